@@ -0,0 +1,75 @@
+"""add product slug column
+
+Revision ID: 009_add_product_slug
+Revises: 008_supplier_management
+Create Date: 2025-02-XX XX:XX:XX.XXXXXX
+
+Persiste el slug de cada producto para que el detalle del catálogo se resuelva
+con una sola consulta indexada en lugar de recorrer todos los productos:
+1. Agregar columna slug a productos
+2. Backfill de slugs únicos a partir del nombre (colisiones -> sufijo con el id)
+3. Índice único filtrado en slug
+"""
+from alembic import op
+import sqlalchemy as sa
+from slugify import slugify
+
+
+# revision identifiers, used by Alembic.
+revision = '009_add_product_slug'
+down_revision = '008_supplier_management'
+branch_labels = None
+depends_on = None
+
+_SLUG_MAX_LENGTH = 120
+
+
+def upgrade() -> None:
+    # 1. Agregar columna slug
+    op.execute("""
+        IF NOT EXISTS (SELECT * FROM sys.columns WHERE object_id = OBJECT_ID('dbo.productos') AND name = 'slug')
+        BEGIN
+            ALTER TABLE dbo.productos ADD slug NVARCHAR(120) NULL;
+        END
+    """)
+
+    # 2. Backfill: el producto más antiguo conserva el slug base, el resto recibe sufijo -id
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.text("SELECT id, nombre FROM dbo.productos WHERE slug IS NULL ORDER BY id")
+    ).all()
+    taken = {
+        row.slug
+        for row in bind.execute(sa.text("SELECT slug FROM dbo.productos WHERE slug IS NOT NULL"))
+    }
+    updates = []
+    for row in rows:
+        base = slugify(row.nombre or "", max_length=_SLUG_MAX_LENGTH) or "producto"
+        slug = base
+        if slug in taken:
+            suffix = f"-{row.id}"
+            slug = f"{base[: _SLUG_MAX_LENGTH - len(suffix)]}{suffix}"
+        taken.add(slug)
+        updates.append({"id": row.id, "slug": slug})
+    if updates:
+        bind.execute(sa.text("UPDATE dbo.productos SET slug = :slug WHERE id = :id"), updates)
+
+    # 3. Índice único filtrado (permite NULL en productos creados fuera de la API)
+    op.execute("""
+        IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'uq_productos_slug' AND object_id = OBJECT_ID('dbo.productos'))
+        BEGIN
+            CREATE UNIQUE INDEX uq_productos_slug
+            ON dbo.productos (slug)
+            WHERE slug IS NOT NULL;
+        END
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS uq_productos_slug ON dbo.productos")
+    op.execute("""
+        IF EXISTS (SELECT * FROM sys.columns WHERE object_id = OBJECT_ID('dbo.productos') AND name = 'slug')
+        BEGIN
+            ALTER TABLE dbo.productos DROP COLUMN slug;
+        END
+    """)
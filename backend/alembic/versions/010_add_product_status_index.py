@@ -0,0 +1,38 @@
+"""add index for product status filter
+
+Revision ID: 010_add_product_status_index
+Revises: 009_add_product_slug
+Create Date: 2025-02-XX XX:XX:XX.XXXXXX
+
+El filtro por estado del listado de productos se resuelve con un EXISTS
+correlacionado productos -> variantes_producto -> valores_atributo_variante.
+Este índice cubre el último salto (variante + atributo, incluyendo el valor)
+para que el filtro, el conteo y la paginación se resuelvan en la misma consulta.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010_add_product_status_index'
+down_revision = '009_add_product_slug'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'idx_valores_atributo_variante_variante_atributo' AND object_id = OBJECT_ID('dbo.valores_atributo_variante'))
+        BEGIN
+            CREATE INDEX idx_valores_atributo_variante_variante_atributo
+            ON dbo.valores_atributo_variante (variante_id, atributo_id)
+            INCLUDE (valor);
+        END
+    """)
+    op.execute("UPDATE STATISTICS dbo.valores_atributo_variante")
+
+
+def downgrade() -> None:
+    op.execute(
+        "DROP INDEX IF EXISTS idx_valores_atributo_variante_variante_atributo ON dbo.valores_atributo_variante"
+    )
@@ -0,0 +1,120 @@
+"""add daily sales rollup tables
+
+Revision ID: 011_add_sales_rollup
+Revises: 010_add_product_status_index
+Create Date: 2025-02-XX XX:XX:XX.XXXXXX
+
+Acumulados diarios que alimentan los reportes para los días completos del
+rango (los bordes parciales siguen leyendo las filas crudas):
+1. resumen_ventas_diario: día x producto x cliente (cantidad, importe, líneas)
+2. resumen_ordenes_diario: día x cliente x estado (cantidad de órdenes)
+3. resumen_caja_diario: día (facturas pagadas, pagos confirmados)
+4. Carga inicial desde las tablas de ventas, facturas y pagos
+
+Las tablas no tienen claves foráneas a propósito: el refresco del día
+recalcula desde las filas crudas y limpia cualquier fila huérfana.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '011_add_sales_rollup'
+down_revision = '010_add_product_status_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 1. Ventas por día, producto y cliente
+    op.execute("""
+        IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'resumen_ventas_diario' AND schema_id = SCHEMA_ID('dbo'))
+        BEGIN
+            CREATE TABLE dbo.resumen_ventas_diario (
+                id INT IDENTITY(1,1) PRIMARY KEY,
+                fecha DATE NOT NULL,
+                producto_id INT NOT NULL,
+                cliente_id INT NOT NULL,
+                cantidad NUMERIC(18, 2) NOT NULL,
+                importe NUMERIC(18, 4) NOT NULL,
+                lineas INT NOT NULL
+            );
+            CREATE UNIQUE INDEX uq_resumen_ventas_diario
+                ON dbo.resumen_ventas_diario (fecha, producto_id, cliente_id);
+            PRINT '  ✓ Creada tabla resumen_ventas_diario';
+        END
+    """)
+
+    # 2. Órdenes por día, cliente y estado
+    op.execute("""
+        IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'resumen_ordenes_diario' AND schema_id = SCHEMA_ID('dbo'))
+        BEGIN
+            CREATE TABLE dbo.resumen_ordenes_diario (
+                id INT IDENTITY(1,1) PRIMARY KEY,
+                fecha DATE NOT NULL,
+                cliente_id INT NOT NULL,
+                estado NVARCHAR(20) NOT NULL,
+                ordenes INT NOT NULL
+            );
+            CREATE UNIQUE INDEX uq_resumen_ordenes_diario
+                ON dbo.resumen_ordenes_diario (fecha, cliente_id, estado);
+            PRINT '  ✓ Creada tabla resumen_ordenes_diario';
+        END
+    """)
+
+    # 3. Caja por día
+    op.execute("""
+        IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'resumen_caja_diario' AND schema_id = SCHEMA_ID('dbo'))
+        BEGIN
+            CREATE TABLE dbo.resumen_caja_diario (
+                fecha DATE NOT NULL PRIMARY KEY,
+                facturas_pagadas NUMERIC(18, 2) NOT NULL,
+                pagos_confirmados NUMERIC(18, 2) NOT NULL
+            );
+            PRINT '  ✓ Creada tabla resumen_caja_diario';
+        END
+    """)
+
+    # 4. Carga inicial (solo si las tablas están vacías)
+    op.execute("""
+        IF NOT EXISTS (SELECT 1 FROM dbo.resumen_ventas_diario)
+        BEGIN
+            INSERT INTO dbo.resumen_ventas_diario (fecha, producto_id, cliente_id, cantidad, importe, lineas)
+            SELECT CAST(o.fecha AS DATE), v.producto_id, o.cliente_id,
+                   SUM(i.cantidad), SUM(i.cantidad * COALESCE(i.precio_unitario, 0)), COUNT(*)
+            FROM dbo.ordenes_venta o
+            JOIN dbo.items_orden_venta i ON i.orden_venta_id = o.id
+            JOIN dbo.variantes_producto v ON v.id = i.variante_producto_id
+            GROUP BY CAST(o.fecha AS DATE), v.producto_id, o.cliente_id;
+        END
+    """)
+    op.execute("""
+        IF NOT EXISTS (SELECT 1 FROM dbo.resumen_ordenes_diario)
+        BEGIN
+            INSERT INTO dbo.resumen_ordenes_diario (fecha, cliente_id, estado, ordenes)
+            SELECT CAST(fecha AS DATE), cliente_id, estado, COUNT(*)
+            FROM dbo.ordenes_venta
+            GROUP BY CAST(fecha AS DATE), cliente_id, estado;
+        END
+    """)
+    op.execute("""
+        IF NOT EXISTS (SELECT 1 FROM dbo.resumen_caja_diario)
+        BEGIN
+            INSERT INTO dbo.resumen_caja_diario (fecha, facturas_pagadas, pagos_confirmados)
+            SELECT fecha, SUM(facturas_pagadas), SUM(pagos_confirmados)
+            FROM (
+                SELECT CAST(fecha_emision AS DATE) AS fecha, total AS facturas_pagadas, 0 AS pagos_confirmados
+                FROM dbo.facturas_venta WHERE estado = 'PAGADO'
+                UNION ALL
+                SELECT CAST(fecha_pago AS DATE), 0, monto
+                FROM dbo.pagos_cliente WHERE estado = 'CONFIRMADO'
+            ) caja
+            GROUP BY fecha;
+        END
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS dbo.resumen_caja_diario")
+    op.execute("DROP TABLE IF EXISTS dbo.resumen_ordenes_diario")
+    op.execute("DROP TABLE IF EXISTS dbo.resumen_ventas_diario")
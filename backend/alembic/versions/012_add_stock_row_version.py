@@ -0,0 +1,80 @@
+"""add row version and unique pair to producto_almacen
+
+Revision ID: 012_add_stock_row_version
+Revises: 011_add_sales_rollup
+Create Date: 2025-02-XX XX:XX:XX.XXXXXX
+
+Control de concurrencia de stock:
+1. Columna version (INT, default 1) para el UPDATE condicionado a versión
+2. Índice único (variante_producto_id, almacen_id): dos altas simultáneas del
+   mismo par fallan en lugar de duplicar el registro, y la operación se reintenta.
+   Si ya existen duplicados no se crea y se informa para depurarlos a mano.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '012_add_stock_row_version'
+down_revision = '011_add_sales_rollup'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 1. Columna de versión
+    op.execute("""
+        IF NOT EXISTS (
+            SELECT * FROM sys.columns
+            WHERE object_id = OBJECT_ID('dbo.producto_almacen') AND name = 'version'
+        )
+        BEGIN
+            ALTER TABLE dbo.producto_almacen
+                ADD version INT NOT NULL CONSTRAINT df_producto_almacen_version DEFAULT 1;
+            PRINT '  ✓ Agregada columna producto_almacen.version';
+        END
+    """)
+
+    # 2. Unicidad por variante y almacén
+    op.execute("""
+        IF NOT EXISTS (
+            SELECT * FROM sys.indexes
+            WHERE name = 'uq_producto_almacen_variante_almacen'
+              AND object_id = OBJECT_ID('dbo.producto_almacen')
+        )
+        BEGIN
+            IF EXISTS (
+                SELECT 1 FROM dbo.producto_almacen
+                GROUP BY variante_producto_id, almacen_id
+                HAVING COUNT(*) > 1
+            )
+                PRINT '  ⚠ producto_almacen tiene pares (variante, almacén) duplicados; índice único no creado';
+            ELSE
+            BEGIN
+                CREATE UNIQUE INDEX uq_producto_almacen_variante_almacen
+                    ON dbo.producto_almacen (variante_producto_id, almacen_id);
+                PRINT '  ✓ Creado índice único uq_producto_almacen_variante_almacen';
+            END
+        END
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        IF EXISTS (
+            SELECT * FROM sys.indexes
+            WHERE name = 'uq_producto_almacen_variante_almacen'
+              AND object_id = OBJECT_ID('dbo.producto_almacen')
+        )
+            DROP INDEX uq_producto_almacen_variante_almacen ON dbo.producto_almacen;
+    """)
+    op.execute("""
+        IF EXISTS (
+            SELECT * FROM sys.columns
+            WHERE object_id = OBJECT_ID('dbo.producto_almacen') AND name = 'version'
+        )
+        BEGIN
+            ALTER TABLE dbo.producto_almacen DROP CONSTRAINT df_producto_almacen_version;
+            ALTER TABLE dbo.producto_almacen DROP COLUMN version;
+        END
+    """)
@@ -0,0 +1,55 @@
+"""add stock_reservado counter for active reservations
+
+Revision ID: 013_add_reservation_holds
+Revises: 012_add_stock_row_version
+Create Date: 2025-02-XX XX:XX:XX.XXXXXX
+
+Contador desnormalizado de cantidad reservada por variante:
+1. Tabla stock_reservado (una fila por variante)
+2. Carga inicial desde items_reserva de reservas PENDIENTE/CONFIRMADA
+
+La disponibilidad pasa a leer una fila por variante en lugar de sumar todo
+el historial de reservas. ReservationHoldService.reconcile corrige desvíos.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '013_add_reservation_holds'
+down_revision = '012_add_stock_row_version'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 1. Tabla del contador
+    op.execute("""
+        IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'stock_reservado' AND schema_id = SCHEMA_ID('dbo'))
+        BEGIN
+            CREATE TABLE dbo.stock_reservado (
+                variante_producto_id INT NOT NULL PRIMARY KEY
+                    CONSTRAINT fk_stock_reservado_variante REFERENCES dbo.variantes_producto (id),
+                cantidad_reservada NUMERIC(12, 2) NOT NULL CONSTRAINT df_stock_reservado_cantidad DEFAULT 0,
+                fecha_actualizacion DATETIME NOT NULL CONSTRAINT df_stock_reservado_fecha DEFAULT GETDATE()
+            );
+            PRINT '  ✓ Creada tabla stock_reservado';
+        END
+    """)
+
+    # 2. Carga inicial (solo si la tabla está vacía)
+    op.execute("""
+        IF NOT EXISTS (SELECT 1 FROM dbo.stock_reservado)
+        BEGIN
+            INSERT INTO dbo.stock_reservado (variante_producto_id, cantidad_reservada, fecha_actualizacion)
+            SELECT i.variante_producto_id, SUM(i.cantidad), GETDATE()
+            FROM dbo.items_reserva i
+            JOIN dbo.reservas r ON r.id = i.reserva_id
+            WHERE r.estado IN ('PENDIENTE', 'CONFIRMADA')
+            GROUP BY i.variante_producto_id;
+        END
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS dbo.stock_reservado")
@@ -0,0 +1,63 @@
+"""add security stamp to usuarios for principal cache revocation
+
+Revision ID: 014_add_user_security_stamp
+Revises: 013_add_reservation_holds
+Create Date: 2025-02-XX XX:XX:XX.XXXXXX
+
+Columna version_seguridad en usuarios: cada cambio de estado, roles o datos
+de acceso la renueva con MAX + 1. Cada worker compara el MAX (índice) con el
+último visto para vaciar su caché de principals sin consultar por petición.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '014_add_user_security_stamp'
+down_revision = '013_add_reservation_holds'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        IF NOT EXISTS (
+            SELECT * FROM sys.columns
+            WHERE object_id = OBJECT_ID('dbo.usuarios') AND name = 'version_seguridad'
+        )
+        BEGIN
+            ALTER TABLE dbo.usuarios
+                ADD version_seguridad INT NOT NULL CONSTRAINT df_usuarios_version_seguridad DEFAULT 0;
+            PRINT '  ✓ Agregada columna usuarios.version_seguridad';
+        END
+    """)
+    op.execute("""
+        IF NOT EXISTS (
+            SELECT * FROM sys.indexes
+            WHERE name = 'ix_usuarios_version_seguridad' AND object_id = OBJECT_ID('dbo.usuarios')
+        )
+        BEGIN
+            CREATE INDEX ix_usuarios_version_seguridad ON dbo.usuarios (version_seguridad);
+            PRINT '  ✓ Creado índice ix_usuarios_version_seguridad';
+        END
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        IF EXISTS (
+            SELECT * FROM sys.indexes
+            WHERE name = 'ix_usuarios_version_seguridad' AND object_id = OBJECT_ID('dbo.usuarios')
+        )
+            DROP INDEX ix_usuarios_version_seguridad ON dbo.usuarios;
+    """)
+    op.execute("""
+        IF EXISTS (
+            SELECT * FROM sys.columns
+            WHERE object_id = OBJECT_ID('dbo.usuarios') AND name = 'version_seguridad'
+        )
+        BEGIN
+            ALTER TABLE dbo.usuarios DROP CONSTRAINT df_usuarios_version_seguridad;
+            ALTER TABLE dbo.usuarios DROP COLUMN version_seguridad;
+        END
+    """)
@@ -0,0 +1,41 @@
+"""add expires_at index to idempotency_keys for batched purge
+
+Revision ID: 015_add_idempotency_expiry_index
+Revises: 014_add_user_security_stamp
+Create Date: 2025-02-XX XX:XX:XX.XXXXXX
+
+La purga periódica borra las claves expiradas por lotes (`expires_at < ahora`).
+Sin índice cada lote recorre la tabla completa.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '015_add_idempotency_expiry_index'
+down_revision = '014_add_user_security_stamp'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        IF NOT EXISTS (
+            SELECT * FROM sys.indexes
+            WHERE name = 'ix_idempotency_keys_expires_at' AND object_id = OBJECT_ID('dbo.idempotency_keys')
+        )
+        BEGIN
+            CREATE INDEX ix_idempotency_keys_expires_at ON dbo.idempotency_keys (expires_at);
+            PRINT '  ✓ Creado índice ix_idempotency_keys_expires_at';
+        END
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        IF EXISTS (
+            SELECT * FROM sys.indexes
+            WHERE name = 'ix_idempotency_keys_expires_at' AND object_id = OBJECT_ID('dbo.idempotency_keys')
+        )
+            DROP INDEX ix_idempotency_keys_expires_at ON dbo.idempotency_keys;
+    """)
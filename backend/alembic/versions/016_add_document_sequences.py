@@ -0,0 +1,124 @@
+"""add document sequences table and document numbers
+
+Revision ID: 016_add_document_sequences
+Revises: 015_add_idempotency_expiry_index
+Create Date: 2025-02-XX XX:XX:XX.XXXXXX
+
+Numeración de documentos con contador por tipo:
+1. Tabla secuencias_documento (una fila por tipo de documento)
+2. Columna numero_documento en ordenes_compra, transferencias_stock y
+   ajustes_stock, rellenada desde el id (OC-/TRF-/AJU- + al menos 6 dígitos)
+3. Índices únicos filtrados sobre los números
+4. Carga de los contadores: FACTURA desde el mayor FAC-XXXXXX emitido, el
+   resto desde el mayor id
+
+DocumentSequenceService incrementa el contador con UPDATE ... OUTPUT en lugar
+de leer el último documento.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '016_add_document_sequences'
+down_revision = '015_add_idempotency_expiry_index'
+branch_labels = None
+depends_on = None
+
+
+# tabla, prefijo, código de secuencia
+_DOCUMENTS = (
+    ("ordenes_compra", "OC-", "ORDEN_COMPRA"),
+    ("transferencias_stock", "TRF-", "TRANSFERENCIA"),
+    ("ajustes_stock", "AJU-", "AJUSTE"),
+)
+
+
+def upgrade() -> None:
+    # 1. Tabla de contadores
+    op.execute("""
+        IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'secuencias_documento' AND schema_id = SCHEMA_ID('dbo'))
+        BEGIN
+            CREATE TABLE dbo.secuencias_documento (
+                codigo VARCHAR(30) NOT NULL PRIMARY KEY,
+                ultimo_valor BIGINT NOT NULL CONSTRAINT df_secuencias_documento_valor DEFAULT 0,
+                fecha_actualizacion DATETIME NOT NULL CONSTRAINT df_secuencias_documento_fecha DEFAULT GETDATE()
+            );
+            PRINT '  ✓ Creada tabla secuencias_documento';
+        END
+    """)
+
+    # 2 y 3. Número de documento (cada paso en su propio lote: la columna
+    # tiene que existir antes de compilar el UPDATE que la rellena)
+    for table, prefix, _code in _DOCUMENTS:
+        op.execute(f"""
+            IF NOT EXISTS (
+                SELECT * FROM sys.columns
+                WHERE object_id = OBJECT_ID('dbo.{table}') AND name = 'numero_documento'
+            )
+            BEGIN
+                ALTER TABLE dbo.{table} ADD numero_documento VARCHAR(30) NULL;
+                PRINT '  ✓ Agregada columna {table}.numero_documento';
+            END
+        """)
+        # Relleno a 6 dígitos sin truncar (como DocumentSequence.format)
+        op.execute(f"""
+            UPDATE dbo.{table}
+            SET numero_documento = '{prefix}' + CASE
+                WHEN LEN(CAST(id AS VARCHAR(20))) >= 6 THEN CAST(id AS VARCHAR(20))
+                ELSE RIGHT('000000' + CAST(id AS VARCHAR(20)), 6)
+            END
+            WHERE numero_documento IS NULL;
+        """)
+        op.execute(f"""
+            IF NOT EXISTS (
+                SELECT * FROM sys.indexes
+                WHERE name = 'uq_{table}_numero_documento' AND object_id = OBJECT_ID('dbo.{table}')
+            )
+            BEGIN
+                CREATE UNIQUE INDEX uq_{table}_numero_documento
+                    ON dbo.{table} (numero_documento)
+                    WHERE numero_documento IS NOT NULL;
+                PRINT '  ✓ Creado índice uq_{table}_numero_documento';
+            END
+        """)
+
+    # 4. Contadores iniciales (solo si no existen)
+    op.execute("""
+        IF NOT EXISTS (SELECT 1 FROM dbo.secuencias_documento WHERE codigo = 'FACTURA')
+        BEGIN
+            INSERT INTO dbo.secuencias_documento (codigo, ultimo_valor, fecha_actualizacion)
+            SELECT 'FACTURA', ISNULL(MAX(TRY_CAST(SUBSTRING(numero_factura, 5, 20) AS BIGINT)), 0), GETDATE()
+            FROM dbo.facturas_venta
+            WHERE numero_factura LIKE 'FAC-%';
+            PRINT '  ✓ Inicializada secuencia FACTURA';
+        END
+    """)
+    for table, _prefix, code in _DOCUMENTS:
+        op.execute(f"""
+            IF NOT EXISTS (SELECT 1 FROM dbo.secuencias_documento WHERE codigo = '{code}')
+            BEGIN
+                INSERT INTO dbo.secuencias_documento (codigo, ultimo_valor, fecha_actualizacion)
+                SELECT '{code}', ISNULL(MAX(id), 0), GETDATE() FROM dbo.{table};
+                PRINT '  ✓ Inicializada secuencia {code}';
+            END
+        """)
+
+
+def downgrade() -> None:
+    for table, _prefix, _code in _DOCUMENTS:
+        op.execute(f"""
+            IF EXISTS (
+                SELECT * FROM sys.indexes
+                WHERE name = 'uq_{table}_numero_documento' AND object_id = OBJECT_ID('dbo.{table}')
+            )
+                DROP INDEX uq_{table}_numero_documento ON dbo.{table};
+        """)
+        op.execute(f"""
+            IF EXISTS (
+                SELECT * FROM sys.columns
+                WHERE object_id = OBJECT_ID('dbo.{table}') AND name = 'numero_documento'
+            )
+                ALTER TABLE dbo.{table} DROP COLUMN numero_documento;
+        """)
+    op.execute("DROP TABLE IF EXISTS dbo.secuencias_documento")
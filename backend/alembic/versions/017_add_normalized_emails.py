@@ -0,0 +1,189 @@
+"""add normalized email columns to usuarios and clientes
+
+Revision ID: 017_add_normalized_emails
+Revises: 016_add_document_sequences
+Create Date: 2025-02-XX XX:XX:XX.XXXXXX
+
+Búsquedas por correo sin funciones sobre la columna:
+1. Correos vacíos de clientes → NULL
+2. Columna calculada persistida correo_normalizado = LOWER(LTRIM(RTRIM(correo)))
+   en usuarios y clientes
+3. Usuarios: si dos cuentas comparten correo normalizado la migración se
+   detiene (hay que resolverlo a mano, no se fusionan cuentas)
+4. Clientes duplicados por correo normalizado: se conserva el vinculado a un
+   usuario (o el de menor id), se le reasignan todas las filas que referencian
+   a los duplicados (cualquier FK hacia clientes) y se borran los duplicados.
+   Los grupos con clientes vinculados a usuarios distintos no se fusionan y la
+   migración se detiene antes de crear los índices (hay que resolverlo a mano)
+5. Índices únicos: usuarios(correo_normalizado) y clientes(correo_normalizado)
+   filtrado a los clientes con correo
+
+Si se fusionaron clientes, reconstruir el acumulado de reportes
+(scripts/rebuild_sales_rollup.py): sus filas guardan el cliente_id antiguo.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '017_add_normalized_emails'
+down_revision = '016_add_document_sequences'
+branch_labels = None
+depends_on = None
+
+# Clientes que se fusionan en otro: por cada correo normalizado se conserva el
+# vinculado a un usuario (o el de menor id). Si en el grupo hay clientes
+# vinculados a usuarios distintos no se fusiona ninguno.
+CLIENTES_A_FUSIONAR_SQL = """
+    SELECT id AS duplicado_id, conservar_id
+    FROM (
+        SELECT
+            id,
+            FIRST_VALUE(id) OVER (
+                PARTITION BY correo_normalizado
+                ORDER BY CASE WHEN usuario_id IS NULL THEN 1 ELSE 0 END, id
+            ) AS conservar_id,
+            MIN(usuario_id) OVER (PARTITION BY correo_normalizado) AS primer_usuario_id,
+            MAX(usuario_id) OVER (PARTITION BY correo_normalizado) AS ultimo_usuario_id
+        FROM dbo.clientes
+        WHERE correo_normalizado IS NOT NULL
+    ) ordenados
+    WHERE id <> conservar_id
+      AND (primer_usuario_id IS NULL OR primer_usuario_id = ultimo_usuario_id)
+"""
+
+# Correos normalizados compartidos por clientes de usuarios distintos
+CLIENTES_EN_CONFLICTO_SQL = """
+    SELECT correo_normalizado
+    FROM dbo.clientes
+    WHERE correo_normalizado IS NOT NULL
+    GROUP BY correo_normalizado
+    HAVING MIN(usuario_id) <> MAX(usuario_id)
+"""
+
+
+def upgrade() -> None:
+    # 1. Correos vacíos (chocarían en el índice único)
+    op.execute("""
+        UPDATE dbo.clientes SET correo = NULL
+        WHERE correo IS NOT NULL AND LTRIM(RTRIM(correo)) = '';
+    """)
+
+    # 2. Columnas calculadas (lote propio: deben existir antes de compilar lo siguiente)
+    for table, nullability in (("usuarios", "NOT NULL"), ("clientes", "NULL")):
+        op.execute(f"""
+            IF NOT EXISTS (
+                SELECT * FROM sys.columns
+                WHERE object_id = OBJECT_ID('dbo.{table}') AND name = 'correo_normalizado'
+            )
+            BEGIN
+                ALTER TABLE dbo.{table} ADD correo_normalizado AS LOWER(LTRIM(RTRIM(correo))) PERSISTED {nullability};
+                PRINT '  ✓ Agregada columna {table}.correo_normalizado';
+            END
+        """)
+
+    # 3. Usuarios con el mismo correo normalizado: no se fusionan automáticamente
+    op.execute("""
+        IF EXISTS (
+            SELECT correo_normalizado FROM dbo.usuarios
+            GROUP BY correo_normalizado HAVING COUNT(*) > 1
+        )
+            THROW 50017, 'Hay usuarios con el mismo correo normalizado; unifícalos antes de migrar.', 1;
+    """)
+
+    # 4. Fusión de clientes duplicados
+    op.execute(f"""
+        SET XACT_ABORT ON;
+        IF OBJECT_ID('tempdb..#clientes_duplicados') IS NOT NULL DROP TABLE #clientes_duplicados;
+
+        SELECT duplicado_id, conservar_id
+        INTO #clientes_duplicados
+        FROM ({CLIENTES_A_FUSIONAR_SQL}) fusion;
+
+        IF EXISTS (SELECT 1 FROM #clientes_duplicados)
+        BEGIN
+            BEGIN TRANSACTION;
+
+            -- Reasignar todas las referencias (FK hacia dbo.clientes) al cliente conservado
+            DECLARE @sql NVARCHAR(MAX) = N'';
+            SELECT @sql += N'UPDATE t SET ' + QUOTENAME(c.name) + N' = d.conservar_id FROM '
+                + QUOTENAME(SCHEMA_NAME(o.schema_id)) + N'.' + QUOTENAME(o.name) + N' t '
+                + N'JOIN #clientes_duplicados d ON t.' + QUOTENAME(c.name) + N' = d.duplicado_id; '
+            FROM sys.foreign_key_columns fkc
+            JOIN sys.objects o ON o.object_id = fkc.parent_object_id
+            JOIN sys.columns c ON c.object_id = fkc.parent_object_id AND c.column_id = fkc.parent_column_id
+            WHERE fkc.referenced_object_id = OBJECT_ID('dbo.clientes');
+            EXEC sp_executesql @sql;
+
+            -- Completar datos vacíos del conservado con los de sus duplicados
+            UPDATE k SET
+                nit_ci = COALESCE(k.nit_ci, x.nit_ci),
+                telefono = COALESCE(k.telefono, x.telefono),
+                direccion = COALESCE(k.direccion, x.direccion)
+            FROM dbo.clientes k
+            JOIN (
+                SELECT d.conservar_id, MAX(c.nit_ci) AS nit_ci, MAX(c.telefono) AS telefono, MAX(c.direccion) AS direccion
+                FROM #clientes_duplicados d
+                JOIN dbo.clientes c ON c.id = d.duplicado_id
+                GROUP BY d.conservar_id
+            ) x ON x.conservar_id = k.id;
+
+            DELETE c FROM dbo.clientes c JOIN #clientes_duplicados d ON d.duplicado_id = c.id;
+
+            COMMIT TRANSACTION;
+            DECLARE @fusionados INT = (SELECT COUNT(*) FROM #clientes_duplicados);
+            PRINT '  ✓ Fusionados ' + CAST(@fusionados AS VARCHAR(12)) + ' clientes duplicados (reconstruir acumulado de reportes)';
+        END
+
+        DROP TABLE #clientes_duplicados;
+    """)
+
+    # Clientes de usuarios distintos con el mismo correo: no se fusionan automáticamente
+    op.execute(f"""
+        IF EXISTS ({CLIENTES_EN_CONFLICTO_SQL})
+            THROW 50017, 'Hay clientes de usuarios distintos con el mismo correo normalizado; unifícalos antes de migrar.', 1;
+    """)
+
+    # 5. Índices únicos
+    op.execute("""
+        IF NOT EXISTS (
+            SELECT * FROM sys.indexes
+            WHERE name = 'uq_usuarios_correo_normalizado' AND object_id = OBJECT_ID('dbo.usuarios')
+        )
+        BEGIN
+            CREATE UNIQUE INDEX uq_usuarios_correo_normalizado ON dbo.usuarios (correo_normalizado);
+            PRINT '  ✓ Creado índice uq_usuarios_correo_normalizado';
+        END
+    """)
+    op.execute("""
+        IF NOT EXISTS (
+            SELECT * FROM sys.indexes
+            WHERE name = 'uq_clientes_correo_normalizado' AND object_id = OBJECT_ID('dbo.clientes')
+        )
+        BEGIN
+            CREATE UNIQUE INDEX uq_clientes_correo_normalizado
+                ON dbo.clientes (correo_normalizado)
+                INCLUDE (usuario_id)
+                WHERE correo IS NOT NULL;
+            PRINT '  ✓ Creado índice uq_clientes_correo_normalizado';
+        END
+    """)
+
+
+def downgrade() -> None:
+    # La fusión de clientes no se deshace
+    for table in ("clientes", "usuarios"):
+        op.execute(f"""
+            IF EXISTS (
+                SELECT * FROM sys.indexes
+                WHERE name = 'uq_{table}_correo_normalizado' AND object_id = OBJECT_ID('dbo.{table}')
+            )
+                DROP INDEX uq_{table}_correo_normalizado ON dbo.{table};
+        """)
+        op.execute(f"""
+            IF EXISTS (
+                SELECT * FROM sys.columns
+                WHERE object_id = OBJECT_ID('dbo.{table}') AND name = 'correo_normalizado'
+            )
+                ALTER TABLE dbo.{table} DROP COLUMN correo_normalizado;
+        """)
@@ -0,0 +1,81 @@
+"""add (usuario_id|cliente_id, fecha, id) indexes to ordenes_venta for "my orders"
+
+Revision ID: 018_add_my_orders_indexes
+Revises: 017_add_normalized_emails
+Create Date: 2025-02-XX XX:XX:XX.XXXXXX
+
+"Mis pedidos" une las órdenes creadas por el usuario y las de su cliente
+(UNION de dos ramas) ordenadas por fecha e id, con paginación por cursor:
+1. idx_ordenes_venta_usuario_fecha_id (usuario_id, fecha DESC, id DESC)
+2. idx_ordenes_venta_cliente_fecha_id (cliente_id, fecha DESC, id DESC), que
+   reemplaza a idx_ordenes_venta_cliente_fecha (cliente_id, fecha DESC) de la
+   migración 003: es su prefijo, así que no hace falta mantener ambos
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '018_add_my_orders_indexes'
+down_revision = '017_add_normalized_emails'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        IF NOT EXISTS (
+            SELECT * FROM sys.indexes
+            WHERE name = 'idx_ordenes_venta_usuario_fecha_id' AND object_id = OBJECT_ID('dbo.ordenes_venta')
+        )
+        BEGIN
+            CREATE INDEX idx_ordenes_venta_usuario_fecha_id
+            ON dbo.ordenes_venta (usuario_id, fecha DESC, id DESC);
+            PRINT '  ✓ Creado índice idx_ordenes_venta_usuario_fecha_id';
+        END
+    """)
+
+    op.execute("""
+        IF NOT EXISTS (
+            SELECT * FROM sys.indexes
+            WHERE name = 'idx_ordenes_venta_cliente_fecha_id' AND object_id = OBJECT_ID('dbo.ordenes_venta')
+        )
+        BEGIN
+            CREATE INDEX idx_ordenes_venta_cliente_fecha_id
+            ON dbo.ordenes_venta (cliente_id, fecha DESC, id DESC);
+            PRINT '  ✓ Creado índice idx_ordenes_venta_cliente_fecha_id';
+        END
+
+        IF EXISTS (
+            SELECT * FROM sys.indexes
+            WHERE name = 'idx_ordenes_venta_cliente_fecha' AND object_id = OBJECT_ID('dbo.ordenes_venta')
+        )
+        BEGIN
+            DROP INDEX idx_ordenes_venta_cliente_fecha ON dbo.ordenes_venta;
+            PRINT '  ✓ Eliminado índice idx_ordenes_venta_cliente_fecha (cubierto por idx_ordenes_venta_cliente_fecha_id)';
+        END
+    """)
+
+    op.execute("UPDATE STATISTICS dbo.ordenes_venta")
+
+
+def downgrade() -> None:
+    op.execute("""
+        IF NOT EXISTS (
+            SELECT * FROM sys.indexes
+            WHERE name = 'idx_ordenes_venta_cliente_fecha' AND object_id = OBJECT_ID('dbo.ordenes_venta')
+        )
+            CREATE INDEX idx_ordenes_venta_cliente_fecha ON dbo.ordenes_venta (cliente_id, fecha DESC);
+
+        IF EXISTS (
+            SELECT * FROM sys.indexes
+            WHERE name = 'idx_ordenes_venta_cliente_fecha_id' AND object_id = OBJECT_ID('dbo.ordenes_venta')
+        )
+            DROP INDEX idx_ordenes_venta_cliente_fecha_id ON dbo.ordenes_venta;
+
+        IF EXISTS (
+            SELECT * FROM sys.indexes
+            WHERE name = 'idx_ordenes_venta_usuario_fecha_id' AND object_id = OBJECT_ID('dbo.ordenes_venta')
+        )
+            DROP INDEX idx_ordenes_venta_usuario_fecha_id ON dbo.ordenes_venta;
+    """)
@@ -0,0 +1,44 @@
+"""add (cliente_id, fecha_reserva, id) index to reservas for the customer history
+
+Revision ID: 019_add_reservas_cliente_index
+Revises: 018_add_my_orders_indexes
+Create Date: 2025-02-XX XX:XX:XX.XXXXXX
+
+El resumen del cliente cuenta sus reservas (totales y activas) y pagina las
+más recientes. facturas_venta y pagos_cliente ya tienen índice por cliente_id;
+reservas solo tenía (estado, fecha_reserva) y cada consulta recorría la tabla.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '019_add_reservas_cliente_index'
+down_revision = '018_add_my_orders_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        IF NOT EXISTS (
+            SELECT * FROM sys.indexes
+            WHERE name = 'idx_reservas_cliente_fecha' AND object_id = OBJECT_ID('dbo.reservas')
+        )
+        BEGIN
+            CREATE INDEX idx_reservas_cliente_fecha
+            ON dbo.reservas (cliente_id, fecha_reserva DESC, id DESC)
+            INCLUDE (estado);
+            PRINT '  ✓ Creado índice idx_reservas_cliente_fecha';
+        END
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        IF EXISTS (
+            SELECT * FROM sys.indexes
+            WHERE name = 'idx_reservas_cliente_fecha' AND object_id = OBJECT_ID('dbo.reservas')
+        )
+            DROP INDEX idx_reservas_cliente_fecha ON dbo.reservas;
+    """)
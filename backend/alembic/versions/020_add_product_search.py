@@ -0,0 +1,129 @@
+"""add busqueda_productos documents and their full-text index
+
+Revision ID: 020_add_product_search
+Revises: 019_add_reservas_cliente_index
+Create Date: 2025-02-XX XX:XX:XX.XXXXXX
+
+La búsqueda de productos (listado e inventario) deja el ILIKE '%texto%' sobre
+productos y variantes:
+1. busqueda_productos: un documento por variante con el texto plegado
+   (nombre y nombre + descripción), sin claves foráneas
+2. Carga inicial con el plegado de la aplicación (app.core.text_folding:
+   sin acentos, ñ -> n, sin signos), la misma que escribe
+   scripts/rebuild_product_search.py; así el motor LIKE encuentra "tuberia"
+   aunque la collation distinga acentos
+3. Catálogo full-text insensible a acentos e índice full-text sobre
+   (nombre, texto) con seguimiento automático de cambios. Si el servidor no
+   tiene Full-Text Search instalado se omite y la aplicación usa LIKE.
+
+En PostgreSQL los índices GIN (tsvector y pg_trgm) se crean con
+`python scripts/rebuild_product_search.py --setup`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.text_folding import folded_text
+
+
+# revision identifiers, used by Alembic.
+revision = '020_add_product_search'
+down_revision = '019_add_reservas_cliente_index'
+branch_labels = None
+depends_on = None
+
+_BATCH = 1000
+
+
+def _backfill_documents(bind) -> int:
+    """Carga los documentos plegados si la tabla está vacía. Devuelve cuántos insertó."""
+    if bind.execute(sa.text("SELECT COUNT(*) FROM dbo.busqueda_productos")).scalar():
+        return 0
+    rows = bind.execute(sa.text("""
+        SELECT p.id, p.nombre, p.descripcion, v.id, v.nombre
+        FROM dbo.productos p
+        LEFT JOIN dbo.variantes_producto v ON v.producto_id = p.id
+        ORDER BY p.id, v.id
+    """)).all()
+    documents = [
+        {
+            "producto_id": producto_id,
+            "variante_id": variante_id,
+            "nombre": folded_text(producto_nombre, variante_nombre)[:250],
+            "texto": folded_text(producto_nombre, variante_nombre, descripcion)[:600],
+        }
+        for producto_id, producto_nombre, descripcion, variante_id, variante_nombre in rows
+    ]
+    insert = sa.text("""
+        INSERT INTO dbo.busqueda_productos (producto_id, variante_id, nombre, texto, fecha_actualizacion)
+        VALUES (:producto_id, :variante_id, :nombre, :texto, CURRENT_TIMESTAMP)
+    """)
+    for offset in range(0, len(documents), _BATCH):
+        bind.execute(insert, documents[offset:offset + _BATCH])
+    return len(documents)
+
+
+def upgrade() -> None:
+    # 1. Documentos de búsqueda
+    op.execute("""
+        IF OBJECT_ID('dbo.busqueda_productos', 'U') IS NULL
+        BEGIN
+            CREATE TABLE dbo.busqueda_productos (
+                id INT IDENTITY(1,1) NOT NULL,
+                producto_id INT NOT NULL,
+                variante_id INT NULL,
+                nombre VARCHAR(250) NOT NULL,
+                texto VARCHAR(600) NOT NULL,
+                fecha_actualizacion DATETIME NOT NULL CONSTRAINT df_busqueda_productos_fecha DEFAULT GETDATE(),
+                CONSTRAINT pk_busqueda_productos PRIMARY KEY (id)
+            );
+            CREATE UNIQUE INDEX uq_busqueda_productos_variante
+                ON dbo.busqueda_productos (producto_id, variante_id);
+            PRINT '  ✓ Creada tabla busqueda_productos';
+        END
+    """)
+
+    # 2. Carga inicial, plegada en Python igual que la aplicación (LOWER no quita acentos)
+    loaded = _backfill_documents(op.get_bind())
+    if loaded:
+        print(f"  ✓ Cargados {loaded} documentos de búsqueda")
+
+    # 3. Full-text (no admite transacciones de usuario)
+    with op.get_context().autocommit_block():
+        op.execute("""
+            IF FULLTEXTSERVICEPROPERTY('IsFullTextInstalled') = 1
+               AND NOT EXISTS (SELECT * FROM sys.fulltext_catalogs WHERE name = 'ftc_busqueda')
+            BEGIN
+                CREATE FULLTEXT CATALOG ftc_busqueda WITH ACCENT_SENSITIVITY = OFF;
+                PRINT '  ✓ Creado catálogo full-text ftc_busqueda';
+            END
+        """)
+        op.execute("""
+            IF FULLTEXTSERVICEPROPERTY('IsFullTextInstalled') = 1
+               AND NOT EXISTS (
+                   SELECT * FROM sys.fulltext_indexes WHERE object_id = OBJECT_ID('dbo.busqueda_productos')
+               )
+            BEGIN
+                CREATE FULLTEXT INDEX ON dbo.busqueda_productos (nombre LANGUAGE 3082, texto LANGUAGE 3082)
+                    KEY INDEX pk_busqueda_productos ON ftc_busqueda
+                    WITH CHANGE_TRACKING AUTO, STOPLIST = OFF;
+                PRINT '  ✓ Creado índice full-text sobre busqueda_productos';
+            END
+            ELSE IF FULLTEXTSERVICEPROPERTY('IsFullTextInstalled') <> 1
+                PRINT '  ! Full-Text Search no está instalado: la búsqueda de productos usará LIKE';
+        """)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("""
+            IF EXISTS (SELECT * FROM sys.fulltext_indexes WHERE object_id = OBJECT_ID('dbo.busqueda_productos'))
+                DROP FULLTEXT INDEX ON dbo.busqueda_productos;
+        """)
+        op.execute("""
+            IF EXISTS (SELECT * FROM sys.fulltext_catalogs WHERE name = 'ftc_busqueda')
+                DROP FULLTEXT CATALOG ftc_busqueda;
+        """)
+    op.execute("""
+        IF OBJECT_ID('dbo.busqueda_productos', 'U') IS NOT NULL
+            DROP TABLE dbo.busqueda_productos;
+    """)
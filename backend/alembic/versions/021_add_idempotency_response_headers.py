@@ -0,0 +1,42 @@
+"""add response_headers to idempotency_keys
+
+Revision ID: 021_add_idempotency_response_headers
+Revises: 020_add_product_search
+Create Date: 2025-02-XX XX:XX:XX.XXXXXX
+
+Un reintento con la misma Idempotency-Key repite también las cabeceras de la
+respuesta original (Location, etc.), guardadas como JSON. Las filas
+anteriores quedan en NULL y se repiten con Content-Type JSON.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '021_add_idempotency_response_headers'
+down_revision = '020_add_product_search'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        IF NOT EXISTS (
+            SELECT * FROM sys.columns
+            WHERE object_id = OBJECT_ID('dbo.idempotency_keys') AND name = 'response_headers'
+        )
+        BEGIN
+            ALTER TABLE dbo.idempotency_keys ADD response_headers NVARCHAR(MAX) NULL;
+            PRINT '  ✓ Agregada columna idempotency_keys.response_headers';
+        END
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        IF EXISTS (
+            SELECT * FROM sys.columns
+            WHERE object_id = OBJECT_ID('dbo.idempotency_keys') AND name = 'response_headers'
+        )
+            ALTER TABLE dbo.idempotency_keys DROP COLUMN response_headers;
+    """)
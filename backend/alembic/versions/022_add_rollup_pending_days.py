@@ -0,0 +1,36 @@
+"""add resumen_dias_pendientes for failed daily rollup refreshes
+
+Revision ID: 022_add_rollup_pending_days
+Revises: 021_add_idempotency_response_headers
+Create Date: 2025-02-XX XX:XX:XX.XXXXXX
+
+Si el refresco del acumulado diario falla después de confirmar una venta o
+un pago, el día se anota aquí y el conciliador de SalesRollupService lo
+recalcula en lugar de dejarlo desviado hasta una reconstrucción manual.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '022_add_rollup_pending_days'
+down_revision = '021_add_idempotency_response_headers'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'resumen_dias_pendientes' AND schema_id = SCHEMA_ID('dbo'))
+        BEGIN
+            CREATE TABLE dbo.resumen_dias_pendientes (
+                fecha DATE NOT NULL PRIMARY KEY,
+                fecha_registro DATETIME NOT NULL
+            );
+            PRINT '  ✓ Creada tabla resumen_dias_pendientes';
+        END
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS dbo.resumen_dias_pendientes")
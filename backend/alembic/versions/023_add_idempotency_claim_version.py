@@ -0,0 +1,47 @@
+"""add version to idempotency_keys
+
+Revision ID: 023_add_idempotency_claim_version
+Revises: 022_add_rollup_pending_days
+Create Date: 2025-02-XX XX:XX:XX.XXXXXX
+
+Cada reserva de una clave expirada o abandonada incrementa `version`; el
+UPDATE de la toma se condiciona a la versión leída. Antes se comparaba
+created_at, que en DATETIME se redondea a 1/300 s y no coincide con el
+parámetro datetime2 que envía el driver.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '023_add_idempotency_claim_version'
+down_revision = '022_add_rollup_pending_days'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        IF NOT EXISTS (
+            SELECT * FROM sys.columns
+            WHERE object_id = OBJECT_ID('dbo.idempotency_keys') AND name = 'version'
+        )
+        BEGIN
+            ALTER TABLE dbo.idempotency_keys
+                ADD version INT NOT NULL CONSTRAINT df_idempotency_keys_version DEFAULT 1;
+            PRINT '  ✓ Agregada columna idempotency_keys.version';
+        END
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        IF EXISTS (
+            SELECT * FROM sys.columns
+            WHERE object_id = OBJECT_ID('dbo.idempotency_keys') AND name = 'version'
+        )
+        BEGIN
+            ALTER TABLE dbo.idempotency_keys DROP CONSTRAINT df_idempotency_keys_version;
+            ALTER TABLE dbo.idempotency_keys DROP COLUMN version;
+        END
+    """)
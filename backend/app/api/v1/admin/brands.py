@@ -1,11 +1,13 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
+from app.core.cache import CATALOG_PREFIX, cached_json_response, invalidate_catalog
 from app.db.session import get_db
 from app.core.dependencies import get_current_user
 from app.models.usuario import Usuario
 from app.models.marca import Marca
-from pydantic import BaseModel
+from app.services.typeahead_service import TypeaheadService
+from pydantic import BaseModel, TypeAdapter
 
 router = APIRouter()
 
@@ -29,8 +31,12 @@ class BrandResponse(BaseModel):
         from_attributes = True
 
 
+_brands_adapter = TypeAdapter(List[BrandResponse])
+
+
 @router.get("", response_model=List[BrandResponse])
 def list_brands(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
@@ -39,8 +45,13 @@ def list_brands(
     role_names = [rol.nombre for rol in current_user.roles]
     if "ADMIN" not in role_names:
         raise HTTPException(status_code=403, detail="Se requiere el rol ADMIN")
-    brands = db.query(Marca).all()
-    return brands
+    return cached_json_response(
+        request,
+        f"{CATALOG_PREFIX}admin:brands",
+        lambda: _brands_adapter.dump_json(
+            _brands_adapter.validate_python(db.query(Marca).all(), from_attributes=True)
+        ),
+    )
 
 
 @router.post("", response_model=BrandResponse, status_code=status.HTTP_201_CREATED)
@@ -62,6 +73,8 @@ def create_brand(
     )
     db.add(brand)
     db.commit()
+    invalidate_catalog()
+    TypeaheadService(db).refresh_brands([brand.id])
     db.refresh(brand)
     return brand
 
@@ -105,6 +118,8 @@ def update_brand(
         brand.descripcion = brand_data.descripcion
     
     db.commit()
+    invalidate_catalog()
+    TypeaheadService(db).refresh_brands([brand.id])
     db.refresh(brand)
     return brand
 
@@ -126,5 +141,7 @@ def delete_brand(
     
     db.delete(brand)
     db.commit()
+    invalidate_catalog()
+    TypeaheadService(db).refresh_brands([brand_id])
     return None
 
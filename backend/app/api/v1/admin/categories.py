@@ -1,11 +1,12 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
+from app.core.cache import CATALOG_PREFIX, cached_json_response, invalidate_catalog
 from app.db.session import get_db
 from app.core.dependencies import get_current_user
 from app.models.usuario import Usuario
 from app.models.categoria import Categoria
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
 router = APIRouter()
 
@@ -29,8 +30,12 @@ class CategoryResponse(BaseModel):
         from_attributes = True
 
 
+_categories_adapter = TypeAdapter(List[CategoryResponse])
+
+
 @router.get("", response_model=List[CategoryResponse])
 def list_categories(
+    request: Request,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
@@ -39,8 +44,13 @@ def list_categories(
     role_names = [rol.nombre for rol in current_user.roles]
     if "ADMIN" not in role_names:
         raise HTTPException(status_code=403, detail="Se requiere el rol ADMIN")
-    categories = db.query(Categoria).all()
-    return categories
+    return cached_json_response(
+        request,
+        f"{CATALOG_PREFIX}admin:categories",
+        lambda: _categories_adapter.dump_json(
+            _categories_adapter.validate_python(db.query(Categoria).all(), from_attributes=True)
+        ),
+    )
 
 
 @router.post("", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
@@ -62,6 +72,7 @@ def create_category(
     )
     db.add(category)
     db.commit()
+    invalidate_catalog()
     db.refresh(category)
     return category
 
@@ -105,6 +116,7 @@ def update_category(
         category.descripcion = category_data.descripcion
     
     db.commit()
+    invalidate_catalog()
     db.refresh(category)
     return category
 
@@ -126,5 +138,6 @@ def delete_category(
     
     db.delete(category)
     db.commit()
+    invalidate_catalog()
     return None
 
@@ -0,0 +1,71 @@
+"""
+Métricas en memoria del worker que atiende la petición (solo ADMIN)
+"""
+from fastapi import APIRouter, Depends, Query
+
+from app.core.dependencies import require_role
+from app.core.metrics import metrics
+from app.db.query_log import query_log
+
+router = APIRouter()
+
+
+@router.get("")
+def get_metrics(
+    prefix: str = Query("", description="Filtra las series cuyo nombre empieza por este prefijo"),
+    _: object = Depends(require_role("ADMIN")),
+):
+    """Contadores, gauges e histogramas del proceso (login, pool de contraseñas, ...)."""
+    return metrics.snapshot(prefix)
+
+
+@router.get("/routes")
+def get_route_metrics(_: object = Depends(require_role("ADMIN"))):
+    """Latencia y consultas por ruta, ordenadas por tiempo total acumulado."""
+    queries = {
+        (labels["method"], labels["route"]): histogram.snapshot()
+        for labels, histogram in metrics.histograms("http_request_db_queries")
+    }
+    rows = []
+    for labels, histogram in metrics.histograms("http_request_latency_ms"):
+        latency = histogram.snapshot()
+        db = queries.get((labels["method"], labels["route"]), {})
+        rows.append({
+            "method": labels["method"],
+            "route": labels["route"],
+            "count": latency["count"],
+            "total_ms": latency["sum"],
+            "avg_ms": round(latency["sum"] / latency["count"], 1) if latency["count"] else None,
+            "p50_ms": latency["p50"],
+            "p95_ms": latency["p95"],
+            "p99_ms": latency["p99"],
+            "max_ms": latency["max"],
+            "avg_db_queries": round(db["sum"] / db["count"], 1) if db.get("count") else None,
+            "max_db_queries": db.get("max"),
+        })
+    rows.sort(key=lambda row: row["total_ms"], reverse=True)
+    return {"items": rows}
+
+
+@router.get("/queries")
+def get_query_metrics(
+    limit: int = Query(20, ge=1, le=200),
+    _: object = Depends(require_role("ADMIN")),
+):
+    """Top-N de sentencias SQL (normalizadas) por tiempo total en este worker."""
+    return {
+        "threshold_ms": query_log.threshold_ms,
+        "items": [
+            {
+                "sql": item.sql,
+                "calls": item.calls,
+                "total_ms": round(item.total_ms, 1),
+                "avg_ms": round(item.total_ms / item.calls, 2),
+                "max_ms": round(item.max_ms, 1),
+                "slow_calls": item.slow_calls,
+                "last_slow_route": item.last_route,
+                "last_slow_caller": item.last_caller,
+            }
+            for item in query_log.top(limit)
+        ],
+    }
@@ -4,6 +4,7 @@ Endpoints para insertar y eliminar datos de prueba en la base de datos
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.db.session import get_db
+from app.core.cache import invalidate_catalog
 from app.core.dependencies import require_role
 from app.models.usuario import Usuario, Rol
 from app.models.cliente import Cliente
@@ -15,6 +16,9 @@ from app.models.proveedor import Proveedor
 from app.models.categoria import Categoria
 from app.models.marca import Marca
 from app.core.security import get_password_hash
+from app.services.product_search_service import ProductSearchService
+from app.services.sales_rollup_service import SalesRollupService
+from app.services.typeahead_service import TypeaheadService
 from datetime import datetime, timedelta
 from decimal import Decimal
 import random
@@ -34,6 +38,15 @@ MOCK_DATA_IDS = {
     "purchases": [],
 }
 
+# Las órdenes de prueba se fechan en los últimos 90 días
+MOCK_SALES_DAYS = 90
+
+
+def _sync_mock_sales_rollup(db: Session) -> None:
+    """Refresca el acumulado de reportes para los días en que caen las órdenes de prueba."""
+    today = datetime.now().date()
+    SalesRollupService(db).sync_days(today - timedelta(days=offset) for offset in range(-1, MOCK_SALES_DAYS + 2))
+
 @router.post("/insert")
 def insert_mock_data(
     db: Session = Depends(get_db),
@@ -526,7 +539,7 @@ def insert_mock_data(
                 
                 orden_venta = OrdenVenta(
                     cliente_id=random.choice(mock_customer_ids),
-                    fecha=datetime.now() - timedelta(days=random.randint(1, 90)),
+                    fecha=datetime.now() - timedelta(days=random.randint(1, MOCK_SALES_DAYS)),
                     estado=estado,
                     usuario_id=random.choice(mock_user_ids) if mock_user_ids else None,
                 )
@@ -595,6 +608,11 @@ def insert_mock_data(
                         db.add(item)
         
         db.commit()
+        invalidate_catalog()
+        _sync_mock_sales_rollup(db)
+        ProductSearchService(db).reindex_products(MOCK_DATA_IDS["products"])
+        TypeaheadService(db).refresh_products(MOCK_DATA_IDS["products"])
+        TypeaheadService(db).refresh_brands(MOCK_DATA_IDS["brands"])
         
         return {
             "message": "Datos de prueba insertados exitosamente",
@@ -703,11 +721,19 @@ def remove_mock_data(
                 db.delete(brand)
                 removed_count["brands"] += 1
         
+        removed_products = list(MOCK_DATA_IDS["products"])
+        removed_brands = list(MOCK_DATA_IDS["brands"])
+
         # Limpiar IDs
         for key in MOCK_DATA_IDS:
             MOCK_DATA_IDS[key] = []
         
         db.commit()
+        invalidate_catalog()
+        _sync_mock_sales_rollup(db)
+        ProductSearchService(db).reindex_products(removed_products)
+        TypeaheadService(db).refresh_products(removed_products)
+        TypeaheadService(db).refresh_brands(removed_brands)
         
         return {
             "message": "Datos de prueba eliminados exitosamente",
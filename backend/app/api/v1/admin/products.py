@@ -1,8 +1,9 @@
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
 
+from app.core.cache import CATALOG_PREFIX, cached_json_response, invalidate_catalog
 from app.core.dependencies import require_role, require_product_management
 from app.db.session import get_db
 from app.schemas.product import (
@@ -30,6 +31,7 @@ def list_products_admin(
     status_filter: Optional[str] = Query(None, alias="status"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Cursor `next_cursor` de la página anterior"),
     service: ProductService = Depends(get_product_service),
     _: None = Depends(require_product_management()),
 ):
@@ -37,19 +39,31 @@ def list_products_admin(
     
     Permisos: ADMIN
     """
-    return service.list_products(q, brand_id, category_id, status_filter, page, page_size)
+    try:
+        return service.list_products(
+            q, brand_id, category_id, status_filter, page, page_size, cursor=cursor
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
 
 @router.get("/meta", response_model=ProductMetaResponse)
 def fetch_products_meta(
+    request: Request,
     service: ProductService = Depends(get_product_service),
     _: None = Depends(require_product_management()),
 ):
     """Obtiene catálogos auxiliares para formularios (marcas, categorías, unidades).
     
+    Respuesta cacheada en memoria con ETag; se invalida en las mutaciones de catálogo.
+    
     Permisos: ADMIN
     """
-    return service.fetch_meta()
+    return cached_json_response(
+        request,
+        f"{CATALOG_PREFIX}meta",
+        lambda: service.fetch_meta().model_dump_json().encode("utf-8"),
+    )
 
 
 @router.post("", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
@@ -63,9 +77,11 @@ def create_product_admin(
     Permisos: ADMIN
     """
     try:
-        return service.create_product(payload)
+        producto = service.create_product(payload)
     except ValueError as exc:  # Validation at service level
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    invalidate_catalog()
+    return producto
 
 
 @router.get("/{product_id}", response_model=ProductResponse)
@@ -96,9 +112,11 @@ def update_product_admin(
     Permisos: ADMIN
     """
     try:
-        return service.update_product(product_id, payload)
+        producto = service.update_product(product_id, payload)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+    invalidate_catalog()
+    return producto
 
 
 @router.patch("/{product_id}/status", response_model=ProductResponse)
@@ -113,6 +131,8 @@ def change_product_status_admin(
     Permisos: ADMIN
     """
     try:
-        return service.set_product_status(product_id, payload)
+        producto = service.set_product_status(product_id, payload)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+    invalidate_catalog()
+    return producto
@@ -0,0 +1,36 @@
+"""
+Perfiles de peticiones guardados por el profiler bajo demanda (solo ADMIN)
+"""
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse
+
+from app.core.dependencies import require_role
+from app.core.profiler import PROFILE_KINDS, is_valid_profile_id, list_profiles, spool_dir
+
+router = APIRouter()
+
+
+@router.get("")
+def get_profiles(
+    limit: int = Query(20, ge=1, le=200),
+    _: object = Depends(require_role("ADMIN")),
+):
+    """Perfiles más recientes del spool de este worker (metadatos)."""
+    return {"items": list_profiles(limit)}
+
+
+@router.get("/{profile_id}/{kind}")
+def download_profile(
+    profile_id: str,
+    kind: Literal["pstats", "collapsed", "json"],
+    _: object = Depends(require_role("ADMIN")),
+):
+    """Descarga el volcado pstats, las pilas colapsadas o los metadatos de un perfil."""
+    if not is_valid_profile_id(profile_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Perfil no encontrado")
+    path = spool_dir() / f"{profile_id}.{kind}"
+    if not path.exists():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Perfil no encontrado")
+    return FileResponse(path, media_type=PROFILE_KINDS[kind], filename=path.name)
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1.admin import brands, categories, products, mock_data
+from app.api.v1.admin import brands, categories, metrics, products, profiles, mock_data
 
 router = APIRouter()
 
@@ -8,5 +8,7 @@ router.include_router(brands.router, prefix="/brands", tags=["admin-brands"])
 router.include_router(categories.router, prefix="/categories", tags=["admin-categories"])
 router.include_router(products.router, prefix="/products", tags=["admin-products"])
 router.include_router(mock_data.router, prefix="/mock-data", tags=["admin-mock-data"])
+router.include_router(metrics.router, prefix="/metrics", tags=["admin-metrics"])
+router.include_router(profiles.router, prefix="/profiles", tags=["admin-profiles"])
 
 
@@ -1,9 +1,14 @@
 import uuid
 import logging
+import time
 from fastapi import APIRouter, Depends, HTTPException, status, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import update
 from sqlalchemy.orm import Session
+from app.core.metrics import metrics
+from app.core.password_executor import PasswordPoolSaturated, password_pool
 from app.core.security import (
-    verify_password, 
+    check_password,
     get_password_hash,
     create_access_token, 
     create_refresh_token, 
@@ -13,7 +18,7 @@ from app.core.security import (
 )
 from app.core.dependencies import get_current_user
 from app.db.session import get_db
-from app.models.usuario import Usuario
+from app.models.usuario import Usuario, normalize_email
 from app.schemas.auth import (
     Token, 
     LoginRequest, 
@@ -31,36 +36,100 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Segundos sugeridos al cliente cuando el pool de contraseñas está saturado
+LOGIN_RETRY_AFTER_SECONDS = 1
+
 
 @router.post("/login", response_model=Token)
-def login(request: LoginRequest, db: Session = Depends(get_db)):
-    """Autentica un usuario y devuelve tokens JWT."""
-    user = db.query(Usuario).filter(Usuario.correo == request.email).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Email o contraseña incorrectos"
-        )
-    if not verify_password(request.password, user.hash_contrasena):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Email o contraseña incorrectos"
-        )
-    if not user.activo:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Usuario inactivo"
+async def login(request: LoginRequest, db: Session = Depends(get_db)):
+    """Autentica un usuario y devuelve tokens JWT.
+
+    bcrypt corre en el pool dedicado de contraseñas; si está saturado se
+    responde 503 con `Retry-After` en lugar de encolar sin límite. Los hashes
+    en formato anterior se regeneran tras un login correcto.
+    """
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        user = await run_in_threadpool(_find_user_by_email, db, request.email)
+        if not user:
+            outcome = "invalid"
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Email o contraseña incorrectos"
+            )
+        try:
+            check = await password_pool.run(check_password, request.password, user.hash_contrasena)
+        except PasswordPoolSaturated as exc:
+            outcome = "saturated"
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Demasiados inicios de sesión simultáneos, intenta de nuevo",
+                headers={"Retry-After": str(LOGIN_RETRY_AFTER_SECONDS)},
+            ) from exc
+        if not check.valid:
+            outcome = "invalid"
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Email o contraseña incorrectos"
+            )
+        if not user.activo:
+            outcome = "inactive"
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Usuario inactivo"
+            )
+        if check.needs_rehash:
+            await _upgrade_password_hash(db, user, request.password)
+
+        subject = str(user.id)
+        access_token = create_access_token(data={"sub": subject})
+        refresh_token = create_refresh_token(data={"sub": subject})
+        outcome = "ok"
+
+        return {
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "token_type": "bearer"
+        }
+    finally:
+        metrics.histogram("auth_login_latency_ms").observe((time.perf_counter() - started) * 1000)
+        metrics.counter("auth_login_total", {"outcome": outcome}).inc()
+
+
+def _find_user_by_email(db: Session, email: str) -> Usuario | None:
+    return db.query(Usuario).filter(Usuario.correo_normalizado == normalize_email(email)).first()
+
+
+async def _upgrade_password_hash(db: Session, user: Usuario, password: str) -> None:
+    """Regenera un hash sin marca al formato normalizado actual.
+
+    Es un paso de mantenimiento: si el pool está saturado o la escritura
+    falla, el login sigue adelante y se reintenta en el próximo.
+    """
+    try:
+        new_hash = await password_pool.run(get_password_hash, password)
+    except PasswordPoolSaturated:
+        return
+    try:
+        await run_in_threadpool(_store_password_hash, db, user.id, user.hash_contrasena, new_hash)
+        metrics.counter("auth_password_rehash_total").inc()
+    except Exception:
+        logger.exception("No se pudo actualizar el hash de contraseña del usuario %s", user.id)
+
+
+def _store_password_hash(db: Session, user_id: int, old_hash: str, new_hash: str) -> None:
+    # Solo si nadie cambió la contraseña entre la lectura y ahora
+    try:
+        db.execute(
+            update(Usuario)
+            .where(Usuario.id == user_id, Usuario.hash_contrasena == old_hash)
+            .values(hash_contrasena=new_hash)
         )
-    
-    subject = str(user.id)
-    access_token = create_access_token(data={"sub": subject})
-    refresh_token = create_refresh_token(data={"sub": subject})
-    
-    return {
-        "access_token": access_token,
-        "refresh_token": refresh_token,
-        "token_type": "bearer"
-    }
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
 
 
 @router.post("/refresh", response_model=Token)
@@ -165,7 +234,7 @@ def forgot_password(
     para evitar enumeración de usuarios.
     """
     try:
-        user = db.query(Usuario).filter(Usuario.correo == request.email).first()
+        user = db.query(Usuario).filter(Usuario.correo_normalizado == normalize_email(request.email)).first()
         
         # Si el usuario existe y está activo, generar token y enviar email
         if user and user.activo:
@@ -275,22 +344,28 @@ async def social_auth(
     
     El frontend debe enviar el ID token obtenido del proveedor OAuth.
     """
-    try:
-        user_info = None
-        
-        if request.provider.lower() == "google":
-            user_info = await verify_google_token(request.id_token)
-            if not user_info:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Token de Google inválido o expirado"
-                )
-        else:
+    user_info = None
+
+    if request.provider.lower() == "google":
+        user_info = await verify_google_token(request.id_token)
+        if not user_info:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Proveedor '{request.provider}' no soportado"
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token de Google inválido o expirado"
             )
-        
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Proveedor '{request.provider}' no soportado"
+        )
+
+    # Las consultas y el hash bcrypt son bloqueantes: se ejecutan en el threadpool
+    return await run_in_threadpool(_social_login, user_info, db)
+
+
+def _social_login(user_info: dict, db: Session) -> dict:
+    """Busca o crea el usuario del proveedor OAuth y emite sus tokens."""
+    try:
         # Extraer información del usuario
         email = user_info.get("email")
         if not email:
@@ -304,7 +379,7 @@ async def social_auth(
         username_base = email.split("@")[0]
         
         # Buscar usuario existente por email
-        user = db.query(Usuario).filter(Usuario.correo == email).first()
+        user = db.query(Usuario).filter(Usuario.correo_normalizado == normalize_email(email)).first()
         
         if user:
             # Usuario existe, solo autenticar
@@ -1,9 +1,10 @@
 from typing import List
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
+from app.core.cache import CATALOG_PREFIX, cached_json_response
 from app.db.session import get_db
 from app.models.categoria import Categoria
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
 router = APIRouter()
 
@@ -17,14 +18,23 @@ class CategoryResponse(BaseModel):
         from_attributes = True
 
 
+_category_list_adapter = TypeAdapter(List[CategoryResponse])
+
+
 @router.get("", response_model=List[CategoryResponse])
 def list_categories(
+    request: Request,
     db: Session = Depends(get_db),
 ):
-    """Lista todas las categorías (endpoint público)."""
-    try:
+    """Lista todas las categorías (endpoint público, cacheado con ETag)."""
+    def build() -> bytes:
         categories = db.query(Categoria).order_by(Categoria.nombre).all()
-        return categories
+        return _category_list_adapter.dump_json(
+            _category_list_adapter.validate_python(categories, from_attributes=True)
+        )
+
+    try:
+        return cached_json_response(request, f"{CATALOG_PREFIX}categories", build)
     except Exception as e:
         import logging
         logger = logging.getLogger(__name__)
@@ -5,7 +5,7 @@ from sqlalchemy.orm import Session
 
 from app.core.dependencies import get_current_user, get_current_user_optional, require_sales_management
 from app.db.session import get_db
-from app.models.usuario import Usuario
+from app.models.usuario import Usuario, normalize_email
 from app.schemas.invoice import InvoiceCreateRequest, InvoiceListResponse, InvoiceResponse
 from app.services.invoice_service import InvoiceService
 
@@ -42,11 +42,10 @@ def list_my_invoices(
     Lista las facturas del usuario autenticado.
     """
     from app.models.cliente import Cliente
-    from sqlalchemy import func
 
     # Buscar el cliente asociado al email del usuario
     cliente = service.db.query(Cliente).filter(
-        func.lower(Cliente.correo) == func.lower(current_user.correo)
+        Cliente.correo_igual(current_user.correo)
     ).first()
 
     if not cliente:
@@ -87,8 +86,8 @@ def get_invoice(
             ).first()
 
             if cliente_factura and cliente_factura.correo and current_user.correo:
-                email_factura = cliente_factura.correo.lower().strip()
-                email_usuario = current_user.correo.lower().strip()
+                email_factura = normalize_email(cliente_factura.correo)
+                email_usuario = normalize_email(current_user.correo)
                 if email_factura == email_usuario:
                     return service.get_invoice(invoice_id)
 
@@ -133,8 +132,8 @@ def get_invoice_by_number(
             ).first()
 
             if cliente_factura and cliente_factura.correo and current_user.correo:
-                email_factura = cliente_factura.correo.lower().strip()
-                email_usuario = current_user.correo.lower().strip()
+                email_factura = normalize_email(cliente_factura.correo)
+                email_usuario = normalize_email(current_user.correo)
                 if email_factura == email_usuario:
                     return service.get_invoice_by_number(numero_factura)
 
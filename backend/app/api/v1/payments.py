@@ -4,8 +4,9 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app.core.dependencies import get_current_user, get_current_user_optional, require_sales_management
+from app.core.idempotency import idempotent
 from app.db.session import get_db
-from app.models.usuario import Usuario
+from app.models.usuario import Usuario, normalize_email
 from app.schemas.payment import PaymentCreateRequest, PaymentListResponse, PaymentResponse
 from app.services.payment_service import PaymentService
 
@@ -43,11 +44,10 @@ def list_my_payments(
     Lista los pagos del usuario autenticado.
     """
     from app.models.cliente import Cliente
-    from sqlalchemy import func
 
     # Buscar el cliente asociado al email del usuario
     cliente = service.db.query(Cliente).filter(
-        func.lower(Cliente.correo) == func.lower(current_user.correo)
+        Cliente.correo_igual(current_user.correo)
     ).first()
 
     if not cliente:
@@ -88,8 +88,8 @@ def get_payment(
             ).first()
 
             if cliente_pago and cliente_pago.correo and current_user.correo:
-                email_pago = cliente_pago.correo.lower().strip()
-                email_usuario = current_user.correo.lower().strip()
+                email_pago = normalize_email(cliente_pago.correo)
+                email_usuario = normalize_email(current_user.correo)
                 if email_pago == email_usuario:
                     return service.get_payment(payment_id)
 
@@ -108,6 +108,7 @@ def get_payment(
 
 
 @router.post("", response_model=PaymentResponse, status_code=status.HTTP_201_CREATED)
+@idempotent
 def create_payment(
     payload: PaymentCreateRequest,
     service: PaymentService = Depends(get_payment_service),
@@ -4,8 +4,9 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
-from app.schemas.product import ProductListResponse, ProductResponse, VariantResponse
+from app.schemas.product import ProductListResponse, ProductResponse, ProductSuggestion, VariantResponse
 from app.services.product_service import ProductService
+from app.services.typeahead_service import SUGGESTION_TYPES, TypeaheadService
 
 router = APIRouter()
 
@@ -22,11 +23,16 @@ def list_products_endpoint(
     status: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Cursor `next_cursor` de la página anterior"),
     service: ProductService = Depends(get_product_service),
 ):
-    """Lista productos con filtros y paginación."""
+    """Lista productos con filtros y paginación (por página o por cursor)."""
     try:
-        return service.list_products(q, brand_id, category_id, status, page, page_size)
+        return service.list_products(
+            q, brand_id, category_id, status, page, page_size, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         import logging
         logger = logging.getLogger(__name__)
@@ -34,6 +40,24 @@ def list_products_endpoint(
         raise HTTPException(status_code=500, detail=f"Error al cargar productos: {str(e)}")
 
 
+@router.get("/suggest", response_model=list[ProductSuggestion])
+def suggest_products_endpoint(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=20),
+    tipos: str = Query(
+        ",".join(SUGGESTION_TYPES),
+        description="Tipos separados por coma: producto, variante, marca (el POS usa `variante`)",
+    ),
+    db: Session = Depends(get_db),
+):
+    """Autocompletado por prefijo servido desde memoria, ordenado por ventas."""
+    requested = [tipo.strip().lower() for tipo in tipos.split(",") if tipo.strip()]
+    unknown = sorted(set(requested) - set(SUGGESTION_TYPES))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Tipos desconocidos: {', '.join(unknown)}")
+    return TypeaheadService(db=db).suggest(q, limit=limit, tipos=requested or SUGGESTION_TYPES)
+
+
 @router.get("/{slug}", response_model=ProductResponse)
 def get_product_by_slug_endpoint(
     slug: str,
@@ -4,10 +4,16 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from app.core.dependencies import require_role, get_current_user
+from app.core.idempotency import idempotent
 from app.db.session import get_db
 from app.models.usuario import Usuario
-from app.schemas.reservation import ReservationListResponse, ReservationResponse
+from app.schemas.reservation import (
+    ReservationAvailabilityBatchResponse,
+    ReservationListResponse,
+    ReservationResponse,
+)
 from app.schemas.reservation_status import (
+    ReservationAvailabilityRequest,
     ReservationCancelRequest,
     ReservationCompleteRequest,
     ReservationConfirmRequest,
@@ -36,7 +42,6 @@ def list_my_reservations(
     MEJORADO: Busca el cliente asociado al usuario por relación directa usuario_id.
     """
     from app.models.cliente import Cliente
-    from sqlalchemy import func
     
     # MEJORADO: Buscar cliente por relación directa usuario_id (más eficiente)
     cliente = service.db.query(Cliente).filter(
@@ -46,7 +51,7 @@ def list_my_reservations(
     # Fallback: buscar por email (para clientes antiguos sin relación)
     if not cliente:
         cliente = service.db.query(Cliente).filter(
-            func.lower(Cliente.correo) == func.lower(current_user.correo)
+            Cliente.correo_igual(current_user.correo)
         ).first()
         # Vincular el cliente al usuario si no está vinculado
         if cliente and not cliente.usuario_id:
@@ -112,7 +117,23 @@ def check_availability(
     return service.check_availability(variante_producto_id, cantidad)
 
 
+@router.post("/availability", response_model=ReservationAvailabilityBatchResponse)
+def check_availability_batch(
+    payload: ReservationAvailabilityRequest,
+    service: ReservationService = Depends(get_reservation_service),
+):
+    """Consulta la disponibilidad de todo un carrito en una sola llamada."""
+    items = service.check_availability_batch(
+        (item.variante_producto_id, item.cantidad) for item in payload.items
+    )
+    return ReservationAvailabilityBatchResponse(
+        items=items,
+        suficiente=all(item["suficiente"] for item in items),
+    )
+
+
 @router.post("", response_model=ReservationResponse)
+@idempotent
 def create_reservation(
     payload: ReservationCreateRequest,
     service: ReservationService = Depends(get_reservation_service),
@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app.core.dependencies import get_current_user, get_current_user_optional, require_sales_management
+from app.core.idempotency import idempotent
 from app.db.session import get_db
 from app.models.usuario import Usuario
 from app.schemas.sale import SaleOrderCreateRequest, SaleOrderListResponse, SaleOrderResponse
@@ -29,92 +30,36 @@ def list_sales_orders(
     estado: Optional[str] = None,
     page: int = 1,
     page_size: int = 50,
+    cursor: Optional[str] = Query(None, description="Cursor `next_cursor` de la página anterior"),
     service: SaleService = Depends(get_sale_service),
     _: object = Depends(require_sales_management()),
 ):
-    return service.list_orders(customer_id=customer_id, estado=estado, page=page, page_size=page_size)
+    try:
+        return service.list_orders(
+            customer_id=customer_id, estado=estado, page=page, page_size=page_size, cursor=cursor
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
 
 @router.get("/my-orders", response_model=SaleOrderListResponse)
 def list_my_orders(
     page: int = Query(1, ge=1, description="Número de página"),
     page_size: int = Query(50, ge=1, le=2000, description="Tamaño de página"),
+    cursor: Optional[str] = Query(None, description="Cursor `next_cursor` de la página anterior"),
     service: SaleService = Depends(get_sale_service),
     current_user: Usuario = Depends(get_current_user),
 ):
     """
     Lista las órdenes de venta del usuario autenticado.
     
-    Busca órdenes por usuario_id (más directo) y también por cliente asociado al email.
+    Incluye las órdenes creadas por el usuario (usuario_id) y las de su cliente
+    asociado (vinculado o con su mismo correo).
     """
-    import logging
-    logger = logging.getLogger(__name__)
-    
-    from app.models.cliente import Cliente
-    from app.models.venta import OrdenVenta
-    from sqlalchemy import func, or_
-    
-    logger.info(f"Buscando órdenes para usuario_id: {current_user.id}, email: {current_user.correo}")
-    
-    # MEJORADO: Buscar órdenes usando la relación directa usuario_id -> cliente_id
-    # 1. Buscar cliente asociado al usuario por relación directa (más eficiente)
-    cliente = service.db.query(Cliente).filter(
-        Cliente.usuario_id == current_user.id
-    ).first()
-    
-    if cliente:
-        logger.info(f"Cliente encontrado por usuario_id: {cliente.id}, email: {cliente.correo}")
-    else:
-        logger.info(f"No se encontró cliente asociado al usuario {current_user.id}")
-        # Fallback: buscar por email (para clientes antiguos sin relación)
-        cliente = service.db.query(Cliente).filter(
-            func.lower(Cliente.correo) == func.lower(current_user.correo)
-        ).first()
-        if cliente:
-            logger.info(f"Cliente encontrado por email (fallback): {cliente.id}")
-            # Vincular el cliente al usuario si no está vinculado
-            if not cliente.usuario_id:
-                cliente.usuario_id = current_user.id
-                service.db.commit()
-                logger.info(f"Cliente {cliente.id} vinculado al usuario {current_user.id}")
-    
-    # Buscar órdenes por usuario_id O por cliente_id
-    condiciones = []
-    if current_user.id:
-        condiciones.append(OrdenVenta.usuario_id == current_user.id)
-        logger.info(f"Agregada condición: usuario_id == {current_user.id}")
-    if cliente:
-        condiciones.append(OrdenVenta.cliente_id == cliente.id)
-        logger.info(f"Agregada condición: cliente_id == {cliente.id}")
-    
-    if not condiciones:
-        # Si no hay condiciones, retornar lista vacía
-        logger.warning("No hay condiciones para buscar órdenes")
-        return SaleOrderListResponse(items=[], total=0, page=page, page_size=page_size)
-    
-    # Buscar órdenes que cumplan cualquiera de las condiciones
-    # Cargar relaciones necesarias (cliente, usuario, items)
-    from app.models.venta import ItemOrdenVenta
-    from sqlalchemy.orm import joinedload
-    ordenes_filtradas = service.db.query(OrdenVenta).options(
-        joinedload(OrdenVenta.cliente),
-        joinedload(OrdenVenta.usuario),
-        joinedload(OrdenVenta.items).joinedload(ItemOrdenVenta.variante),
-    ).filter(
-        or_(*condiciones)
-    ).order_by(OrdenVenta.fecha.desc(), OrdenVenta.id.desc()).offset((page - 1) * page_size).limit(page_size).all()
-    
-    total = service.db.query(OrdenVenta).filter(
-        or_(*condiciones)
-    ).count()
-    
-    logger.info(f"Encontradas {len(ordenes_filtradas)} órdenes de {total} totales")
-    for orden in ordenes_filtradas:
-        logger.info(f"Orden {orden.id}: usuario_id={orden.usuario_id}, cliente_id={orden.cliente_id}")
-    
-    # Mapear a respuesta usando el método del servicio
-    items = [service._map_order(orden) for orden in ordenes_filtradas]
-    return SaleOrderListResponse(items=items, total=total, page=page, page_size=page_size)
+    try:
+        return service.list_my_orders(current_user, page=page, page_size=page_size, cursor=cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
 
 @router.get("/{order_id}", response_model=SaleOrderResponse)
@@ -158,9 +103,8 @@ def get_sales_order(
             
             # Fallback: verificar por email (para clientes antiguos sin relación)
             if not cliente_usuario:
-                from sqlalchemy import func
                 cliente_usuario = db.query(Cliente).filter(
-                    func.lower(Cliente.correo) == func.lower(current_user.correo)
+                    Cliente.correo_igual(current_user.correo)
                 ).first()
                 if cliente_usuario and orden.cliente_id == cliente_usuario.id:
                     # Vincular el cliente al usuario si no está vinculado
@@ -194,6 +138,7 @@ def get_sales_order(
 
 
 @router.post("", response_model=SaleOrderResponse, status_code=status.HTTP_201_CREATED)
+@idempotent
 def create_sales_order(
     payload: SaleOrderCreateRequest,
     service: SaleService = Depends(get_sale_service),
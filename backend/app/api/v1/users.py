@@ -215,7 +215,7 @@ def get_user_customer_history(
     """Obtiene el historial de variaciones de datos del cliente asociado al usuario."""
     from app.models.usuario import Usuario
     from app.models.cliente import Cliente
-    from app.models.venta import OrdenVenta
+    from app.services.customer_summary_service import CustomerSummaryService
     
     user = db.query(Usuario).filter(Usuario.id == user_id).first()
     if not user:
@@ -233,8 +233,7 @@ def get_user_customer_history(
             "variations": [],
         }
     
-    # Obtener todas las órdenes del cliente
-    orders = db.query(OrdenVenta).filter(OrdenVenta.cliente_id == cliente.id).order_by(OrdenVenta.fecha.desc()).all()
+    statistics = CustomerSummaryService(db=db).get_summary(cliente.id).statistics
     
     # Datos actuales del cliente
     current_data = {
@@ -256,9 +255,9 @@ def get_user_customer_history(
         "has_customer": True,
         "customer_id": cliente.id,
         "current_data": current_data,
-        "orders_count": len(orders),
-        "first_order_date": orders[0].fecha.isoformat() if orders else None,
-        "last_order_date": orders[-1].fecha.isoformat() if orders else None,
+        "orders_count": statistics.total_orders,
+        "first_order_date": statistics.first_order_date.isoformat() if statistics.first_order_date else None,
+        "last_order_date": statistics.last_order_date.isoformat() if statistics.last_order_date else None,
         "variations_note": "El historial de variaciones se mostrará cuando se implemente la tabla de historial de cambios del cliente.",
     }
 
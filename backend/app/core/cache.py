@@ -0,0 +1,136 @@
+"""Caché en memoria del proceso para respuestas de catálogo poco cambiantes.
+
+Las entradas guardan el cuerpo JSON ya serializado junto con su ETag, de modo
+que una respuesta repetida no consulta la base ni valida modelos Pydantic, y
+los clientes que envían `If-None-Match` reciben un 304 sin cuerpo.
+
+La caché es local a cada worker: las invalidaciones explícitas solo afectan al
+proceso que atiende la mutación, y el TTL acota la desactualización del resto.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, cast
+
+from fastapi import Request, Response, status
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True, slots=True)
+class CachedBody:
+    body: bytes
+    etag: str
+
+
+class TTLCache:
+    """Caché LRU acotada por cantidad de entradas y con expiración por TTL."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self._lock = threading.Lock()
+        # Cambia con cada invalidación: una carga que empezó antes no se guarda
+        self._generation = 0
+
+    def get(self, key: str) -> object | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: object) -> None:
+        with self._lock:
+            self._store(key, value)
+
+    def _store(self, key: str, value: object) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def get_or_set(self, key: str, loader: Callable[[], object]) -> object:
+        """Valor de `key` o el que devuelve `loader`.
+
+        Si hubo una invalidación mientras corría `loader`, el valor se devuelve
+        pero no se guarda: pudo leerse antes de la mutación que invalidó.
+        """
+        value = self.get(key)
+        if value is None:
+            generation = self._generation
+            value = loader()
+            with self._lock:
+                if self._generation == generation:
+                    self._store(key, value)
+        return value
+
+    def invalidate(self, prefix: str = "") -> None:
+        """Elimina las entradas cuya clave empieza con `prefix` (todas si está vacío)."""
+        with self._lock:
+            self._generation += 1
+            for key in [key for key in self._data if key.startswith(prefix)]:
+                del self._data[key]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+catalog_cache = TTLCache(
+    maxsize=settings.catalog_cache_max_entries,
+    ttl=settings.catalog_cache_ttl_seconds,
+)
+
+CATALOG_PREFIX = "catalog:"
+
+
+def _make_body(payload: bytes) -> CachedBody:
+    digest = hashlib.sha1(payload).hexdigest()
+    return CachedBody(body=payload, etag=f'"{digest}"')
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {value.strip().removeprefix("W/") for value in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def cached_json_response(
+    request: Request,
+    key: str,
+    build: Callable[[], bytes],
+    cache: TTLCache = catalog_cache,
+) -> Response:
+    """Devuelve la respuesta JSON cacheada bajo `key`, construyéndola con `build` si falta."""
+    entry = cast(CachedBody, cache.get_or_set(key, lambda: _make_body(build())))
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request, entry.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+def invalidate_catalog() -> None:
+    """Hook de invalidación para mutaciones de marcas, categorías, unidades y productos."""
+    catalog_cache.invalidate(CATALOG_PREFIX)
+
+
+__all__ = [
+    "TTLCache",
+    "CachedBody",
+    "catalog_cache",
+    "cached_json_response",
+    "invalidate_catalog",
+    "CATALOG_PREFIX",
+]
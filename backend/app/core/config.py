@@ -30,11 +30,88 @@ class Settings(BaseSettings):
 
     database_url: str = Field(..., alias="DATABASE_URL")
 
+    # Pool de conexiones (SQL Server) y threadpool de endpoints síncronos
+    db_pool_size: int = Field(10, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(20, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout_seconds: float = Field(30, alias="DB_POOL_TIMEOUT_SECONDS")
+    db_pool_recycle_seconds: int = Field(1800, alias="DB_POOL_RECYCLE_SECONDS")
+    threadpool_max_workers: int = Field(0, alias="THREADPOOL_MAX_WORKERS")  # 0 = tamaño + overflow del pool
+    # Saturación (0-1) del pool o del threadpool a partir de la cual /ready responde 503
+    readiness_max_saturation: float = Field(0.9, alias="READINESS_MAX_SATURATION")
+
+    # Server-Timing, access log JSON e histogramas por ruta
+    request_metrics_enabled: bool = Field(True, alias="REQUEST_METRICS_ENABLED")
+
+    # Registro de consultas lentas (umbral 0 = sin fichero; las estadísticas por sentencia siguen activas)
+    slow_query_threshold_ms: float = Field(500, alias="SLOW_QUERY_THRESHOLD_MS")
+    slow_query_log_path: str = Field("logs/slow_queries.jsonl", alias="SLOW_QUERY_LOG_PATH")
+    slow_query_log_max_bytes: int = Field(10 * 1024 * 1024, alias="SLOW_QUERY_LOG_MAX_BYTES")
+    slow_query_log_backups: int = Field(5, alias="SLOW_QUERY_LOG_BACKUPS")
+    slow_query_capture_plan: bool = Field(False, alias="SLOW_QUERY_CAPTURE_PLAN")
+    slow_query_stats_max_statements: int = Field(1000, alias="SLOW_QUERY_STATS_MAX_STATEMENTS")
+
+    # Profiler por petición para ADMIN (cabecera X-Profile: 1 o ?_profile=1)
+    profiler_enabled: bool = Field(True, alias="PROFILER_ENABLED")
+    profile_spool_dir: str = Field("logs/profiles", alias="PROFILE_SPOOL_DIR")
+    profile_spool_max_files: int = Field(50, alias="PROFILE_SPOOL_MAX_FILES")
+
+    # Idempotencia de POST (Idempotency-Key) para rutas marcadas con @idempotent
+    idempotency_ttl_hours: int = Field(24, alias="IDEMPOTENCY_TTL_HOURS")
+    idempotency_cache_ttl_seconds: int = Field(600, alias="IDEMPOTENCY_CACHE_TTL_SECONDS")
+    idempotency_cache_max_entries: int = Field(2048, alias="IDEMPOTENCY_CACHE_MAX_ENTRIES")
+    idempotency_wait_seconds: float = Field(30, alias="IDEMPOTENCY_WAIT_SECONDS")
+    idempotency_in_progress_timeout_seconds: float = Field(120, alias="IDEMPOTENCY_IN_PROGRESS_TIMEOUT_SECONDS")
+    idempotency_purge_interval_seconds: int = Field(3600, alias="IDEMPOTENCY_PURGE_INTERVAL_SECONDS")
+    idempotency_purge_batch_size: int = Field(500, alias="IDEMPOTENCY_PURGE_BATCH_SIZE")
+
     jwt_secret: str = Field("change-me", alias="JWT_SECRET")
     jwt_alg: str = Field("HS256", alias="JWT_ALG")
     access_token_expire_minutes: int = Field(30, alias="ACCESS_TOKEN_EXPIRE_MINUTES")
     refresh_token_expire_minutes: int = Field(43200, alias="REFRESH_TOKEN_EXPIRE_MINUTES")
 
+    # Caché en memoria de catálogos (marcas, categorías, unidades)
+    catalog_cache_ttl_seconds: int = Field(300, alias="CATALOG_CACHE_TTL_SECONDS")
+    catalog_cache_max_entries: int = Field(128, alias="CATALOG_CACHE_MAX_ENTRIES")
+
+    # Caché de principals (usuario + roles + permisos) para get_current_user
+    principal_cache_ttl_seconds: float = Field(5, alias="PRINCIPAL_CACHE_TTL_SECONDS")
+    principal_cache_max_entries: int = Field(1024, alias="PRINCIPAL_CACHE_MAX_ENTRIES")
+    principal_stamp_check_seconds: float = Field(1, alias="PRINCIPAL_STAMP_CHECK_SECONDS")
+
+    # Pool dedicado para bcrypt (hash/verificación de contraseñas)
+    password_pool_workers: int = Field(4, alias="PASSWORD_POOL_WORKERS")
+    password_pool_queue_limit: int = Field(32, alias="PASSWORD_POOL_QUEUE_LIMIT")
+
+    # Conciliación periódica del contador de stock reservado (0 = desactivada)
+    reservation_reconcile_interval_seconds: int = Field(900, alias="RESERVATION_RECONCILE_INTERVAL_SECONDS")
+
+    # Recalculo de los días del acumulado de ventas cuyo refresco falló (0 = desactivado)
+    sales_rollup_reconcile_seconds: int = Field(300, alias="SALES_ROLLUP_RECONCILE_SECONDS")
+
+    # Numeración de documentos no fiscales (órdenes de compra, transferencias,
+    # ajustes): >1 reserva bloques hi-lo por worker (admite huecos). Las
+    # facturas siempre se numeran sin huecos.
+    document_sequence_block_size: int = Field(1, alias="DOCUMENT_SEQUENCE_BLOCK_SIZE")
+
+    # Caché usuario -> cliente para las lecturas "mis pedidos" (por worker)
+    customer_link_cache_ttl_seconds: float = Field(300, alias="CUSTOMER_LINK_CACHE_TTL_SECONDS")
+    customer_link_cache_max_entries: int = Field(4096, alias="CUSTOMER_LINK_CACHE_MAX_ENTRIES")
+
+    # Resumen 360 del cliente por worker (0 = sin caché)
+    customer_summary_cache_ttl_seconds: float = Field(0, alias="CUSTOMER_SUMMARY_CACHE_TTL_SECONDS")
+    customer_summary_cache_max_entries: int = Field(1024, alias="CUSTOMER_SUMMARY_CACHE_MAX_ENTRIES")
+
+    # Búsqueda de productos: auto | mssql | postgresql | memory | like
+    product_search_backend: str = Field("auto", alias="PRODUCT_SEARCH_BACKEND")
+    product_search_max_results: int = Field(500, alias="PRODUCT_SEARCH_MAX_RESULTS")
+    # Recarga completa del índice en memoria por worker (0 = solo al arrancar)
+    product_search_memory_refresh_seconds: float = Field(300, alias="PRODUCT_SEARCH_MEMORY_REFRESH_SECONDS")
+
+    # Autocompletado en memoria: reconstrucción completa (0 = solo la primera consulta)
+    typeahead_refresh_seconds: float = Field(900, alias="TYPEAHEAD_REFRESH_SECONDS")
+    # Ventana de ventas que ordena las sugerencias
+    typeahead_popularity_days: int = Field(90, alias="TYPEAHEAD_POPULARITY_DAYS")
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -4,33 +4,46 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.models.usuario import Usuario
+from app.core.principal import principal_cache
 from app.core.security import decode_token
 
 security = HTTPBearer(auto_error=False)  # No lanza error si no hay token
 security_required = HTTPBearer()  # Lanza error si no hay token (para endpoints que requieren auth)
 
+# Las dependencias que consultan la base son `def` (FastAPI las ejecuta en el
+# threadpool); los checkers de rol/permiso son `async def` porque solo revisan
+# los roles ya cargados en memoria y no hacen I/O sobre el event loop.
+# El usuario autenticado es un `Principal` de la caché (app/core/principal.py):
+# expone los mismos atributos que leen los endpoints de `Usuario`.
 
-async def get_current_user(
+
+def user_id_from_token(token: str) -> Optional[int]:
+    """Extrae el id de usuario de un access token; None si el token no es válido."""
+    try:
+        payload = decode_token(token)
+    except ValueError:
+        return None
+    if payload.get("type") != "access":
+        return None
+    raw_user_id: Optional[str] = payload.get("sub")  # type: ignore[assignment]
+    if raw_user_id is None:
+        return None
+    try:
+        return int(raw_user_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security_required),
     db: Session = Depends(get_db)
 ) -> Usuario:
     """Obtiene el usuario actual desde el token JWT."""
-    token = credentials.credentials
-    try:
-        payload = decode_token(token)
-        if payload.get("type") != "access":
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido")
-        raw_user_id: Optional[str] = payload.get("sub")  # type: ignore[assignment]
-        if raw_user_id is None:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido")
-        try:
-            user_id = int(raw_user_id)
-        except (TypeError, ValueError):
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido") from None
-    except ValueError:
+    user_id = user_id_from_token(credentials.credentials)
+    if user_id is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido")
-    
-    user = db.query(Usuario).filter(Usuario.id == user_id).first()
+
+    user = principal_cache.get(db, user_id)
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuario no encontrado")
     if not user.activo:
@@ -46,31 +59,20 @@ async def get_current_active_user(
     return current_user
 
 
-async def get_current_user_optional(
+def get_current_user_optional(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db: Session = Depends(get_db)
 ) -> Optional[Usuario]:
     """Obtiene el usuario actual si hay token, None si no hay autenticación."""
     if not credentials:
         return None
-    try:
-        token = credentials.credentials
-        payload = decode_token(token)
-        if payload.get("type") != "access":
-            return None
-        raw_user_id: Optional[str] = payload.get("sub")
-        if raw_user_id is None:
-            return None
-        try:
-            user_id = int(raw_user_id)
-        except (TypeError, ValueError):
-            return None
-        user = db.query(Usuario).filter(Usuario.id == user_id).first()
-        if user is None or not user.activo:
-            return None
-        return user
-    except (ValueError, HTTPException):
+    user_id = user_id_from_token(credentials.credentials)
+    if user_id is None:
+        return None
+    user = principal_cache.get(db, user_id)
+    if user is None or not user.activo:
         return None
+    return user
 
 
 def require_role(required_role: str, *additional_roles: str, optional: bool = False):
@@ -81,6 +83,9 @@ def require_role(required_role: str, *additional_roles: str, optional: bool = Fa
         *additional_roles: Roles adicionales (el usuario debe tener al menos uno)
         optional: Si es True, permite acceso sin autenticación (para endpoints públicos)
     """
+    all_required_roles = [required_role] + list(additional_roles)
+    normalized_required = frozenset(role.strip().upper() for role in all_required_roles)
+
     async def role_checker(
         current_user: Optional[Usuario] = Depends(get_current_user_optional if optional else get_current_user)
     ) -> Optional[Usuario]:
@@ -93,12 +98,8 @@ def require_role(required_role: str, *additional_roles: str, optional: bool = Fa
                 detail="Se requiere autenticación"
             )
         
-        all_required_roles = [required_role] + list(additional_roles)
-        normalized_required = [role.strip().upper() for role in all_required_roles]
-        role_names = [rol.nombre.strip().upper() for rol in current_user.roles]
-        
         # El usuario debe tener al menos uno de los roles requeridos
-        if not any(role in role_names for role in normalized_required):
+        if _role_set(current_user).isdisjoint(normalized_required):
             roles_str = ", ".join(all_required_roles)
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -108,16 +109,28 @@ def require_role(required_role: str, *additional_roles: str, optional: bool = Fa
     return role_checker
 
 
+def _role_set(current_user: Usuario) -> frozenset[str]:
+    """Roles en mayúsculas: precalculados en el Principal, o derivados de un `Usuario` ORM."""
+    role_names = getattr(current_user, "role_names", None)
+    if role_names is not None:
+        return role_names
+    return frozenset(rol.nombre.strip().upper() for rol in current_user.roles)
+
+
 def get_user_roles(current_user: Usuario) -> list[str]:
     """Obtiene los nombres de los roles del usuario en mayúsculas."""
-    return [rol.nombre.strip().upper() for rol in current_user.roles]
+    return sorted(_role_set(current_user))
 
 
 def has_role(current_user: Usuario, role_name: str) -> bool:
     """Verifica si el usuario tiene un rol específico."""
-    role_names = get_user_roles(current_user)
-    normalized_role = role_name.strip().upper()
-    return normalized_role in role_names
+    return role_name.strip().upper() in _role_set(current_user)
+
+
+def has_permission(current_user: Usuario, permission_name: str) -> bool:
+    """Verifica si alguno de los roles del usuario otorga el permiso indicado."""
+    permissions = getattr(current_user, "permissions", frozenset())
+    return permission_name.strip().upper() in permissions
 
 
 def can_view_inventory(current_user: Usuario) -> bool:
@@ -125,8 +138,7 @@ def can_view_inventory(current_user: Usuario) -> bool:
     
     Permisos: ADMIN, INVENTARIOS, SUPERVISOR
     """
-    role_names = get_user_roles(current_user)
-    return any(role in ["ADMIN", "INVENTARIOS", "SUPERVISOR"] for role in role_names)
+    return not _role_set(current_user).isdisjoint({"ADMIN", "INVENTARIOS", "SUPERVISOR"})
 
 
 def can_update_stock(current_user: Usuario) -> bool:
@@ -134,8 +146,7 @@ def can_update_stock(current_user: Usuario) -> bool:
     
     Permisos: ADMIN, INVENTARIOS
     """
-    role_names = get_user_roles(current_user)
-    return any(role in ["ADMIN", "INVENTARIOS"] for role in role_names)
+    return not _role_set(current_user).isdisjoint({"ADMIN", "INVENTARIOS"})
 
 
 def can_manage_products(current_user: Usuario) -> bool:
@@ -187,8 +198,7 @@ def can_manage_sales(current_user: Usuario) -> bool:
     
     Permisos: ADMIN, VENTAS
     """
-    role_names = get_user_roles(current_user)
-    return any(role in ["ADMIN", "VENTAS"] for role in role_names)
+    return not _role_set(current_user).isdisjoint({"ADMIN", "VENTAS"})
 
 
 def require_sales_management():
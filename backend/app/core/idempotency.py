@@ -0,0 +1,347 @@
+"""Idempotencia genérica para endpoints que crean recursos (POST).
+
+Un endpoint se apunta con el decorador `@idempotent`; el middleware solo
+actúa sobre esas rutas y cuando la petición trae la cabecera
+`Idempotency-Key`. Para cada clave:
+
+1. Caché LRU en memoria (`TTLCache`) con las respuestas ya completadas: un
+   reintento se responde sin tocar la base.
+2. Single-flight dentro del worker: los duplicados concurrentes esperan el
+   resultado de la primera petición en lugar de ejecutar el handler.
+3. Entre workers, la primera petición reserva la clave en
+   `dbo.idempotency_keys` con una fila "en curso"; un duplicado en otro worker
+   recibe 409 mientras dure y la respuesta guardada después.
+4. Las respuestas < 500 se guardan (estado, cabeceras y cuerpo) y se
+   repiten tal cual (con la cabecera `Idempotent-Replayed: true`); un 5xx, un conflicto transitorio (408, 409,
+   425, 429) o una excepción libera la reserva para que el cliente pueda
+   reintentar.
+
+La clave se acota al usuario (id del access token, no el token en sí: un
+reintento tras refrescar el token debe repetir la respuesta), al método y a
+la ruta; el cuerpo se compara por hash: la misma clave con otro cuerpo
+responde 422.
+Las claves expiradas se purgan por lotes en un hilo aparte
+(`start_idempotency_purger`).
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
+from starlette.routing import Match
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.repositories.idempotency_repo import (
+    IN_PROGRESS_STATUS,
+    claim_idempotency_key,
+    cleanup_expired_keys,
+    complete_idempotency_key,
+    release_idempotency_key,
+)
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+REPLAYED_HEADER = b"idempotent-replayed"
+MAX_KEY_LENGTH = 200
+# Conflictos transitorios: no se guardan, el reintento vuelve a ejecutar el handler
+_TRANSIENT_STATUSES = frozenset({408, 409, 425, 429})
+
+
+def idempotent(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    """Marca un endpoint para que el middleware de idempotencia lo cubra."""
+    endpoint.__idempotent__ = True  # type: ignore[attr-defined]
+    return endpoint
+
+
+_JSON_HEADERS = ((b"content-type", b"application/json"),)
+# Se recalcula al repetir la respuesta
+_SKIPPED_HEADERS = frozenset({b"content-length"})
+
+
+@dataclass(frozen=True, slots=True)
+class StoredResponse:
+    status_code: int
+    body: bytes
+    request_hash: Optional[str]
+    headers: tuple[tuple[bytes, bytes], ...] = _JSON_HEADERS
+
+
+_routes: list[APIRoute] = []
+_responses = TTLCache(
+    maxsize=settings.idempotency_cache_max_entries,
+    ttl=settings.idempotency_cache_ttl_seconds,
+)
+_inflight: dict[str, asyncio.Future] = {}
+
+
+def collect_idempotent_routes(app: FastAPI) -> list[APIRoute]:
+    """Registra las rutas marcadas con `@idempotent` (llamar tras incluir los routers)."""
+    _routes[:] = [
+        route
+        for route in app.routes
+        if isinstance(route, APIRoute) and getattr(route.endpoint, "__idempotent__", False)
+    ]
+    return list(_routes)
+
+
+def _header(scope: dict, name: bytes) -> Optional[bytes]:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value
+    return None
+
+
+def _matches(scope: dict) -> bool:
+    return any(route.matches(scope)[0] == Match.FULL for route in _routes)
+
+
+def _owner(scope: dict) -> str:
+    from app.core.dependencies import user_id_from_token  # diferido: dependencies importa la sesión
+
+    authorization = (_header(scope, b"authorization") or b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    user_id = user_id_from_token(token.strip()) if scheme.lower() == "bearer" and token else None
+    return f"user:{user_id}" if user_id is not None else "anonymous"
+
+
+def _scoped_key(scope: dict, client_key: str) -> str:
+    # La misma clave en otra ruta o de otro usuario no debe compartir respuesta
+    scope_id = f"{_owner(scope)}|{scope['method']}|{scope['path']}".encode("utf-8")
+    return f"{hashlib.sha256(scope_id).hexdigest()[:16]}:{client_key}"
+
+
+def _dump_headers(headers: tuple[tuple[bytes, bytes], ...]) -> str:
+    return json.dumps([[name.decode("latin-1"), value.decode("latin-1")] for name, value in headers])
+
+
+def _load_headers(raw: Optional[str]) -> tuple[tuple[bytes, bytes], ...]:
+    if not raw:  # filas guardadas antes de registrar cabeceras
+        return _JSON_HEADERS
+    return tuple((name.encode("latin-1"), value.encode("latin-1")) for name, value in json.loads(raw))
+
+
+def _error(status_code: int, message: str) -> StoredResponse:
+    body = json.dumps({"detail": message}, ensure_ascii=False).encode("utf-8")
+    return StoredResponse(status_code=status_code, body=body, request_hash=None)
+
+
+def _claim(key: str, route: str, request_hash: str) -> Optional[StoredResponse]:
+    """Reserva la clave en la base; devuelve la respuesta a repetir si ya existía."""
+    from app.db.session import SessionLocal  # diferido: session importa métricas y middlewares
+
+    db = SessionLocal()
+    try:
+        row = claim_idempotency_key(
+            db,
+            key=key,
+            route=route,
+            method="POST",
+            request_hash=request_hash,
+            ttl_hours=settings.idempotency_ttl_hours,
+            stale_after_seconds=settings.idempotency_in_progress_timeout_seconds,
+        )
+        if row is None:
+            return None
+        if row.status_code == IN_PROGRESS_STATUS:
+            return _error(409, "Hay una petición con esta Idempotency-Key en curso; reintenta en unos segundos")
+        body = (row.response_body or "").encode("utf-8")
+        return StoredResponse(
+            status_code=row.status_code,
+            body=body,
+            request_hash=row.request_hash,
+            headers=_load_headers(row.response_headers),
+        )
+    finally:
+        db.close()
+
+
+def _finish(key: str, stored: Optional[StoredResponse]) -> None:
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        if stored is None:
+            release_idempotency_key(db, key)
+        else:
+            complete_idempotency_key(
+                db,
+                key,
+                stored.status_code,
+                stored.body.decode("utf-8", "replace"),
+                _dump_headers(stored.headers),
+            )
+    finally:
+        db.close()
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or not _routes:
+            await self.app(scope, receive, send)
+            return
+        raw_key = _header(scope, IDEMPOTENCY_HEADER)
+        if raw_key is None or not _matches(scope):
+            await self.app(scope, receive, send)
+            return
+
+        client_key = raw_key.decode("latin-1").strip()
+        if not client_key or len(client_key) > MAX_KEY_LENGTH:
+            await self._send(send, _error(400, f"Idempotency-Key inválida (1 a {MAX_KEY_LENGTH} caracteres)"))
+            return
+
+        body = await self._read_body(receive)
+        request_hash = hashlib.sha256(body).hexdigest()
+        key = _scoped_key(scope, client_key)
+
+        stored = await self._lookup(key)
+        if stored is None:
+            claimed = _inflight.get(key) is None
+            if claimed:
+                _inflight[key] = asyncio.get_running_loop().create_future()
+                try:
+                    await self._execute(scope, receive, send, body, key, request_hash)
+                finally:
+                    future = _inflight.pop(key)
+                    if not future.done():
+                        future.set_result(None)
+                return
+            stored = await self._lookup(key, wait=True)
+            if stored is None:
+                stored = _error(409, "La petición original con esta Idempotency-Key falló; reintenta")
+
+        if stored.request_hash is None:  # respuesta del propio middleware, no un replay
+            await self._send(send, stored)
+            return
+        if stored.request_hash != request_hash:
+            metrics.counter("idempotency_mismatch_total").inc()
+            await self._send(send, _error(422, "La Idempotency-Key ya se usó con un cuerpo distinto"))
+            return
+        metrics.counter("idempotency_replayed_total").inc()
+        await self._send(send, stored, replayed=True)
+
+    async def _lookup(self, key: str, wait: bool = False) -> Optional[StoredResponse]:
+        stored = _responses.get(key)
+        if stored is None and wait and key in _inflight:
+            try:
+                await asyncio.wait_for(asyncio.shield(_inflight[key]), settings.idempotency_wait_seconds)
+            except asyncio.TimeoutError:
+                return _error(409, "Hay una petición con esta Idempotency-Key en curso; reintenta en unos segundos")
+            stored = _responses.get(key)
+        return stored  # type: ignore[return-value]
+
+    async def _execute(
+        self, scope: dict, receive: Callable, send: Callable, body: bytes, key: str, request_hash: str
+    ) -> None:
+        existing = await run_in_threadpool(_claim, key, scope["path"], request_hash)
+        if existing is not None:
+            if existing.request_hash is None:  # reserva en curso en otro worker
+                await self._send(send, existing)
+            elif existing.request_hash != request_hash:
+                metrics.counter("idempotency_mismatch_total").inc()
+                await self._send(send, _error(422, "La Idempotency-Key ya se usó con un cuerpo distinto"))
+            else:
+                _responses.set(key, existing)
+                metrics.counter("idempotency_replayed_total").inc()
+                await self._send(send, existing, replayed=True)
+            return
+
+        status_code = 500
+        headers: tuple[tuple[bytes, bytes], ...] = ()
+        chunks: list[bytes] = []
+
+        async def replay_receive() -> dict:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        async def capture_send(message: dict) -> None:
+            nonlocal status_code, headers
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = tuple(
+                    (bytes(name).lower(), bytes(value))
+                    for name, value in message.get("headers", ())
+                    if bytes(name).lower() not in _SKIPPED_HEADERS
+                )
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        body_sent = False
+        stored: Optional[StoredResponse] = None
+        try:
+            await self.app(scope, replay_receive, capture_send)
+            if status_code < 500 and status_code not in _TRANSIENT_STATUSES:
+                stored = StoredResponse(
+                    status_code=status_code,
+                    body=b"".join(chunks),
+                    request_hash=request_hash,
+                    headers=headers,
+                )
+                _responses.set(key, stored)
+        finally:
+            try:
+                await run_in_threadpool(_finish, key, stored)
+            except Exception:
+                logger.exception("No se pudo guardar la respuesta idempotente de %s", scope["path"])
+
+    @staticmethod
+    async def _read_body(receive: Callable) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    @staticmethod
+    async def _send(send: Callable, stored: StoredResponse, replayed: bool = False) -> None:
+        headers = [*stored.headers, (b"content-length", str(len(stored.body)).encode("latin-1"))]
+        if replayed:
+            headers.append((REPLAYED_HEADER, b"true"))
+        await send({"type": "http.response.start", "status": stored.status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": stored.body})
+
+
+def start_idempotency_purger(session_factory, interval_seconds: int, batch_size: int) -> Optional[threading.Event]:
+    """Lanza un hilo daemon que purga por lotes las claves expiradas cada `interval_seconds`.
+
+    Devuelve el evento que lo detiene (o None si está desactivado).
+    """
+    if interval_seconds <= 0:
+        return None
+    stop = threading.Event()
+
+    def _loop() -> None:
+        while not stop.wait(interval_seconds):
+            db = session_factory()
+            try:
+                deleted = cleanup_expired_keys(db, batch_size=batch_size)
+                if deleted:
+                    logger.info("Purgadas %s claves de idempotencia expiradas", deleted)
+            except Exception:
+                logger.exception("Falló la purga de claves de idempotencia")
+            finally:
+                db.close()
+
+    threading.Thread(target=_loop, name="idempotency-purger", daemon=True).start()
+    return stop
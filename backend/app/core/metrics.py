@@ -0,0 +1,156 @@
+"""Métricas en memoria del proceso (contadores, gauges e histogramas).
+
+Registro mínimo, sin dependencias externas, pensado para exponerse por un
+endpoint de administración (`GET /api/v1/admin/metrics`). Cada worker de
+uvicorn mantiene sus propios valores; las series se identifican por nombre y
+etiquetas, y se crean la primera vez que se piden.
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Any, Callable, Optional
+
+# Límites superiores (ms) por defecto para histogramas de latencia
+LATENCY_BUCKETS_MS: tuple[float, ...] = (
+    5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000,
+)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(labels: Optional[dict[str, Any]]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in (labels or {}).items()))
+
+
+class Counter:
+    def __init__(self) -> None:
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+
+class Histogram:
+    """Histograma de buckets fijos con percentiles aproximados."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS_MS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # el último es +Inf
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum += value
+            if value > self._max:
+                self._max = value
+
+    def _quantile(self, counts: list[int], total: int, q: float) -> Optional[float]:
+        """Límite superior del bucket que contiene el cuantil `q`."""
+        if total == 0:
+            return None
+        target = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= target:
+                return self.buckets[index] if index < len(self.buckets) else self._max
+        return self._max
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            counts = list(self._counts)
+            total, total_sum, maximum = self._count, self._sum, self._max
+        cumulative: dict[str, int] = {}
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts, strict=True):
+            seen += count
+            cumulative["+Inf" if bound == float("inf") else f"{bound:g}"] = seen
+        return {
+            "count": total,
+            "sum": round(total_sum, 3),
+            "max": round(maximum, 3),
+            "p50": self._quantile(counts, total, 0.50),
+            "p95": self._quantile(counts, total, 0.95),
+            "p99": self._quantile(counts, total, 0.99),
+            "buckets": cumulative,
+        }
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._counters: dict[tuple[str, Labels], Counter] = {}
+        self._histograms: dict[tuple[str, Labels], Histogram] = {}
+        self._gauges: dict[str, Callable[[], Any]] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, labels: Optional[dict[str, Any]] = None) -> Counter:
+        key = (name, _labels(labels))
+        counter = self._counters.get(key)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(key, Counter())
+        return counter
+
+    def histogram(
+        self,
+        name: str,
+        labels: Optional[dict[str, Any]] = None,
+        buckets: tuple[float, ...] = LATENCY_BUCKETS_MS,
+    ) -> Histogram:
+        key = (name, _labels(labels))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(buckets))
+        return histogram
+
+    def histograms(self, name: str) -> list[tuple[dict[str, str], Histogram]]:
+        """Series del histograma `name` con sus etiquetas."""
+        with self._lock:
+            items = list(self._histograms.items())
+        return [(dict(labels), histogram) for (key, labels), histogram in items if key == name]
+
+    def gauge(self, name: str, read: Callable[[], Any]) -> None:
+        """Registra un gauge que se lee en el momento del snapshot."""
+        with self._lock:
+            self._gauges[name] = read
+
+    def snapshot(self, prefix: str = "") -> dict[str, Any]:
+        """Estado actual de las series cuyo nombre empieza por `prefix`."""
+        with self._lock:
+            counters = list(self._counters.items())
+            histograms = list(self._histograms.items())
+            gauges = list(self._gauges.items())
+        return {
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": counter.value}
+                for (name, labels), counter in sorted(counters, key=lambda item: item[0])
+                if name.startswith(prefix)
+            ],
+            "gauges": [
+                {"name": name, "value": read()}
+                for name, read in sorted(gauges, key=lambda item: item[0])
+                if name.startswith(prefix)
+            ],
+            "histograms": [
+                {"name": name, "labels": dict(labels), **histogram.snapshot()}
+                for (name, labels), histogram in sorted(histograms, key=lambda item: item[0])
+                if name.startswith(prefix)
+            ],
+        }
+
+
+metrics = MetricsRegistry()
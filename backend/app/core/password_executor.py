@@ -0,0 +1,94 @@
+"""Pool dedicado para hashing y verificación de contraseñas (bcrypt).
+
+bcrypt consume CPU a propósito. Si se ejecuta en el threadpool compartido de
+FastAPI, una ráfaga de logins (o un ataque de credential stuffing) ocupa todos
+sus hilos y deja sin servicio al resto de endpoints síncronos. Este pool tiene
+su propio número de hilos y una cola acotada: cuando workers + cola están
+ocupados, `run` rechaza de inmediato con `PasswordPoolSaturated` en lugar de
+encolar sin límite, y el endpoint responde 503 con `Retry-After`.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+T = TypeVar("T")
+
+
+class PasswordPoolSaturated(RuntimeError):
+    """No hay hilo ni hueco en la cola del pool de contraseñas."""
+
+
+class PasswordExecutor:
+    def __init__(self, workers: int, queue_limit: int) -> None:
+        self.workers = max(1, workers)
+        self.queue_limit = max(0, queue_limit)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password")
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_limit)
+        self._lock = threading.Lock()
+        self._pending = 0  # en ejecución + en cola
+        self._running = 0
+        self._rejected = metrics.counter("password_pool_rejected_total")
+        self._completed = metrics.counter("password_pool_completed_total")
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    @property
+    def queued(self) -> int:
+        return max(0, self._pending - self._running)
+
+    def submit(self, fn: Callable[..., T], *args: Any) -> Future:
+        """Encola `fn(*args)` o lanza `PasswordPoolSaturated` si no hay hueco."""
+        if not self._slots.acquire(blocking=False):
+            self._rejected.inc()
+            raise PasswordPoolSaturated("Pool de contraseñas saturado")
+        with self._lock:
+            self._pending += 1
+        try:
+            future = self._executor.submit(self._call, fn, args)
+        except BaseException:
+            self._release(None)
+            raise
+        # El hueco se libera al terminar o al cancelarse antes de empezar
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Ejecuta `fn(*args)` en el pool sin bloquear el event loop."""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def _call(self, fn: Callable[..., T], args: tuple) -> T:
+        with self._lock:
+            self._running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+            self._completed.inc()
+
+    def _release(self, _future: Future | None) -> None:
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_pool = PasswordExecutor(
+    workers=settings.password_pool_workers,
+    queue_limit=settings.password_pool_queue_limit,
+)
+
+metrics.gauge("password_pool_workers", lambda: password_pool.workers)
+metrics.gauge("password_pool_queue_limit", lambda: password_pool.queue_limit)
+metrics.gauge("password_pool_running", lambda: password_pool.running)
+metrics.gauge("password_pool_queued", lambda: password_pool.queued)
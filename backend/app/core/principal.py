@@ -0,0 +1,135 @@
+"""Caché en memoria de principals (usuario autenticado + roles + permisos).
+
+`get_current_user` resuelve el usuario del token desde esta caché: una entrada
+por id con TTL de pocos segundos que guarda el estado activo, los roles y los
+permisos ya normalizados, de modo que los checks de autorización son pruebas
+de pertenencia a un conjunto sin acceso a la base.
+
+Revocación:
+- En el worker que atiende el cambio (activar/desactivar, roles, datos), el
+  servicio de usuarios invalida la entrada después del commit.
+- Para el resto de workers, cada cambio renueva `usuarios.version_seguridad`
+  con MAX + 1. Cada worker consulta el MAX (índice) como mucho una vez por
+  `principal_stamp_check_seconds` y, si subió, vacía su caché.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.usuario import Rol, Usuario
+
+
+@dataclass(frozen=True, slots=True)
+class PrincipalRole:
+    id: int
+    nombre: str
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Instantánea inmutable del usuario autenticado.
+
+    Expone los mismos atributos que leen los endpoints de `Usuario`
+    (`id`, `nombre_usuario`, `correo`, `activo`, `roles[].nombre`).
+    """
+    id: int
+    nombre_usuario: str
+    correo: str
+    activo: bool
+    roles: tuple[PrincipalRole, ...]
+    role_names: frozenset[str]
+    permissions: frozenset[str]
+    version_seguridad: int
+
+
+def load_user_with_roles(db: Session, user_id: int) -> Optional[Usuario]:
+    """Carga el usuario con sus roles y los permisos de cada rol en una sola consulta."""
+    stmt = (
+        select(Usuario)
+        .options(joinedload(Usuario.roles).joinedload(Rol.permisos))
+        .where(Usuario.id == user_id)
+    )
+    return db.scalars(stmt).unique().first()
+
+
+def build_principal(user: Usuario) -> Principal:
+    return Principal(
+        id=user.id,
+        nombre_usuario=user.nombre_usuario,
+        correo=user.correo,
+        activo=bool(user.activo),
+        roles=tuple(PrincipalRole(id=rol.id, nombre=rol.nombre) for rol in user.roles),
+        role_names=frozenset(rol.nombre.strip().upper() for rol in user.roles),
+        permissions=frozenset(
+            permiso.nombre.strip().upper() for rol in user.roles for permiso in rol.permisos
+        ),
+        version_seguridad=user.version_seguridad or 0,
+    )
+
+
+def next_security_stamp():
+    """Expresión SQL del próximo sello global (MAX + 1) para asignar a `version_seguridad`."""
+    return (
+        select(func.coalesce(func.max(Usuario.version_seguridad), 0) + 1)
+        .scalar_subquery()
+    )
+
+
+class PrincipalCache:
+    def __init__(self, maxsize: int, ttl: float, stamp_check_seconds: float) -> None:
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.stamp_check_seconds = stamp_check_seconds
+        self._stamp: Optional[int] = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"user:{user_id}:"  # el separador final evita que "user:1" invalide "user:10"
+
+    def get(self, db: Session, user_id: int) -> Optional[Principal]:
+        """Principal del usuario, desde la caché o cargado de la base si expiró."""
+        self._sync_stamp(db)
+        principal = self._cache.get(self._key(user_id))
+        if principal is None:
+            user = load_user_with_roles(db, user_id)
+            if user is None:
+                return None
+            principal = build_principal(user)
+            self._cache.set(self._key(user_id), principal)
+        return principal  # type: ignore[return-value]
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """Elimina la entrada de `user_id` (todas si es None) en este worker."""
+        self._cache.invalidate(self._key(user_id) if user_id is not None else "")
+
+    def _sync_stamp(self, db: Session) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.stamp_check_seconds:
+            return
+        with self._lock:
+            if now - self._checked_at < self.stamp_check_seconds:
+                return
+            self._checked_at = now
+        stamp = db.scalar(select(func.max(Usuario.version_seguridad))) or 0
+        if stamp != self._stamp:
+            self._stamp = stamp
+            self._cache.invalidate()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.principal_cache_max_entries,
+    ttl=settings.principal_cache_ttl_seconds,
+    stamp_check_seconds=settings.principal_stamp_check_seconds,
+)
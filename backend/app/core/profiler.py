@@ -0,0 +1,288 @@
+"""Perfilado bajo demanda de una petición (solo ADMIN).
+
+Se activa con la cabecera `X-Profile: 1` o el parámetro `?_profile=1` y un
+token de un usuario ADMIN; en cualquier otro caso la petición sigue sin
+perfilar. El handler del endpoint se ejecuta bajo `cProfile` y, al terminar
+la respuesta, se guardan en `PROFILE_SPOOL_DIR`:
+
+- `<id>.pstats`: volcado de `pstats` (`python -m pstats <id>.pstats`, snakeviz).
+- `<id>.collapsed`: pilas colapsadas en microsegundos para `flamegraph.pl` o
+  speedscope, reconstruidas a partir del grafo de llamadas de cProfile.
+- `<id>.json`: metadatos (ruta, método, duración, usuario).
+
+El spool conserva como mucho `PROFILE_SPOOL_MAX_FILES` perfiles y la
+respuesta lleva el id en `X-Profile-Id` solo si se llegó a perfilar. Sin la
+bandera, el coste es revisar una cabecera y el query string.
+
+Se perfila una sola petición a la vez por proceso: desde Python 3.12
+cProfile usa un único slot de `sys.monitoring` compartido por todo el
+proceso y un segundo `enable()` falla. Si ya hay una petición perfilada en
+curso, la nueva se sirve sin perfilar (sin `X-Profile-Id`).
+
+El perfil no está aislado a la petición: en 3.12+ registra lo que ejecuten
+los demás hilos del proceso mientras está activo y, en endpoints `async`,
+lo que ejecute el event loop mientras el handler espera.
+"""
+from __future__ import annotations
+
+import cProfile
+import json
+import pstats
+import re
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Optional
+from urllib.parse import parse_qsl
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_PARAM = "_profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+PROFILE_KINDS = {"pstats": "application/octet-stream", "collapsed": "text/plain", "json": "application/json"}
+
+_PROFILE_ID = re.compile(r"^\d{8}T\d{6}-[0-9a-f]{8}$")
+_MAX_STACK_DEPTH = 64
+_MIN_PATH_SECONDS = 1e-6  # caminos por debajo de 1 µs no se expanden
+_MAX_PATHS = 200_000
+
+
+@dataclass(slots=True)
+class ProfileSession:
+    id: str
+    user_id: int
+    started: float = field(default_factory=time.perf_counter)
+    profiles: list[cProfile.Profile] = field(default_factory=list)
+
+
+_active: ContextVar[Optional[ProfileSession]] = ContextVar("profile_session", default=None)
+# Una petición perfilada a la vez en todo el proceso (ver docstring del módulo)
+_profiling = threading.Lock()
+
+
+def active_profile() -> Optional[ProfileSession]:
+    return _active.get()
+
+
+def _enable_profile(session: ProfileSession) -> Optional[cProfile.Profile]:
+    """Activa un `cProfile.Profile` para la sesión; None si otra herramienta ocupa el profiler."""
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:  # 3.12+: otro profiler (p. ej. un depurador) ya está activo
+        return None
+    session.profiles.append(profile)
+    return profile
+
+
+def call_profiled(session: ProfileSession, call: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    profile = _enable_profile(session)
+    if profile is None:
+        return call(*args, **kwargs)
+    try:
+        return call(*args, **kwargs)
+    finally:
+        profile.disable()
+
+
+async def call_profiled_async(session: ProfileSession, call: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    profile = _enable_profile(session)
+    if profile is None:
+        return await call(*args, **kwargs)
+    try:
+        return await call(*args, **kwargs)
+    finally:
+        profile.disable()
+
+
+def is_valid_profile_id(profile_id: str) -> bool:
+    return bool(_PROFILE_ID.match(profile_id))
+
+
+def spool_dir() -> Path:
+    return Path(settings.profile_spool_dir)
+
+
+def _requested(scope: dict) -> bool:
+    query_string = scope.get("query_string", b"")
+    if PROFILE_QUERY_PARAM.encode() in query_string:
+        # Comparación exacta: ?x_profile=1 o ?_profile=10 no activan el perfil
+        params = parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)
+        if any(name == PROFILE_QUERY_PARAM and value == "1" for name, value in params):
+            return True
+    return any(name == PROFILE_HEADER and value == b"1" for name, value in scope.get("headers", ()))
+
+
+def _bearer_token(scope: dict) -> Optional[str]:
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            return token.strip() if scheme.lower() == "bearer" and token else None
+    return None
+
+
+def _admin_user_id(token: str) -> Optional[int]:
+    """Id del usuario si el token es de un ADMIN activo (consulta la caché de principals)."""
+    # Importes diferidos: app.db.session importa (vía request_metrics) este módulo
+    from app.core.dependencies import user_id_from_token
+    from app.core.principal import principal_cache
+    from app.db.session import SessionLocal
+
+    user_id = user_id_from_token(token)
+    if user_id is None:
+        return None
+    db = SessionLocal()
+    try:
+        principal = principal_cache.get(db, user_id)
+    finally:
+        db.close()
+    if principal is None or not principal.activo or "ADMIN" not in principal.role_names:
+        return None
+    return user_id
+
+
+def collapsed_stacks(stats: pstats.Stats) -> list[str]:
+    """Pilas colapsadas (`a;b;c <µs>`) aproximadas desde el grafo de cProfile.
+
+    cProfile guarda aristas llamador→llamado, no pilas completas: el tiempo
+    propio de cada función se reparte entre los caminos en proporción al
+    tiempo acumulado que le llega por cada uno. Las recursiones se cortan.
+    """
+    raw = stats.stats  # type: ignore[attr-defined]
+    children: dict[tuple, list[tuple[tuple, float]]] = {}
+    roots = []
+    for func, (_cc, _nc, _tt, ct, callers) in raw.items():
+        if not callers:
+            roots.append((func, ct))
+        for caller, edge in callers.items():
+            children.setdefault(caller, []).append((func, edge[3]))
+
+    def label(func: tuple) -> str:
+        filename, line, name = func
+        if filename == "~":
+            return name
+        return f"{Path(filename).stem}:{name}:{line}"
+
+    lines: dict[str, float] = {}
+    budget = [_MAX_PATHS]
+
+    def walk(func: tuple, path_ct: float, stack: list[str], seen: frozenset) -> None:
+        budget[0] -= 1
+        _cc, _nc, tt, ct, _callers = raw[func]
+        stack = stack + [label(func)]
+        ratio = min(1.0, path_ct / ct) if ct else 0.0
+        own = tt * ratio
+        if own > 0:
+            key = ";".join(stack)
+            lines[key] = lines.get(key, 0.0) + own
+        if len(stack) >= _MAX_STACK_DEPTH:
+            return
+        for child, edge_ct in children.get(func, ()):
+            child_ct = edge_ct * ratio
+            if child not in seen and child_ct >= _MIN_PATH_SECONDS and budget[0] > 0:
+                walk(child, child_ct, stack, seen | {child})
+
+    for root, ct in roots:
+        walk(root, ct, [], frozenset({root}))
+    return [f"{key} {int(value * 1_000_000)}" for key, value in lines.items() if value * 1_000_000 >= 1]
+
+
+def save_profile(session: ProfileSession, metadata: dict[str, Any]) -> None:
+    """Escribe pstats, pilas colapsadas y metadatos y recorta el spool."""
+    if not session.profiles:
+        return
+    directory = spool_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    stats = pstats.Stats(session.profiles[0])
+    for profile in session.profiles[1:]:
+        stats.add(profile)
+    stats.dump_stats(directory / f"{session.id}.pstats")
+    (directory / f"{session.id}.collapsed").write_text("\n".join(collapsed_stacks(stats)) + "\n", encoding="utf-8")
+    (directory / f"{session.id}.json").write_text(json.dumps(metadata, ensure_ascii=False), encoding="utf-8")
+    _trim_spool(directory)
+
+
+def _recent_metadata(directory: Path) -> list[Path]:
+    return sorted(directory.glob("*.json"), key=lambda path: path.stat().st_mtime_ns, reverse=True)
+
+
+def _trim_spool(directory: Path) -> None:
+    for meta in _recent_metadata(directory)[settings.profile_spool_max_files:]:
+        for kind in PROFILE_KINDS:
+            (directory / f"{meta.stem}.{kind}").unlink(missing_ok=True)
+
+
+def list_profiles(limit: int) -> list[dict[str, Any]]:
+    directory = spool_dir()
+    if not directory.exists():
+        return []
+    items = []
+    for meta in _recent_metadata(directory)[:limit]:
+        try:
+            items.append(json.loads(meta.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue
+    return items
+
+
+class ProfilerMiddleware:
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not _requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        token = _bearer_token(scope)
+        user_id = await run_in_threadpool(_admin_user_id, token) if token else None
+        if user_id is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not _profiling.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfileSession(
+            id=f"{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}",
+            user_id=user_id,
+        )
+        status_code = 500
+
+        async def send_with_id(message: dict) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Sin perfil activado (otro profiler ocupaba el slot) no habrá fichero que enlazar
+                if session.profiles:
+                    headers = list(message.get("headers", []))
+                    headers.append((PROFILE_ID_HEADER, session.id.encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        context_token = _active.set(session)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _active.reset(context_token)
+            _profiling.release()
+            route = getattr(scope.get("route"), "path", None)
+            metadata = {
+                "id": session.id,
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route,
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - session.started) * 1000, 1),
+                "user_id": session.user_id,
+            }
+            await run_in_threadpool(save_profile, session, metadata)
@@ -0,0 +1,197 @@
+"""Tiempos por petición: consultas a la base, handler, serialización y total.
+
+- `install_query_hooks(engine)`: `before/after_cursor_execute` suman el número
+  de consultas y el tiempo de base a las estadísticas de la petición en curso
+  (ContextVar; fuera de una petición no hacen nada).
+- `instrument_routes(app)`: envuelve el endpoint de cada ruta para medir el
+  tiempo del handler (y ejecutarlo bajo el profiler si la petición lo pidió,
+  ver app/core/profiler.py). La serialización es lo que transcurre entre que
+  el handler devuelve y se envía la cabecera de la respuesta.
+- `RequestMetricsMiddleware`: middleware ASGI puro que añade `Server-Timing`,
+  escribe una línea JSON por petición en el logger `app.access` y alimenta los
+  histogramas por ruta (`http_request_latency_ms`, `http_request_db_queries`).
+
+El coste por petición es un objeto pequeño y unos `perf_counter()`, sin
+bloqueos salvo la actualización del histograma.
+"""
+from __future__ import annotations
+
+import functools
+import inspect
+import json
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.metrics import metrics
+from app.core.profiler import active_profile, call_profiled, call_profiled_async
+
+access_logger = logging.getLogger("app.access")
+
+# Buckets para el número de consultas por petición (detección de N+1)
+QUERY_COUNT_BUCKETS: tuple[float, ...] = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+
+class RequestStats:
+    __slots__ = ("scope", "started", "queries", "db_ms", "handler_ms", "handler_done", "response_started")
+
+    def __init__(self, scope: Optional[dict] = None) -> None:
+        self.scope = scope
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_ms = 0.0
+        self.handler_ms: Optional[float] = None
+        self.handler_done: Optional[float] = None
+        self.response_started: Optional[float] = None
+
+    @property
+    def route(self) -> Optional[str]:
+        """Plantilla de la ruta (`/api/v1/sales/{id}`) una vez resuelta por el router."""
+        if self.scope is None:
+            return None
+        route = self.scope.get("route")
+        return getattr(route, "path", None)
+
+    @property
+    def serialization_ms(self) -> Optional[float]:
+        if self.handler_done is None or self.response_started is None:
+            return None
+        return (self.response_started - self.handler_done) * 1000
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+def install_query_hooks(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany) -> None:
+        if _current.get() is not None:
+            context._request_query_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany) -> None:
+        stats = _current.get()
+        started = getattr(context, "_request_query_started", None)
+        if stats is not None and started is not None:
+            stats.queries += 1
+            stats.db_ms += (time.perf_counter() - started) * 1000
+
+
+def _timed_endpoint(call: Callable[..., Any]) -> Callable[..., Any]:
+    def _finish(started: float) -> None:
+        stats = _current.get()
+        if stats is not None:
+            stats.handler_done = time.perf_counter()
+            stats.handler_ms = (stats.handler_done - started) * 1000
+
+    if inspect.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def endpoint(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            profile = active_profile()
+            try:
+                if profile is not None:
+                    return await call_profiled_async(profile, call, *args, **kwargs)
+                return await call(*args, **kwargs)
+            finally:
+                _finish(started)
+    else:
+        @functools.wraps(call)
+        def endpoint(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            profile = active_profile()
+            try:
+                if profile is not None:
+                    return call_profiled(profile, call, *args, **kwargs)
+                return call(*args, **kwargs)
+            finally:
+                _finish(started)
+    endpoint._request_timed = True  # type: ignore[attr-defined]
+    return endpoint
+
+
+def instrument_routes(app: FastAPI) -> None:
+    """Envuelve el endpoint de cada `APIRoute` ya registrada (idempotente).
+
+    FastAPI invoca `route.dependant.call` en cada petición, así que basta con
+    sustituirlo después de incluir los routers; la firma no se vuelve a leer.
+    """
+    for route in app.routes:
+        if isinstance(route, APIRoute) and not getattr(route.dependant.call, "_request_timed", False):
+            route.dependant.call = _timed_endpoint(route.dependant.call)
+
+
+def _server_timing(stats: RequestStats, total_ms: float) -> str:
+    parts = [f'db;dur={stats.db_ms:.1f};desc="{stats.queries} queries"']
+    if stats.handler_ms is not None:
+        parts.append(f"handler;dur={stats.handler_ms:.1f}")
+    serialization_ms = stats.serialization_ms
+    if serialization_ms is not None:
+        parts.append(f"serialize;dur={serialization_ms:.1f}")
+    parts.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(parts)
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = _current.set(stats)
+        status_code = 500
+
+        async def send_with_timing(message: dict) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                stats.response_started = time.perf_counter()
+                status_code = message["status"]
+                total_ms = (stats.response_started - stats.started) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", _server_timing(stats, total_ms).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            self._record(scope, stats, status_code)
+
+    @staticmethod
+    def _record(scope: dict, stats: RequestStats, status_code: int) -> None:
+        total_ms = (time.perf_counter() - stats.started) * 1000
+        route = stats.route or "<sin ruta>"
+        labels = {"method": scope["method"], "route": route}
+        metrics.histogram("http_request_latency_ms", labels).observe(total_ms)
+        metrics.histogram("http_request_db_queries", labels, QUERY_COUNT_BUCKETS).observe(stats.queries)
+        if status_code >= 500:
+            metrics.counter("http_request_errors_total", labels).inc()
+
+        if access_logger.isEnabledFor(logging.INFO):
+            serialization_ms = stats.serialization_ms
+            access_logger.info(json.dumps({
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route,
+                "status": status_code,
+                "total_ms": round(total_ms, 1),
+                "handler_ms": round(stats.handler_ms, 1) if stats.handler_ms is not None else None,
+                "serialization_ms": round(serialization_ms, 1) if serialization_ms is not None else None,
+                "db_ms": round(stats.db_ms, 1),
+                "db_queries": stats.queries,
+            }, ensure_ascii=False))
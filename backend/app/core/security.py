@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from hashlib import sha256
 from typing import Any, Optional
@@ -8,6 +9,18 @@ from jose import JWTError, jwt
 from app.core.config import settings
 
 
+# Marca de los hashes con SHA-256 previo a bcrypt. Los hashes sin marca son de
+# formatos anteriores (normalizados o legacy sin normalizar) y se rehashean en
+# el siguiente login correcto, así cada verificación cuesta un solo bcrypt.
+_NORMALIZED_PREFIX = "sha256$"
+
+
+@dataclass(frozen=True, slots=True)
+class PasswordCheck:
+    valid: bool
+    needs_rehash: bool = False
+
+
 def _normalize_password(password: str) -> bytes:
     """
     Normaliza la contraseña para evitar la limitación de 72 bytes de bcrypt.
@@ -18,32 +31,45 @@ def _normalize_password(password: str) -> bytes:
     return sha256(password.encode("utf-8")).digest()
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verifica una contraseña contra su hash.
-
-    Incluye compatibilidad con hashes legacy generados sin normalización previa.
-    """
-    hashed_bytes = hashed_password.encode("utf-8")
-    normalized = _normalize_password(plain_password)
+def _checkpw(password: bytes, hashed: str) -> bool:
     try:
-        if bcrypt.checkpw(normalized, hashed_bytes):
-            return True
+        return bcrypt.checkpw(password, hashed.encode("utf-8"))
     except ValueError:
         # Hash malformado
         return False
 
-    # Compatibilidad con hashes previos (sin SHA-256 antes de bcrypt)
-    try:
-        return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_bytes)
-    except ValueError:
-        return False
+
+def check_password(plain_password: str, hashed_password: str) -> PasswordCheck:
+    """Verifica una contraseña e indica si su hash debe regenerarse.
+
+    Con marca se hace un único bcrypt. Sin marca se prueba el formato
+    normalizado y luego el legacy (sin SHA-256); si alguno coincide el hash
+    se marca para rehash.
+    """
+    if hashed_password.startswith(_NORMALIZED_PREFIX):
+        bcrypt_hash = hashed_password[len(_NORMALIZED_PREFIX):]
+        return PasswordCheck(valid=_checkpw(_normalize_password(plain_password), bcrypt_hash))
+
+    if _checkpw(_normalize_password(plain_password), hashed_password):
+        return PasswordCheck(valid=True, needs_rehash=True)
+    if _checkpw(plain_password.encode("utf-8"), hashed_password):
+        return PasswordCheck(valid=True, needs_rehash=True)
+    return PasswordCheck(valid=False)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verifica una contraseña contra su hash.
+
+    Incluye compatibilidad con hashes legacy generados sin normalización previa.
+    """
+    return check_password(plain_password, hashed_password).valid
 
 
 def get_password_hash(password: str) -> str:
     """Genera el hash de una contraseña."""
     normalized = _normalize_password(password)
     hashed = bcrypt.hashpw(normalized, bcrypt.gensalt())
-    return hashed.decode("utf-8")
+    return _NORMALIZED_PREFIX + hashed.decode("utf-8")
 
 
 def create_access_token(data: dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
@@ -0,0 +1,30 @@
+"""Plegado de texto para búsquedas: sin acentos, sin mayúsculas, en palabras.
+
+"Tubería PVC 1/2\"" y "tuberia pvc" producen los mismos términos, así que las
+búsquedas no dependen de cómo se escribió el catálogo ni de la collation de la
+base. La ñ se pliega a n (igual que `unaccent` de PostgreSQL).
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+
+_TOKEN_RE = re.compile(r"[0-9a-z]+")
+
+
+def fold(value: str | None) -> str:
+    """Texto en minúsculas y sin marcas diacríticas ("Ñandú Tubería" -> "nandu tuberia")."""
+    if not value:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def tokenize(value: str | None) -> list[str]:
+    """Términos alfanuméricos del texto plegado, en orden de aparición."""
+    return _TOKEN_RE.findall(fold(value))
+
+
+def folded_text(*parts: str | None) -> str:
+    """Une las partes como términos plegados separados por espacio (texto de índice)."""
+    return " ".join(token for part in parts for token in tokenize(part))
@@ -0,0 +1,68 @@
+"""Tamaño del threadpool de FastAPI alineado con el pool de conexiones.
+
+Los endpoints y dependencias síncronos corren en el threadpool de anyio y casi
+todos piden una conexión. Con más hilos que conexiones, los sobrantes quedan
+bloqueados en el checkout del pool (hasta `pool_timeout`) sin que nada lo
+muestre; con menos, sobran conexiones. Por eso, salvo que se fije
+`THREADPOOL_MAX_WORKERS`, el límite se iguala a tamaño + overflow del pool.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+from anyio import CapacityLimiter
+from anyio.to_thread import current_default_thread_limiter
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_limiter: Optional[CapacityLimiter] = None
+
+
+def threadpool_size(pool_capacity: Optional[int]) -> Optional[int]:
+    """Hilos a usar: el valor configurado o, si es 0, la capacidad del pool.
+
+    None deja el valor por defecto de anyio (pool sin límite, p. ej. SQLite).
+    """
+    configured = settings.threadpool_max_workers
+    if configured <= 0:
+        return max(1, pool_capacity) if pool_capacity else None
+    if pool_capacity and configured > pool_capacity:
+        logger.warning(
+            "THREADPOOL_MAX_WORKERS=%s supera la capacidad del pool de conexiones (%s); "
+            "los hilos sobrantes esperarán en el checkout",
+            configured,
+            pool_capacity,
+        )
+    return configured
+
+
+def configure_threadpool(pool_capacity: Optional[int]) -> int:
+    """Ajusta el limitador por defecto de anyio. Debe llamarse dentro del event loop."""
+    global _limiter
+    _limiter = current_default_thread_limiter()
+    size = threadpool_size(pool_capacity)
+    if size is not None:
+        _limiter.total_tokens = size
+    return int(_limiter.total_tokens)
+
+
+def threadpool_status() -> dict:
+    if _limiter is None:
+        return {"size": None, "busy": 0, "waiting": 0, "saturation": 0.0}
+    total = int(_limiter.total_tokens)
+    busy = int(_limiter.borrowed_tokens)
+    return {
+        "size": total,
+        "busy": busy,
+        "waiting": _limiter.statistics().tasks_waiting,
+        "saturation": round(busy / total, 3) if total else 0.0,
+    }
+
+
+metrics.gauge("threadpool_size", lambda: threadpool_status()["size"])
+metrics.gauge("threadpool_busy", lambda: threadpool_status()["busy"])
+metrics.gauge("threadpool_waiting", lambda: threadpool_status()["waiting"])
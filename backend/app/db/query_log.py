@@ -0,0 +1,304 @@
+"""Registro de consultas lentas y estadísticas por sentencia.
+
+- Cada sentencia suma llamadas y tiempo a una tabla en memoria indexada por
+  el SQL normalizado (literales → `?`, listas IN colapsadas), de la que el
+  endpoint de administración saca el top-N por tiempo total.
+- Las que superan `SLOW_QUERY_THRESHOLD_MS` se escriben como una línea JSON en
+  un fichero rotativo (`SLOW_QUERY_LOG_PATH`) con el SQL normalizado, la forma
+  de los parámetros (tipos, nunca valores), la duración, la ruta HTTP y el
+  método de servicio/repositorio que la lanzó.
+- Con `SLOW_QUERY_CAPTURE_PLAN` se añade el plan estimado: `SET SHOWPLAN_XML`
+  en SQL Server (sin los atributos `ParameterCompiledValue`, que llevan los
+  valores) y `EXPLAIN (FORMAT JSON)` en PostgreSQL. Ni uno ni otro ejecutan
+  la sentencia.
+
+La escritura y la captura del plan se hacen en un hilo aparte con una cola
+acotada; si la cola está llena el registro se descarta (y se cuenta), nunca
+se frena la petición. El hilo y el directorio del fichero se crean al
+arrancar la aplicación (`start_writer`), no al importar el módulo.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import queue
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.request_metrics import current_request_stats
+
+logger = logging.getLogger(__name__)
+
+_SLOW_QUEUE_SIZE = 256
+_NORMALIZED_CACHE_SIZE = 4096
+
+_STRING_LITERAL = re.compile(r"N?'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w@$])-?\d+(?:\.\d+)?\b")
+_NAMED_PARAM = re.compile(r"%\(\w+\)s|:\w+\b|\?|%s")
+_PARAM_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+# Valores de los parámetros en SHOWPLAN_XML (compilados y, si los hubiera, de ejecución)
+_PLAN_PARAMETER_VALUE = re.compile(r'\s+Parameter(?:Compiled|Runtime)Value="[^"]*"')
+
+# Sentencias cuyo plan se puede pedir sin ejecutarlas
+_PLANNABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "MERGE")
+# Prefijos de módulos que se reportan como origen de la consulta, por prioridad
+_CALLER_PREFIXES = ("app.services.", "app.repositories.", "app.api.")
+
+
+def normalize_sql(statement: str) -> str:
+    """SQL sin literales ni espacios redundantes, con las listas IN colapsadas."""
+    sql = _STRING_LITERAL.sub("?", statement)
+    sql = _NAMED_PARAM.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _WHITESPACE.sub(" ", sql).strip()
+    return _PARAM_LIST.sub("(?+)", sql)
+
+
+def scrub_plan(plan_xml: str) -> str:
+    """SHOWPLAN_XML sin los valores con los que se compiló cada parámetro."""
+    return _PLAN_PARAMETER_VALUE.sub("", plan_xml)
+
+
+def parameters_shape(parameters: Any, executemany: bool) -> Any:
+    """Tipos de los parámetros (sin valores) para el registro."""
+    if executemany and isinstance(parameters, (list, tuple)):
+        first = parameters[0] if parameters else None
+        return {"rows": len(parameters), "row": parameters_shape(first, False)}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+def _caller() -> Optional[str]:
+    """Primer marco de servicio (o repositorio / endpoint) en la pila."""
+    frame = sys._getframe(2)
+    found: dict[str, str] = {}
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        for prefix in _CALLER_PREFIXES:
+            if module.startswith(prefix) and prefix not in found:
+                name = getattr(frame.f_code, "co_qualname", frame.f_code.co_name)
+                found[prefix] = f"{module}.{name}:{frame.f_lineno}"
+        if _CALLER_PREFIXES[0] in found:
+            break
+        frame = frame.f_back
+    return next((found[prefix] for prefix in _CALLER_PREFIXES if prefix in found), None)
+
+
+@dataclass(slots=True)
+class StatementStats:
+    sql: str
+    calls: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    slow_calls: int = 0
+    last_route: Optional[str] = None
+    last_caller: Optional[str] = None
+
+
+class QueryLog:
+    def __init__(
+        self,
+        threshold_ms: float,
+        max_statements: int,
+        log_path: Optional[str],
+        max_bytes: int,
+        backups: int,
+        capture_plan: bool,
+    ) -> None:
+        self.threshold_ms = threshold_ms
+        self.max_statements = max_statements
+        self.capture_plan = capture_plan
+        self._stats: dict[str, StatementStats] = {}
+        self._normalized: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue(maxsize=_SLOW_QUEUE_SIZE)
+        self._engine: Optional[Engine] = None
+        self._log_path = log_path
+        self._max_bytes = max_bytes
+        self._backups = backups
+        self._writer: Optional[logging.Logger] = None
+        self._stop: Optional[threading.Event] = None
+        self._dropped = metrics.counter("db_slow_query_dropped_total")
+        self._slow = metrics.counter("db_slow_queries_total")
+
+    @staticmethod
+    def _build_writer(log_path: str, max_bytes: int, backups: int) -> logging.Logger:
+        path = Path(log_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Logger propio (fuera del registro global): un handler por fichero
+        writer = logging.Logger("app.slow_query", logging.INFO)
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        writer.addHandler(handler)
+        return writer
+
+    def install(self, engine: Engine) -> None:
+        """Engancha los eventos del engine (estadísticas); el fichero lo escribe `start_writer`."""
+        self._engine = engine
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+
+    def start_writer(self) -> Optional[threading.Event]:
+        """Crea el fichero y lanza el hilo escritor si hay umbral y ruta.
+
+        Devuelve el evento que lo detiene (o None si está desactivado).
+        """
+        if self.threshold_ms <= 0 or not self._log_path:
+            return None
+        if self._stop is not None and not self._stop.is_set():
+            return None  # ya hay un escritor en marcha
+        if self._writer is None:
+            self._writer = self._build_writer(self._log_path, self._max_bytes, self._backups)
+        stop = self._stop = threading.Event()
+        threading.Thread(target=self._drain, args=(stop,), name="slow-query-log", daemon=True).start()
+        return stop
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        context._query_log_started = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        started = getattr(context, "_query_log_started", None)
+        if started is None:
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        slow = 0 < self.threshold_ms <= elapsed_ms
+        stats = current_request_stats()
+        route = stats.route if stats is not None else None
+        caller = _caller() if slow else None
+
+        sql = self._normalize(statement)
+        with self._lock:
+            entry = self._stats.get(sql)
+            if entry is None:
+                entry = self._new_entry(sql)
+            entry.calls += 1
+            entry.total_ms += elapsed_ms
+            entry.max_ms = max(entry.max_ms, elapsed_ms)
+            if slow:
+                entry.slow_calls += 1
+                entry.last_route = route
+                entry.last_caller = caller
+
+        if not slow:
+            return
+        self._slow.inc()
+        if self._writer is None:
+            return
+        record = {
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "duration_ms": round(elapsed_ms, 1),
+            "sql": sql,
+            "params": parameters_shape(parameters, executemany),
+            "executemany": bool(executemany),
+            "route": route,
+            "caller": caller,
+            "dialect": conn.dialect.name,
+        }
+        plan_request = (statement, parameters) if self.capture_plan and not executemany else None
+        try:
+            self._queue.put_nowait((record, plan_request))
+        except queue.Full:
+            self._dropped.inc()
+
+    def _normalize(self, statement: str) -> str:
+        with self._lock:
+            sql = self._normalized.get(statement)
+        if sql is None:
+            sql = normalize_sql(statement)
+            with self._lock:
+                if len(self._normalized) >= _NORMALIZED_CACHE_SIZE:
+                    self._normalized.clear()
+                self._normalized[statement] = sql
+        return sql
+
+    def _new_entry(self, sql: str) -> StatementStats:
+        # Con la tabla llena se descarta la sentencia con menos tiempo acumulado
+        if len(self._stats) >= self.max_statements:
+            coldest = min(self._stats.values(), key=lambda item: item.total_ms)
+            del self._stats[coldest.sql]
+        entry = self._stats[sql] = StatementStats(sql=sql)
+        return entry
+
+    def top(self, limit: int = 20) -> list[StatementStats]:
+        """Sentencias ordenadas por tiempo total acumulado en este worker."""
+        with self._lock:
+            items = [
+                StatementStats(
+                    sql=entry.sql,
+                    calls=entry.calls,
+                    total_ms=entry.total_ms,
+                    max_ms=entry.max_ms,
+                    slow_calls=entry.slow_calls,
+                    last_route=entry.last_route,
+                    last_caller=entry.last_caller,
+                )
+                for entry in self._stats.values()
+            ]
+        items.sort(key=lambda item: item.total_ms, reverse=True)
+        return items[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def _drain(self, stop: threading.Event) -> None:
+        while not stop.is_set():
+            try:
+                record, plan_request = self._queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            try:
+                if plan_request is not None:
+                    record["plan"] = self._estimated_plan(*plan_request)
+                self._writer.info(json.dumps(record, ensure_ascii=False, default=str))
+            except Exception:
+                logger.exception("No se pudo registrar la consulta lenta")
+
+    def _estimated_plan(self, statement: str, parameters: Any) -> Optional[str]:
+        if self._engine is None or not statement.lstrip().upper().startswith(_PLANNABLE):
+            return None
+        dialect = self._engine.dialect.name
+        try:
+            # Conexión propia: el SET no debe afectar a las sesiones de las peticiones
+            with self._engine.connect() as conn:
+                if dialect == "mssql":
+                    conn.exec_driver_sql("SET SHOWPLAN_XML ON")
+                    try:
+                        plan = conn.exec_driver_sql(statement, parameters).scalar()
+                        return scrub_plan(plan) if plan else plan
+                    finally:
+                        # No se devuelve al pool una conexión que pudiera seguir
+                        # en modo SHOWPLAN (dejaría de ejecutar consultas)
+                        conn.invalidate()
+                if dialect == "postgresql":
+                    rows = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+                    return json.dumps(rows)
+        except Exception as exc:
+            return f"<plan no disponible: {exc.__class__.__name__}>"
+        return None
+
+
+query_log = QueryLog(
+    threshold_ms=settings.slow_query_threshold_ms,
+    max_statements=settings.slow_query_stats_max_statements,
+    log_path=settings.slow_query_log_path,
+    max_bytes=settings.slow_query_log_max_bytes,
+    backups=settings.slow_query_log_backups,
+    capture_plan=settings.slow_query_capture_plan,
+)
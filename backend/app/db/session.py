@@ -1,12 +1,50 @@
+import threading
+import time
+from typing import Optional
+
 from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.db.query_log import query_log
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool que mide la espera de checkout y cuenta los timeouts."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            metrics.counter("db_pool_checkout_timeouts_total").inc()
+            raise
+        finally:
+            metrics.histogram("db_pool_checkout_wait_ms").observe((time.perf_counter() - started) * 1000)
+
+
+def _engine_options(database_url: str) -> dict:
+    # SQLite (tests) usa sus propios pools sin tamaño/overflow
+    if make_url(database_url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+    }
+
 
 engine = create_engine(
     settings.database_url,
     pool_pre_ping=True,
     future=True,
+    **_engine_options(settings.database_url),
 )
 
 
@@ -21,6 +59,61 @@ def _enable_fast_executemany(
         pass
 
 
+query_log.install(engine)
+
+
+# Conexiones prestadas en este momento, mantenido por los eventos del pool
+_in_use = 0
+_in_use_peak = 0
+_in_use_lock = threading.Lock()
+
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+    global _in_use, _in_use_peak
+    with _in_use_lock:
+        _in_use += 1
+        _in_use_peak = max(_in_use_peak, _in_use)
+
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record) -> None:
+    global _in_use
+    with _in_use_lock:
+        _in_use = max(0, _in_use - 1)
+
+
+def _is_queue_pool() -> bool:
+    return isinstance(engine.pool, QueuePool)
+
+
+def pool_capacity() -> Optional[int]:
+    """Conexiones simultáneas máximas del pool (tamaño + overflow); None si no tiene límite."""
+    if not _is_queue_pool():
+        return None
+    return settings.db_pool_size + max(0, settings.db_max_overflow)
+
+
+def pool_status() -> dict:
+    """Estado del pool sin pedir conexión (apto para readiness bajo carga)."""
+    capacity = pool_capacity()
+    return {
+        "capacity": capacity,
+        "size": settings.db_pool_size if capacity else None,
+        "max_overflow": settings.db_max_overflow if capacity else None,
+        "in_use": _in_use,
+        "in_use_peak": _in_use_peak,
+        "overflow": max(0, engine.pool.overflow()) if capacity else 0,
+        "saturation": round(_in_use / capacity, 3) if capacity else 0.0,
+    }
+
+
+metrics.gauge("db_pool_in_use", lambda: pool_status()["in_use"])
+metrics.gauge("db_pool_in_use_peak", lambda: pool_status()["in_use_peak"])
+metrics.gauge("db_pool_overflow", lambda: pool_status()["overflow"])
+metrics.gauge("db_pool_capacity", pool_capacity)
+
+
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False, future=True)
 
 
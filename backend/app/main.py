@@ -1,11 +1,21 @@
 from fastapi import Depends, FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.db.session import get_db
+from app.core.idempotency import IdempotencyMiddleware, collect_idempotent_routes, start_idempotency_purger
+from app.core.password_executor import password_pool
+from app.core.profiler import ProfilerMiddleware
+from app.core.request_metrics import RequestMetricsMiddleware, install_query_hooks, instrument_routes
+from app.core.threadpool import configure_threadpool, threadpool_status
+from app.db.query_log import query_log
+from app.db.session import SessionLocal, engine, get_db, pool_capacity, pool_status
 from app.api.v1.routes import api_router
+from app.services.reservation_hold_service import start_hold_reconciler
+from app.services.sales_rollup_service import start_rollup_reconciler
+from app.services.typeahead_service import start_typeahead_refresher
 
 app = FastAPI(title="Ferretería API", version="1.0.0")
 
@@ -13,6 +23,9 @@ allow_all_origins = "*" in settings.cors_origins
 cors_allow_origins = ["*"] if allow_all_origins else settings.cors_origins
 cors_allow_credentials = False if allow_all_origins else True
 
+# Por dentro de CORS: las respuestas repetidas también llevan sus cabeceras
+app.add_middleware(IdempotencyMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=cors_allow_origins,
@@ -21,6 +34,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.profiler_enabled:
+    app.add_middleware(ProfilerMiddleware)
+
+if settings.request_metrics_enabled:
+    # Se añade después de CORS para quedar por fuera y medir la petición completa
+    app.add_middleware(RequestMetricsMiddleware)
+    install_query_hooks(engine)
+
 
 @app.get(f"{settings.api_v1_prefix}/health")
 def health(db: Session = Depends(get_db)):
@@ -32,4 +53,57 @@ def health(db: Session = Depends(get_db)):
     except Exception:
         return {"status": "degraded"}
 
+
+@app.get(f"{settings.api_v1_prefix}/ready")
+async def ready():
+    """Readiness para el balanceador: 503 si el pool o el threadpool están saturados.
+
+    Es async y no pide conexión a la base para responder aunque ambos estén
+    llenos; el balanceador deja de enviar tráfico antes de que las esperas de
+    checkout terminen en timeouts en cadena.
+    """
+    pool = pool_status()
+    threads = threadpool_status()
+    limit = settings.readiness_max_saturation
+    is_ready = pool["saturation"] < limit and threads["saturation"] < limit and threads["waiting"] == 0
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={"status": "ready" if is_ready else "saturated", "db_pool": pool, "threadpool": threads},
+    )
+
+
+@app.on_event("startup")
+async def configure_worker_threads() -> None:
+    # Se ejecuta dentro del event loop: el limitador de anyio es por loop
+    configure_threadpool(pool_capacity())
+
+
+@app.on_event("startup")
+def start_background_jobs() -> None:
+    app.state.hold_reconciler = start_hold_reconciler(
+        SessionLocal, settings.reservation_reconcile_interval_seconds
+    )
+    app.state.idempotency_purger = start_idempotency_purger(
+        SessionLocal, settings.idempotency_purge_interval_seconds, settings.idempotency_purge_batch_size
+    )
+    app.state.typeahead_refresher = start_typeahead_refresher(SessionLocal, settings.typeahead_refresh_seconds)
+    app.state.rollup_reconciler = start_rollup_reconciler(SessionLocal, settings.sales_rollup_reconcile_seconds)
+    app.state.slow_query_writer = query_log.start_writer()
+
+
+@app.on_event("shutdown")
+def stop_background_jobs() -> None:
+    for name in (
+        "hold_reconciler", "idempotency_purger", "typeahead_refresher", "rollup_reconciler", "slow_query_writer"
+    ):
+        stop = getattr(app.state, name, None)
+        if stop is not None:
+            stop.set()
+    password_pool.shutdown()
+
+
 app.include_router(api_router, prefix=settings.api_v1_prefix)
+
+# Mide el handler de cada ruta y lo ejecuta bajo el profiler cuando se pide
+instrument_routes(app)
+collect_idempotent_routes(app)
@@ -13,9 +13,12 @@ from app.models.compra import OrdenCompra, ItemOrdenCompra
 from app.models.venta import OrdenVenta, ItemOrdenVenta
 from app.models.factura import FacturaVenta, ItemFacturaVenta
 from app.models.pago import PagoCliente
-from app.models.reserva import Reserva, ItemReserva
+from app.models.reserva import Reserva, ItemReserva, StockReservado
 from app.models.promocion import Promocion, ReglaPromocion
 from app.models.idempotency import IdempotencyKey
+from app.models.secuencia_documento import SecuenciaDocumento
+from app.models.busqueda_producto import BusquedaProducto
+from app.models.resumen_venta import ResumenVentaDiaria, ResumenOrdenDiaria, ResumenCajaDiaria, ResumenDiaPendiente
 from app.models.inventario import (
     LibroStock,
     AjusteStock,
@@ -48,12 +51,19 @@ __all__ = [
     "PagoCliente",
     "Reserva",
     "ItemReserva",
+    "StockReservado",
     "Promocion",
     "ReglaPromocion",
     "Cliente",
     "Proveedor",
     "ContactoProveedor",
     "IdempotencyKey",
+    "SecuenciaDocumento",
+    "ResumenVentaDiaria",
+    "ResumenOrdenDiaria",
+    "ResumenCajaDiaria",
+    "ResumenDiaPendiente",
+    "BusquedaProducto",
     "Atributo",
     "ValorAtributo",
     "ValorAtributoVariante",
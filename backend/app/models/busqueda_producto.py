@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, Integer, PrimaryKeyConstraint, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class BusquedaProducto(Base):
+    """Documento de búsqueda por variante (o por producto si no tiene variantes).
+
+    `nombre` y `texto` guardan el texto ya plegado (minúsculas, sin acentos,
+    ver `app.core.text_folding`), así la búsqueda no depende de la collation.
+    Sobre esta tabla se crean el índice full-text de SQL Server y los índices
+    GIN de PostgreSQL. Igual que los acumulados de reportes, no declara claves
+    foráneas: `ProductSearchService.reindex_products` reescribe las filas del
+    producto y `scripts/rebuild_product_search.py` la reconstruye completa.
+    """
+    __tablename__ = "busqueda_productos"
+    __table_args__ = (
+        # El índice full-text de SQL Server exige una clave única con nombre conocido
+        PrimaryKeyConstraint("id", name="pk_busqueda_productos"),
+        Index("uq_busqueda_productos_variante", "producto_id", "variante_id", unique=True),
+        {"schema": "dbo"}
+    )
+
+    id: Mapped[int] = mapped_column(Integer, autoincrement=True)
+    producto_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    variante_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # Nombre del producto + nombre de la variante (pesa más en el ranking)
+    nombre: Mapped[str] = mapped_column(String(250), nullable=False)
+    # Nombre + descripción
+    texto: Mapped[str] = mapped_column(String(600), nullable=False)
+    fecha_actualizacion: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now)
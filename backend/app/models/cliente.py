@@ -1,10 +1,12 @@
 from datetime import datetime
 from typing import List, TYPE_CHECKING
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Index
+from sqlalchemy import Computed, DateTime, ForeignKey, Integer, String, Index, and_, text
+from sqlalchemy.sql.elements import ColumnElement
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
+from app.models.usuario import NORMALIZED_EMAIL_SQL, normalize_email
 
 if TYPE_CHECKING:
     from app.models.usuario import Usuario
@@ -15,7 +17,15 @@ if TYPE_CHECKING:
 class Cliente(Base):
     __tablename__ = "clientes"
     __table_args__ = (
-        Index("ix_clientes_correo", "correo"),  # Índice para búsquedas por email
+        Index("ix_clientes_correo", "correo"),
+        # Único entre clientes con correo; búsquedas de checkout, "mis pedidos" y registro
+        Index(
+            "uq_clientes_correo_normalizado",
+            "correo_normalizado",
+            unique=True,
+            mssql_where=text("correo IS NOT NULL"),
+            mssql_include=["usuario_id"],
+        ),
         Index("ix_clientes_usuario_id", "usuario_id"),  # Índice para búsquedas por usuario
         {"schema": "dbo"}
     )
@@ -25,6 +35,7 @@ class Cliente(Base):
     nit_ci: Mapped[str | None] = mapped_column(String(20), nullable=True)
     telefono: Mapped[str | None] = mapped_column(String(20), nullable=True)
     correo: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    correo_normalizado: Mapped[str | None] = mapped_column(String(100), Computed(NORMALIZED_EMAIL_SQL, persisted=True))
     direccion: Mapped[str | None] = mapped_column(String(255), nullable=True)
     fecha_registro: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     # Relación opcional con Usuario: un cliente puede tener máximo un usuario asociado
@@ -57,3 +68,14 @@ class Cliente(Base):
         "PagoCliente",
         back_populates="cliente",
     )
+
+    @classmethod
+    def correo_igual(cls, correo: str | ColumnElement) -> ColumnElement[bool]:
+        """Condición por correo normalizado que puede usar `uq_clientes_correo_normalizado`.
+
+        El índice está filtrado por `correo IS NOT NULL`; SQL Server solo lo
+        elige si la consulta repite ese filtro, porque no lo deduce de la
+        igualdad sobre la columna calculada.
+        """
+        value = normalize_email(correo) if isinstance(correo, str) else correo
+        return and_(cls.correo.is_not(None), cls.correo_normalizado == value)
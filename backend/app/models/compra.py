@@ -12,6 +12,7 @@ class OrdenCompra(Base):
     __table_args__ = {"schema": "dbo"}
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    numero_documento: Mapped[str | None] = mapped_column(String(30), nullable=True)  # OC-000001
     proveedor_id: Mapped[int] = mapped_column(ForeignKey("dbo.proveedores.id"), nullable=False)
     fecha: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     estado: Mapped[str] = mapped_column(String(20), nullable=False)  # BORRADOR, ENVIADO, CONFIRMADO, RECHAZADO, RECIBIDO, FACTURADO, CERRADO
@@ -1,6 +1,6 @@
 from datetime import datetime
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, Integer, DateTime, Text, Index
+from sqlalchemy import String, Integer, DateTime, Text, Index, text
 from app.db.base import Base
 
 
@@ -9,6 +9,7 @@ class IdempotencyKey(Base):
     __tablename__ = "idempotency_keys"
     __table_args__ = (
         Index("idx_idempotency_key_route", "key", "route", "method"),
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
         {"schema": "dbo"}
     )
     
@@ -19,6 +20,9 @@ class IdempotencyKey(Base):
     request_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)  # SHA256 hash del body
     status_code: Mapped[int] = mapped_column(Integer, nullable=False)
     response_body: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON serializado
+    response_headers: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON [[nombre, valor], ...]
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
     expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    # Se incrementa en cada reserva: condiciona la toma de claves expiradas o abandonadas
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default=text("1"))
 
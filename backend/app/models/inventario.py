@@ -35,6 +35,7 @@ class AjusteStock(Base):
     __table_args__ = {"schema": "dbo"}
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    numero_documento: Mapped[str | None] = mapped_column(String(30), nullable=True)  # AJU-000001
     fecha: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
     descripcion: Mapped[str | None] = mapped_column(String(255), nullable=True)
     usuario_id: Mapped[int | None] = mapped_column(ForeignKey("dbo.usuarios.id"), nullable=True)
@@ -66,6 +67,7 @@ class TransferenciaStock(Base):
     __table_args__ = {"schema": "dbo"}
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    numero_documento: Mapped[str | None] = mapped_column(String(30), nullable=True)  # TRF-000001
     fecha: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
     usuario_id: Mapped[int | None] = mapped_column(ForeignKey("dbo.usuarios.id"), nullable=True)
     almacen_origen_id: Mapped[int] = mapped_column(ForeignKey("dbo.almacenes.id"), nullable=False)
@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import TYPE_CHECKING
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, DateTime, ForeignKey
+from sqlalchemy import String, Integer, DateTime, ForeignKey, Index, text
 from app.db.base import Base
 
 
@@ -19,12 +19,17 @@ else:
 
 class Producto(Base):
     __tablename__ = "productos"
-    __table_args__ = {"schema": "dbo"}
+    __table_args__ = (
+        # Búsqueda de detalle por slug (índice filtrado: permite productos aún sin slug)
+        Index("uq_productos_slug", "slug", unique=True, mssql_where=text("slug IS NOT NULL")),
+        {"schema": "dbo"},
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     categoria_id: Mapped[int | None] = mapped_column(ForeignKey("dbo.categorias.id"), nullable=True)
     marca_id: Mapped[int | None] = mapped_column(ForeignKey("dbo.marcas.id"), nullable=True)
     nombre: Mapped[str] = mapped_column(String(100), nullable=False)
+    slug: Mapped[str | None] = mapped_column(String(120), nullable=True)
     descripcion: Mapped[str | None] = mapped_column(String(255), nullable=True)
     fecha_creacion: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     
@@ -1,12 +1,15 @@
 from datetime import datetime
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, Numeric, DateTime, ForeignKey
+from sqlalchemy import Integer, Numeric, DateTime, ForeignKey, Index, text
 from app.db.base import Base
 
 
 class ProductoAlmacen(Base):
     __tablename__ = "producto_almacen"
-    __table_args__ = {"schema": "dbo"}
+    __table_args__ = (
+        Index("uq_producto_almacen_variante_almacen", "variante_producto_id", "almacen_id", unique=True),
+        {"schema": "dbo"}
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     variante_producto_id: Mapped[int] = mapped_column(ForeignKey("dbo.variantes_producto.id"), nullable=False)
@@ -14,6 +17,8 @@ class ProductoAlmacen(Base):
     cantidad_disponible: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
     costo_promedio: Mapped[float | None] = mapped_column(Numeric(10, 2), nullable=True)
     fecha_actualizacion: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    # Versión para control optimista: cada UPDATE de stock exige la versión leída y la incrementa
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default=text("1"))
     
     # Relationships
     variante: Mapped["VarianteProducto"] = relationship("VarianteProducto", back_populates="stock_almacenes")
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import List
 
-from sqlalchemy import DateTime, ForeignKey, Integer, Numeric, String, Text
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, Numeric, String, Text
 from decimal import Decimal
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -10,7 +10,10 @@ from app.db.base import Base
 
 class Reserva(Base):
     __tablename__ = "reservas"
-    __table_args__ = {"schema": "dbo"}
+    __table_args__ = (
+        Index("idx_reservas_cliente_fecha", "cliente_id", "fecha_reserva", "id"),  # Historial del cliente
+        {"schema": "dbo"},
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     cliente_id: Mapped[int] = mapped_column(ForeignKey("dbo.clientes.id"), nullable=False)
@@ -60,3 +63,22 @@ class ItemReserva(Base):
     reserva: Mapped[Reserva] = relationship("Reserva", back_populates="items")
     variante: Mapped["VarianteProducto"] = relationship("VarianteProducto")
 
+
+
+class StockReservado(Base):
+    """Cantidad comprometida por reservas activas (PENDIENTE/CONFIRMADA) por variante.
+
+    Contador desnormalizado: lo mantienen en la misma transacción la creación,
+    cancelación y completado de reservas, y `ReservationHoldService.reconcile`
+    lo recalcula desde `items_reserva` para corregir desvíos.
+    """
+    __tablename__ = "stock_reservado"
+    __table_args__ = {"schema": "dbo"}
+
+    variante_producto_id: Mapped[int] = mapped_column(
+        ForeignKey("dbo.variantes_producto.id"),
+        primary_key=True,
+        autoincrement=False,
+    )
+    cantidad_reservada: Mapped[float] = mapped_column(Numeric(12, 2), nullable=False, default=0)
+    fecha_actualizacion: Mapped[datetime] = mapped_column(DateTime, nullable=False)
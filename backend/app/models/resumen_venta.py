@@ -0,0 +1,63 @@
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, Index, Integer, Numeric, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class ResumenVentaDiaria(Base):
+    """Acumulado diario de líneas de venta por producto y cliente.
+
+    La categoría se resuelve al leer a través del producto, igual que en las
+    consultas sobre las filas crudas. No declara claves foráneas para no
+    bloquear el borrado de clientes o productos: el refresco del día limpia
+    las filas huérfanas.
+    """
+    __tablename__ = "resumen_ventas_diario"
+    __table_args__ = (
+        Index("uq_resumen_ventas_diario", "fecha", "producto_id", "cliente_id", unique=True),
+        {"schema": "dbo"}
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    fecha: Mapped[date] = mapped_column(Date, nullable=False)
+    producto_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    cliente_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    cantidad: Mapped[float] = mapped_column(Numeric(18, 2), nullable=False)
+    importe: Mapped[float] = mapped_column(Numeric(18, 4), nullable=False)
+    lineas: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class ResumenOrdenDiaria(Base):
+    """Cantidad de órdenes por día, cliente y estado actual (incluye órdenes sin líneas)."""
+    __tablename__ = "resumen_ordenes_diario"
+    __table_args__ = (
+        Index("uq_resumen_ordenes_diario", "fecha", "cliente_id", "estado", unique=True),
+        {"schema": "dbo"}
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    fecha: Mapped[date] = mapped_column(Date, nullable=False)
+    cliente_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    estado: Mapped[str] = mapped_column(String(20), nullable=False)
+    ordenes: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class ResumenCajaDiaria(Base):
+    """Totales diarios de facturas pagadas (por emisión) y pagos confirmados (por fecha de pago)."""
+    __tablename__ = "resumen_caja_diario"
+    __table_args__ = {"schema": "dbo"}
+
+    fecha: Mapped[date] = mapped_column(Date, primary_key=True)
+    facturas_pagadas: Mapped[float] = mapped_column(Numeric(18, 2), nullable=False)
+    pagos_confirmados: Mapped[float] = mapped_column(Numeric(18, 2), nullable=False)
+
+
+class ResumenDiaPendiente(Base):
+    """Días cuyo refresco del acumulado falló; el conciliador los recalcula y los borra."""
+    __tablename__ = "resumen_dias_pendientes"
+    __table_args__ = {"schema": "dbo"}
+
+    fecha: Mapped[date] = mapped_column(Date, primary_key=True)
+    fecha_registro: Mapped[datetime] = mapped_column(DateTime, nullable=False)
@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class SecuenciaDocumento(Base):
+    """Último número asignado por tipo de documento (FACTURA, ORDEN_COMPRA, ...).
+
+    Se incrementa con un único `UPDATE ... OUTPUT` (SQL Server) o
+    `UPDATE ... RETURNING` (PostgreSQL), ver `DocumentSequenceService`.
+    """
+    __tablename__ = "secuencias_documento"
+    __table_args__ = {"schema": "dbo"}
+
+    codigo: Mapped[str] = mapped_column(String(30), primary_key=True)
+    ultimo_valor: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    fecha_actualizacion: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now)
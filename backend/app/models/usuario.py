@@ -1,12 +1,29 @@
 from datetime import datetime
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, Boolean, DateTime, Table, Column, ForeignKey, PrimaryKeyConstraint, Index
+from sqlalchemy import String, Integer, Boolean, Computed, DateTime, Table, Column, ForeignKey, PrimaryKeyConstraint, Index, text
 from app.db.base import Base
 
 if TYPE_CHECKING:
     from app.models.cliente import Cliente
 
+# Expresión de las columnas calculadas `correo_normalizado` (usuarios y clientes).
+# LTRIM/RTRIM solo quitan espacios (no tabuladores ni saltos de línea)
+NORMALIZED_EMAIL_SQL = "LOWER(LTRIM(RTRIM(correo)))"
+
+
+def normalize_email(correo: Optional[str]) -> Optional[str]:
+    """Normaliza un correo igual que `correo_normalizado`: sin espacios en los extremos, en minúsculas.
+
+    Solo se recortan espacios, como LTRIM/RTRIM; `str.strip()` quitaría
+    también tabuladores y saltos de línea y el valor no coincidiría con la
+    columna calculada.
+    """
+    if correo is None:
+        return None
+    return correo.strip(" ").lower()
+
+
 # Tabla de asociación many-to-many usuarios <-> roles
 usuarios_roles_table = Table(
     "usuarios_roles",
@@ -31,18 +48,23 @@ roles_permisos_table = Table(
 class Usuario(Base):
     __tablename__ = "usuarios"
     __table_args__ = (
-        Index("ix_usuarios_correo", "correo"),  # Índice para búsquedas por email (login)
+        Index("ix_usuarios_correo", "correo"),
+        Index("uq_usuarios_correo_normalizado", "correo_normalizado", unique=True),  # Login y recuperación
         Index("ix_usuarios_nombre_usuario", "nombre_usuario"),  # Índice para búsquedas por username
+        Index("ix_usuarios_version_seguridad", "version_seguridad"),  # MAX() barato para la caché de principals
         {"schema": "dbo"}
     )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     nombre_usuario: Mapped[str] = mapped_column(String(50), nullable=False, unique=True)
     correo: Mapped[str] = mapped_column(String(100), nullable=False, unique=True)
+    correo_normalizado: Mapped[str] = mapped_column(String(100), Computed(NORMALIZED_EMAIL_SQL, persisted=True))
     hash_contrasena: Mapped[str] = mapped_column(String(255), nullable=False)
     fecha_creacion: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     fecha_modificacion: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     activo: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
+    # Sello de seguridad: se renueva (MAX + 1) al cambiar estado, roles o datos de acceso
+    version_seguridad: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default=text("0"))
     
     # Relationships
     roles: Mapped[list["Rol"]] = relationship(
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import List, TYPE_CHECKING
 
-from sqlalchemy import DateTime, ForeignKey, Integer, Numeric, String, Text
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, Numeric, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -13,7 +13,12 @@ if TYPE_CHECKING:
 
 class OrdenVenta(Base):
     __tablename__ = "ordenes_venta"
-    __table_args__ = {"schema": "dbo"}
+    __table_args__ = (
+        # "Mis pedidos": una búsqueda por rama del UNION, ya en orden (fecha, id)
+        Index("idx_ordenes_venta_usuario_fecha_id", "usuario_id", "fecha", "id"),
+        Index("idx_ordenes_venta_cliente_fecha_id", "cliente_id", "fecha", "id"),
+        {"schema": "dbo"},
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     cliente_id: Mapped[int] = mapped_column(ForeignKey("dbo.clientes.id"), nullable=False)
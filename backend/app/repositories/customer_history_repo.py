@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.models.cliente import Cliente
+from app.models.factura import FacturaVenta
+from app.models.pago import PagoCliente
+from app.models.reserva import Reserva
+from app.models.venta import ItemOrdenVenta, OrdenVenta
+from app.repositories.pagination import PageQuery
+from app.repositories.reservation_repo import ACTIVE_RESERVATION_STATES
+from app.repositories.sale_repo import SaleRepository
+
+CLOSED_ORDER_STATES = ("ENTREGADO", "CANCELADO")
+VOID_INVOICE_STATE = "ANULADA"
+CONFIRMED_PAYMENT_STATE = "CONFIRMADO"
+PENDING_PAYMENT_STATE = "PENDIENTE"
+
+
+class CustomerHistoryRepository:
+    """Lecturas del historial de un cliente: agregados y páginas de cada colección."""
+
+    def __init__(self, db: Session):
+        self._db = db
+
+    def summary(self, customer_id: int) -> Optional[Row]:
+        """Cliente y sus agregados en una sola consulta (None si no existe).
+
+        Cada agregado es una subconsulta escalar sobre el índice por
+        `cliente_id` de su tabla; nada se carga en memoria.
+        """
+
+        def scalar(stmt, label: str, default: Any = 0):
+            value = stmt.scalar_subquery()
+            return (func.coalesce(value, default) if default is not None else value).label(label)
+
+        orders = select(func.count()).select_from(OrdenVenta).where(OrdenVenta.cliente_id == customer_id)
+        reservations = select(func.count()).select_from(Reserva).where(Reserva.cliente_id == customer_id)
+        invoices = select(FacturaVenta.id).where(
+            FacturaVenta.cliente_id == customer_id, FacturaVenta.estado != VOID_INVOICE_STATE
+        )
+        payments = select(func.sum(PagoCliente.monto)).where(PagoCliente.cliente_id == customer_id)
+        stmt = select(
+            Cliente,
+            scalar(orders, "total_orders"),
+            scalar(orders.where(OrdenVenta.estado.not_in(CLOSED_ORDER_STATES)), "open_orders"),
+            scalar(select(func.min(OrdenVenta.fecha)).where(OrdenVenta.cliente_id == customer_id), "first_order_date", None),
+            scalar(select(func.max(OrdenVenta.fecha)).where(OrdenVenta.cliente_id == customer_id), "last_order_date", None),
+            scalar(
+                select(func.sum(ItemOrdenVenta.cantidad * func.coalesce(ItemOrdenVenta.precio_unitario, 0)))
+                .join(OrdenVenta, OrdenVenta.id == ItemOrdenVenta.orden_venta_id)
+                .where(OrdenVenta.cliente_id == customer_id),
+                "total_spent",
+            ),
+            scalar(reservations, "total_reservations"),
+            scalar(reservations.where(Reserva.estado.in_(ACTIVE_RESERVATION_STATES)), "open_reservations"),
+            scalar(
+                select(func.count()).select_from(FacturaVenta).where(FacturaVenta.cliente_id == customer_id),
+                "total_invoices",
+            ),
+            scalar(
+                select(func.sum(FacturaVenta.total)).where(FacturaVenta.id.in_(invoices)),
+                "total_invoiced",
+            ),
+            scalar(
+                select(func.count()).select_from(PagoCliente).where(PagoCliente.cliente_id == customer_id),
+                "total_payments",
+            ),
+            scalar(payments.where(PagoCliente.estado == CONFIRMED_PAYMENT_STATE), "total_paid"),
+            scalar(
+                payments.where(
+                    PagoCliente.estado == CONFIRMED_PAYMENT_STATE, PagoCliente.factura_id.in_(invoices)
+                ),
+                "paid_on_invoices",
+            ),
+            scalar(payments.where(PagoCliente.estado == PENDING_PAYMENT_STATE), "pending_payments"),
+        ).where(Cliente.id == customer_id)
+        return self._db.execute(stmt).first()
+
+    def orders_page(self, customer_id: int, offset: int, limit: int) -> list[OrdenVenta]:
+        """Órdenes del cliente (más recientes primero) con su grafo para `_map_order`."""
+        ids = self._db.scalars(
+            select(OrdenVenta.id)
+            .where(OrdenVenta.cliente_id == customer_id)
+            .order_by(OrdenVenta.fecha.desc(), OrdenVenta.id.desc())
+            .offset(offset)
+            .limit(limit)
+        ).all()
+        loader = PageQuery(
+            db=self._db, model=OrdenVenta, order_by=(OrdenVenta.id,), options=SaleRepository._load_options()
+        )
+        return loader.load(list(ids))
+
+    def reservations_page(self, customer_id: int, offset: int, limit: int) -> list[Reserva]:
+        return self._page(Reserva, Reserva.fecha_reserva, customer_id, offset, limit)
+
+    def invoices_page(self, customer_id: int, offset: int, limit: int) -> list[FacturaVenta]:
+        return self._page(FacturaVenta, FacturaVenta.fecha_emision, customer_id, offset, limit)
+
+    def payments_page(self, customer_id: int, offset: int, limit: int) -> list[PagoCliente]:
+        return self._page(PagoCliente, PagoCliente.fecha_pago, customer_id, offset, limit)
+
+    def _page(self, model, fecha, customer_id: int, offset: int, limit: int) -> list:
+        stmt = (
+            select(model)
+            .where(model.cliente_id == customer_id)
+            .order_by(fecha.desc(), model.id.desc())
+            .offset(offset)
+            .limit(limit)
+        )
+        return list(self._db.scalars(stmt).all())
@@ -3,10 +3,11 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Optional, Sequence
 
-from sqlalchemy import func, or_, select
+from sqlalchemy import and_, case, func, literal, or_, select
 from sqlalchemy.orm import Session
 
 from app.models.cliente import Cliente
+from app.models.usuario import Usuario
 
 
 @dataclass(slots=True)
@@ -46,6 +47,39 @@ class CustomerRepository:
         stmt = self._base_stmt().where(Cliente.id == customer_id)
         return self._db.scalars(stmt).first()
 
+    def customer_id_for_user(self, usuario_id: int, email: Optional[str]) -> Optional[int]:
+        """Id del cliente del usuario en una consulta: el vinculado o, si no hay, el libre con su correo."""
+        conditions = [Cliente.usuario_id == usuario_id]
+        if email:
+            conditions.append(and_(Cliente.usuario_id.is_(None), Cliente.correo_igual(email)))
+        stmt = (
+            select(Cliente.id)
+            .where(or_(*conditions))
+            .order_by(case((Cliente.usuario_id == usuario_id, 0), else_=1), Cliente.id)
+            .limit(1)
+        )
+        return self._db.scalar(stmt)
+
+    def order_candidates(self, usuario_id: Optional[int], email: str) -> tuple[list[Cliente], Optional[str]]:
+        """Clientes que pueden corresponder a un pedido, en una sola consulta.
+
+        Devuelve los clientes vinculados a `usuario_id` o cuyo correo
+        normalizado coincide con `email` (ya normalizado) o con el del usuario,
+        junto con el correo normalizado del usuario (None si no hay candidatos
+        o usuario). Todas las condiciones usan índices.
+        """
+        conditions = [Cliente.correo_igual(email)]
+        user_email = literal(None)
+        if usuario_id:
+            user_email = (
+                select(Usuario.correo_normalizado).where(Usuario.id == usuario_id).scalar_subquery()
+            )
+            conditions += [Cliente.usuario_id == usuario_id, Cliente.correo_igual(user_email)]
+        rows = self._db.execute(
+            select(Cliente, user_email.label("correo_usuario")).where(or_(*conditions)).order_by(Cliente.id)
+        ).all()
+        return [row[0] for row in rows], (rows[0][1] if rows else None)
+
     def create(self, data: dict) -> Cliente:
         customer = Cliente(**data)
         self._db.add(customer)
@@ -5,13 +5,15 @@ import logging
 from datetime import datetime, timedelta
 from typing import Optional
 
-from sqlalchemy import and_
-from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy import and_, delete, select, update
+from sqlalchemy.exc import IntegrityError, OperationalError, ProgrammingError
 from sqlalchemy.orm import Session
 
 from app.models.idempotency import IdempotencyKey
 
 DEFAULT_TTL_HOURS = 24
+# status_code de una clave reservada cuya petición aún no terminó
+IN_PROGRESS_STATUS = 0
 logger = logging.getLogger(__name__)
 
 
@@ -110,22 +112,144 @@ def _hash_request_body(body: dict) -> str:
     return hashlib.sha256(body_str.encode()).hexdigest()
 
 
-def cleanup_expired_keys(db: Session) -> int:
-    """Elimina claves de idempotencia expiradas. Retorna cantidad eliminada."""
+def claim_idempotency_key(
+    db: Session,
+    key: str,
+    route: str,
+    method: str,
+    request_hash: Optional[str],
+    ttl_hours: int = DEFAULT_TTL_HOURS,
+    stale_after_seconds: float = 120,
+) -> Optional[IdempotencyKey]:
+    """
+    Reserva la clave insertando una fila "en curso" (status_code = 0).
+
+    Devuelve None si la reserva es de esta petición (o si la tabla no existe)
+    y la fila existente en otro caso: completada, o en curso en otro worker.
+    Las claves expiradas y las reservas en curso más antiguas que
+    `stale_after_seconds` (worker caído) se reutilizan.
+    """
+    now = datetime.utcnow()
     try:
-        count = (
-            db.query(IdempotencyKey)
-            .filter(IdempotencyKey.expires_at < datetime.utcnow())
-            .delete()
+        existing = db.scalars(select(IdempotencyKey).where(IdempotencyKey.key == key)).first()
+        if existing is not None:
+            abandoned = (
+                existing.status_code == IN_PROGRESS_STATUS
+                and existing.created_at < now - timedelta(seconds=stale_after_seconds)
+            )
+            if existing.expires_at > now and not abandoned:
+                return existing
+            # Se toma la fila solo si nadie la tomó antes (misma versión)
+            result = db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.id == existing.id, IdempotencyKey.version == existing.version)
+                .values(
+                    version=IdempotencyKey.version + 1,
+                    route=route,
+                    method=method,
+                    request_hash=request_hash,
+                    status_code=IN_PROGRESS_STATUS,
+                    response_body=None,
+                    response_headers=None,
+                    created_at=now,
+                    expires_at=now + timedelta(hours=ttl_hours),
+                )
+            )
+            db.commit()
+            if result.rowcount == 1:
+                return None
+            db.expire_all()
+            return db.scalars(select(IdempotencyKey).where(IdempotencyKey.key == key)).first()
+
+        db.add(
+            IdempotencyKey(
+                key=key,
+                route=route,
+                method=method,
+                request_hash=request_hash,
+                status_code=IN_PROGRESS_STATUS,
+                created_at=now,
+                expires_at=now + timedelta(hours=ttl_hours),
+            )
+        )
+        try:
+            db.commit()
+            return None
+        except IntegrityError:
+            # Otro worker insertó la misma clave entre la lectura y el insert
+            db.rollback()
+            return db.scalars(select(IdempotencyKey).where(IdempotencyKey.key == key)).first()
+    except (ProgrammingError, OperationalError) as exc:
+        db.rollback()
+        if _table_missing(exc):
+            logger.warning("Tabla dbo.idempotency_keys no encontrada; omitiendo idempotencia hasta que exista.")
+            return None
+        raise
+
+
+def complete_idempotency_key(
+    db: Session,
+    key: str,
+    status_code: int,
+    response_body: Optional[str],
+    response_headers: Optional[str] = None,
+) -> None:
+    """Guarda la respuesta final (estado, cuerpo y cabeceras en JSON) de una clave reservada."""
+    try:
+        db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key == key)
+            .values(status_code=status_code, response_body=response_body, response_headers=response_headers)
         )
         db.commit()
-        return count
+    except (ProgrammingError, OperationalError) as exc:
+        db.rollback()
+        if not _table_missing(exc):
+            raise
+
+
+def release_idempotency_key(db: Session, key: str) -> None:
+    """Libera una reserva en curso (la petición falló y puede reintentarse)."""
+    try:
+        db.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.key == key, IdempotencyKey.status_code == IN_PROGRESS_STATUS
+            )
+        )
+        db.commit()
+    except (ProgrammingError, OperationalError) as exc:
+        db.rollback()
+        if not _table_missing(exc):
+            raise
+
+
+def cleanup_expired_keys(db: Session, batch_size: int = 500) -> int:
+    """Elimina claves de idempotencia expiradas por lotes. Retorna cantidad eliminada.
+
+    Cada lote se confirma por separado para mantener cortas las transacciones
+    y los bloqueos sobre la tabla.
+    """
+    total = 0
+    try:
+        while True:
+            ids = db.scalars(
+                select(IdempotencyKey.id)
+                .where(IdempotencyKey.expires_at < datetime.utcnow())
+                .limit(batch_size)
+            ).all()
+            if not ids:
+                break
+            db.execute(delete(IdempotencyKey).where(IdempotencyKey.id.in_(ids)))
+            db.commit()
+            total += len(ids)
+            if len(ids) < batch_size:
+                break
+        return total
     except (ProgrammingError, OperationalError) as exc:
         db.rollback()
         if _table_missing(exc):
             logger.warning(
                 "Tabla dbo.idempotency_keys no encontrada al limpiar claves expiradas."
             )
-            return 0
+            return total
         raise
-
@@ -1,14 +1,24 @@
 from __future__ import annotations
 
-from sqlalchemy import or_, select
+from typing import Iterable, Iterator, Sequence
+
+from sqlalchemy import select
 from sqlalchemy.orm import Session, joinedload
 
 from app.models.producto_almacen import ProductoAlmacen
 from app.models.variante_producto import VarianteProducto
-from app.models.producto import Producto
 from app.models.almacen import Almacen
 
 
+# SQL Server admite ~2100 parámetros por sentencia; los IN se parten en bloques
+_IN_CHUNK_SIZE = 1000
+
+
+def _chunks(values: Sequence[int], size: int = _IN_CHUNK_SIZE) -> Iterator[Sequence[int]]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
 class InventoryRepository:
     def __init__(self, db: Session):
         self._db = db
@@ -45,27 +55,73 @@ class InventoryRepository:
         )
         return self._db.scalars(stmt).first()
 
+    def existing_variant_ids(self, variant_ids: Iterable[int]) -> set[int]:
+        ids = sorted(set(variant_ids))
+        found: set[int] = set()
+        for chunk in _chunks(ids):
+            found.update(self._db.scalars(select(VarianteProducto.id).where(VarianteProducto.id.in_(chunk))))
+        return found
+
+    def get_warehouses(self, warehouse_ids: Iterable[int]) -> dict[int, Almacen]:
+        ids = sorted(set(warehouse_ids))
+        stmt = select(Almacen).where(Almacen.id.in_(ids))
+        return {almacen.id: almacen for almacen in self._db.scalars(stmt)}
+
+    def stock_records(
+        self, pairs: Iterable[tuple[int, int]], *, lock: bool = False
+    ) -> dict[tuple[int, int], ProductoAlmacen]:
+        """Registros de stock de los pares (variante, almacén) indicados, en bloque.
+
+        Con `lock=True` las filas se bloquean para actualización en orden
+        (variante, almacén): `WITH (UPDLOCK, ROWLOCK)` en SQL Server y
+        `FOR UPDATE` en PostgreSQL. Todas las transacciones de stock toman los
+        bloqueos en el mismo orden, lo que evita interbloqueos entre ellas.
+        """
+        wanted = set(pairs)
+        variant_ids = sorted({variant_id for variant_id, _ in wanted})
+        warehouse_ids = sorted({warehouse_id for _, warehouse_id in wanted})
+        records: dict[tuple[int, int], ProductoAlmacen] = {}
+        for chunk in _chunks(variant_ids):
+            stmt = (
+                select(ProductoAlmacen)
+                .where(
+                    ProductoAlmacen.variante_producto_id.in_(chunk),
+                    ProductoAlmacen.almacen_id.in_(warehouse_ids),
+                )
+                .order_by(ProductoAlmacen.variante_producto_id, ProductoAlmacen.almacen_id, ProductoAlmacen.id)
+            )
+            if lock:
+                stmt = stmt.with_hint(ProductoAlmacen, "WITH (UPDLOCK, ROWLOCK)", "mssql").with_for_update()
+            for record in self._db.scalars(stmt):
+                key = (record.variante_producto_id, record.almacen_id)
+                if key in wanted:
+                    records.setdefault(key, record)
+        return records
+
+    def stock_versions(self, stock_ids: Iterable[int]) -> dict[int, int]:
+        ids = sorted(set(stock_ids))
+        versions: dict[int, int] = {}
+        for chunk in _chunks(ids):
+            stmt = select(ProductoAlmacen.id, ProductoAlmacen.version).where(ProductoAlmacen.id.in_(chunk))
+            versions.update({row.id: row.version for row in self._db.execute(stmt)})
+        return versions
+
     def list_warehouses(self) -> list[Almacen]:
         stmt = select(Almacen).order_by(Almacen.nombre.asc())
         return list(self._db.scalars(stmt).all())
 
-    def search_variants(self, search: str, limit: int = 20) -> list[VarianteProducto]:
-        like = f"%{search.strip()}%"
+    def variants_by_ids(self, variant_ids: Sequence[int]) -> list[VarianteProducto]:
+        """Variantes con producto, unidad y stock, en el orden de `variant_ids`."""
+        if not variant_ids:
+            return []
         stmt = (
             select(VarianteProducto)
-            .join(VarianteProducto.producto)
             .options(
                 joinedload(VarianteProducto.producto),
                 joinedload(VarianteProducto.unidad_medida),
                 joinedload(VarianteProducto.stock_almacenes).joinedload(ProductoAlmacen.almacen),
             )
-            .where(
-                or_(
-                    Producto.nombre.ilike(like),
-                    VarianteProducto.nombre.ilike(like),
-                )
-            )
-            .order_by(Producto.nombre.asc(), VarianteProducto.nombre.asc())
-            .limit(limit)
+            .where(VarianteProducto.id.in_(list(variant_ids)))
         )
-        return list(self._db.scalars(stmt).unique().all())
+        by_id = {variante.id: variante for variante in self._db.scalars(stmt).unique()}
+        return [by_id[variant_id] for variant_id in variant_ids if variant_id in by_id]
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Generic, Sequence, TypeVar
+
+from sqlalchemy import and_, func, inspect, or_, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import UnaryExpression
+
+T = TypeVar("T")
+
+FilterFn = Callable[[Any], Any]
+
+
+@dataclass(slots=True)
+class Page(Generic[T]):
+    """Resultado de una página: entidades, total filtrado y cursor a la siguiente página."""
+
+    items: list[T]
+    total: int
+    next_cursor: str | None = None
+
+
+@dataclass(slots=True)
+class _SortKey:
+    column: Any
+    descending: bool
+
+
+@dataclass(slots=True)
+class PageQuery(Generic[T]):
+    """Paginación en dos fases para repositorios con grafos de carga ansiosa.
+
+    1. Se selecciona solo la página de claves primarias (más las columnas de
+       ordenamiento) sobre la tabla filtrada, sin joins de colecciones.
+    2. Se carga el grafo completo únicamente para esos ids con las `options`
+       indicadas (se recomienda `selectinload` para colecciones).
+
+    `order_by` debe terminar en una columna única (normalmente el id) para que
+    el orden sea estable; la paginación por cursor además requiere columnas no nulas.
+    """
+
+    db: Session
+    model: type[T]
+    order_by: Sequence[Any]
+    options: Sequence[Any] = ()
+    apply_filters: FilterFn | None = None
+    _pk: Any = field(init=False)
+    _pk_attr: str = field(init=False)
+    _keys: list[_SortKey] = field(init=False)
+
+    def __post_init__(self) -> None:
+        mapper = inspect(self.model)
+        self._pk = mapper.primary_key[0]
+        self._pk_attr = mapper.get_property_by_column(self._pk).key
+        self._keys = [_sort_key(expr) for expr in self.order_by]
+
+    def _filtered(self, stmt):
+        return self.apply_filters(stmt) if self.apply_filters else stmt
+
+    def count(self) -> int:
+        return self.db.scalar(self._filtered(select(func.count()).select_from(self.model))) or 0
+
+    def _key_stmt(self):
+        columns = [self._pk, *(key.column for key in self._keys)]
+        return self._filtered(select(*columns)).order_by(*self.order_by)
+
+    def load(self, ids: Sequence[Any]) -> list[T]:
+        """Carga las entidades de `ids` conservando el orden recibido."""
+        if not ids:
+            return []
+        stmt = select(self.model).options(*self.options).where(self._pk.in_(ids))
+        by_id = {getattr(row, self._pk_attr): row for row in self.db.scalars(stmt).unique()}
+        return [by_id[item_id] for item_id in ids if item_id in by_id]
+
+    def _build_page(self, rows: list[Any], page_size: int, total: int, has_more: bool) -> Page[T]:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(list(rows[-1][1:])) if rows and has_more else None
+        return Page(items=self.load([row[0] for row in rows]), total=total, next_cursor=next_cursor)
+
+    def offset_page(self, page: int, page_size: int) -> Page[T]:
+        total = self.count()
+        offset = (page - 1) * page_size
+        if offset >= total:
+            return Page(items=[], total=total)
+        rows = list(self.db.execute(self._key_stmt().offset(offset).limit(page_size)).all())
+        return self._build_page(rows, page_size, total, has_more=offset + len(rows) < total)
+
+    def keyset_page(self, cursor: str, page_size: int) -> Page[T]:
+        values = decode_cursor(cursor)
+        if len(values) != len(self._keys):
+            raise ValueError("Cursor de paginación inválido")
+        stmt = self._key_stmt().where(self._after(values)).limit(page_size + 1)
+        rows = list(self.db.execute(stmt).all())
+        return self._build_page(rows, page_size, self.count(), has_more=len(rows) > page_size)
+
+    def _after(self, values: Sequence[Any]):
+        """Predicado "fila posterior al cursor" para un orden lexicográfico mixto."""
+        clauses = []
+        for index, key in enumerate(self._keys):
+            equal_prefix = [k.column == v for k, v in zip(self._keys[:index], values[:index], strict=True)]
+            value = values[index]
+            step = key.column < value if key.descending else key.column > value
+            clauses.append(and_(*equal_prefix, step))
+        return or_(*clauses)
+
+
+def paginate(
+    db: Session,
+    model: type[T],
+    *,
+    order_by: Sequence[Any],
+    options: Sequence[Any] = (),
+    apply_filters: FilterFn | None = None,
+    page: int = 1,
+    page_size: int = 20,
+    cursor: str | None = None,
+) -> Page[T]:
+    """Atajo: usa el cursor si se recibe, si no la paginación por número de página."""
+    query = PageQuery(
+        db=db, model=model, order_by=order_by, options=options, apply_filters=apply_filters
+    )
+    if cursor:
+        return query.keyset_page(cursor, page_size)
+    return query.offset_page(page, page_size)
+
+
+def _sort_key(expr: Any) -> _SortKey:
+    if isinstance(expr, UnaryExpression) and expr.modifier in (operators.desc_op, operators.asc_op):
+        return _SortKey(column=expr.element, descending=expr.modifier is operators.desc_op)
+    return _SortKey(column=expr, descending=False)
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "dec" in value:
+            return Decimal(value["dec"])
+        raise ValueError("Cursor de paginación inválido")
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as exc:
+        raise ValueError("Cursor de paginación inválido") from exc
+    if not isinstance(values, list):
+        raise ValueError("Cursor de paginación inválido")
+    try:
+        return [_decode_value(value) for value in values]
+    except (TypeError, ValueError, ArithmeticError) as exc:
+        # Cursor manipulado: {"dec": "abc"}, {"dt": 5}, {"d": null}...
+        raise ValueError("Cursor de paginación inválido") from exc
+
+
+__all__ = ["Page", "PageQuery", "paginate", "encode_cursor", "decode_cursor"]
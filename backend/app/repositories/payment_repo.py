@@ -7,6 +7,7 @@ from sqlalchemy import func, select
 from sqlalchemy.orm import Session, joinedload
 
 from app.models.pago import PagoCliente
+from app.repositories.pagination import paginate
 
 
 @dataclass(slots=True)
@@ -21,17 +22,18 @@ class PaymentRepository:
     def __init__(self, db: Session):
         self._db = db
 
-    def _base_stmt(self):
+    @staticmethod
+    def _load_options() -> tuple:
         return (
-            select(PagoCliente)
-            .options(
-                joinedload(PagoCliente.cliente),
-                joinedload(PagoCliente.factura),
-                joinedload(PagoCliente.orden_venta),
-                joinedload(PagoCliente.usuario),
-            )
+            joinedload(PagoCliente.cliente),
+            joinedload(PagoCliente.factura),
+            joinedload(PagoCliente.orden_venta),
+            joinedload(PagoCliente.usuario),
         )
 
+    def _base_stmt(self):
+        return select(PagoCliente).options(*self._load_options())
+
     def _apply_filters(self, stmt, filters: PaymentFilter):
         if filters.cliente_id:
             stmt = stmt.where(PagoCliente.cliente_id == filters.cliente_id)
@@ -44,14 +46,16 @@ class PaymentRepository:
         return stmt
 
     def list(self, filters: PaymentFilter, page: int, page_size: int) -> tuple[list[PagoCliente], int]:
-        stmt = self._apply_filters(
-            self._base_stmt().order_by(PagoCliente.fecha_pago.desc(), PagoCliente.id.desc()),
-            filters,
+        result = paginate(
+            self._db,
+            PagoCliente,
+            order_by=(PagoCliente.fecha_pago.desc(), PagoCliente.id.desc()),
+            options=self._load_options(),
+            apply_filters=lambda stmt: self._apply_filters(stmt, filters),
+            page=page,
+            page_size=page_size,
         )
-        total_stmt = self._apply_filters(select(func.count()).select_from(PagoCliente), filters)
-        total = self._db.scalar(total_stmt) or 0
-        result = self._db.execute(stmt.offset((page - 1) * page_size).limit(page_size)).unique()
-        return list(result.scalars().all()), total
+        return result.items, result.total
 
     def get(self, payment_id: int) -> Optional[PagoCliente]:
         stmt = self._base_stmt().where(PagoCliente.id == payment_id)
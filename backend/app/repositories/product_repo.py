@@ -2,27 +2,36 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Iterable, Sequence
+from typing import Iterable
 
 from slugify import slugify
-from sqlalchemy import func, or_, select
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, false, func, or_, select
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 from app.models.atributo import Atributo, ValorAtributoVariante
 from app.models.imagen_producto import ImagenProducto
 from app.models.producto import Producto
 from app.models.variante_producto import VarianteProducto
+from app.repositories.pagination import Page, PageQuery, decode_cursor, encode_cursor, paginate
 
 
 _STATUS_ATTRIBUTE_NAME = "estado_producto"
 _DEFAULT_STATUS = "ACTIVE"
+_INACTIVE_STATUS_VALUES = ("INACTIVO", "INACTIVA", "INACTIVE", "DISABLED", "OFF")
+_ACTIVE_STATUS_VALUES = ("ACTIVO", "ACTIVA", "ACTIVE")
+_SLUG_MAX_LENGTH = 120
+# Máximo de candidatos que revisa la búsqueda aproximada cuando el slug no existe
+_SLUG_FALLBACK_LIMIT = 50
 
 
 @dataclass(slots=True)
 class ProductFilter:
     search: str | None = None
+    # Ids ya ordenados por relevancia (ProductSearchService); reemplaza el orden por fecha
+    product_ids: list[int] | None = None
     brand_id: int | None = None
     category_id: int | None = None
+    status: str | None = None
 
 
 class ProductRepository:
@@ -31,21 +40,23 @@ class ProductRepository:
     def __init__(self, db: Session):
         self._db = db
 
-    def _base_stmt(self):
+    @staticmethod
+    def _load_options() -> tuple:
+        # Colecciones con selectinload: evita el producto cartesiano de varios joins
         return (
-            select(Producto)
-            .options(
-                joinedload(Producto.marca),
-                joinedload(Producto.categoria),
-                joinedload(Producto.variantes)
-                .joinedload(VarianteProducto.unidad_medida),
-                joinedload(Producto.variantes)
-                .joinedload(VarianteProducto.valores_atributos)
-                .joinedload(ValorAtributoVariante.atributo),
-                joinedload(Producto.imagenes),
-            )
+            joinedload(Producto.marca),
+            joinedload(Producto.categoria),
+            selectinload(Producto.variantes)
+            .joinedload(VarianteProducto.unidad_medida),
+            selectinload(Producto.variantes)
+            .selectinload(VarianteProducto.valores_atributos)
+            .joinedload(ValorAtributoVariante.atributo),
+            selectinload(Producto.imagenes),
         )
 
+    def _base_stmt(self):
+        return select(Producto).options(*self._load_options())
+
     def _apply_filters(self, stmt, filters: ProductFilter):
         conditions: list = []
         if filters.search:
@@ -56,39 +67,125 @@ class ProductRepository:
                     Producto.descripcion.ilike(like),
                 )
             )
+        if filters.product_ids is not None:
+            conditions.append(Producto.id.in_(filters.product_ids))
         if filters.brand_id:
             conditions.append(Producto.marca_id == filters.brand_id)
         if filters.category_id:
             conditions.append(Producto.categoria_id == filters.category_id)
+        if filters.status:
+            conditions.append(self._status_condition(filters.status))
 
         if conditions:
             stmt = stmt.where(*conditions)
         return stmt
 
-    def list(
+    @staticmethod
+    def _status_values_exist(inactive: bool):
+        """EXISTS correlacionado sobre los valores `estado_producto` de las variantes."""
+        valor = func.upper(func.ltrim(func.rtrim(ValorAtributoVariante.valor)))
+        condition = (
+            valor.in_(_INACTIVE_STATUS_VALUES) if inactive else valor.not_in(_INACTIVE_STATUS_VALUES)
+        )
+        return (
+            select(ValorAtributoVariante.id)
+            .join(VarianteProducto, VarianteProducto.id == ValorAtributoVariante.variante_id)
+            .join(Atributo, Atributo.id == ValorAtributoVariante.atributo_id)
+            .where(
+                VarianteProducto.producto_id == Producto.id,
+                Atributo.nombre == _STATUS_ATTRIBUTE_NAME,
+                condition,
+            )
+            .exists()
+        )
+
+    def _status_condition(self, status: str):
+        """Traduce el estado calculado por `determine_status` a una condición SQL.
+
+        Un producto es INACTIVE cuando tiene al menos un valor de estado y todos son
+        inactivos; en cualquier otro caso (incluido sin valores) es ACTIVE.
+        """
+        value = status.strip().upper()
+        is_inactive = and_(
+            self._status_values_exist(inactive=True),
+            ~self._status_values_exist(inactive=False),
+        )
+        if value in _INACTIVE_STATUS_VALUES:
+            return is_inactive
+        if value in _ACTIVE_STATUS_VALUES:
+            return ~is_inactive
+        return false()
+
+    def list_page(
         self,
         filters: ProductFilter,
         page: int,
         page_size: int,
-    ) -> tuple[list[Producto], int]:
-        stmt = self._apply_filters(self._base_stmt(), filters)
-        stmt = stmt.order_by(Producto.fecha_creacion.desc())
-
-        total_stmt = select(func.count()).select_from(Producto)
-        total_stmt = self._apply_filters(total_stmt, filters)
-        total = self._db.scalar(total_stmt) or 0
+        cursor: str | None = None,
+    ) -> Page[Producto]:
+        if filters.product_ids is not None:
+            return self._ranked_page(filters, page, page_size, cursor)
+        return paginate(
+            self._db,
+            Producto,
+            order_by=(Producto.fecha_creacion.desc(), Producto.id.desc()),
+            options=self._load_options(),
+            apply_filters=lambda stmt: self._apply_filters(stmt, filters),
+            page=page,
+            page_size=page_size,
+            cursor=cursor,
+        )
 
-        result = self._db.scalars(
-            stmt.offset((page - 1) * page_size).limit(page_size)
+    def _ranked_page(
+        self,
+        filters: ProductFilter,
+        page: int,
+        page_size: int,
+        cursor: str | None,
+    ) -> Page[Producto]:
+        """Página de resultados de búsqueda en el orden de relevancia de `product_ids`.
+
+        Los demás filtros se aplican con una sola consulta de ids; el cursor es
+        la posición dentro de la lista ordenada.
+        """
+        if cursor:
+            values = decode_cursor(cursor)
+            if len(values) != 1 or not isinstance(values[0], int) or values[0] < 0:
+                raise ValueError("Cursor de paginación inválido")
+            offset = values[0]
+        else:
+            offset = (page - 1) * page_size
+        ranked = filters.product_ids or []
+        allowed = (
+            set(self._db.scalars(self._apply_filters(select(Producto.id), filters)).all()) if ranked else set()
+        )
+        ids = [product_id for product_id in ranked if product_id in allowed]
+        end = offset + page_size
+        loader = PageQuery(db=self._db, model=Producto, order_by=(Producto.id,), options=self._load_options())
+        return Page(
+            items=loader.load(ids[offset:end]),
+            total=len(ids),
+            next_cursor=encode_cursor([end]) if end < len(ids) else None,
         )
-        rows: Sequence[Producto] = result.unique().all()
-        return list(rows), total
+
+    def list(
+        self,
+        filters: ProductFilter,
+        page: int,
+        page_size: int,
+    ) -> tuple[list[Producto], int]:
+        result = self.list_page(filters, page, page_size)
+        return result.items, result.total
 
     def get_by_id(self, product_id: int) -> Producto | None:
         stmt = self._base_stmt().where(Producto.id == product_id)
         return self._db.scalars(stmt).first()
 
-    def _match_by_slug(self, slug: str, productos: Iterable[Producto]) -> Producto | None:
+    def _match_by_slug(self, slug: str, productos: Iterable) -> int | None:
+        """Busca entre los candidatos uno cuyo nombre genere un slug equivalente.
+
+        Los candidatos solo necesitan exponer `id` y `nombre`; devuelve el id encontrado.
+        """
         # Normalizar el slug de búsqueda (lowercase, sin espacios extra)
         slug_normalized = slug.lower().strip()
         
@@ -99,21 +196,21 @@ class ProductRepository:
             
             # Comparación exacta
             if producto_slug == slug_normalized:
-                return producto
+                return producto.id
             
             # Comparación flexible: sin guiones
             if producto_slug.replace("-", "") == slug_normalized.replace("-", ""):
-                return producto
+                return producto.id
             
             # Comparación flexible: espacios en lugar de guiones
             if producto_slug.replace("-", " ") == slug_normalized.replace("-", " "):
-                return producto
+                return producto.id
             
             # Comparación flexible: normalizar múltiples guiones
             producto_slug_normalized = "-".join(filter(None, producto_slug.split("-")))
             slug_search_normalized = "-".join(filter(None, slug_normalized.split("-")))
             if producto_slug_normalized == slug_search_normalized:
-                return producto
+                return producto.id
         
         return None
 
@@ -124,23 +221,42 @@ class ProductRepository:
         
         # Normalizar el slug
         slug_normalized = slug.lower().strip()
+        if not slug_normalized:
+            return None
         
-        # Primero intentar búsqueda directa en todos los productos (más rápido si hay pocos)
-        all_products = self._db.scalars(self._base_stmt()).unique().all()
-        match = self._match_by_slug(slug_normalized, all_products)
-        if match:
-            return match
+        # Búsqueda directa por la columna indexada
+        stmt = self._base_stmt().where(Producto.slug == slug_normalized)
+        producto = self._db.scalars(stmt).unique().first()
+        if producto:
+            return producto
         
-        # Si no se encuentra, intentar búsqueda aproximada por texto
+        # Fallback acotado: productos sin slug persistido o slugs antiguos.
+        # Solo se leen id y nombre de un número limitado de candidatos.
         search = slug_normalized.replace("-", " ")
-        stmt = self._apply_filters(self._base_stmt(), ProductFilter(search=search))
-        candidates: Iterable[Producto] = self._db.scalars(stmt).unique().all()
-        match = self._match_by_slug(slug_normalized, candidates)
-        if match:
-            return match
-
-        # Último intento: buscar en todos los productos de nuevo (por si acaso)
-        return self._match_by_slug(slug_normalized, all_products)
+        candidates_stmt = self._apply_filters(
+            select(Producto.id, Producto.nombre), ProductFilter(search=search)
+        ).limit(_SLUG_FALLBACK_LIMIT)
+        match_id = self._match_by_slug(slug_normalized, self._db.execute(candidates_stmt).all())
+        if match_id is None:
+            return None
+        return self.get_by_id(match_id)
+
+    def _assign_slug(self, producto: Producto) -> None:
+        """Genera y persiste un slug único para el producto (requiere `producto.id`).
+
+        Se prueba el slug del nombre, luego `<slug>-<id>` y, si otro producto
+        ya se llama así, `<slug>-<id>-2`, `<slug>-<id>-3`... hasta uno libre.
+        """
+        base = slugify(producto.nombre or "", max_length=_SLUG_MAX_LENGTH) or "producto"
+        candidate = base
+        attempt = 0
+        while self._db.scalar(
+            select(Producto.id).where(Producto.slug == candidate, Producto.id != producto.id)
+        ) is not None:
+            attempt += 1
+            suffix = f"-{producto.id}" if attempt == 1 else f"-{producto.id}-{attempt}"
+            candidate = f"{base[: _SLUG_MAX_LENGTH - len(suffix)]}{suffix}"
+        producto.slug = candidate
 
     def list_variants(self, product_id: int) -> list[VarianteProducto]:
         stmt = (
@@ -159,7 +275,7 @@ class ProductRepository:
         if not status:
             return _DEFAULT_STATUS
         value = status.strip().upper()
-        if value in {"INACTIVO", "INACTIVA", "INACTIVE", "DISABLED", "OFF"}:
+        if value in _INACTIVE_STATUS_VALUES:
             return "INACTIVE"
         return _DEFAULT_STATUS
 
@@ -240,6 +356,7 @@ class ProductRepository:
         self._db.add(producto)
         self._db.flush()
 
+        self._assign_slug(producto)
         self._apply_status(producto, data.get("status", _DEFAULT_STATUS))
 
         self._db.commit()
@@ -247,10 +364,14 @@ class ProductRepository:
         return producto
 
     def update(self, producto: Producto, data: dict) -> Producto:
+        previous_name = producto.nombre
         for field in ("nombre", "descripcion", "categoria_id", "marca_id"):
             if field in data and data[field] is not None:
                 setattr(producto, field, data[field])
 
+        if producto.nombre != previous_name or not producto.slug:
+            self._assign_slug(producto)
+
         now = datetime.utcnow()
 
         if "variantes" in data:
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional, Sequence
+from typing import Optional
 
-from sqlalchemy import func, select
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
 
 from app.models.promocion import Promocion, ReglaPromocion
+from app.repositories.pagination import paginate
 
 
 @dataclass(slots=True)
@@ -19,7 +20,7 @@ class PromotionRepository:
         self._db = db
 
     def _base_stmt(self):
-        return select(Promocion).options(joinedload(Promocion.reglas))
+        return select(Promocion).options(selectinload(Promocion.reglas))
 
     def _apply_filters(self, stmt, filters: PromotionFilter):
         if filters.active is not None:
@@ -27,16 +28,16 @@ class PromotionRepository:
         return stmt
 
     def list(self, filters: PromotionFilter, page: int, page_size: int) -> tuple[list[Promocion], int]:
-        stmt = self._apply_filters(
-            self._base_stmt().order_by(Promocion.fecha_inicio.desc(), Promocion.id.desc()),
-            filters,
+        result = paginate(
+            self._db,
+            Promocion,
+            order_by=(Promocion.fecha_inicio.desc(), Promocion.id.desc()),
+            options=(selectinload(Promocion.reglas),),
+            apply_filters=lambda stmt: self._apply_filters(stmt, filters),
+            page=page,
+            page_size=page_size,
         )
-        total_stmt = self._apply_filters(select(func.count()).select_from(Promocion), filters)
-        total = self._db.scalar(total_stmt) or 0
-        rows: Sequence[Promocion] = (
-            self._db.scalars(stmt.offset((page - 1) * page_size).limit(page_size)).unique().all()
-        )
-        return list(rows), total
+        return result.items, result.total
 
     def get(self, promotion_id: int) -> Promocion | None:
         stmt = self._base_stmt().where(Promocion.id == promotion_id)
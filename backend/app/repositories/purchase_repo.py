@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional, Sequence
+from typing import Optional
 
-from sqlalchemy import func, select
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload, selectinload
 
 from app.models.compra import ItemOrdenCompra, OrdenCompra
+from app.repositories.pagination import paginate
 
 
 @dataclass(slots=True)
@@ -19,16 +20,17 @@ class PurchaseRepository:
     def __init__(self, db: Session):
         self._db = db
 
-    def _base_stmt(self):
+    @staticmethod
+    def _load_options() -> tuple:
         return (
-            select(OrdenCompra)
-            .options(
-                joinedload(OrdenCompra.proveedor),
-                joinedload(OrdenCompra.usuario),
-                joinedload(OrdenCompra.items).joinedload(ItemOrdenCompra.variante),
-            )
+            joinedload(OrdenCompra.proveedor),
+            joinedload(OrdenCompra.usuario),
+            selectinload(OrdenCompra.items).joinedload(ItemOrdenCompra.variante),
         )
 
+    def _base_stmt(self):
+        return select(OrdenCompra).options(*self._load_options())
+
     def _apply_filters(self, stmt, filters: PurchaseFilter):
         if filters.supplier_id:
             stmt = stmt.where(OrdenCompra.proveedor_id == filters.supplier_id)
@@ -37,16 +39,16 @@ class PurchaseRepository:
         return stmt
 
     def list(self, filters: PurchaseFilter, page: int, page_size: int) -> tuple[list[OrdenCompra], int]:
-        stmt = self._apply_filters(
-            self._base_stmt().order_by(OrdenCompra.fecha.desc(), OrdenCompra.id.desc()), filters
+        result = paginate(
+            self._db,
+            OrdenCompra,
+            order_by=(OrdenCompra.fecha.desc(), OrdenCompra.id.desc()),
+            options=self._load_options(),
+            apply_filters=lambda stmt: self._apply_filters(stmt, filters),
+            page=page,
+            page_size=page_size,
         )
-        total_stmt = self._apply_filters(select(func.count()).select_from(OrdenCompra), filters)
-        total = self._db.scalar(total_stmt) or 0
-        result = self._db.execute(
-            stmt.offset((page - 1) * page_size).limit(page_size)
-        ).unique()
-        rows: Sequence[OrdenCompra] = result.scalars().all()
-        return list(rows), total
+        return result.items, result.total
 
     def get(self, order_id: int) -> OrdenCompra | None:
         stmt = self._base_stmt().where(OrdenCompra.id == order_id)
@@ -59,12 +61,14 @@ class PurchaseRepository:
         estado: str = "BORRADOR",
         usuario_id: Optional[int] = None,
         observaciones: Optional[str] = None,
+        numero_documento: Optional[str] = None,
     ) -> OrdenCompra:
         from datetime import datetime
         from decimal import Decimal
         from app.models.compra import ItemOrdenCompra
 
         orden = OrdenCompra(
+            numero_documento=numero_documento,
             proveedor_id=proveedor_id,
             fecha=datetime.now(),
             estado=estado,
@@ -1,12 +1,28 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional, Sequence
+from datetime import datetime
+from typing import Iterable, Iterator, Optional, Sequence
 
-from sqlalchemy import func, select
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import bindparam, func, insert, literal, select, union_all, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, selectinload
 
-from app.models.reserva import ItemReserva, Reserva
+from app.models.producto_almacen import ProductoAlmacen
+from app.models.reserva import ItemReserva, Reserva, StockReservado
+from app.repositories.pagination import paginate
+
+
+# Estados de reserva que comprometen stock
+ACTIVE_RESERVATION_STATES = ("PENDIENTE", "CONFIRMADA")
+
+# SQL Server admite ~2100 parámetros por sentencia; los IN se parten en bloques
+_IN_CHUNK_SIZE = 1000
+
+
+def _chunks(values: Sequence[int], size: int = _IN_CHUNK_SIZE) -> Iterator[Sequence[int]]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
 
 
 @dataclass(slots=True)
@@ -19,16 +35,17 @@ class ReservationRepository:
     def __init__(self, db: Session):
         self._db = db
 
-    def _base_stmt(self):
+    @staticmethod
+    def _load_options() -> tuple:
         return (
-            select(Reserva)
-            .options(
-                joinedload(Reserva.cliente),
-                joinedload(Reserva.usuario),
-                joinedload(Reserva.items).joinedload(ItemReserva.variante),
-            )
+            joinedload(Reserva.cliente),
+            joinedload(Reserva.usuario),
+            selectinload(Reserva.items).joinedload(ItemReserva.variante),
         )
 
+    def _base_stmt(self):
+        return select(Reserva).options(*self._load_options())
+
     def _apply_filters(self, stmt, filters: ReservationFilter):
         if filters.customer_id:
             stmt = stmt.where(Reserva.cliente_id == filters.customer_id)
@@ -37,21 +54,167 @@ class ReservationRepository:
         return stmt
 
     def list(self, filters: ReservationFilter, page: int, page_size: int) -> tuple[list[Reserva], int]:
-        stmt = self._apply_filters(
-            self._base_stmt().order_by(Reserva.fecha_reserva.desc(), Reserva.id.desc()), filters
+        result = paginate(
+            self._db,
+            Reserva,
+            order_by=(Reserva.fecha_reserva.desc(), Reserva.id.desc()),
+            options=self._load_options(),
+            apply_filters=lambda stmt: self._apply_filters(stmt, filters),
+            page=page,
+            page_size=page_size,
         )
-        total_stmt = self._apply_filters(select(func.count()).select_from(Reserva), filters)
-        total = self._db.scalar(total_stmt) or 0
-        result = self._db.execute(
-            stmt.offset((page - 1) * page_size).limit(page_size)
-        ).unique()
-        rows: Sequence[Reserva] = result.scalars().all()
-        return list(rows), total
+        return result.items, result.total
 
     def get(self, reservation_id: int) -> Reserva | None:
         stmt = self._base_stmt().where(Reserva.id == reservation_id)
         return self._db.scalars(stmt).first()
 
+    def availability(self, variant_ids: Iterable[int]) -> dict[int, tuple[float, float]]:
+        """Stock total y cantidad reservada por variante, en una consulta agrupada por bloque.
+
+        La parte reservada sale del contador `stock_reservado` (una fila por
+        variante), no de sumar el historial de `items_reserva`. Las variantes
+        sin stock ni reservas no aparecen en el resultado.
+        """
+        ids = sorted(set(variant_ids))
+        totals: dict[int, tuple[float, float]] = {}
+        for chunk in _chunks(ids):
+            movimientos = union_all(
+                select(
+                    ProductoAlmacen.variante_producto_id.label("variante_id"),
+                    ProductoAlmacen.cantidad_disponible.label("stock"),
+                    literal(0).label("reservado"),
+                ).where(ProductoAlmacen.variante_producto_id.in_(chunk)),
+                select(
+                    StockReservado.variante_producto_id.label("variante_id"),
+                    literal(0).label("stock"),
+                    StockReservado.cantidad_reservada.label("reservado"),
+                ).where(StockReservado.variante_producto_id.in_(chunk)),
+            ).subquery("movimientos")
+            stmt = select(
+                movimientos.c.variante_id,
+                func.sum(movimientos.c.stock).label("stock"),
+                func.sum(movimientos.c.reservado).label("reservado"),
+            ).group_by(movimientos.c.variante_id)
+            for row in self._db.execute(stmt):
+                totals[row.variante_id] = (float(row.stock or 0), float(row.reservado or 0))
+        return totals
+
+    # ------------------------------------------------------------------
+    # Contador de stock reservado
+    # ------------------------------------------------------------------
+    def lock_holds(self, variant_ids: Iterable[int], now: datetime) -> dict[int, float]:
+        """Bloquea los contadores de las variantes en orden de id, creando los que falten.
+
+        Dos reservas sobre la misma variante se serializan aquí: la segunda
+        espera al commit de la primera y valida disponibilidad con el contador
+        ya actualizado. Si otra transacción crea el mismo contador a la vez,
+        el INSERT falla dentro de un savepoint y la lectura bloqueada espera
+        a que esa fila quede confirmada.
+        """
+        ids = sorted(set(variant_ids))
+        holds = self._locked_holds(ids)
+        missing = [variant_id for variant_id in ids if variant_id not in holds]
+        if missing:
+            try:
+                with self._db.begin_nested():
+                    self._db.execute(
+                        insert(StockReservado),
+                        [
+                            {"variante_producto_id": variant_id, "cantidad_reservada": 0, "fecha_actualizacion": now}
+                            for variant_id in missing
+                        ],
+                    )
+            except IntegrityError:
+                pass
+            holds.update(self._locked_holds(missing))
+        return holds
+
+    def _locked_holds(self, ids: Sequence[int]) -> dict[int, float]:
+        holds: dict[int, float] = {}
+        for chunk in _chunks(ids):
+            stmt = (
+                select(StockReservado.variante_producto_id, StockReservado.cantidad_reservada)
+                .where(StockReservado.variante_producto_id.in_(chunk))
+                .order_by(StockReservado.variante_producto_id)
+                .with_hint(StockReservado, "WITH (UPDLOCK, ROWLOCK)", "mssql")
+                .with_for_update()
+            )
+            holds.update({row.variante_producto_id: float(row.cantidad_reservada) for row in self._db.execute(stmt)})
+        return holds
+
+    def apply_hold_deltas(self, deltas: dict[int, float], now: datetime) -> None:
+        """Suma `deltas` (positivos al reservar, negativos al liberar) con un UPDATE en bloque.
+
+        El incremento se hace en la base (`cantidad = cantidad + delta`), por lo
+        que no pierde actualizaciones concurrentes. Sin commit.
+        """
+        rows = [
+            {"b_variante": variant_id, "b_delta": delta, "b_fecha": now}
+            for variant_id, delta in sorted(deltas.items())
+            if delta
+        ]
+        if not rows:
+            return
+        table = StockReservado.__table__
+        stmt = (
+            update(table)
+            .where(table.c.variante_producto_id == bindparam("b_variante"))
+            .values(
+                cantidad_reservada=table.c.cantidad_reservada + bindparam("b_delta"),
+                fecha_actualizacion=bindparam("b_fecha"),
+            )
+        )
+        self._db.execute(stmt, rows)
+
+    def claim_transition(self, reservation_id: int, from_states: Iterable[str], to_state: str) -> bool:
+        """Cambia el estado solo si sigue en `from_states`; False si otra petición se adelantó."""
+        stmt = (
+            update(Reserva)
+            .where(Reserva.id == reservation_id, Reserva.estado.in_(tuple(from_states)))
+            .values(estado=to_state)
+            .execution_options(synchronize_session=False)
+        )
+        return self._db.execute(stmt).rowcount == 1
+
+    def active_reserved_totals(self, variant_ids: Optional[Iterable[int]] = None) -> dict[int, float]:
+        """Suma real de ítems en reservas activas por variante (fuente de verdad del contador)."""
+        stmt = (
+            select(ItemReserva.variante_producto_id, func.sum(ItemReserva.cantidad).label("cantidad"))
+            .join(Reserva, Reserva.id == ItemReserva.reserva_id)
+            .where(Reserva.estado.in_(ACTIVE_RESERVATION_STATES))
+            .group_by(ItemReserva.variante_producto_id)
+        )
+        if variant_ids is None:
+            return {row.variante_producto_id: float(row.cantidad) for row in self._db.execute(stmt)}
+        totals: dict[int, float] = {}
+        for chunk in _chunks(sorted(set(variant_ids))):
+            chunk_stmt = stmt.where(ItemReserva.variante_producto_id.in_(chunk))
+            totals.update({row.variante_producto_id: float(row.cantidad) for row in self._db.execute(chunk_stmt)})
+        return totals
+
+    def holds(self) -> dict[int, float]:
+        stmt = select(StockReservado.variante_producto_id, StockReservado.cantidad_reservada)
+        return {row.variante_producto_id: float(row.cantidad_reservada) for row in self._db.execute(stmt)}
+
+    def set_holds(self, quantities: dict[int, float], now: datetime) -> None:
+        """Fija el valor absoluto de contadores existentes (los faltantes se crean con `lock_holds`)."""
+        if not quantities:
+            return
+        table = StockReservado.__table__
+        stmt = (
+            update(table)
+            .where(table.c.variante_producto_id == bindparam("b_variante"))
+            .values(cantidad_reservada=bindparam("b_cantidad"), fecha_actualizacion=bindparam("b_fecha"))
+        )
+        self._db.execute(
+            stmt,
+            [
+                {"b_variante": variant_id, "b_cantidad": cantidad, "b_fecha": now}
+                for variant_id, cantidad in sorted(quantities.items())
+            ],
+        )
+
     def create(
         self,
         cliente_id: int,
@@ -62,7 +225,6 @@ class ReservationRepository:
     ) -> Reserva:
         from datetime import datetime
         from decimal import Decimal
-        from app.models.reserva import ItemReserva
 
         reserva = Reserva(
             cliente_id=cliente_id,
@@ -74,17 +236,23 @@ class ReservationRepository:
         self._db.add(reserva)
         self._db.flush()
 
-        for item_data in items:
-            item = ItemReserva(
-                reserva_id=reserva.id,
-                variante_producto_id=item_data["variante_producto_id"],
-                cantidad=Decimal(str(item_data["cantidad"])),
+        if items:
+            self._db.execute(
+                insert(ItemReserva),
+                [
+                    {
+                        "reserva_id": reserva.id,
+                        "variante_producto_id": item_data["variante_producto_id"],
+                        "cantidad": Decimal(str(item_data["cantidad"])),
+                    }
+                    for item_data in items
+                ],
             )
-            self._db.add(item)
 
         self._db.commit()
-        self._db.refresh(reserva)
-        return reserva
+        # Releer con las relaciones precargadas en lugar de cargarlas ítem por ítem
+        self._db.expire(reserva)
+        return self.get(reserva.id)
 
     def update(self, reserva: Reserva, data: dict) -> Reserva:
         for key, value in data.items():
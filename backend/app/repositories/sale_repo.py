@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional, Sequence
+from typing import Optional
 
-from sqlalchemy import func, select
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, func, insert, or_, select, union
+from sqlalchemy.orm import Session, joinedload, selectinload
 
+from app.models.variante_producto import VarianteProducto
 from app.models.venta import ItemOrdenVenta, OrdenVenta
+from app.repositories.pagination import Page, PageQuery, decode_cursor, encode_cursor, paginate
 
 
 @dataclass(slots=True)
@@ -20,16 +22,17 @@ class SaleRepository:
     def __init__(self, db: Session):
         self._db = db
 
-    def _base_stmt(self):
+    @staticmethod
+    def _load_options() -> tuple:
         return (
-            select(OrdenVenta)
-            .options(
-                joinedload(OrdenVenta.cliente),
-                joinedload(OrdenVenta.usuario),
-                joinedload(OrdenVenta.items).joinedload(ItemOrdenVenta.variante),
-            )
+            joinedload(OrdenVenta.cliente),
+            joinedload(OrdenVenta.usuario),
+            selectinload(OrdenVenta.items).joinedload(ItemOrdenVenta.variante),
         )
 
+    def _base_stmt(self):
+        return select(OrdenVenta).options(*self._load_options())
+
     def _apply_filters(self, stmt, filters: SaleFilter):
         if filters.customer_id:
             stmt = stmt.where(OrdenVenta.cliente_id == filters.customer_id)
@@ -39,22 +42,85 @@ class SaleRepository:
             stmt = stmt.where(OrdenVenta.estado == filters.estado)
         return stmt
 
+    def list_page(
+        self, filters: SaleFilter, page: int, page_size: int, cursor: str | None = None
+    ) -> Page[OrdenVenta]:
+        return paginate(
+            self._db,
+            OrdenVenta,
+            order_by=(OrdenVenta.fecha.desc(), OrdenVenta.id.desc()),
+            options=self._load_options(),
+            apply_filters=lambda stmt: self._apply_filters(stmt, filters),
+            page=page,
+            page_size=page_size,
+            cursor=cursor,
+        )
+
     def list(self, filters: SaleFilter, page: int, page_size: int) -> tuple[list[OrdenVenta], int]:
-        stmt = self._apply_filters(
-            self._base_stmt().order_by(OrdenVenta.fecha.desc(), OrdenVenta.id.desc()), filters
+        result = self.list_page(filters, page, page_size)
+        return result.items, result.total
+
+    def list_for_user_page(
+        self,
+        usuario_id: int,
+        cliente_id: Optional[int],
+        page: int,
+        page_size: int,
+        cursor: str | None = None,
+    ) -> Page[OrdenVenta]:
+        """Pedidos creados por el usuario o de su cliente, del más reciente al más antiguo.
+
+        Cada rama del UNION busca en su índice `(usuario_id|cliente_id, fecha, id)`
+        en lugar de un OR que recorre la tabla, y el total sale de
+        `COUNT(*) OVER ()` en la misma consulta de claves. Después se cargan solo
+        las órdenes de la página (ítems con `selectinload`).
+        """
+        branches = [select(OrdenVenta.id, OrdenVenta.fecha).where(OrdenVenta.usuario_id == usuario_id)]
+        if cliente_id:
+            branches.append(select(OrdenVenta.id, OrdenVenta.fecha).where(OrdenVenta.cliente_id == cliente_id))
+        mine = (union(*branches) if len(branches) > 1 else branches[0]).subquery("mias")
+        counted = select(mine.c.id, mine.c.fecha, func.count().over().label("total")).subquery("contadas")
+        stmt = select(counted.c.id, counted.c.fecha, counted.c.total).order_by(
+            counted.c.fecha.desc(), counted.c.id.desc()
+        )
+        if cursor:
+            values = decode_cursor(cursor)
+            if len(values) != 2:
+                raise ValueError("Cursor de paginación inválido")
+            fecha, order_id = values
+            stmt = stmt.where(
+                or_(counted.c.fecha < fecha, and_(counted.c.fecha == fecha, counted.c.id < order_id))
+            )
+        else:
+            stmt = stmt.offset((page - 1) * page_size)
+        rows = list(self._db.execute(stmt.limit(page_size + 1)).all())
+        if rows:
+            total = rows[0].total
+        else:
+            # Página fuera de rango: sin filas no hay conteo de ventana
+            total = self._db.scalar(select(func.count()).select_from(mine)) or 0
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        loader = PageQuery(db=self._db, model=OrdenVenta, order_by=(OrdenVenta.id,), options=self._load_options())
+        return Page(
+            items=loader.load([row.id for row in rows]),
+            total=total,
+            next_cursor=encode_cursor([rows[-1].fecha, rows[-1].id]) if has_more else None,
         )
-        total_stmt = self._apply_filters(select(func.count()).select_from(OrdenVenta), filters)
-        total = self._db.scalar(total_stmt) or 0
-        result = self._db.execute(
-            stmt.offset((page - 1) * page_size).limit(page_size)
-        ).unique()
-        rows: Sequence[OrdenVenta] = result.scalars().all()
-        return list(rows), total
 
     def get(self, order_id: int) -> OrdenVenta | None:
         stmt = self._base_stmt().where(OrdenVenta.id == order_id)
         return self._db.scalars(stmt).first()
 
+    def variant_prices(self, variant_ids: list[int]) -> dict[int, Optional[float]]:
+        """Precio de lista de cada variante existente (una consulta `IN`)."""
+        if not variant_ids:
+            return {}
+        rows = self._db.execute(
+            select(VarianteProducto.id, VarianteProducto.precio).where(VarianteProducto.id.in_(set(variant_ids)))
+        ).all()
+        return {variant_id: float(precio) if precio is not None else None for variant_id, precio in rows}
+
     def create(
         self,
         cliente_id: int,
@@ -67,7 +133,6 @@ class SaleRepository:
     ) -> OrdenVenta:
         from datetime import datetime
         from decimal import Decimal
-        from app.models.venta import ItemOrdenVenta
 
         orden = OrdenVenta(
             cliente_id=cliente_id,
@@ -81,16 +146,25 @@ class SaleRepository:
         self._db.add(orden)
         self._db.flush()
 
-        for item_data in items:
-            item = ItemOrdenVenta(
-                orden_venta_id=orden.id,
-                variante_producto_id=item_data["variante_producto_id"],
-                cantidad=Decimal(str(item_data["cantidad"])),
-                precio_unitario=Decimal(str(item_data["precio_unitario"])) if item_data.get("precio_unitario") else None,
-            )
-            self._db.add(item)
+        # Un solo executemany para todas las líneas (no hace falta recuperar sus ids)
+        self._db.execute(
+            insert(ItemOrdenVenta),
+            [
+                {
+                    "orden_venta_id": orden.id,
+                    "variante_producto_id": item_data["variante_producto_id"],
+                    "cantidad": Decimal(str(item_data["cantidad"])),
+                    "precio_unitario": (
+                        Decimal(str(item_data["precio_unitario"])) if item_data.get("precio_unitario") else None
+                    ),
+                }
+                for item_data in items
+            ],
+        )
 
         self._db.commit()
-        self._db.refresh(orden)
-        return orden
+        # Recarga con items y variantes en carga anticipada: mapear la respuesta
+        # no debe lanzar una consulta por línea
+        stmt = self._base_stmt().where(OrdenVenta.id == orden.id).execution_options(populate_existing=True)
+        return self._db.scalars(stmt).first()
 
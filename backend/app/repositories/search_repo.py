@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterable, Literal, Optional, Sequence
+
+from sqlalchemy import case, delete, func, insert, literal, or_, select, text
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.models.busqueda_producto import BusquedaProducto
+from app.models.producto import Producto
+from app.models.variante_producto import VarianteProducto
+
+# Agrupa los documentos por producto (listado) o por variante (inventario)
+SearchTarget = Literal["producto", "variante"]
+
+# Peso del nombre frente a la descripción en los rankings SQL
+NAME_WEIGHT = 2
+
+
+class ProductSearchRepository:
+    """Documentos de `busqueda_productos` y consultas de búsqueda por motor."""
+
+    def __init__(self, db: Session):
+        self._db = db
+
+    # ------------------------------------------------------------------
+    # Documentos
+    # ------------------------------------------------------------------
+    def source_rows(self, product_ids: Optional[Iterable[int]] = None) -> list[Row]:
+        """(producto_id, producto_nombre, descripcion, variante_id, variante_nombre) por variante.
+
+        Los productos sin variantes salen una vez con `variante_id` nulo.
+        """
+        stmt = (
+            select(
+                Producto.id.label("producto_id"),
+                Producto.nombre.label("producto_nombre"),
+                Producto.descripcion,
+                VarianteProducto.id.label("variante_id"),
+                VarianteProducto.nombre.label("variante_nombre"),
+            )
+            .outerjoin(VarianteProducto, VarianteProducto.producto_id == Producto.id)
+            .order_by(Producto.id, VarianteProducto.id)
+        )
+        if product_ids is not None:
+            stmt = stmt.where(Producto.id.in_(list(product_ids)))
+        return list(self._db.execute(stmt).all())
+
+    def replace_documents(self, product_ids: Optional[Sequence[int]], documents: Sequence[dict]) -> None:
+        """Reemplaza los documentos de `product_ids` (de todos si es None). No hace commit."""
+        stmt = delete(BusquedaProducto)
+        if product_ids is not None:
+            stmt = stmt.where(BusquedaProducto.producto_id.in_(list(product_ids)))
+        self._db.execute(stmt)
+        if documents:
+            now = datetime.now()
+            self._db.execute(
+                insert(BusquedaProducto),
+                [{**document, "fecha_actualizacion": now} for document in documents],
+            )
+
+    # ------------------------------------------------------------------
+    # Consultas por motor. Reciben los términos ya plegados y devuelven ids
+    # ordenados por relevancia.
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _key_column(target: SearchTarget) -> str:
+        return "producto_id" if target == "producto" else "variante_id"
+
+    def search_mssql(self, terms: Sequence[str], target: SearchTarget, limit: int) -> list[int]:
+        """CONTAINSTABLE con prefijos ("tub*" AND "pvc*"); coincidir en el nombre suma rango."""
+        key = self._key_column(target)
+        query = " AND ".join(f'"{term}*"' for term in terms)
+        stmt = text(f"""
+            SELECT TOP (:limit) b.{key} AS id,
+                   MAX(ft.[RANK] + ISNULL(fn.[RANK], 0) * {NAME_WEIGHT}) AS score
+            FROM CONTAINSTABLE(dbo.busqueda_productos, texto, :query) AS ft
+            JOIN dbo.busqueda_productos AS b ON b.id = ft.[KEY]
+            LEFT JOIN CONTAINSTABLE(dbo.busqueda_productos, nombre, :query) AS fn ON fn.[KEY] = b.id
+            WHERE b.{key} IS NOT NULL
+            GROUP BY b.{key}
+            ORDER BY score DESC, id
+        """)
+        return [row.id for row in self._db.execute(stmt, {"query": query, "limit": limit})]
+
+    def search_postgresql(
+        self,
+        terms: Sequence[str],
+        target: SearchTarget,
+        limit: int,
+        *,
+        trigram: bool = False,
+    ) -> list[int]:
+        """tsquery 'simple' con prefijos (tub:* & pvc:*); sin resultados y con pg_trgm, por similitud."""
+        key = self._key_column(target)
+        stmt = text(f"""
+            SELECT b.{key} AS id,
+                   MAX(ts_rank(to_tsvector('simple', b.texto), q)
+                       + ts_rank(to_tsvector('simple', b.nombre), q) * {NAME_WEIGHT}) AS score
+            FROM dbo.busqueda_productos AS b, to_tsquery('simple', :query) AS q
+            WHERE to_tsvector('simple', b.texto) @@ q AND b.{key} IS NOT NULL
+            GROUP BY b.{key}
+            ORDER BY score DESC, id
+            LIMIT :limit
+        """)
+        query = " & ".join(f"{term}:*" for term in terms)
+        ids = [row.id for row in self._db.execute(stmt, {"query": query, "limit": limit})]
+        if ids or not trigram:
+            return ids
+        # Errores de tipeo ("tuberai"): similitud de trigramas sobre el texto plegado
+        fuzzy = text(f"""
+            SELECT b.{key} AS id, MAX(word_similarity(:phrase, b.texto)) AS score
+            FROM dbo.busqueda_productos AS b
+            WHERE :phrase <% b.texto AND b.{key} IS NOT NULL
+            GROUP BY b.{key}
+            ORDER BY score DESC, id
+            LIMIT :limit
+        """)
+        return [row.id for row in self._db.execute(fuzzy, {"phrase": " ".join(terms), "limit": limit})]
+
+    def search_like(self, terms: Sequence[str], target: SearchTarget, limit: int) -> list[int]:
+        """LIKE por término sobre el texto plegado, sin índice de texto.
+
+        Recorre la tabla igual que el ILIKE anterior, pero ya ignora acentos y
+        exige todos los términos; ordena por términos que empiezan una palabra
+        del nombre.
+        """
+        key = getattr(BusquedaProducto, self._key_column(target))
+        conditions = [BusquedaProducto.texto.like(f"%{term}%") for term in terms]
+        score = sum(
+            (
+                case(
+                    (
+                        or_(
+                            BusquedaProducto.nombre.like(f"{term}%"),
+                            BusquedaProducto.nombre.like(f"% {term}%"),
+                        ),
+                        literal(NAME_WEIGHT),
+                    ),
+                    else_=literal(1),
+                )
+                for term in terms
+            ),
+            literal(0),
+        )
+        stmt = (
+            select(key.label("id"), func.max(score).label("score"))
+            .where(*conditions, key.is_not(None))
+            .group_by(key)
+            .order_by(func.max(score).desc(), key)
+            .limit(limit)
+        )
+        return [row.id for row in self._db.execute(stmt)]
+
+    # ------------------------------------------------------------------
+    # Disponibilidad de los índices
+    # ------------------------------------------------------------------
+    def mssql_fulltext_ready(self) -> bool:
+        """True si el servidor tiene full-text y `busqueda_productos` tiene su índice activo."""
+        return bool(self._db.scalar(text("""
+            SELECT CASE WHEN FULLTEXTSERVICEPROPERTY('IsFullTextInstalled') = 1
+                         AND OBJECTPROPERTY(OBJECT_ID('dbo.busqueda_productos'), 'TableHasActiveFulltextIndex') = 1
+                        THEN 1 ELSE 0 END
+        """)))
+
+    def postgresql_trigram_ready(self) -> bool:
+        return bool(self._db.scalar(text("SELECT COUNT(*) FROM pg_extension WHERE extname = 'pg_trgm'")))
+
+
+__all__ = ["ProductSearchRepository", "SearchTarget", "NAME_WEIGHT"]
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.secuencia_documento import SecuenciaDocumento
+
+
+class DocumentSequenceRepository:
+    def __init__(self, db: Session):
+        self._db = db
+
+    def increment(self, codigo: str, amount: int = 1) -> Optional[int]:
+        """Suma `amount` al contador y devuelve el nuevo último valor en una sola sentencia.
+
+        SQLAlchemy lo emite como `UPDATE ... OUTPUT inserted.ultimo_valor` en
+        SQL Server y `UPDATE ... RETURNING` en PostgreSQL: la fila queda
+        bloqueada hasta el fin de la transacción, así que dos llamadas
+        concurrentes nunca devuelven el mismo valor. None si no existe la fila.
+        """
+        stmt = (
+            update(SecuenciaDocumento)
+            .where(SecuenciaDocumento.codigo == codigo)
+            .values(
+                ultimo_valor=SecuenciaDocumento.ultimo_valor + amount,
+                fecha_actualizacion=datetime.now(),
+            )
+            .returning(SecuenciaDocumento.ultimo_valor)
+        )
+        return self._db.execute(stmt).scalar_one_or_none()
+
+    def ensure(self, codigo: str, start: int = 0) -> None:
+        """Crea la fila del contador si no existe (en su propia transacción)."""
+        try:
+            self._db.execute(
+                insert(SecuenciaDocumento).values(
+                    codigo=codigo,
+                    ultimo_valor=start,
+                    fecha_actualizacion=datetime.now(),
+                )
+            )
+            self._db.commit()
+        except IntegrityError:
+            # Otro worker la creó a la vez
+            self._db.rollback()
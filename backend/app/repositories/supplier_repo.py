@@ -2,12 +2,13 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, Sequence
+from typing import Optional
 
-from sqlalchemy import func, or_, select
-from sqlalchemy.orm import Session
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session, selectinload
 
 from app.models.proveedor import Proveedor
+from app.repositories.pagination import paginate
 
 
 @dataclass(slots=True)
@@ -35,20 +36,19 @@ class SupplierRepository:
         return stmt
 
     def list(self, filters: SupplierFilter, page: int, page_size: int) -> tuple[list[Proveedor], int]:
-        from sqlalchemy.orm import joinedload
-        stmt = (
-            self._apply_filters(self._base_stmt().order_by(Proveedor.nombre.asc()), filters)
-            .options(
-                joinedload(Proveedor.productos),
-                joinedload(Proveedor.contactos),
-            )
+        result = paginate(
+            self._db,
+            Proveedor,
+            order_by=(Proveedor.nombre.asc(), Proveedor.id.asc()),
+            options=(
+                selectinload(Proveedor.productos),
+                selectinload(Proveedor.contactos),
+            ),
+            apply_filters=lambda stmt: self._apply_filters(stmt, filters),
+            page=page,
+            page_size=page_size,
         )
-        total_stmt = self._apply_filters(select(func.count()).select_from(Proveedor), filters)
-        total = self._db.scalar(total_stmt) or 0
-        rows: Sequence[Proveedor] = self._db.scalars(
-            stmt.offset((page - 1) * page_size).limit(page_size)
-        ).unique().all()
-        return list(rows), total
+        return result.items, result.total
 
     def get(self, supplier_id: int) -> Proveedor | None:
         from sqlalchemy.orm import joinedload
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.models.marca import Marca
+from app.models.producto import Producto
+from app.models.variante_producto import VarianteProducto
+from app.models.venta import ItemOrdenVenta, OrdenVenta
+
+CANCELLED_ORDER_STATE = "CANCELADO"
+
+
+class TypeaheadRepository:
+    """Lecturas para construir el índice de autocompletado (solo columnas, sin entidades)."""
+
+    def __init__(self, db: Session):
+        self._db = db
+
+    def catalog_rows(self, product_ids: Optional[Iterable[int]] = None) -> list[Row]:
+        """(producto_id, producto_nombre, slug, marca_id, variante_id, variante_nombre) por variante.
+
+        Los productos sin variantes salen una vez con `variante_id` nulo.
+        """
+        stmt = (
+            select(
+                Producto.id.label("producto_id"),
+                Producto.nombre.label("producto_nombre"),
+                Producto.slug,
+                Producto.marca_id,
+                VarianteProducto.id.label("variante_id"),
+                VarianteProducto.nombre.label("variante_nombre"),
+            )
+            .outerjoin(VarianteProducto, VarianteProducto.producto_id == Producto.id)
+            .order_by(Producto.id, VarianteProducto.id)
+        )
+        if product_ids is not None:
+            stmt = stmt.where(Producto.id.in_(list(product_ids)))
+        return list(self._db.execute(stmt).all())
+
+    def brand_rows(self, brand_ids: Optional[Iterable[int]] = None) -> list[Row]:
+        stmt = select(Marca.id, Marca.nombre).order_by(Marca.id)
+        if brand_ids is not None:
+            stmt = stmt.where(Marca.id.in_(list(brand_ids)))
+        return list(self._db.execute(stmt).all())
+
+    def variant_sales(self, since: datetime) -> dict[int, float]:
+        """Unidades vendidas por variante desde `since` (órdenes no canceladas)."""
+        stmt = (
+            select(ItemOrdenVenta.variante_producto_id, func.sum(ItemOrdenVenta.cantidad))
+            .join(OrdenVenta, OrdenVenta.id == ItemOrdenVenta.orden_venta_id)
+            .where(OrdenVenta.fecha >= since, OrdenVenta.estado != CANCELLED_ORDER_STATE)
+            .group_by(ItemOrdenVenta.variante_producto_id)
+        )
+        return {variant_id: float(total or 0) for variant_id, total in self._db.execute(stmt)}
+
+
+__all__ = ["TypeaheadRepository"]
@@ -3,14 +3,16 @@ from __future__ import annotations
 import logging
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Iterable, Optional, Sequence
+from typing import Iterable, Optional
 
-from sqlalchemy import func, or_, select
+from sqlalchemy import or_, select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload
 
+from app.core.principal import next_security_stamp
 from app.core.security import get_password_hash
-from app.models.usuario import Permiso, Rol, Usuario
+from app.models.usuario import Permiso, Rol, Usuario, normalize_email
+from app.repositories.pagination import paginate
 
 logger = logging.getLogger(__name__)
 
@@ -50,30 +52,16 @@ class UserRepository:
 
     def list(self, filters: UserFilter, page: int, page_size: int) -> tuple[list[Usuario], int]:
         try:
-            # Intentar primero con eager loading de roles
-            try:
-                stmt = self._apply_filters(self._base_stmt(eager_load_roles=True), filters).order_by(Usuario.id.asc())
-            except Exception:
-                # Si falla, intentar sin eager loading
-                logger.warning("Fallando back a consulta sin eager loading de roles")
-                stmt = self._apply_filters(self._base_stmt(eager_load_roles=False), filters).order_by(Usuario.id.asc())
-            
-            total_stmt = self._apply_filters(select(func.count()).select_from(Usuario), filters)
-            total = self._db.scalar(total_stmt) or 0
-            
-            result = self._db.scalars(
-                stmt.offset((page - 1) * page_size).limit(page_size)
+            result = paginate(
+                self._db,
+                Usuario,
+                order_by=(Usuario.id.asc(),),
+                options=(selectinload(Usuario.roles),),
+                apply_filters=lambda stmt: self._apply_filters(stmt, filters),
+                page=page,
+                page_size=page_size,
             )
-            
-            # Intentar usar unique() si es posible, si no, usar all() directamente
-            try:
-                users: Sequence[Usuario] = result.unique().all()
-            except Exception as unique_error:
-                logger.warning(f"Error con unique(), usando all() directamente: {unique_error}")
-                # Si unique() falla, intentar sin unique
-                users: Sequence[Usuario] = result.all()
-            
-            return list(users), total
+            return result.items, result.total
         except Exception as e:
             logger.error(f"Error en UserRepository.list: {type(e).__name__}: {str(e)}", exc_info=True)
             raise
@@ -91,7 +79,7 @@ class UserRepository:
         return self._db.scalars(stmt).first()
 
     def get_by_email(self, correo: str) -> Usuario | None:
-        stmt = self._base_stmt().where(Usuario.correo == correo.strip().lower())
+        stmt = self._base_stmt().where(Usuario.correo_normalizado == normalize_email(correo))
         return self._db.scalars(stmt).first()
 
     def get_by_username(self, username: str) -> Usuario | None:
@@ -107,16 +95,16 @@ class UserRepository:
         activo: bool = True,
         roles: Iterable[int] | None = None,
     ) -> Usuario:
-        correo = correo.strip().lower()
+        correo = normalize_email(correo)
         nombre_usuario = nombre_usuario.strip()
 
         existing = self._db.scalar(
             select(Usuario).where(
-                or_(Usuario.correo == correo, Usuario.nombre_usuario == nombre_usuario)
+                or_(Usuario.correo_normalizado == correo, Usuario.nombre_usuario == nombre_usuario)
             )
         )
         if existing:
-            msg = "El correo electrónico ya está registrado" if existing.correo == correo else "El nombre de usuario ya está en uso"
+            msg = "El correo electrónico ya está registrado" if existing.correo_normalizado == correo else "El nombre de usuario ya está en uso"
             raise IntegrityError(statement="INSERT usuarios", params=None, orig=Exception(msg))
 
         now = datetime.utcnow()
@@ -144,6 +132,7 @@ class UserRepository:
     def update_roles(self, user: Usuario, role_ids: Iterable[int]) -> Usuario:
         user.roles = self._fetch_roles(list(role_ids))
         user.fecha_modificacion = datetime.utcnow()
+        user.version_seguridad = next_security_stamp()
         self._db.add(user)
         self._db.commit()
         self._db.refresh(user)
@@ -152,6 +141,7 @@ class UserRepository:
     def update_status(self, user: Usuario, activo: bool) -> Usuario:
         user.activo = activo
         user.fecha_modificacion = datetime.utcnow()
+        user.version_seguridad = next_security_stamp()
         self._db.add(user)
         self._db.commit()
         self._db.refresh(user)
@@ -168,10 +158,11 @@ class UserRepository:
         if nombre_usuario is not None:
             user.nombre_usuario = nombre_usuario.strip()
         if correo is not None:
-            user.correo = correo.strip().lower()
+            user.correo = normalize_email(correo)
         if activo is not None:
             user.activo = activo
         user.fecha_modificacion = datetime.utcnow()
+        user.version_seguridad = next_security_stamp()
         self._db.add(user)
         try:
             self._db.commit()
@@ -3,6 +3,8 @@ from typing import List, Optional
 
 from pydantic import BaseModel, EmailStr, Field
 
+from app.schemas.sale import SaleOrderResponse
+
 
 class CustomerBase(BaseModel):
     nombre: str = Field(..., max_length=100)
@@ -38,3 +40,78 @@ class CustomerListResponse(BaseModel):
     page: int
     page_size: int
 
+
+
+class CustomerStatistics(BaseModel):
+    total_orders: int = 0
+    open_orders: int = 0
+    total_reservations: int = 0
+    open_reservations: int = 0
+    total_invoices: int = 0
+    total_payments: int = 0
+    total_spent: float = 0.0
+    total_invoiced: float = 0.0
+    total_paid: float = 0.0
+    open_invoice_balance: float = 0.0  # facturas no anuladas menos pagos confirmados sobre ellas
+    pending_payments: float = 0.0
+    first_order_date: Optional[datetime] = None
+    last_order_date: Optional[datetime] = None
+
+
+class CustomerCurrentData(BaseModel):
+    nombre: str
+    telefono: Optional[str] = None
+    nit_ci: Optional[str] = None
+    correo: Optional[str] = None
+    direccion: Optional[str] = None
+    fecha_registro: Optional[datetime] = None
+    usuario_id: Optional[int] = None
+
+
+class CustomerHistoryOrders(BaseModel):
+    items: List[SaleOrderResponse]
+    total: int
+
+
+class CustomerHistoryReservation(BaseModel):
+    id: int
+    fecha: Optional[datetime] = None
+    estado: str
+
+
+class CustomerHistoryInvoice(BaseModel):
+    id: int
+    numero_factura: str
+    fecha_emision: Optional[datetime] = None
+    total: float
+    estado: str
+
+
+class CustomerHistoryPayment(BaseModel):
+    id: int
+    monto: float
+    metodo_pago: str
+    fecha_pago: Optional[datetime] = None
+    estado: str
+
+
+class CustomerHistoryVariations(BaseModel):
+    names: List[str]
+    phones: List[str]
+    nits: List[str]
+    note: str
+
+
+class CustomerHistoryResponse(BaseModel):
+    """Resumen del cliente; las colecciones traen solo la página pedida (vacías si no se incluyen)."""
+
+    customer_id: int
+    current_data: CustomerCurrentData
+    orders: CustomerHistoryOrders
+    reservations: List[CustomerHistoryReservation]
+    invoices: List[CustomerHistoryInvoice]
+    payments: List[CustomerHistoryPayment]
+    variations: CustomerHistoryVariations
+    statistics: CustomerStatistics
+    page: int
+    page_size: int
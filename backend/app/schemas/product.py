@@ -30,6 +30,14 @@ class VariantResponse(BaseModel):
         from_attributes = True
 
 
+class ProductSuggestion(BaseModel):
+    tipo: str  # producto | variante | marca
+    id: int
+    texto: str
+    producto_id: Optional[int] = None
+    slug: Optional[str] = None
+
+
 class ProductImageResponse(BaseModel):
     id: int
     url: str
@@ -61,8 +69,9 @@ class ProductResponse(BaseModel):
     @model_validator(mode="after")
     def compute_fields(self):
         """Calcula campos adicionales para compatibilidad con UI."""
-        # Slug
-        self.slug = slugify(self.nombre)
+        # Slug (se respeta el slug persistido; si no existe se deriva del nombre)
+        if not self.slug:
+            self.slug = slugify(self.nombre)
         
         # Image (primera imagen)
         if self.imagenes and len(self.imagenes) > 0:
@@ -160,6 +169,7 @@ class ProductListResponse(BaseModel):
     total: int
     page: int
     page_size: int
+    next_cursor: Optional[str] = None  # Cursor para pedir la página siguiente (keyset)
 
 
 class ProductDetailResponse(ProductResponse):
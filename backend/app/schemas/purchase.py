@@ -30,6 +30,7 @@ class PurchaseItemResponse(BaseModel):
 
 class PurchaseOrderResponse(BaseModel):
     id: int
+    numero_documento: Optional[str] = None
     fecha: datetime
     estado: str
     proveedor: Optional[PurchaseSupplier] = None
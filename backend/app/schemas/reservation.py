@@ -58,3 +58,17 @@ class ReservationListResponse(BaseModel):
     page: int
     page_size: int
 
+
+
+class ReservationAvailabilityResponse(BaseModel):
+    variante_producto_id: int
+    stock_total: float
+    reservado: float
+    disponible: float
+    solicitado: float
+    suficiente: bool
+
+
+class ReservationAvailabilityBatchResponse(BaseModel):
+    items: List[ReservationAvailabilityResponse]
+    suficiente: bool
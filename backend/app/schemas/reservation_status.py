@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class ReservationCreateRequest(BaseModel):
@@ -10,6 +10,15 @@ class ReservationCreateRequest(BaseModel):
     observaciones: Optional[str] = None
 
 
+class ReservationAvailabilityItem(BaseModel):
+    variante_producto_id: int
+    cantidad: float = Field(gt=0)
+
+
+class ReservationAvailabilityRequest(BaseModel):
+    items: list[ReservationAvailabilityItem] = Field(min_length=1, max_length=500)
+
+
 class ReservationCancelRequest(BaseModel):
     motivo: Optional[str] = None
 
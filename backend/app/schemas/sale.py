@@ -54,6 +54,7 @@ class SaleOrderListResponse(BaseModel):
     total: int
     page: int
     page_size: int
+    next_cursor: Optional[str] = None  # Cursor para pedir la página siguiente (keyset)
 
 
 class SaleItemCreateRequest(BaseModel):
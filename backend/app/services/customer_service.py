@@ -4,9 +4,13 @@ from dataclasses import dataclass, field
 from typing import Optional
 
 from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.repositories.customer_repo import CustomerFilter, CustomerRepository
+from app.services.customer_summary_service import invalidate_customer_summary
 from app.schemas.customer import (
     CustomerCreateRequest,
     CustomerListResponse,
@@ -14,6 +18,22 @@ from app.schemas.customer import (
     CustomerUpdateRequest,
 )
 
+# usuario_id -> cliente_id (0 = sin cliente) para las lecturas "mis pedidos".
+# Local a cada worker: el TTL acota lo que tarda en verse un vínculo hecho en otro.
+_customer_links = TTLCache(
+    maxsize=settings.customer_link_cache_max_entries,
+    ttl=settings.customer_link_cache_ttl_seconds,
+)
+
+
+def _link_key(usuario_id: int) -> str:
+    return f"user:{usuario_id}:"
+
+
+def invalidate_customer_link(usuario_id: Optional[int] = None) -> None:
+    """Olvida el cliente cacheado de `usuario_id` (de todos los usuarios si es None)."""
+    _customer_links.invalidate(_link_key(usuario_id) if usuario_id is not None else "")
+
 
 @dataclass(slots=True)
 class CustomerService:
@@ -41,8 +61,20 @@ class CustomerService:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cliente no encontrado")
         return CustomerResponse.model_validate(customer)
 
+    def customer_id_for_user(self, usuario_id: int, email: Optional[str]) -> Optional[int]:
+        """Cliente asociado al usuario (vinculado o, si no hay, libre con su correo), cacheado."""
+        key = _link_key(usuario_id)
+        cached = _customer_links.get(key)
+        if cached is None:
+            cached = self._repo.customer_id_for_user(usuario_id, email) or 0
+            _customer_links.set(key, cached)
+        return cached or None
+
     def create_customer(self, payload: CustomerCreateRequest) -> CustomerResponse:
-        customer = self._repo.create(payload.model_dump())
+        try:
+            customer = self._repo.create(payload.model_dump())
+        except IntegrityError as exc:
+            self._raise_duplicate_email(exc)
         return CustomerResponse.model_validate(customer)
 
     def update_customer(self, customer_id: int, payload: CustomerUpdateRequest) -> CustomerResponse:
@@ -52,9 +84,22 @@ class CustomerService:
         data = {k: v for k, v in payload.model_dump().items() if v is not None}
         if not data:
             return CustomerResponse.model_validate(customer)
-        customer = self._repo.update(customer, data)
+        try:
+            customer = self._repo.update(customer, data)
+        except IntegrityError as exc:
+            self._raise_duplicate_email(exc)
+        if "correo" in data:
+            invalidate_customer_link()
+        invalidate_customer_summary(customer_id)
         return CustomerResponse.model_validate(customer)
 
+    def _raise_duplicate_email(self, exc: IntegrityError) -> None:
+        # El correo normalizado es único entre clientes (uq_clientes_correo_normalizado)
+        self.db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Ya existe un cliente con ese correo"
+        ) from exc
+
     def delete_customer(self, customer_id: int) -> None:
         customer = self._repo.get(customer_id)
         if not customer:
@@ -63,4 +108,6 @@ class CustomerService:
             self._repo.delete(customer)
         except ValueError as exc:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+        invalidate_customer_link()
+        invalidate_customer_summary(customer_id)
 
@@ -0,0 +1,177 @@
+"""Vista 360 del cliente: agregados en una consulta y colecciones paginadas a pedido.
+
+Los conteos, el total comprado, las fechas de primera/última orden y los
+saldos abiertos salen de `CustomerHistoryRepository.summary` (una consulta con
+subconsultas agregadas). Las órdenes, reservas, facturas y pagos solo se leen
+si se piden, y de a una página.
+
+Con `CUSTOMER_SUMMARY_CACHE_TTL_SECONDS > 0` el resumen se guarda por cliente en
+una caché local del worker; las ventas, pagos, facturas y reservas del cliente
+la invalidan en este proceso y el TTL acota la desactualización de los demás.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.repositories.customer_history_repo import CustomerHistoryRepository
+from app.schemas.customer import (
+    CustomerCurrentData,
+    CustomerHistoryInvoice,
+    CustomerHistoryOrders,
+    CustomerHistoryPayment,
+    CustomerHistoryReservation,
+    CustomerHistoryResponse,
+    CustomerHistoryVariations,
+    CustomerStatistics,
+)
+
+HISTORY_COLLECTIONS = ("orders", "reservations", "invoices", "payments")
+
+_summaries = TTLCache(
+    maxsize=settings.customer_summary_cache_max_entries,
+    ttl=settings.customer_summary_cache_ttl_seconds,
+)
+
+
+def _key(customer_id: int) -> str:
+    return f"customer:{customer_id}:"
+
+
+def invalidate_customer_summary(customer_id: Optional[int] = None) -> None:
+    """Descarta el resumen cacheado de `customer_id` (de todos si es None)."""
+    _summaries.invalidate(_key(customer_id) if customer_id is not None else "")
+
+
+@dataclass(frozen=True, slots=True)
+class CustomerSummary:
+    current_data: CustomerCurrentData
+    statistics: CustomerStatistics
+
+
+@dataclass(slots=True)
+class CustomerSummaryService:
+    db: Session
+    _repo: CustomerHistoryRepository = field(init=False)
+
+    def __post_init__(self) -> None:
+        self._repo = CustomerHistoryRepository(self.db)
+
+    def get_summary(self, customer_id: int) -> CustomerSummary:
+        cached = _summaries.get(_key(customer_id))
+        if cached is not None:
+            return cached
+        row = self._repo.summary(customer_id)
+        if row is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cliente no encontrado")
+        cliente = row.Cliente
+        invoiced = float(row.total_invoiced)
+        summary = CustomerSummary(
+            current_data=CustomerCurrentData(
+                nombre=cliente.nombre,
+                telefono=cliente.telefono,
+                nit_ci=cliente.nit_ci,
+                correo=cliente.correo,
+                direccion=cliente.direccion,
+                fecha_registro=cliente.fecha_registro,
+                usuario_id=cliente.usuario_id,
+            ),
+            statistics=CustomerStatistics(
+                total_orders=row.total_orders,
+                open_orders=row.open_orders,
+                total_reservations=row.total_reservations,
+                open_reservations=row.open_reservations,
+                total_invoices=row.total_invoices,
+                total_payments=row.total_payments,
+                total_spent=round(float(row.total_spent), 2),
+                total_invoiced=round(invoiced, 2),
+                total_paid=round(float(row.total_paid), 2),
+                open_invoice_balance=round(invoiced - float(row.paid_on_invoices), 2),
+                pending_payments=round(float(row.pending_payments), 2),
+                first_order_date=row.first_order_date,
+                last_order_date=row.last_order_date,
+            ),
+        )
+        if _summaries.ttl > 0:
+            _summaries.set(_key(customer_id), summary)
+        return summary
+
+    def get_history(
+        self,
+        customer_id: int,
+        *,
+        include: Iterable[str] = HISTORY_COLLECTIONS,
+        page: int = 1,
+        page_size: int = 20,
+    ) -> CustomerHistoryResponse:
+        """Resumen más la página `page` de cada colección de `include`."""
+        from app.services.sale_service import SaleService
+
+        include = set(include)
+        unknown = include - set(HISTORY_COLLECTIONS)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Colecciones desconocidas: {', '.join(sorted(unknown))}",
+            )
+        summary = self.get_summary(customer_id)
+        offset = (page - 1) * page_size
+        orders = reservations = invoices = payments = []
+        if "orders" in include:
+            mapper = SaleService(db=self.db)
+            orders = [mapper._map_order(order) for order in self._repo.orders_page(customer_id, offset, page_size)]
+        if "reservations" in include:
+            reservations = [
+                CustomerHistoryReservation(id=r.id, fecha=r.fecha_reserva, estado=r.estado)
+                for r in self._repo.reservations_page(customer_id, offset, page_size)
+            ]
+        if "invoices" in include:
+            invoices = [
+                CustomerHistoryInvoice(
+                    id=f.id,
+                    numero_factura=f.numero_factura,
+                    fecha_emision=f.fecha_emision,
+                    total=float(f.total) if f.total else 0.0,
+                    estado=f.estado,
+                )
+                for f in self._repo.invoices_page(customer_id, offset, page_size)
+            ]
+        if "payments" in include:
+            payments = [
+                CustomerHistoryPayment(
+                    id=p.id,
+                    monto=float(p.monto) if p.monto else 0.0,
+                    metodo_pago=p.metodo_pago,
+                    fecha_pago=p.fecha_pago,
+                    estado=p.estado,
+                )
+                for p in self._repo.payments_page(customer_id, offset, page_size)
+            ]
+
+        data = summary.current_data
+        # Sin tabla de historial de cambios solo se conocen los datos actuales
+        return CustomerHistoryResponse(
+            customer_id=customer_id,
+            current_data=data,
+            orders=CustomerHistoryOrders(items=orders, total=summary.statistics.total_orders),
+            reservations=reservations,
+            invoices=invoices,
+            payments=payments,
+            variations=CustomerHistoryVariations(
+                names=[data.nombre] if data.nombre else [],
+                phones=[data.telefono] if data.telefono else [],
+                nits=[data.nit_ci] if data.nit_ci else [],
+                note=(
+                    "El historial completo de variaciones se mostrará cuando se implemente "
+                    "la tabla de historial de cambios del cliente."
+                ),
+            ),
+            statistics=summary.statistics,
+            page=page,
+            page_size=page_size,
+        )
@@ -0,0 +1,104 @@
+"""Numeración de documentos (facturas, órdenes de compra, transferencias, ajustes).
+
+Cada tipo de documento tiene una fila en `dbo.secuencias_documento` que se
+incrementa con un único `UPDATE ... OUTPUT/RETURNING`; no hay lectura previa
+del último documento, así que dos peticiones concurrentes nunca obtienen el
+mismo número.
+
+- Sin huecos (facturas, y el resto con `DOCUMENT_SEQUENCE_BLOCK_SIZE=1`): el
+  incremento se hace dentro de la transacción del documento. Si esta se
+  revierte, el contador también; a cambio, la fila del contador queda
+  bloqueada hasta el commit y las altas de ese tipo se serializan.
+- Hi-lo (`DOCUMENT_SEQUENCE_BLOCK_SIZE>1`, solo documentos no fiscales): cada
+  worker reserva un bloque de números en una transacción propia y los reparte
+  en memoria. No bloquea, pero un bloque sin agotar al reiniciar deja un hueco
+  y los números de workers distintos no salen en orden cronológico.
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.repositories.sequence_repo import DocumentSequenceRepository
+
+
+@dataclass(frozen=True, slots=True)
+class DocumentSequence:
+    codigo: str
+    prefijo: str
+    ancho: int = 6
+    fiscal: bool = False  # los documentos fiscales nunca usan bloques
+
+    def format(self, value: int) -> str:
+        return f"{self.prefijo}{value:0{self.ancho}d}"
+
+
+FACTURA = DocumentSequence("FACTURA", "FAC-", fiscal=True)
+ORDEN_COMPRA = DocumentSequence("ORDEN_COMPRA", "OC-")
+TRANSFERENCIA = DocumentSequence("TRANSFERENCIA", "TRF-")
+AJUSTE = DocumentSequence("AJUSTE", "AJU-")
+
+
+class _Block:
+    __slots__ = ("next", "last")
+
+    def __init__(self, next_value: int, last: int) -> None:
+        self.next = next_value
+        self.last = last
+
+
+# Bloques hi-lo reservados por este proceso, por código de secuencia
+_blocks: dict[str, _Block] = {}
+_blocks_lock = threading.Lock()
+
+
+def reset_blocks() -> None:
+    """Descarta los bloques en memoria (los números no usados quedan como hueco)."""
+    with _blocks_lock:
+        _blocks.clear()
+
+
+@dataclass(slots=True)
+class DocumentSequenceService:
+    db: Session
+    block_size: int = field(default_factory=lambda: settings.document_sequence_block_size)
+    _repo: DocumentSequenceRepository = field(init=False)
+
+    def __post_init__(self) -> None:
+        self._repo = DocumentSequenceRepository(self.db)
+
+    def next_number(self, sequence: DocumentSequence) -> str:
+        """Siguiente número formateado (`FAC-000123`) para el tipo de documento."""
+        if sequence.fiscal or self.block_size <= 1:
+            return sequence.format(self._increment(self._repo, sequence.codigo, 1))
+        return sequence.format(self._next_from_block(sequence.codigo))
+
+    def _increment(self, repo: DocumentSequenceRepository, codigo: str, amount: int) -> int:
+        value = repo.increment(codigo, amount)
+        if value is None:
+            # Secuencia sin fila (base sin la carga de la migración): se crea
+            # aparte para no confirmar la transacción del documento
+            with Session(bind=self.db.get_bind()) as own:
+                DocumentSequenceRepository(own).ensure(codigo)
+            value = repo.increment(codigo, amount)
+        return value
+
+    def _next_from_block(self, codigo: str) -> int:
+        with _blocks_lock:
+            block = _blocks.get(codigo)
+            if block is None or block.next > block.last:
+                last = self._reserve_block(codigo)
+                block = _blocks[codigo] = _Block(last - self.block_size + 1, last)
+            value = block.next
+            block.next += 1
+            return value
+
+    def _reserve_block(self, codigo: str) -> int:
+        # Transacción propia: el bloque queda reservado aunque el documento falle
+        with Session(bind=self.db.get_bind()) as own:
+            last = self._increment(DocumentSequenceRepository(own), codigo, self.block_size)
+            own.commit()
+        return last
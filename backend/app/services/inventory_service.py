@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import logging
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional
+from typing import Callable, Iterable, Optional, TypeVar
 
+from fastapi import HTTPException, status
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.exc import DBAPIError, IntegrityError
 from sqlalchemy.orm import Session
 
 from app.models.almacen import Almacen
@@ -28,6 +32,28 @@ from app.schemas.inventory import (
     VariantStockOverview,
     WarehouseResponse,
 )
+from app.services.document_sequence_service import AJUSTE, TRANSFERENCIA, DocumentSequenceService
+from app.services.product_search_service import ProductSearchService
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Reintentos ante conflicto de versión, interbloqueo o alta concurrente del mismo par
+STOCK_WRITE_MAX_ATTEMPTS = 3
+
+# SQL Server 1205 (víctima de interbloqueo), PostgreSQL 40P01 / 40001
+_RETRYABLE_DB_ERRORS = ("1205", "40P01", "40001", "deadlock")
+# Alta concurrente del mismo par (variante, almacén): nombre del índice único
+# (SQL Server / PostgreSQL) o columnas que informa SQLite
+_STOCK_PAIR_UNIQUE = (
+    "uq_producto_almacen_variante_almacen",
+    "producto_almacen.variante_producto_id, producto_almacen.almacen_id",
+)
+
+
+class StockConflictError(RuntimeError):
+    """Un registro de stock cambió entre la lectura y la escritura."""
 
 
 @dataclass(slots=True)
@@ -48,28 +74,115 @@ class InventoryService:
             raise ValueError(msg)
         return variante
 
-    def _ensure_warehouse_exists(self, almacen_id: int) -> Almacen:
-        almacen = self.db.get(Almacen, almacen_id)
-        if not almacen:
-            msg = f"Almacén {almacen_id} no encontrado"
-            raise ValueError(msg)
-        return almacen
+    def _require_variants(self, variant_ids: Iterable[int]) -> None:
+        """Valida en bloque que existan las variantes; reporta la primera faltante en orden."""
+        ids = list(dict.fromkeys(variant_ids))
+        found = self._repo.existing_variant_ids(ids)
+        for variant_id in ids:
+            if variant_id not in found:
+                raise ValueError(f"Variante {variant_id} no encontrada")
+
+    def _require_warehouses(self, warehouse_ids: Iterable[int]) -> dict[int, Almacen]:
+        """Valida en bloque que existan los almacenes y los devuelve por id."""
+        ids = list(dict.fromkeys(warehouse_ids))
+        almacenes = self._repo.get_warehouses(ids)
+        for almacen_id in ids:
+            if almacen_id not in almacenes:
+                raise ValueError(f"Almacén {almacen_id} no encontrado")
+        return almacenes
+
+    def _load_stock(
+        self, pairs: Iterable[tuple[int, int]], now: datetime
+    ) -> dict[tuple[int, int], ProductoAlmacen]:
+        """Trae y bloquea los registros de stock de `pairs` en bloque, creando los que falten.
+
+        Los faltantes se insertan con un solo executemany (sin RETURNING) y se
+        leen de vuelta con una consulta, en lugar de un INSERT + flush por par.
+        Si otra transacción crea el mismo par a la vez, la restricción única
+        hace fallar el INSERT y la operación se reintenta.
+        """
+        wanted = set(pairs)
+        stock = self._repo.stock_records(wanted, lock=True)
+        missing = sorted(wanted - stock.keys())
+        if missing:
+            self.db.execute(
+                insert(ProductoAlmacen),
+                [
+                    {
+                        "variante_producto_id": variant_id,
+                        "almacen_id": warehouse_id,
+                        "cantidad_disponible": 0,
+                        "costo_promedio": None,
+                        "fecha_actualizacion": now,
+                        "version": 1,
+                    }
+                    for variant_id, warehouse_id in missing
+                ],
+            )
+            stock.update(self._repo.stock_records(missing, lock=True))
+        return stock
 
-    def _get_or_create_stock(self, variant_id: int, warehouse_id: int) -> ProductoAlmacen:
-        stock = self._repo.get_stock_record(variant_id, warehouse_id)
-        if stock:
-            return stock
-        now = datetime.utcnow()
-        stock = ProductoAlmacen(
-            variante_producto_id=variant_id,
-            almacen_id=warehouse_id,
-            cantidad_disponible=0,
-            costo_promedio=None,
-            fecha_actualizacion=now,
+    def _save_stock(self, stock: dict[tuple[int, int], ProductoAlmacen]) -> None:
+        """Persiste los registros modificados con un UPDATE en bloque condicionado a su versión.
+
+        Los registros se sacan de la sesión para que el flush del ORM no emita
+        un UPDATE propio por fila. Con los bloqueos tomados en `_load_stock` la
+        verificación no debería fallar; cubre escritores que no bloquean y
+        motores sin bloqueo por fila, y dispara el reintento.
+        """
+        rows = []
+        for record in stock.values():
+            self.db.expunge(record)
+            rows.append(
+                {
+                    "b_id": record.id,
+                    "b_version": record.version,
+                    "b_cantidad": record.cantidad_disponible,
+                    "b_costo": record.costo_promedio,
+                    "b_fecha": record.fecha_actualizacion,
+                }
+            )
+            record.version += 1
+        table = ProductoAlmacen.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("b_id"), table.c.version == bindparam("b_version"))
+            .values(
+                cantidad_disponible=bindparam("b_cantidad"),
+                costo_promedio=bindparam("b_costo"),
+                fecha_actualizacion=bindparam("b_fecha"),
+                version=table.c.version + 1,
+            )
         )
-        self.db.add(stock)
-        self.db.flush()
-        return stock
+        result = self.db.execute(stmt, rows)
+
+        if self.db.get_bind().dialect.supports_sane_multi_rowcount:
+            if result.rowcount != len(rows):
+                raise StockConflictError("Registros de stock modificados concurrentemente.")
+            return
+        # pyodbc no informa filas afectadas en executemany: se verifica leyendo las versiones
+        current = self._repo.stock_versions(record.id for record in stock.values())
+        stale = [record.id for record in stock.values() if current.get(record.id) != record.version]
+        if stale:
+            raise StockConflictError(f"Registros de stock modificados concurrentemente: {stale}")
+
+    def _run_with_retry(self, operation: Callable[[], T]) -> T:
+        """Ejecuta una operación de stock reintentando ante conflictos de concurrencia."""
+        for attempt in range(1, STOCK_WRITE_MAX_ATTEMPTS + 1):
+            try:
+                return operation()
+            except (StockConflictError, IntegrityError, DBAPIError) as exc:
+                self.db.rollback()
+                if not _is_retryable(exc):
+                    raise
+                if attempt == STOCK_WRITE_MAX_ATTEMPTS:
+                    logger.warning("Operación de stock abortada tras %s intentos: %s", attempt, exc)
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail="El stock cambió durante la operación. Intenta nuevamente.",
+                    ) from exc
+                logger.info("Conflicto de concurrencia en stock (intento %s): %s", attempt, exc)
+        raise AssertionError("unreachable")
 
     @staticmethod
     def _calculate_average_cost(
@@ -88,25 +201,25 @@ class InventoryService:
         weighted = ((prev_cost * prev_qty) + (incoming_cost * incoming_qty)) / total_qty
         return round(weighted, 2)
 
-    def _build_stock_entry(self, variant_id: int, warehouse_id: int) -> StockEntry:
-        stock = self._repo.get_stock_record(variant_id, warehouse_id)
-        if not stock:
-            almacen = self._ensure_warehouse_exists(warehouse_id)
-            return StockEntry(
-                variante_id=variant_id,
-                almacen_id=warehouse_id,
-                almacen_nombre=almacen.nombre,
-                cantidad_disponible=0.0,
-                costo_promedio=None,
+    @staticmethod
+    def _stock_entries(
+        stock: dict[tuple[int, int], ProductoAlmacen],
+        almacenes: dict[int, Almacen],
+    ) -> list[StockEntry]:
+        """Arma la respuesta desde el estado en memoria, sin volver a consultar."""
+        entries: list[StockEntry] = []
+        for (variant_id, warehouse_id), record in sorted(stock.items()):
+            almacen = almacenes.get(warehouse_id)
+            entries.append(
+                StockEntry(
+                    variante_id=variant_id,
+                    almacen_id=warehouse_id,
+                    almacen_nombre=almacen.nombre if almacen else "Desconocido",
+                    cantidad_disponible=round(float(record.cantidad_disponible), 2),
+                    costo_promedio=float(record.costo_promedio) if record.costo_promedio is not None else None,
+                )
             )
-        almacen_nombre = stock.almacen.nombre if stock.almacen else "Desconocido"
-        return StockEntry(
-            variante_id=stock.variante_producto_id,
-            almacen_id=stock.almacen_id,
-            almacen_nombre=almacen_nombre,
-            cantidad_disponible=float(stock.cantidad_disponible),
-            costo_promedio=float(stock.costo_promedio) if stock.costo_promedio is not None else None,
-        )
+        return entries
 
     # ------------------------------------------------------------------
     # Consultas
@@ -155,7 +268,8 @@ class InventoryService:
         ]
 
     def search_variants(self, search: str, limit: int = 20) -> list[VariantSearchItem]:
-        variantes = self._repo.search_variants(search, limit=limit)
+        variant_ids = ProductSearchService(self.db).search_variant_ids(search, limit=limit)
+        variantes = self._repo.variants_by_ids(variant_ids)
         results: list[VariantSearchItem] = []
         for variante in variantes:
             producto = variante.producto
@@ -189,51 +303,53 @@ class InventoryService:
     # Operaciones
     # ------------------------------------------------------------------
     def register_entry(self, payload: InventoryEntryRequest, user_id: Optional[int]) -> InventoryOperationResult:
-        self._ensure_warehouse_exists(payload.almacen_id)
-        updated_pairs: set[tuple[int, int]] = set()
+        return self._run_with_retry(lambda: self._register_entry(payload, user_id))
+
+    def transfer_stock(self, payload: InventoryTransferRequest, user_id: Optional[int]) -> InventoryOperationResult:
+        if payload.almacen_origen_id == payload.almacen_destino_id:
+            raise ValueError("El almacén de origen y destino deben ser distintos.")
+        return self._run_with_retry(lambda: self._transfer_stock(payload, user_id))
+
+    def adjust_stock(self, payload: InventoryAdjustmentRequest, user_id: Optional[int]) -> InventoryOperationResult:
+        return self._run_with_retry(lambda: self._adjust_stock(payload, user_id))
+
+    def _register_entry(self, payload: InventoryEntryRequest, user_id: Optional[int]) -> InventoryOperationResult:
+        almacenes = self._require_warehouses([payload.almacen_id])
         now = datetime.utcnow()
+        descripcion = payload.descripcion or "Ingreso manual de inventario"
         try:
+            self._require_variants(item.variante_id for item in payload.items)
+            stock = self._load_stock(((item.variante_id, payload.almacen_id) for item in payload.items), now)
+            movimientos: list[dict] = []
             for item in payload.items:
-                self._ensure_variant_exists(item.variante_id)
-                stock = self._get_or_create_stock(item.variante_id, payload.almacen_id)
-                prev_qty = float(stock.cantidad_disponible)
-                new_qty = prev_qty + item.cantidad
-                stock.cantidad_disponible = new_qty
-                new_cost = self._calculate_average_cost(prev_qty, float(stock.costo_promedio) if stock.costo_promedio is not None else None, item.cantidad, item.costo_unitario)
+                registro = stock[(item.variante_id, payload.almacen_id)]
+                prev_qty = float(registro.cantidad_disponible)
+                registro.cantidad_disponible = prev_qty + item.cantidad
+                new_cost = self._calculate_average_cost(prev_qty, float(registro.costo_promedio) if registro.costo_promedio is not None else None, item.cantidad, item.costo_unitario)
                 if new_cost is not None:
-                    stock.costo_promedio = new_cost
-                stock.fecha_actualizacion = now
-
-                movimiento = LibroStock(
-                    variante_producto_id=item.variante_id,
-                    almacen_id=payload.almacen_id,
-                    tipo_movimiento="ENTRADA",
-                    cantidad=item.cantidad,
-                    fecha_movimiento=now,
-                    descripcion=payload.descripcion or "Ingreso manual de inventario",
+                    registro.costo_promedio = new_cost
+                registro.fecha_actualizacion = now
+                movimientos.append(
+                    _ledger_row(item.variante_id, payload.almacen_id, "ENTRADA", item.cantidad, now, descripcion)
                 )
-                self.db.add(movimiento)
-                updated_pairs.add((item.variante_id, payload.almacen_id))
 
+            self._save_stock(stock)
+            self.db.execute(insert(LibroStock), movimientos)
             self.db.commit()
         except Exception:
             self.db.rollback()
             raise
 
-        updated_stock = [self._build_stock_entry(variante_id, almacen_id) for variante_id, almacen_id in sorted(updated_pairs)]
         return InventoryOperationResult(
             message="Ingreso registrado correctamente.",
-            updated_stock=updated_stock,
+            updated_stock=self._stock_entries(stock, almacenes),
         )
 
-    def transfer_stock(self, payload: InventoryTransferRequest, user_id: Optional[int]) -> InventoryOperationResult:
-        if payload.almacen_origen_id == payload.almacen_destino_id:
-            raise ValueError("El almacén de origen y destino deben ser distintos.")
-        self._ensure_warehouse_exists(payload.almacen_origen_id)
-        self._ensure_warehouse_exists(payload.almacen_destino_id)
-        updated_pairs: set[tuple[int, int]] = set()
+    def _transfer_stock(self, payload: InventoryTransferRequest, user_id: Optional[int]) -> InventoryOperationResult:
+        almacenes = self._require_warehouses([payload.almacen_origen_id, payload.almacen_destino_id])
         now = datetime.utcnow()
         transfer = TransferenciaStock(
+            numero_documento=DocumentSequenceService(self.db).next_number(TRANSFERENCIA),
             fecha=now,
             usuario_id=user_id,
             almacen_origen_id=payload.almacen_origen_id,
@@ -241,12 +357,23 @@ class InventoryService:
             descripcion=payload.descripcion,
         )
         self.db.add(transfer)
-        self.db.flush()  # Obtener ID para descripción
+        self.db.flush()  # Obtener ID para los items
+        descripcion = f"Transferencia {transfer.numero_documento} - {payload.descripcion or 'Sin descripción'}"
         try:
+            self._require_variants(item.variante_id for item in payload.items)
+            stock = self._load_stock(
+                (
+                    (item.variante_id, almacen_id)
+                    for item in payload.items
+                    for almacen_id in (payload.almacen_origen_id, payload.almacen_destino_id)
+                ),
+                now,
+            )
+            items_transferencia: list[dict] = []
+            movimientos: list[dict] = []
             for item in payload.items:
-                self._ensure_variant_exists(item.variante_id)
-                stock_origen = self._get_or_create_stock(item.variante_id, payload.almacen_origen_id)
-                stock_destino = self._get_or_create_stock(item.variante_id, payload.almacen_destino_id)
+                stock_origen = stock[(item.variante_id, payload.almacen_origen_id)]
+                stock_destino = stock[(item.variante_id, payload.almacen_destino_id)]
 
                 origen_qty = float(stock_origen.cantidad_disponible)
                 if origen_qty < item.cantidad:
@@ -272,93 +399,116 @@ class InventoryService:
                 stock_origen.fecha_actualizacion = now
                 stock_destino.fecha_actualizacion = now
 
-                item_transfer = ItemTransferenciaStock(
-                    transferencia=transfer,
-                    variante_producto_id=item.variante_id,
-                    cantidad=item.cantidad,
+                items_transferencia.append(
+                    {
+                        "transferencia_stock_id": transfer.id,
+                        "variante_producto_id": item.variante_id,
+                        "cantidad": item.cantidad,
+                    }
                 )
-                self.db.add(item_transfer)
-
-                salida = LibroStock(
-                    variante_producto_id=item.variante_id,
-                    almacen_id=payload.almacen_origen_id,
-                    tipo_movimiento="SALIDA",
-                    cantidad=item.cantidad,
-                    fecha_movimiento=now,
-                    descripcion=f"Transferencia #{transfer.id} - {payload.descripcion or 'Sin descripción'}",
+                movimientos.append(
+                    _ledger_row(item.variante_id, payload.almacen_origen_id, "SALIDA", item.cantidad, now, descripcion)
                 )
-                entrada = LibroStock(
-                    variante_producto_id=item.variante_id,
-                    almacen_id=payload.almacen_destino_id,
-                    tipo_movimiento="ENTRADA",
-                    cantidad=item.cantidad,
-                    fecha_movimiento=now,
-                    descripcion=f"Transferencia #{transfer.id} - {payload.descripcion or 'Sin descripción'}",
+                movimientos.append(
+                    _ledger_row(item.variante_id, payload.almacen_destino_id, "ENTRADA", item.cantidad, now, descripcion)
                 )
-                self.db.add_all([salida, entrada])
-
-                updated_pairs.add((item.variante_id, payload.almacen_origen_id))
-                updated_pairs.add((item.variante_id, payload.almacen_destino_id))
 
+            self._save_stock(stock)
+            self.db.execute(insert(ItemTransferenciaStock), items_transferencia)
+            self.db.execute(insert(LibroStock), movimientos)
             self.db.commit()
         except Exception:
             self.db.rollback()
             raise
 
-        updated_stock = [self._build_stock_entry(variante_id, almacen_id) for variante_id, almacen_id in sorted(updated_pairs)]
         return InventoryOperationResult(
-            message=f"Transferencia #{transfer.id} registrada correctamente.",
-            updated_stock=updated_stock,
+            message=f"Transferencia {transfer.numero_documento} registrada correctamente.",
+            updated_stock=self._stock_entries(stock, almacenes),
         )
 
-    def adjust_stock(self, payload: InventoryAdjustmentRequest, user_id: Optional[int]) -> InventoryOperationResult:
-        updated_pairs: set[tuple[int, int]] = set()
+    def _adjust_stock(self, payload: InventoryAdjustmentRequest, user_id: Optional[int]) -> InventoryOperationResult:
         now = datetime.utcnow()
         ajuste = AjusteStock(
+            numero_documento=DocumentSequenceService(self.db).next_number(AJUSTE),
             fecha=now,
             descripcion=payload.descripcion,
             usuario_id=user_id,
         )
         self.db.add(ajuste)
         self.db.flush()
+        descripcion = f"Ajuste {ajuste.numero_documento} - {payload.descripcion or 'Sin descripción'}"
         try:
+            self._require_variants(item.variante_id for item in payload.items)
+            almacenes = self._require_warehouses(item.almacen_id for item in payload.items)
+            stock = self._load_stock(((item.variante_id, item.almacen_id) for item in payload.items), now)
+            items_ajuste: list[dict] = []
+            movimientos: list[dict] = []
             for item in payload.items:
-                self._ensure_variant_exists(item.variante_id)
-                self._ensure_warehouse_exists(item.almacen_id)
-                stock = self._get_or_create_stock(item.variante_id, item.almacen_id)
-                prev_qty = float(stock.cantidad_disponible)
+                registro = stock[(item.variante_id, item.almacen_id)]
+                prev_qty = float(registro.cantidad_disponible)
                 diff = item.cantidad_nueva - prev_qty
-                stock.cantidad_disponible = item.cantidad_nueva
-                stock.fecha_actualizacion = now
-
-                item_ajuste = ItemAjusteStock(
-                    ajuste=ajuste,
-                    variante_producto_id=item.variante_id,
-                    cantidad_anterior=prev_qty,
-                    cantidad_nueva=item.cantidad_nueva,
+                registro.cantidad_disponible = item.cantidad_nueva
+                registro.fecha_actualizacion = now
+
+                items_ajuste.append(
+                    {
+                        "ajuste_stock_id": ajuste.id,
+                        "variante_producto_id": item.variante_id,
+                        "cantidad_anterior": prev_qty,
+                        "cantidad_nueva": item.cantidad_nueva,
+                    }
                 )
-                self.db.add(item_ajuste)
-
                 if diff != 0:
-                    movimiento = LibroStock(
-                        variante_producto_id=item.variante_id,
-                        almacen_id=item.almacen_id,
-                        tipo_movimiento="ENTRADA" if diff > 0 else "SALIDA",
-                        cantidad=abs(diff),
-                        fecha_movimiento=now,
-                        descripcion=f"Ajuste #{ajuste.id} - {payload.descripcion or 'Sin descripción'}",
+                    movimientos.append(
+                        _ledger_row(
+                            item.variante_id,
+                            item.almacen_id,
+                            "ENTRADA" if diff > 0 else "SALIDA",
+                            abs(diff),
+                            now,
+                            descripcion,
+                        )
                     )
-                    self.db.add(movimiento)
-
-                updated_pairs.add((item.variante_id, item.almacen_id))
 
+            self._save_stock(stock)
+            self.db.execute(insert(ItemAjusteStock), items_ajuste)
+            if movimientos:
+                self.db.execute(insert(LibroStock), movimientos)
             self.db.commit()
         except Exception:
             self.db.rollback()
             raise
 
-        updated_stock = [self._build_stock_entry(variante_id, almacen_id) for variante_id, almacen_id in sorted(updated_pairs)]
         return InventoryOperationResult(
-            message=f"Ajuste #{ajuste.id} registrado correctamente.",
-            updated_stock=updated_stock,
+            message=f"Ajuste {ajuste.numero_documento} registrado correctamente.",
+            updated_stock=self._stock_entries(stock, almacenes),
         )
+
+
+def _is_retryable(exc: Exception) -> bool:
+    """Conflictos de concurrencia; cualquier otra violación (FK, NOT NULL...) no se reintenta."""
+    if isinstance(exc, StockConflictError):
+        return True
+    message = str(getattr(exc, "orig", exc))
+    if isinstance(exc, IntegrityError):
+        return any(name in message for name in _STOCK_PAIR_UNIQUE)
+    return any(code in message for code in _RETRYABLE_DB_ERRORS)
+
+
+def _ledger_row(
+    variant_id: int,
+    warehouse_id: int,
+    tipo: str,
+    cantidad: float,
+    fecha: datetime,
+    descripcion: str,
+) -> dict:
+    """Fila de `LibroStock` para la inserción en bloque (executemany)."""
+    return {
+        "variante_producto_id": variant_id,
+        "almacen_id": warehouse_id,
+        "tipo_movimiento": tipo,
+        "cantidad": cantidad,
+        "fecha_movimiento": fecha,
+        "descripcion": descripcion,
+    }
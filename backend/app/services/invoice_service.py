@@ -9,6 +9,8 @@ from sqlalchemy.orm import Session
 
 from app.models.factura import FacturaVenta, ItemFacturaVenta
 from app.repositories.invoice_repo import InvoiceFilter, InvoiceRepository
+from app.services.document_sequence_service import FACTURA, DocumentSequenceService
+from app.services.customer_summary_service import invalidate_customer_summary
 from app.schemas.invoice import (
     InvoiceCreateRequest,
     InvoiceItemResponse,
@@ -69,8 +71,8 @@ class InvoiceService:
                 status_code=status.HTTP_404_NOT_FOUND, detail="Cliente no encontrado"
             )
 
-        # Generar número de factura
-        numero_factura = self._repo.get_next_invoice_number()
+        # Número correlativo sin huecos: el contador se bloquea hasta el commit
+        numero_factura = DocumentSequenceService(self.db).next_number(FACTURA)
 
         # Calcular totales
         subtotal = sum(
@@ -118,6 +120,7 @@ class InvoiceService:
 
         self.db.commit()
         self.db.refresh(invoice)
+        invalidate_customer_summary(invoice.cliente_id)
         return self._map_invoice(invoice)
 
     def _map_invoice(self, invoice: FacturaVenta) -> InvoiceResponse:
@@ -9,6 +9,8 @@ from sqlalchemy.orm import Session
 
 from app.models.pago import PagoCliente
 from app.repositories.payment_repo import PaymentFilter, PaymentRepository
+from app.services.customer_summary_service import invalidate_customer_summary
+from app.services.sales_rollup_service import SalesRollupService
 from app.schemas.payment import (
     PaymentCreateRequest,
     PaymentListResponse,
@@ -93,6 +95,8 @@ class PaymentService:
 
         self.db.commit()
         self.db.refresh(payment)
+        invalidate_customer_summary(payment.cliente_id)
+        SalesRollupService(self.db).sync_days([payment.fecha_pago.date()])
         return self._map_payment(payment)
 
     def _map_payment(self, payment: PagoCliente) -> PaymentResponse:
@@ -0,0 +1,358 @@
+"""Búsqueda de productos y variantes con plegado de acentos, prefijos y ranking.
+
+Los textos se pliegan con `app.core.text_folding` tanto al indexar como al
+consultar, así "tuberia" encuentra "Tubería". Cada término de la consulta
+funciona como prefijo ("tub pvc" encuentra "Tubería PVC") y deben aparecer
+todos; coincidir en el nombre pesa más que en la descripción.
+
+Motores (`PRODUCT_SEARCH_BACKEND`):
+
+- `mssql`: CONTAINSTABLE sobre el índice full-text de `busqueda_productos`.
+- `postgresql`: `to_tsquery('simple')` con índice GIN y, si está `pg_trgm`,
+  similitud de trigramas cuando no hay coincidencias.
+- `memory`: índice invertido en memoria del worker, construido desde las
+  tablas de productos y refrescado cada `PRODUCT_SEARCH_MEMORY_REFRESH_SECONDS`.
+  Pensado para tests, SQLite e instalaciones pequeñas.
+- `like`: LIKE sobre el texto plegado (recorre la tabla).
+- `auto`: el motor del dialecto; en SQL Server sin full-text, `like`.
+
+Crear o editar un producto llama a `reindex_products`, que reescribe sus
+documentos y actualiza el índice en memoria de este worker.
+"""
+from __future__ import annotations
+
+import bisect
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Optional, Sequence
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.text_folding import folded_text, tokenize
+from app.repositories.search_repo import NAME_WEIGHT, ProductSearchRepository, SearchTarget
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("auto", "memory", "mssql", "postgresql", "like")
+
+# Se ignoran en la consulta (no en el índice) salvo que sean los únicos términos
+SEARCH_STOPWORDS = frozenset({
+    "a", "al", "con", "de", "del", "el", "en", "la", "las", "lo", "los",
+    "para", "por", "sin", "un", "una", "y",
+})
+
+# Un término que solo coincide como prefijo puntúa menos que la palabra exacta
+PREFIX_MATCH_FACTOR = 0.5
+
+DocKey = tuple[int, Optional[int]]
+
+
+def query_terms(q: str | None) -> list[str]:
+    """Términos plegados y sin repetir de la consulta, sin palabras vacías."""
+    terms = list(dict.fromkeys(tokenize(q)))
+    meaningful = [term for term in terms if term not in SEARCH_STOPWORDS]
+    return meaningful or terms
+
+
+def build_documents(rows: Iterable) -> list[dict]:
+    """Documentos de `busqueda_productos` a partir de `ProductSearchRepository.source_rows`."""
+    return [
+        {
+            "producto_id": row.producto_id,
+            "variante_id": row.variante_id,
+            "nombre": folded_text(row.producto_nombre, row.variante_nombre)[:250],
+            "texto": folded_text(row.producto_nombre, row.variante_nombre, row.descripcion)[:600],
+        }
+        for row in rows
+    ]
+
+
+class InMemorySearchIndex:
+    """Índice invertido término -> {(producto_id, variante_id): peso}.
+
+    Los términos se mantienen además en una lista ordenada para resolver los
+    prefijos con `bisect`. El ranking suma, por término de la consulta, el
+    mejor peso de campo (nombre o descripción) por su idf.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._postings: dict[str, dict[DocKey, int]] = {}
+        self._terms: list[str] = []
+        self._docs: dict[DocKey, dict[str, int]] = {}
+        self._by_product: dict[int, set[DocKey]] = {}
+        self.loaded_at: float | None = None
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def load(self, documents: Iterable[dict]) -> None:
+        """Reemplaza todo el contenido del índice."""
+        postings: dict[str, dict[DocKey, int]] = {}
+        docs: dict[DocKey, dict[str, int]] = {}
+        by_product: dict[int, set[DocKey]] = {}
+        for document in documents:
+            key, weights = self._weights(document)
+            for term, weight in weights.items():
+                postings.setdefault(term, {})[key] = weight
+            docs[key] = weights
+            by_product.setdefault(key[0], set()).add(key)
+        with self._lock:
+            self._postings = postings
+            self._terms = sorted(postings)
+            self._docs = docs
+            self._by_product = by_product
+            self.loaded_at = time.monotonic()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings = {}
+            self._terms = []
+            self._docs = {}
+            self._by_product = {}
+            self.loaded_at = None
+
+    def replace_products(self, product_ids: Iterable[int], documents: Iterable[dict]) -> None:
+        """Cambia los documentos de `product_ids` por `documents` (no hace nada si no está cargado)."""
+        with self._lock:
+            if self.loaded_at is None:
+                return
+            for product_id in product_ids:
+                for key in self._by_product.pop(product_id, ()):
+                    for term in self._docs.pop(key, {}):
+                        self._remove_posting(term, key)
+            for document in documents:
+                key, weights = self._weights(document)
+                for term, weight in weights.items():
+                    posting = self._postings.get(term)
+                    if posting is None:
+                        posting = self._postings[term] = {}
+                        bisect.insort(self._terms, term)
+                    posting[key] = weight
+                self._docs[key] = weights
+                self._by_product.setdefault(key[0], set()).add(key)
+
+    def search(self, terms: Sequence[str], target: SearchTarget, limit: int) -> list[int]:
+        """Ids de producto o variante que contienen todos los términos, por relevancia.
+
+        Empieza por el término más selectivo; los siguientes se comprueban
+        sobre los documentos candidatos cuando son menos que sus postings
+        (un prefijo corto como "1" abarca miles de términos).
+        """
+        with self._lock:
+            total = max(len(self._docs), 1)
+            plan = []
+            for term in terms:
+                candidates = self._expand(term)
+                if not candidates:
+                    return []
+                plan.append((sum(len(self._postings[c]) for c in candidates), term, candidates))
+            plan.sort()
+
+            scores: dict[DocKey, float] | None = None
+            for size, term, candidates in plan:
+                if scores is not None and len(scores) < size:
+                    scores = self._score_candidates(scores, term, total)
+                else:
+                    matched = self._score_postings(term, candidates, total)
+                    if scores is None:
+                        scores = matched
+                    else:
+                        scores = {key: scores[key] + score for key, score in matched.items() if key in scores}
+                if not scores:
+                    return []
+
+        best: dict[int, float] = {}
+        for (producto_id, variante_id), score in (scores or {}).items():
+            item_id = producto_id if target == "producto" else variante_id
+            if item_id is not None and score > best.get(item_id, 0.0):
+                best[item_id] = score
+        ranked = sorted(best.items(), key=lambda item: (-item[1], item[0]))
+        return [item_id for item_id, _ in ranked[:limit]]
+
+    def _term_factor(self, term: str, candidate: str, total: int) -> float:
+        """idf del término del índice, reducido si solo coincide como prefijo."""
+        idf = math.log(1 + total / len(self._postings[candidate]))
+        return idf if candidate == term else idf * PREFIX_MATCH_FACTOR
+
+    def _score_postings(self, term: str, candidates: list[str], total: int) -> dict[DocKey, float]:
+        matched: dict[DocKey, float] = {}
+        for candidate in candidates:
+            factor = self._term_factor(term, candidate, total)
+            for key, weight in self._postings[candidate].items():
+                score = weight * factor
+                if score > matched.get(key, 0.0):
+                    matched[key] = score
+        return matched
+
+    def _score_candidates(self, scores: dict[DocKey, float], term: str, total: int) -> dict[DocKey, float]:
+        factors: dict[str, float] = {}
+        narrowed: dict[DocKey, float] = {}
+        for key, score in scores.items():
+            best = 0.0
+            for candidate, weight in self._docs[key].items():
+                if candidate.startswith(term):
+                    factor = factors.get(candidate)
+                    if factor is None:
+                        factor = factors[candidate] = self._term_factor(term, candidate, total)
+                    best = max(best, weight * factor)
+            if best:
+                narrowed[key] = score + best
+        return narrowed
+
+    def _expand(self, prefix: str) -> list[str]:
+        start = bisect.bisect_left(self._terms, prefix)
+        end = bisect.bisect_left(self._terms, prefix + "\uffff", start)
+        return self._terms[start:end]
+
+    def _remove_posting(self, term: str, key: DocKey) -> None:
+        posting = self._postings.get(term)
+        if posting is None:
+            return
+        posting.pop(key, None)
+        if not posting:
+            del self._postings[term]
+            index = bisect.bisect_left(self._terms, term)
+            if index < len(self._terms) and self._terms[index] == term:
+                del self._terms[index]
+
+    @staticmethod
+    def _weights(document: dict) -> tuple[DocKey, dict[str, int]]:
+        key = (document["producto_id"], document["variante_id"])
+        weights = {term: 1 for term in document["texto"].split()}
+        weights.update({term: NAME_WEIGHT for term in document["nombre"].split()})
+        return key, weights
+
+
+_memory_index = InMemorySearchIndex()
+_memory_load_lock = threading.Lock()
+# Motor elegido por "auto" para cada dialecto (se decide una vez por proceso)
+_resolved_backends: dict[str, str] = {}
+_pg_trigram: dict[str, bool] = {}
+
+
+def reset_search_state() -> None:
+    """Vacía el índice en memoria y olvida los motores resueltos (tests)."""
+    _memory_index.clear()
+    _resolved_backends.clear()
+    _pg_trigram.clear()
+
+
+@dataclass(slots=True)
+class ProductSearchService:
+    db: Session
+    _repo: ProductSearchRepository = field(init=False)
+
+    def __post_init__(self) -> None:
+        self._repo = ProductSearchRepository(self.db)
+
+    def search_product_ids(self, q: str | None, limit: Optional[int] = None) -> list[int]:
+        return self._search(q, "producto", limit)
+
+    def search_variant_ids(self, q: str | None, limit: Optional[int] = None) -> list[int]:
+        return self._search(q, "variante", limit)
+
+    def backend(self) -> str:
+        configured = (settings.product_search_backend or "auto").strip().lower()
+        if configured not in BACKENDS:
+            raise ValueError(f"PRODUCT_SEARCH_BACKEND inválido: {configured}")
+        if configured != "auto":
+            return configured
+        dialect = self.db.get_bind().dialect.name
+        resolved = _resolved_backends.get(dialect)
+        if resolved is None:
+            resolved = self._resolve_auto(dialect)
+            _resolved_backends[dialect] = resolved
+        return resolved
+
+    def _resolve_auto(self, dialect: str) -> str:
+        if dialect == "mssql":
+            if self._repo.mssql_fulltext_ready():
+                return "mssql"
+            logger.warning(
+                "busqueda_productos no tiene índice full-text activo; la búsqueda usa LIKE "
+                "(ver alembic 020_add_product_search)"
+            )
+            return "like"
+        if dialect == "postgresql":
+            return "postgresql"
+        return "memory"
+
+    def _search(self, q: str | None, target: SearchTarget, limit: Optional[int]) -> list[int]:
+        terms = query_terms(q)
+        if not terms:
+            return []
+        limit = limit or settings.product_search_max_results
+        backend = self.backend()
+        if backend == "memory":
+            return self._memory().search(terms, target, limit)
+        if backend == "mssql":
+            return self._repo.search_mssql(terms, target, limit)
+        if backend == "postgresql":
+            if "ready" not in _pg_trigram:
+                _pg_trigram["ready"] = self._repo.postgresql_trigram_ready()
+            return self._repo.search_postgresql(terms, target, limit, trigram=_pg_trigram["ready"])
+        return self._repo.search_like(terms, target, limit)
+
+    def _memory(self) -> InMemorySearchIndex:
+        """Índice del worker, cargado la primera vez y recargado al vencer el intervalo.
+
+        La recarga completa cubre los cambios hechos por otros workers.
+        """
+        index = _memory_index
+        if not self._memory_stale(index):
+            return index
+        with _memory_load_lock:
+            if self._memory_stale(index):
+                index.load(build_documents(self._repo.source_rows()))
+        return index
+
+    @staticmethod
+    def _memory_stale(index: InMemorySearchIndex) -> bool:
+        if index.loaded_at is None:
+            return True
+        refresh = settings.product_search_memory_refresh_seconds
+        return refresh > 0 and time.monotonic() - index.loaded_at > refresh
+
+    def reindex_products(self, product_ids: Iterable[int]) -> None:
+        """Reescribe los documentos de productos ya confirmados.
+
+        Igual que el acumulado de reportes, un fallo aquí no revierte el
+        producto: se registra y queda para la próxima reconstrucción.
+        """
+        ids = sorted(set(product_ids))
+        if not ids:
+            return
+        try:
+            documents = build_documents(self._repo.source_rows(ids))
+            self._repo.replace_documents(ids, documents)
+            self.db.commit()
+        except SQLAlchemyError as exc:
+            self.db.rollback()
+            logger.warning("No se pudo reindexar la búsqueda de los productos %s: %s", ids, exc)
+            return
+        _memory_index.replace_products(ids, documents)
+
+    def rebuild(self) -> int:
+        """Reconstruye todos los documentos (y el índice en memoria). Devuelve cuántos hay."""
+        documents = build_documents(self._repo.source_rows())
+        self._repo.replace_documents(None, documents)
+        self.db.commit()
+        if _memory_index.loaded_at is not None:
+            _memory_index.load(documents)
+        return len(documents)
+
+
+__all__ = [
+    "ProductSearchService",
+    "InMemorySearchIndex",
+    "build_documents",
+    "query_terms",
+    "reset_search_state",
+    "SEARCH_STOPWORDS",
+]
@@ -9,6 +9,8 @@ from app.models.categoria import Categoria
 from app.models.marca import Marca
 from app.models.variante_producto import UnidadMedida
 from app.repositories.product_repo import ProductFilter, ProductRepository
+from app.services.product_search_service import ProductSearchService
+from app.services.typeahead_service import TypeaheadService
 from app.schemas.product import (
     BrandResponse,
     CategoryResponse,
@@ -62,6 +64,7 @@ class ProductService:
         return ProductResponse(
             id=producto.id,
             nombre=producto.nombre,
+            slug=producto.slug or "",
             descripcion=producto.descripcion,
             marca=marca,
             categoria=categoria,
@@ -78,17 +81,27 @@ class ProductService:
         status: Optional[str],
         page: int,
         page_size: int,
+        cursor: Optional[str] = None,
     ) -> ProductListResponse:
-        filters = ProductFilter(search=q, brand_id=brand_id, category_id=category_id)
-        productos, total = self._repo.list(filters, page, page_size)
-        items = [self._map_product(producto) for producto in productos]
-
-        if status:
-            normalized = status.strip().upper()
-            items = [item for item in items if item.status.upper() == normalized]
-            total = len(items)
-
-        return ProductListResponse(items=items, total=total, page=page, page_size=page_size)
+        """Lista productos; con `cursor` pagina por keyset en lugar de usar `page`.
+
+        Con `q` los resultados vienen ordenados por relevancia
+        (`ProductSearchService`, hasta PRODUCT_SEARCH_MAX_RESULTS).
+        Lanza ValueError si el cursor no es válido.
+        """
+        product_ids = ProductSearchService(self.db).search_product_ids(q) if q and q.strip() else None
+        filters = ProductFilter(
+            product_ids=product_ids, brand_id=brand_id, category_id=category_id, status=status
+        )
+        result = self._repo.list_page(filters, page, page_size, cursor=cursor)
+        items = [self._map_product(producto) for producto in result.items]
+        return ProductListResponse(
+            items=items,
+            total=result.total,
+            page=page,
+            page_size=page_size,
+            next_cursor=result.next_cursor,
+        )
 
     def get_product_by_slug(self, slug: str) -> ProductResponse | None:
         producto = self._repo.get_by_slug(slug)
@@ -119,6 +132,8 @@ class ProductService:
     # ------------------------------------------------------------------
     def create_product(self, payload: ProductCreateRequest) -> ProductResponse:
         producto = self._repo.create(payload.model_dump())
+        ProductSearchService(self.db).reindex_products([producto.id])
+        TypeaheadService(self.db).refresh_products([producto.id])
         return self._map_product(producto)
 
     def update_product(self, product_id: int, payload: ProductUpdateRequest) -> ProductResponse:
@@ -127,6 +142,8 @@ class ProductService:
             raise ValueError("Producto no encontrado")
         data = payload.model_dump(exclude_unset=True)
         producto = self._repo.update(producto, data)
+        ProductSearchService(self.db).reindex_products([producto.id])
+        TypeaheadService(self.db).refresh_products([producto.id])
         return self._map_product(producto)
 
     def set_product_status(self, product_id: int, payload: ProductStatusUpdateRequest) -> ProductResponse:
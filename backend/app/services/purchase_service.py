@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 
 from app.models.compra import OrdenCompra
 from app.repositories.purchase_repo import PurchaseFilter, PurchaseRepository
+from app.services.document_sequence_service import ORDEN_COMPRA, DocumentSequenceService
 from app.schemas.purchase import (
     PurchaseItemResponse,
     PurchaseOrderListResponse,
@@ -82,6 +83,7 @@ class PurchaseService:
         )
         return PurchaseOrderResponse(
             id=order.id,
+            numero_documento=order.numero_documento,
             fecha=order.fecha,
             estado=order.estado,
             proveedor=proveedor,
@@ -124,6 +126,7 @@ class PurchaseService:
             estado="BORRADOR",  # Asegurar que siempre sea mayúsculas
             usuario_id=usuario_id,
             observaciones=payload.observaciones,
+            numero_documento=DocumentSequenceService(self.db).next_number(ORDEN_COMPRA),
         )
 
         return self._map_order(orden)
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from datetime import datetime, timedelta
-from typing import List
+from datetime import date, datetime, time, timedelta
+from typing import Any, List
 
-from sqlalchemy import func, literal, select, Date
+from sqlalchemy import and_, case, false, func, literal, literal_column, null, or_, select, tuple_, union_all
 from sqlalchemy.orm import Session
 
 from app.models import (
@@ -14,8 +14,13 @@ from app.models import (
     OrdenVenta,
     Producto,
     ProductoAlmacen,
-    VarianteProducto,
+    ResumenCajaDiaria,
+    ResumenOrdenDiaria,
+    ResumenVentaDiaria,
 )
+from app.services.sales_rollup_service import cash_facts, order_facts, sale_line_facts
+
+PENDING_ORDER_STATES = ("PENDIENTE", "EN_PROCESO", "ENVIADO")
 
 
 @dataclass(slots=True)
@@ -39,6 +44,47 @@ class TopProduct:
     total: float
 
 
+@dataclass(slots=True)
+class ReportRange:
+    """Rango de un reporte dividido en días completos y bordes parciales.
+
+    Los días completos [first_day, last_day] se leen del acumulado diario; el
+    tramo inicial y final que no cubren un día entero se leen de las filas
+    crudas. Un día cuenta como completo si el rango lo abarca desde las 00:00
+    hasta `time.max` (lo que envían los endpoints para la fecha final).
+    """
+
+    start: datetime
+    end: datetime
+    first_day: date | None = None
+    last_day: date | None = None
+
+    @classmethod
+    def split(cls, start: datetime, end: datetime) -> "ReportRange":
+        first = start.date() if start.time() == time.min else start.date() + timedelta(days=1)
+        last = end.date() if end.time() == time.max else end.date() - timedelta(days=1)
+        if first > last:
+            return cls(start=start, end=end)
+        return cls(start=start, end=end, first_day=first, last_day=last)
+
+    def raw(self, column: Any):
+        """Predicado sobre la columna de fecha cruda para los tramos fuera del acumulado."""
+        if self.first_day is None or self.last_day is None:
+            return and_(column >= self.start, column <= self.end)
+        clauses = []
+        head_stop = datetime.combine(self.first_day, time.min)
+        if self.start < head_stop:
+            clauses.append(and_(column >= self.start, column < head_stop))
+        tail_start = datetime.combine(self.last_day + timedelta(days=1), time.min)
+        if tail_start <= self.end:
+            clauses.append(and_(column >= tail_start, column <= self.end))
+        return or_(*clauses) if clauses else false()
+
+    def rolled(self, column: Any):
+        """Predicado sobre la columna `fecha` de las tablas de acumulado."""
+        return and_(column >= self.first_day, column <= self.last_day)
+
+
 @dataclass(slots=True)
 class ReportService:
     db: Session
@@ -56,45 +102,154 @@ class ReportService:
         if start_dt > end_dt:
             raise ValueError("La fecha inicial no puede ser posterior a la final")
 
-        sales_total = self._sales_total_between(start_dt, end_dt)
-        pending_orders = self._pending_orders_between(start_dt, end_dt)
-        low_stock = self._low_stock_products()
-        active_customers = self._active_customers_between(start_dt, end_dt)
-        categories = self._sales_by_category_between(start_dt, end_dt)
-        top_products = self._top_products_between(start_dt, end_dt)
+        return self._summary_single_pass(ReportRange.split(start_dt, end_dt))
+
+    def _line_facts(self, rng: ReportRange):
+        """Líneas de venta del rango: acumulado para días completos y filas crudas en los bordes."""
+        raw = sale_line_facts(rng.raw)
+        if rng.first_day is None:
+            return raw.subquery("lineas")
+        rolled = select(
+            ResumenVentaDiaria.fecha,
+            ResumenVentaDiaria.cliente_id,
+            ResumenVentaDiaria.producto_id,
+            ResumenVentaDiaria.cantidad,
+            ResumenVentaDiaria.importe,
+            ResumenVentaDiaria.lineas,
+        ).where(rng.rolled(ResumenVentaDiaria.fecha))
+        return union_all(raw, rolled).subquery("lineas")
+
+    def _order_facts(self, rng: ReportRange):
+        """Órdenes del rango por día, cliente y estado (acumulado + bordes crudos)."""
+        raw = order_facts(rng.raw)
+        if rng.first_day is None:
+            return raw.subquery("ordenes")
+        rolled = select(
+            ResumenOrdenDiaria.fecha,
+            ResumenOrdenDiaria.cliente_id,
+            ResumenOrdenDiaria.estado,
+            ResumenOrdenDiaria.ordenes,
+        ).where(rng.rolled(ResumenOrdenDiaria.fecha))
+        return union_all(raw, rolled).subquery("ordenes")
+
+    def _cash_totals(self, rng: ReportRange) -> tuple[float, float]:
+        """Facturas pagadas y pagos confirmados del rango (acumulado + bordes crudos)."""
+        parts = [cash_facts(rng.raw)]
+        if rng.first_day is not None:
+            parts.append(
+                select(
+                    ResumenCajaDiaria.fecha,
+                    ResumenCajaDiaria.facturas_pagadas,
+                    ResumenCajaDiaria.pagos_confirmados,
+                ).where(rng.rolled(ResumenCajaDiaria.fecha))
+            )
+        caja = union_all(*parts).subquery("caja")
+        row = self.db.execute(
+            select(
+                func.coalesce(func.sum(caja.c.facturas_pagadas), 0).label("facturas_pagadas"),
+                func.coalesce(func.sum(caja.c.pagos_confirmados), 0).label("pagos_confirmados"),
+            )
+        ).one()
+        return float(row.facturas_pagadas or 0), float(row.pagos_confirmados or 0)
+
+    def _summary_single_pass(
+        self, rng: ReportRange, top_limit: int = 5
+    ) -> tuple[ReportSummary, List[CategoryBreakdown], List[TopProduct]]:
+        """Resuelve el resumen con una sola consulta sobre el período.
+
+        El CTE `ventas_periodo` une las líneas de venta (con su categoría y
+        producto) y las órdenes por estado; los GROUPING SETS devuelven en el
+        mismo recorrido el total por categoría, el total por producto y la fila
+        global con el total, las órdenes pendientes y los clientes activos. El
+        conteo de stock bajo viaja como subconsulta escalar del SELECT externo.
+        """
+        lineas = self._line_facts(rng)
+        ordenes = self._order_facts(rng)
+        ventas = union_all(
+            select(
+                lineas.c.cliente_id.label("cliente_id"),
+                Categoria.nombre.label("categoria"),
+                Producto.nombre.label("producto"),
+                lineas.c.importe.label("importe"),
+                literal_column("0").label("pendientes"),
+            )
+            .select_from(lineas)
+            .join(Producto, Producto.id == lineas.c.producto_id)
+            .outerjoin(Categoria, Categoria.id == Producto.categoria_id),
+            select(
+                ordenes.c.cliente_id,
+                null(),
+                null(),
+                null(),
+                case((ordenes.c.estado.in_(PENDING_ORDER_STATES), ordenes.c.ordenes), else_=0),
+            ),
+        ).cte("ventas_periodo")
+        agregado = (
+            select(
+                func.grouping(ventas.c.categoria).label("g_categoria"),
+                func.grouping(ventas.c.producto).label("g_producto"),
+                ventas.c.categoria,
+                ventas.c.producto,
+                func.coalesce(func.sum(ventas.c.importe), 0).label("total"),
+                func.coalesce(func.sum(ventas.c.pendientes), 0).label("pending_orders"),
+                func.count(func.distinct(ventas.c.cliente_id)).label("active_customers"),
+            )
+            .group_by(
+                func.grouping_sets(tuple_(ventas.c.categoria), tuple_(ventas.c.producto), tuple_())
+            )
+            .subquery("agregado")
+        )
+        low_stock = (
+            select(func.count(ProductoAlmacen.id))
+            .where(ProductoAlmacen.cantidad_disponible < literal(self.LOW_STOCK_THRESHOLD))
+            .scalar_subquery()
+        )
+        rows = self.db.execute(select(agregado, low_stock.label("low_stock"))).all()
+
+        sales_total = 0.0
+        pending_orders = active_customers = low_stock_count = 0
+        category_rows: list[tuple[str, float]] = []
+        product_rows: list[tuple[str, float]] = []
+        for row in rows:
+            low_stock_count = int(row.low_stock or 0)
+            total = float(row.total or 0)
+            if row.g_categoria and row.g_producto:
+                sales_total = total
+                pending_orders = int(row.pending_orders or 0)
+                active_customers = int(row.active_customers or 0)
+            elif not row.g_categoria and row.categoria is not None:
+                category_rows.append((row.categoria, total))
+            elif not row.g_producto and row.producto is not None:
+                product_rows.append((row.producto, total))
+
+        category_rows.sort(key=lambda item: item[1], reverse=True)
+        grand_total = sum(total for _, total in category_rows) or 1.0
+        categories = [
+            CategoryBreakdown(
+                category=name,
+                total=round(total, 2),
+                percentage=round((total / grand_total) * 100, 2),
+            )
+            for name, total in category_rows
+        ]
+        product_rows.sort(key=lambda item: item[1], reverse=True)
+        top_products = [
+            TopProduct(product=name, total=round(total, 2)) for name, total in product_rows[:top_limit]
+        ]
 
         summary = ReportSummary(
             sales_last_30_days=sales_total,
             pending_orders=pending_orders,
-            low_stock_products=low_stock,
+            low_stock_products=low_stock_count,
             active_customers_last_30_days=active_customers,
         )
         return summary, categories, top_products
 
-    def _sales_total_between(self, start: datetime, end: datetime) -> float:
-        stmt = (
-            select(
-                func.coalesce(
-                    func.sum(ItemOrdenVenta.cantidad * func.coalesce(ItemOrdenVenta.precio_unitario, 0)),
-                    0,
-                )
-            )
-            .select_from(OrdenVenta)
-            .join(ItemOrdenVenta, ItemOrdenVenta.orden_venta_id == OrdenVenta.id)
-            .where(OrdenVenta.fecha >= start, OrdenVenta.fecha <= end)
-        )
-        result = self.db.execute(stmt).scalar_one()
+    def _sales_total_between(self, rng: ReportRange) -> float:
+        lineas = self._line_facts(rng)
+        result = self.db.execute(select(func.coalesce(func.sum(lineas.c.importe), 0))).scalar_one()
         return float(result or 0)
 
-    def _pending_orders_between(self, start: datetime, end: datetime) -> int:
-        stmt = (
-            select(func.count(OrdenVenta.id))
-            .where(OrdenVenta.estado.in_(["PENDIENTE", "EN_PROCESO", "ENVIADO"]))
-            .where(OrdenVenta.fecha >= start, OrdenVenta.fecha <= end)
-        )
-        result = self.db.execute(stmt).scalar_one()
-        return int(result or 0)
-
     def _low_stock_products(self) -> int:
         stmt = select(func.count(ProductoAlmacen.id)).where(
             ProductoAlmacen.cantidad_disponible < literal(self.LOW_STOCK_THRESHOLD)
@@ -102,53 +257,23 @@ class ReportService:
         result = self.db.execute(stmt).scalar_one()
         return int(result or 0)
 
-    def _active_customers_between(self, start: datetime, end: datetime) -> int:
+    def _active_customers_between(self, rng: ReportRange) -> int:
+        ordenes = self._order_facts(rng)
         stmt = (
-            select(func.count(func.distinct(OrdenVenta.cliente_id)))
-            .select_from(OrdenVenta)
-            .join(Cliente, Cliente.id == OrdenVenta.cliente_id)
-            .where(OrdenVenta.fecha >= start, OrdenVenta.fecha <= end)
+            select(func.count(func.distinct(ordenes.c.cliente_id)))
+            .select_from(ordenes)
+            .join(Cliente, Cliente.id == ordenes.c.cliente_id)
         )
         result = self.db.execute(stmt).scalar_one()
         return int(result or 0)
 
-    def _sales_by_category_between(self, start: datetime, end: datetime) -> List[CategoryBreakdown]:
-        total_expr = func.coalesce(
-            func.sum(ItemOrdenVenta.cantidad * func.coalesce(ItemOrdenVenta.precio_unitario, 0)),
-            0,
-        )
-        stmt = (
-            select(Categoria.nombre.label("category"), total_expr.label("total"))
-            .select_from(OrdenVenta)
-            .join(ItemOrdenVenta, ItemOrdenVenta.orden_venta_id == OrdenVenta.id)
-            .join(VarianteProducto, VarianteProducto.id == ItemOrdenVenta.variante_producto_id)
-            .join(Producto, Producto.id == VarianteProducto.producto_id)
-            .join(Categoria, Categoria.id == Producto.categoria_id)
-            .where(OrdenVenta.fecha >= start, OrdenVenta.fecha <= end)
-            .group_by(Categoria.nombre)
-            .order_by(total_expr.desc())
-        )
-        rows = self.db.execute(stmt).all()
-        totals = [float(row.total or 0) for row in rows]
-        grand_total = sum(totals) or 1.0
-        breakdown: List[CategoryBreakdown] = []
-        for row, total in zip(rows, totals):
-            percentage = round((total / grand_total) * 100, 2)
-            breakdown.append(CategoryBreakdown(category=row.category, total=round(total, 2), percentage=percentage))
-        return breakdown
-
-    def _top_products_between(self, start: datetime, end: datetime, limit: int = 5) -> List[TopProduct]:
-        total_expr = func.coalesce(
-            func.sum(ItemOrdenVenta.cantidad * func.coalesce(ItemOrdenVenta.precio_unitario, 0)),
-            0,
-        )
+    def _top_products_between(self, rng: ReportRange, limit: int = 5) -> List[TopProduct]:
+        lineas = self._line_facts(rng)
+        total_expr = func.coalesce(func.sum(lineas.c.importe), 0)
         stmt = (
             select(Producto.nombre.label("product"), total_expr.label("total"))
-            .select_from(OrdenVenta)
-            .join(ItemOrdenVenta, ItemOrdenVenta.orden_venta_id == OrdenVenta.id)
-            .join(VarianteProducto, VarianteProducto.id == ItemOrdenVenta.variante_producto_id)
-            .join(Producto, Producto.id == VarianteProducto.producto_id)
-            .where(OrdenVenta.fecha >= start, OrdenVenta.fecha <= end)
+            .select_from(lineas)
+            .join(Producto, Producto.id == lineas.c.producto_id)
             .group_by(Producto.nombre)
             .order_by(total_expr.desc())
             .limit(limit)
@@ -163,7 +288,7 @@ class ReportService:
         end: datetime | None = None,
     ) -> dict:
         """Genera reporte financiero: ingresos, egresos, ganancias, flujo de caja."""
-        from app.models import FacturaVenta, PagoCliente, OrdenCompra, ItemOrdenCompra
+        from app.models import OrdenCompra, ItemOrdenCompra
         
         end_dt = end or datetime.utcnow()
         start_dt = start or (end_dt - timedelta(days=30))
@@ -171,13 +296,9 @@ class ReportService:
         if start_dt > end_dt:
             raise ValueError("La fecha inicial no puede ser posterior a la final")
 
-        # Ingresos: total de facturas pagadas
-        ingresos_stmt = (
-            select(func.coalesce(func.sum(FacturaVenta.total), 0))
-            .where(FacturaVenta.fecha_emision >= start_dt, FacturaVenta.fecha_emision <= end_dt)
-            .where(FacturaVenta.estado == "PAGADO")
-        )
-        ingresos = float(self.db.execute(ingresos_stmt).scalar_one() or 0)
+        # Ingresos (facturas pagadas) y pagos recibidos salen del acumulado diario
+        rng = ReportRange.split(start_dt, end_dt)
+        ingresos, pagos_recibidos = self._cash_totals(rng)
 
         # Egresos: total de compras recibidas
         egresos_stmt = (
@@ -197,14 +318,6 @@ class ReportService:
         # Ganancias
         ganancias = ingresos - egresos
 
-        # Flujo de caja: pagos recibidos vs pagos realizados
-        pagos_recibidos_stmt = (
-            select(func.coalesce(func.sum(PagoCliente.monto), 0))
-            .where(PagoCliente.fecha_pago >= start_dt, PagoCliente.fecha_pago <= end_dt)
-            .where(PagoCliente.estado == "CONFIRMADO")
-        )
-        pagos_recibidos = float(self.db.execute(pagos_recibidos_stmt).scalar_one() or 0)
-
         return {
             "period": {
                 "start": start_dt.isoformat(),
@@ -301,23 +414,18 @@ class ReportService:
         if start_dt > end_dt:
             raise ValueError("La fecha inicial no puede ser posterior a la final")
 
+        rng = ReportRange.split(start_dt, end_dt)
+        lineas = self._line_facts(rng)
+        total_expr = func.coalesce(func.sum(lineas.c.importe), 0)
+
         # Ventas totales
-        total_sales = self._sales_total_between(start_dt, end_dt)
+        total_sales = self._sales_total_between(rng)
 
         # Ventas por día
         daily_sales_stmt = (
-            select(
-                func.cast(OrdenVenta.fecha, Date).label("date"),
-                func.coalesce(
-                    func.sum(ItemOrdenVenta.cantidad * func.coalesce(ItemOrdenVenta.precio_unitario, 0)),
-                    0
-                ).label("total")
-            )
-            .select_from(OrdenVenta)
-            .join(ItemOrdenVenta, ItemOrdenVenta.orden_venta_id == OrdenVenta.id)
-            .where(OrdenVenta.fecha >= start_dt, OrdenVenta.fecha <= end_dt)
-            .group_by(func.cast(OrdenVenta.fecha, Date))
-            .order_by(func.cast(OrdenVenta.fecha, Date))
+            select(lineas.c.fecha.label("date"), total_expr.label("total"))
+            .group_by(lineas.c.fecha)
+            .order_by(lineas.c.fecha)
         )
         daily_sales = [
             {
@@ -328,26 +436,15 @@ class ReportService:
         ]
 
         # Top productos vendidos
-        top_products = self._top_products_between(start_dt, end_dt, limit=10)
+        top_products = self._top_products_between(rng, limit=10)
 
         # Top clientes
         top_customers_stmt = (
-            select(
-                Cliente.nombre,
-                func.coalesce(
-                    func.sum(ItemOrdenVenta.cantidad * func.coalesce(ItemOrdenVenta.precio_unitario, 0)),
-                    0
-                ).label("total")
-            )
-            .select_from(OrdenVenta)
-            .join(ItemOrdenVenta, ItemOrdenVenta.orden_venta_id == OrdenVenta.id)
-            .join(Cliente, Cliente.id == OrdenVenta.cliente_id)
-            .where(OrdenVenta.fecha >= start_dt, OrdenVenta.fecha <= end_dt)
+            select(Cliente.nombre, total_expr.label("total"))
+            .select_from(lineas)
+            .join(Cliente, Cliente.id == lineas.c.cliente_id)
             .group_by(Cliente.nombre)
-            .order_by(func.coalesce(
-                func.sum(ItemOrdenVenta.cantidad * func.coalesce(ItemOrdenVenta.precio_unitario, 0)),
-                0
-            ).desc())
+            .order_by(total_expr.desc())
             .limit(10)
         )
         top_customers = [
@@ -449,8 +546,10 @@ class ReportService:
         if start_dt > end_dt:
             raise ValueError("La fecha inicial no puede ser posterior a la final")
 
+        rng = ReportRange.split(start_dt, end_dt)
+
         # Clientes activos
-        active_customers = self._active_customers_between(start_dt, end_dt)
+        active_customers = self._active_customers_between(rng)
 
         # Clientes nuevos
         new_customers_stmt = (
@@ -460,25 +559,19 @@ class ReportService:
         new_customers = int(self.db.execute(new_customers_stmt).scalar_one() or 0)
 
         # Top clientes (ya calculado en sales_report, pero lo incluimos aquí también)
+        lineas = self._line_facts(rng)
+        total_expr = func.coalesce(func.sum(lineas.c.importe), 0)
         top_customers_stmt = (
             select(
                 Cliente.nombre,
                 Cliente.correo,
-                func.count(OrdenVenta.id).label("total_ordenes"),
-                func.coalesce(
-                    func.sum(ItemOrdenVenta.cantidad * func.coalesce(ItemOrdenVenta.precio_unitario, 0)),
-                    0
-                ).label("total_gastado")
+                func.coalesce(func.sum(lineas.c.lineas), 0).label("total_ordenes"),
+                total_expr.label("total_gastado"),
             )
-            .select_from(Cliente)
-            .join(OrdenVenta, OrdenVenta.cliente_id == Cliente.id)
-            .join(ItemOrdenVenta, ItemOrdenVenta.orden_venta_id == OrdenVenta.id)
-            .where(OrdenVenta.fecha >= start_dt, OrdenVenta.fecha <= end_dt)
+            .select_from(lineas)
+            .join(Cliente, Cliente.id == lineas.c.cliente_id)
             .group_by(Cliente.nombre, Cliente.correo)
-            .order_by(func.coalesce(
-                func.sum(ItemOrdenVenta.cantidad * func.coalesce(ItemOrdenVenta.precio_unitario, 0)),
-                0
-            ).desc())
+            .order_by(total_expr.desc())
             .limit(10)
         )
         top_customers = [
@@ -0,0 +1,108 @@
+"""Conciliación del contador de stock reservado (`stock_reservado`).
+
+Las reservas mantienen el contador en su propia transacción; esta clase lo
+compara con la suma real de `items_reserva` en reservas activas y corrige los
+desvíos (datos cargados por scripts, ediciones manuales o fallos antiguos).
+Se ejecuta periódicamente dentro de la API (`start_hold_reconciler`) y a
+demanda con `scripts/reconcile_reservation_holds.py`.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.repositories.reservation_repo import ReservationRepository
+
+logger = logging.getLogger(__name__)
+
+# Diferencias menores se consideran redondeo de Numeric(10, 2)
+_TOLERANCE = 0.005
+
+
+@dataclass(slots=True)
+class HoldDrift:
+    variante_producto_id: int
+    registrado: Optional[float]  # None si no existe contador
+    real: float
+
+
+@dataclass(slots=True)
+class ReservationHoldService:
+    db: Session
+    _repo: ReservationRepository = field(init=False)
+
+    def __post_init__(self) -> None:
+        self._repo = ReservationRepository(self.db)
+
+    def find_drift(self) -> list[HoldDrift]:
+        """Variantes cuyo contador no coincide con las reservas activas (sin bloquear)."""
+        holds = self._repo.holds()
+        actual = self._repo.active_reserved_totals()
+        drift: list[HoldDrift] = []
+        for variant_id in sorted(holds.keys() | actual.keys()):
+            registrado = holds.get(variant_id)
+            real = actual.get(variant_id, 0.0)
+            if registrado is None and real == 0:
+                continue
+            if registrado is None or abs(registrado - real) > _TOLERANCE:
+                drift.append(HoldDrift(variante_producto_id=variant_id, registrado=registrado, real=real))
+        return drift
+
+    def reconcile(self, *, repair: bool = True) -> list[HoldDrift]:
+        """Detecta desvíos y, con `repair`, los corrige en una transacción.
+
+        Los contadores afectados se bloquean y la suma real se recalcula con
+        el bloqueo tomado, así una reserva en curso no se pisa: su transacción
+        ya tiene el contador bloqueado y la conciliación espera a su commit.
+        """
+        drift = self.find_drift()
+        if not drift or not repair:
+            return drift
+
+        now = datetime.now()
+        variant_ids = [item.variante_producto_id for item in drift]
+        try:
+            self._repo.lock_holds(variant_ids, now)
+            actual = self._repo.active_reserved_totals(variant_ids)
+            self._repo.set_holds({variant_id: actual.get(variant_id, 0.0) for variant_id in variant_ids}, now)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        for item in drift:
+            logger.warning(
+                "Stock reservado corregido para variante %s: %s -> %s",
+                item.variante_producto_id,
+                item.registrado,
+                item.real,
+            )
+        return drift
+
+
+def start_hold_reconciler(session_factory, interval_seconds: int) -> Optional[threading.Event]:
+    """Lanza un hilo daemon que concilia al arrancar y luego cada `interval_seconds`.
+
+    Devuelve el evento que lo detiene (o None si está desactivado).
+    """
+    if interval_seconds <= 0:
+        return None
+    stop = threading.Event()
+
+    def _loop() -> None:
+        while not stop.is_set():
+            db = session_factory()
+            try:
+                ReservationHoldService(db=db).reconcile()
+            except Exception:
+                logger.exception("Falló la conciliación de stock reservado")
+            finally:
+                db.close()
+            stop.wait(interval_seconds)
+
+    threading.Thread(target=_loop, name="reservation-hold-reconciler", daemon=True).start()
+    return stop
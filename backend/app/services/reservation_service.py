@@ -1,13 +1,19 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Optional
+from datetime import datetime
+from typing import Iterable, Optional
 
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.models.reserva import ItemReserva, Reserva
-from app.repositories.reservation_repo import ReservationFilter, ReservationRepository
+from app.models.reserva import Reserva
+from app.repositories.reservation_repo import (
+    ACTIVE_RESERVATION_STATES,
+    ReservationFilter,
+    ReservationRepository,
+)
+from app.services.customer_summary_service import invalidate_customer_summary
 from app.schemas.reservation import (
     ReservationCustomer,
     ReservationItemResponse,
@@ -82,43 +88,58 @@ class ReservationService:
             observaciones=reservation.observaciones,
         )
 
+    def _claim_transition(self, reserva: Reserva, to_state: str) -> None:
+        """Pasa la reserva a `to_state` desde el estado leído y libera su stock reservado.
+
+        El UPDATE condicionado al estado evita que dos peticiones simultáneas
+        (p. ej. dos cancelaciones) descuenten el contador dos veces. Sin commit.
+        """
+        from_state = reserva.estado
+        if not self._repo.claim_transition(reserva.id, (from_state,), to_state):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="La reserva cambió de estado durante la operación. Recarga e intenta nuevamente.",
+            )
+        reserva.estado = to_state
+        if from_state in ACTIVE_RESERVATION_STATES:
+            released: dict[int, float] = {}
+            for item in reserva.items:
+                released[item.variante_producto_id] = released.get(item.variante_producto_id, 0.0) - float(item.cantidad)
+            self._repo.apply_hold_deltas(released, datetime.now())
+
     def check_availability(self, variante_producto_id: int, cantidad: float) -> dict:
         """
         Consulta la disponibilidad de un producto.
         Retorna información sobre stock disponible.
         """
-        from app.models.producto_almacen import ProductoAlmacen
-        from sqlalchemy import func
-
-        # Obtener stock total de la variante
-        stock_total = (
-            self.db.query(func.sum(ProductoAlmacen.cantidad_disponible))
-            .filter(ProductoAlmacen.variante_producto_id == variante_producto_id)
-            .scalar() or 0.0
-        )
+        return self.check_availability_batch([(variante_producto_id, cantidad)])[0]
 
-        # Obtener reservas pendientes/confirmadas que afectan el stock
-        reservas_activas = (
-            self.db.query(func.sum(ItemReserva.cantidad))
-            .join(Reserva)
-            .filter(
-                ItemReserva.variante_producto_id == variante_producto_id,
-                Reserva.estado.in_(["PENDIENTE", "CONFIRMADA"]),
+    def check_availability_batch(self, items: Iterable[tuple[int, float]]) -> list[dict]:
+        """
+        Consulta la disponibilidad de varias variantes con una sola consulta agrupada.
+        Las cantidades de una variante repetida se suman; el resultado sigue el
+        orden de la primera aparición de cada variante.
+        """
+        solicitado: dict[int, float] = {}
+        for variante_producto_id, cantidad in items:
+            solicitado[variante_producto_id] = solicitado.get(variante_producto_id, 0.0) + float(cantidad)
+
+        totals = self._repo.availability(solicitado.keys())
+        results: list[dict] = []
+        for variante_producto_id, cantidad in solicitado.items():
+            stock_total, reservas_activas = totals.get(variante_producto_id, (0.0, 0.0))
+            disponible = stock_total - reservas_activas
+            results.append(
+                {
+                    "variante_producto_id": variante_producto_id,
+                    "stock_total": stock_total,
+                    "reservado": reservas_activas,
+                    "disponible": disponible,
+                    "solicitado": cantidad,
+                    "suficiente": disponible >= cantidad,
+                }
             )
-            .scalar() or 0.0
-        )
-
-        disponible = float(stock_total) - float(reservas_activas)
-        suficiente = disponible >= cantidad
-
-        return {
-            "variante_producto_id": variante_producto_id,
-            "stock_total": float(stock_total),
-            "reservado": float(reservas_activas),
-            "disponible": disponible,
-            "solicitado": cantidad,
-            "suficiente": suficiente,
-        }
+        return results
 
     def create_reservation(
         self,
@@ -154,15 +175,6 @@ class ReservationService:
                 detail="Se requiere un cliente_id o un usuario autenticado"
             )
 
-        # Verificar disponibilidad de todos los items
-        for item in payload.items:
-            availability = self.check_availability(item["variante_producto_id"], item["cantidad"])
-            if not availability["suficiente"]:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Stock insuficiente para la variante {item['variante_producto_id']}. Disponible: {availability['disponible']}, Solicitado: {item['cantidad']}"
-                )
-
         # Crear la reserva
         items_data = [
             {
@@ -172,14 +184,36 @@ class ReservationService:
             for item in payload.items
         ]
 
-        reserva = self._repo.create(
-            cliente_id=cliente_id,
-            items=items_data,
-            usuario_id=usuario_id,
-            fecha_reserva=payload.fecha_reserva,
-            observaciones=payload.observaciones,
-        )
+        now = datetime.now()
+        try:
+            # Bloquear los contadores antes de validar: dos reservas de la misma
+            # variante se serializan y la segunda ve lo que reservó la primera
+            self._repo.lock_holds((item["variante_producto_id"] for item in items_data), now)
+            availability = self.check_availability_batch(
+                (item["variante_producto_id"], item["cantidad"]) for item in items_data
+            )
+            for result in availability:
+                if not result["suficiente"]:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Stock insuficiente para la variante {result['variante_producto_id']}. Disponible: {result['disponible']}, Solicitado: {result['solicitado']}"
+                    )
+
+            self._repo.apply_hold_deltas(
+                {result["variante_producto_id"]: result["solicitado"] for result in availability}, now
+            )
+            reserva = self._repo.create(
+                cliente_id=cliente_id,
+                items=items_data,
+                usuario_id=usuario_id,
+                fecha_reserva=payload.fecha_reserva,
+                observaciones=payload.observaciones,
+            )
+        except Exception:
+            self.db.rollback()
+            raise
 
+        invalidate_customer_summary(reserva.cliente_id)
         return self._map_reservation(reserva)
 
     def cancel_reservation(self, reservation_id: int, motivo: Optional[str] = None) -> ReservationResponse:
@@ -202,12 +236,13 @@ class ReservationService:
                 detail="No se puede cancelar una reserva completada"
             )
 
-        reserva.estado = "CANCELADA"
+        self._claim_transition(reserva, "CANCELADA")
         if motivo:
             reserva.observaciones = (reserva.observaciones or "") + f"\n[Motivo cancelación: {motivo}]"
 
         self.db.commit()
         self.db.refresh(reserva)
+        invalidate_customer_summary(reserva.cliente_id)
         return self._map_reservation(reserva)
 
     def process_deposit(
@@ -241,6 +276,7 @@ class ReservationService:
 
         self.db.commit()
         self.db.refresh(reserva)
+        invalidate_customer_summary(reserva.cliente_id)
         return self._map_reservation(reserva)
 
     def send_confirmation(
@@ -270,6 +306,7 @@ class ReservationService:
 
         self.db.commit()
         self.db.refresh(reserva)
+        invalidate_customer_summary(reserva.cliente_id)
         return self._map_reservation(reserva)
 
     def complete_reservation(
@@ -314,10 +351,16 @@ class ReservationService:
             sucursal_recogida_id=payload.sucursal_recogida_id,
         )
 
-        orden_venta = sale_service.create_order(sale_payload, usuario_id=usuario_id or reserva.usuario_id)
+        # El cambio de estado y la liberación del stock reservado se confirman
+        # junto con la orden de venta (create_order hace el commit)
+        try:
+            self._claim_transition(reserva, "COMPLETADA")
+            orden_venta = sale_service.create_order(sale_payload, usuario_id=usuario_id or reserva.usuario_id)
+        except Exception:
+            self.db.rollback()
+            raise
 
         # Actualizar reserva
-        reserva.estado = "COMPLETADA"
         reserva.fecha_completado = datetime.now()
         reserva.orden_venta_id = orden_venta.id
         if payload.observaciones:
@@ -325,5 +368,6 @@ class ReservationService:
 
         self.db.commit()
         self.db.refresh(reserva)
+        invalidate_customer_summary(reserva.cliente_id)
         return self._map_reservation(reserva)
 
@@ -1,13 +1,20 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+from datetime import datetime
 from typing import Optional
 
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 
+from app.models.cliente import Cliente
+from app.models.usuario import Usuario, normalize_email
 from app.models.venta import OrdenVenta
+from app.repositories.customer_repo import CustomerRepository
 from app.repositories.sale_repo import SaleFilter, SaleRepository
+from app.services.customer_service import CustomerService, invalidate_customer_link
+from app.services.customer_summary_service import invalidate_customer_summary
+from app.services.sales_rollup_service import SalesRollupService
 from app.schemas.sale import (
     SaleCustomer,
     SaleItemResponse,
@@ -33,11 +40,42 @@ class SaleService:
         estado: Optional[str],
         page: int,
         page_size: int,
+        cursor: Optional[str] = None,
     ) -> SaleOrderListResponse:
+        """Página de órdenes; ValueError si el cursor no es válido."""
         filters = SaleFilter(customer_id=customer_id, estado=estado)
-        orders, total = self._repo.list(filters, page, page_size)
-        items = [self._map_order(order) for order in orders]
-        return SaleOrderListResponse(items=items, total=total, page=page, page_size=page_size)
+        result = self._repo.list_page(filters, page, page_size, cursor=cursor)
+        items = [self._map_order(order) for order in result.items]
+        return SaleOrderListResponse(
+            items=items,
+            total=result.total,
+            page=page,
+            page_size=page_size,
+            next_cursor=result.next_cursor,
+        )
+
+    def list_my_orders(
+        self,
+        usuario: Usuario,
+        *,
+        page: int,
+        page_size: int,
+        cursor: Optional[str] = None,
+    ) -> SaleOrderListResponse:
+        """Pedidos del usuario: los que creó y los de su cliente (vinculado o por correo).
+
+        Solo lectura: no vincula clientes (eso ocurre al comprar o registrarse).
+        ValueError si el cursor no es válido.
+        """
+        cliente_id = CustomerService(self.db).customer_id_for_user(usuario.id, usuario.correo)
+        result = self._repo.list_for_user_page(usuario.id, cliente_id, page, page_size, cursor=cursor)
+        return SaleOrderListResponse(
+            items=[self._map_order(order) for order in result.items],
+            total=result.total,
+            page=page,
+            page_size=page_size,
+            next_cursor=result.next_cursor,
+        )
 
     def get_order(self, order_id: int) -> SaleOrderResponse:
         order = self._repo.get(order_id)
@@ -52,118 +90,18 @@ class SaleService:
     ) -> SaleOrderResponse:
         import logging
         logger = logging.getLogger(__name__)
-        
-        from app.models.cliente import Cliente
-        from app.models.usuario import Usuario
-        from datetime import datetime
-        from sqlalchemy import func
 
         logger.info(f"Creando orden - usuario_id: {usuario_id}, cliente_email: {payload.cliente_email}")
 
-        # Obtener o crear cliente
         cliente_id = payload.cliente_id
+        vinculado = False
         if not cliente_id:
-            if payload.cliente_email:
-                # Normalizar el email para búsqueda y almacenamiento
-                email_normalizado = payload.cliente_email.strip().lower()
-                
-                # MEJORADO: Si hay un usuario autenticado, buscar cliente por relación directa usuario_id
-                if usuario_id:
-                    usuario = self.db.query(Usuario).filter(Usuario.id == usuario_id).first()
-                    if usuario:
-                        logger.info(f"Usuario encontrado: {usuario.id}, email: {usuario.correo}")
-                        # Buscar cliente por relación directa usuario_id (más eficiente y seguro)
-                        cliente = self.db.query(Cliente).filter(
-                            Cliente.usuario_id == usuario_id
-                        ).first()
-                        if cliente:
-                            logger.info(f"Cliente encontrado por usuario_id: {cliente.id}, email: {cliente.correo}")
-                            cliente_id = cliente.id
-                            # Actualizar datos del cliente si es necesario
-                            if payload.cliente_nombre and cliente.nombre != payload.cliente_nombre:
-                                cliente.nombre = payload.cliente_nombre
-                            if payload.cliente_telefono and cliente.telefono != payload.cliente_telefono:
-                                cliente.telefono = payload.cliente_telefono
-                            if payload.cliente_nit_ci and cliente.nit_ci != payload.cliente_nit_ci:
-                                cliente.nit_ci = payload.cliente_nit_ci
-                            self.db.flush()
-                        else:
-                            # Si no tiene cliente asociado, buscar por email como fallback
-                            if usuario.correo:
-                                cliente = self.db.query(Cliente).filter(
-                                    func.lower(Cliente.correo) == func.lower(usuario.correo)
-                                ).first()
-                                if cliente:
-                                    # Vincular el cliente existente al usuario
-                                    cliente.usuario_id = usuario_id
-                                    logger.info(f"Cliente {cliente.id} vinculado al usuario {usuario_id}")
-                                    cliente_id = cliente.id
-                                    self.db.flush()
-                
-                # Si no se encontró cliente por usuario, buscar por el email proporcionado
-                if not cliente_id:
-                    cliente = self.db.query(Cliente).filter(
-                        func.lower(Cliente.correo) == email_normalizado
-                    ).first()
-                    if cliente:
-                        logger.info(f"Cliente encontrado por email proporcionado: {cliente.id}, email: {cliente.correo}")
-                        # ACTUALIZAR información del cliente si es diferente o está vacía
-                        # Esto evita duplicados y mantiene información actualizada
-                        actualizado = False
-                        if payload.cliente_nombre and (not cliente.nombre or cliente.nombre.strip() != payload.cliente_nombre.strip()):
-                            logger.info(f"Actualizando nombre del cliente {cliente.id}: '{cliente.nombre}' -> '{payload.cliente_nombre}'")
-                            cliente.nombre = payload.cliente_nombre.strip()
-                            actualizado = True
-                        
-                        if payload.cliente_telefono and (not cliente.telefono or cliente.telefono.strip() != payload.cliente_telefono.strip()):
-                            logger.info(f"Actualizando teléfono del cliente {cliente.id}: '{cliente.telefono}' -> '{payload.cliente_telefono}'")
-                            cliente.telefono = payload.cliente_telefono.strip()
-                            actualizado = True
-                        
-                        if payload.cliente_nit_ci and (not cliente.nit_ci or cliente.nit_ci.strip() != payload.cliente_nit_ci.strip()):
-                            logger.info(f"Actualizando NIT/CI del cliente {cliente.id}: '{cliente.nit_ci}' -> '{payload.cliente_nit_ci}'")
-                            cliente.nit_ci = payload.cliente_nit_ci.strip()
-                            actualizado = True
-                        
-                        # Si se encontró por email pero no tenía usuario_id, y hay usuario_id, vincularlo
-                        if usuario_id and not cliente.usuario_id:
-                            logger.info(f"Vinculando cliente {cliente.id} al usuario {usuario_id}")
-                            cliente.usuario_id = usuario_id
-                            actualizado = True
-                        
-                        if actualizado:
-                            self.db.flush()
-                            logger.info(f"Cliente {cliente.id} actualizado correctamente")
-                        
-                        cliente_id = cliente.id
-                        
-                        # Guardar snapshot de los datos del cliente en la orden (para historial)
-                        # Esto se hará después de crear la orden
-                    else:
-                        # Crear nuevo cliente
-                        if not payload.cliente_nombre:
-                            raise HTTPException(
-                                status_code=status.HTTP_400_BAD_REQUEST,
-                                detail="Se requiere cliente_nombre cuando se crea un nuevo cliente"
-                            )
-                        logger.info(f"Creando nuevo cliente con email: {email_normalizado}")
-                        cliente = Cliente(
-                            nombre=payload.cliente_nombre,
-                            correo=email_normalizado,
-                            nit_ci=payload.cliente_nit_ci,
-                            telefono=payload.cliente_telefono,
-                            fecha_registro=datetime.now(),
-                            usuario_id=usuario_id, # Asignar usuario_id si está presente
-                        )
-                        self.db.add(cliente)
-                        self.db.flush()
-                        cliente_id = cliente.id
-                        logger.info(f"Cliente creado: {cliente_id}")
-            else:
+            if not payload.cliente_email:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Se requiere cliente_id o cliente_email"
                 )
+            cliente_id, vinculado = self._resolve_customer(payload, usuario_id)
 
         # Validar items
         if not payload.items:
@@ -172,29 +110,28 @@ class SaleService:
                 detail="La orden debe tener al menos un item"
             )
 
-        # Preparar items para el repositorio
-        from app.models.variante_producto import VarianteProducto
-        items_data = []
-        for item in payload.items:
-            # Si no se proporciona precio, obtenerlo de la variante
-            precio_unitario = item.precio_unitario
-            if precio_unitario is None:
-                variante = self.db.query(VarianteProducto).filter(
-                    VarianteProducto.id == item.variante_producto_id
-                ).first()
-                if variante and variante.precio:
-                    precio_unitario = float(variante.precio)
-                else:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=f"La variante {item.variante_producto_id} no tiene precio. Por favor, proporciona precio_unitario."
-                    )
-            
-            items_data.append({
+        # Precios de lista para las líneas sin precio: una sola consulta IN
+        sin_precio = [item.variante_producto_id for item in payload.items if item.precio_unitario is None]
+        precios = self._repo.variant_prices(sin_precio)
+        faltantes = sorted({variant_id for variant_id in sin_precio if not precios.get(variant_id)})
+        if faltantes:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=(
+                    f"Las variantes {', '.join(map(str, faltantes))} no existen o no tienen precio. "
+                    "Por favor, proporciona precio_unitario."
+                ),
+            )
+        items_data = [
+            {
                 "variante_producto_id": item.variante_producto_id,
                 "cantidad": item.cantidad,
-                "precio_unitario": precio_unitario,
-            })
+                "precio_unitario": (
+                    item.precio_unitario if item.precio_unitario is not None else precios[item.variante_producto_id]
+                ),
+            }
+            for item in payload.items
+        ]
 
         # Crear la orden
         logger.info(f"Creando orden - cliente_id: {cliente_id}, usuario_id: {usuario_id}, items: {len(items_data)}")
@@ -208,6 +145,9 @@ class SaleService:
             sucursal_recogida_id=payload.sucursal_recogida_id,
         )
         logger.info(f"Orden creada: {orden.id}, usuario_id guardado: {orden.usuario_id}, metodo_pago: {payload.metodo_pago}")
+        if vinculado:
+            # Tras el commit: antes, una lectura concurrente volvería a cachear el vínculo anterior
+            invalidate_customer_link(usuario_id)
 
         # Generar factura automáticamente si la orden está en estado PAGADO
         # (En Bolivia, las facturas son obligatorias para ventas formales)
@@ -219,8 +159,87 @@ class SaleService:
                 logger.error(f"Error al generar factura automática para orden {orden.id}: {e}")
                 # No fallar la creación de la orden si falla la factura
 
+        invalidate_customer_summary(orden.cliente_id)
+
+        self._sync_report_rollup(orden.fecha, datetime.utcnow())
         return self._map_order(orden)
 
+    def _resolve_customer(self, payload: "SaleOrderCreateRequest", usuario_id: Optional[int]) -> tuple[int, bool]:
+        """Cliente del pedido: una consulta de candidatos y, si no hay, alta.
+
+        Prioridad: el cliente vinculado al usuario autenticado; el que tiene el
+        correo del usuario (se vincula); el que tiene el correo indicado (se
+        actualizan sus datos y se vincula si estaba libre); si no, uno nuevo.
+        Devuelve también si se vinculó el cliente al usuario (la caché del
+        vínculo se invalida después del commit).
+        """
+        import logging
+        logger = logging.getLogger(__name__)
+
+        email_normalizado = normalize_email(payload.cliente_email)
+        candidatos, correo_usuario = CustomerRepository(self.db).order_candidates(usuario_id, email_normalizado)
+
+        def por_correo(correo: Optional[str]) -> Optional[Cliente]:
+            if not correo:
+                return None
+            return next((c for c in candidatos if c.correo_normalizado == correo), None)
+
+        cliente = next((c for c in candidatos if usuario_id and c.usuario_id == usuario_id), None)
+        if cliente is not None:
+            logger.info(f"Cliente encontrado por usuario_id: {cliente.id}")
+            self._update_customer_details(cliente, payload)
+            return cliente.id, False
+
+        cliente = por_correo(correo_usuario)
+        if cliente is not None:
+            cliente.usuario_id = usuario_id
+            self.db.flush()
+            logger.info(f"Cliente {cliente.id} vinculado al usuario {usuario_id}")
+            return cliente.id, True
+
+        cliente = por_correo(email_normalizado)
+        if cliente is not None:
+            logger.info(f"Cliente encontrado por email proporcionado: {cliente.id}")
+            # Si no tenía usuario y hay uno autenticado, se vincula
+            vinculado = bool(usuario_id and not cliente.usuario_id)
+            if vinculado:
+                cliente.usuario_id = usuario_id
+            self._update_customer_details(cliente, payload)
+            return cliente.id, vinculado
+
+        if not payload.cliente_nombre:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Se requiere cliente_nombre cuando se crea un nuevo cliente"
+            )
+        cliente = Cliente(
+            nombre=payload.cliente_nombre,
+            correo=email_normalizado,
+            nit_ci=payload.cliente_nit_ci,
+            telefono=payload.cliente_telefono,
+            fecha_registro=datetime.now(),
+            usuario_id=usuario_id,
+        )
+        self.db.add(cliente)
+        self.db.flush()
+        logger.info(f"Cliente creado: {cliente.id}")
+        return cliente.id, bool(usuario_id)
+
+    def _update_customer_details(self, cliente: Cliente, payload: "SaleOrderCreateRequest") -> None:
+        """Actualiza nombre, teléfono y NIT/CI con los datos del pedido si cambiaron."""
+        for campo, valor in (
+            ("nombre", payload.cliente_nombre),
+            ("telefono", payload.cliente_telefono),
+            ("nit_ci", payload.cliente_nit_ci),
+        ):
+            if valor and (getattr(cliente, campo) or "").strip() != valor.strip():
+                setattr(cliente, campo, valor.strip())
+        self.db.flush()
+
+    def _sync_report_rollup(self, *moments: Optional[datetime]) -> None:
+        """Refresca el acumulado diario de reportes para los días de `moments`."""
+        SalesRollupService(self.db).sync_days(moment.date() for moment in moments if moment)
+
     def _generate_invoice_for_order(self, orden_id: int, usuario_id: Optional[int] = None) -> None:
         """Genera una factura automáticamente para una orden"""
         from app.services.invoice_service import InvoiceService
@@ -288,6 +307,8 @@ class SaleService:
         
         self.db.commit()
         self.db.refresh(orden)
+        invalidate_customer_summary(orden.cliente_id)
+        self._sync_report_rollup(orden.fecha)
         return self._map_order(orden)
 
     def ship_order(
@@ -316,6 +337,8 @@ class SaleService:
         
         self.db.commit()
         self.db.refresh(orden)
+        invalidate_customer_summary(orden.cliente_id)
+        self._sync_report_rollup(orden.fecha)
         return self._map_order(orden)
 
     def deliver_order(
@@ -374,6 +397,8 @@ class SaleService:
         
         self.db.commit()
         self.db.refresh(orden)
+        invalidate_customer_summary(orden.cliente_id)
+        self._sync_report_rollup(orden.fecha, orden.fecha_entrega)
         return self._map_order(orden)
 
     def ready_for_pickup(
@@ -398,6 +423,8 @@ class SaleService:
         orden.estado = "LISTO_PARA_RECOGER"
         self.db.commit()
         self.db.refresh(orden)
+        invalidate_customer_summary(orden.cliente_id)
+        self._sync_report_rollup(orden.fecha)
         return self._map_order(orden)
 
     def pickup_order(
@@ -471,6 +498,8 @@ class SaleService:
         
         self.db.commit()
         self.db.refresh(orden)
+        invalidate_customer_summary(orden.cliente_id)
+        self._sync_report_rollup(orden.fecha, orden.fecha_entrega)
         return self._map_order(orden)
 
     def _map_order(self, order: OrdenVenta) -> SaleOrderResponse:
@@ -0,0 +1,275 @@
+"""Acumulado diario de ventas, órdenes y caja que alimenta los reportes.
+
+Cada refresco recalcula los días afectados desde las filas crudas (DELETE +
+INSERT ... SELECT agrupado), por lo que es idempotente y corrige cualquier
+desvío previo de esos días. Las ventas y los pagos lo invocan después de su
+commit; `scripts/rebuild_sales_rollup.py` reconstruye rangos completos.
+
+Dos refrescos del mismo día se serializan con un bloqueo por día
+(`sp_getapplock` en SQL Server, `pg_advisory_xact_lock` en PostgreSQL) que
+dura hasta el commit. Si aun así falla, se reintenta y, agotados los
+intentos, el día se anota en `resumen_dias_pendientes` para que el
+conciliador (`start_rollup_reconciler`) lo recalcule.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Any, Callable, Iterable, Optional
+
+from sqlalchemy import Date, and_, cast, delete, func, insert, literal_column, select, text, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import (
+    FacturaVenta,
+    ItemOrdenVenta,
+    OrdenVenta,
+    PagoCliente,
+    ResumenCajaDiaria,
+    ResumenDiaPendiente,
+    ResumenOrdenDiaria,
+    ResumenVentaDiaria,
+    VarianteProducto,
+)
+
+logger = logging.getLogger(__name__)
+
+PAID_INVOICE_STATE = "PAGADO"
+CONFIRMED_PAYMENT_STATE = "CONFIRMADO"
+
+# Intentos de `sync_days` antes de dejar los días para el conciliador
+_SYNC_ATTEMPTS = 3
+_DAY_LOCK_TIMEOUT_MS = 10_000
+
+# Recibe la columna de fecha de la tabla cruda y devuelve el predicado del rango
+DateWindow = Callable[[Any], Any]
+
+
+def sale_line_facts(window: DateWindow):
+    """Una fila por línea de venta con el mismo formato que `resumen_ventas_diario`."""
+    return (
+        select(
+            cast(OrdenVenta.fecha, Date).label("fecha"),
+            OrdenVenta.cliente_id.label("cliente_id"),
+            VarianteProducto.producto_id.label("producto_id"),
+            ItemOrdenVenta.cantidad.label("cantidad"),
+            (ItemOrdenVenta.cantidad * func.coalesce(ItemOrdenVenta.precio_unitario, 0)).label("importe"),
+            literal_column("1").label("lineas"),
+        )
+        .select_from(OrdenVenta)
+        .join(ItemOrdenVenta, ItemOrdenVenta.orden_venta_id == OrdenVenta.id)
+        .join(VarianteProducto, VarianteProducto.id == ItemOrdenVenta.variante_producto_id)
+        .where(window(OrdenVenta.fecha))
+    )
+
+
+def order_facts(window: DateWindow):
+    """Una fila por orden con el mismo formato que `resumen_ordenes_diario`."""
+    return select(
+        cast(OrdenVenta.fecha, Date).label("fecha"),
+        OrdenVenta.cliente_id.label("cliente_id"),
+        OrdenVenta.estado.label("estado"),
+        literal_column("1").label("ordenes"),
+    ).where(window(OrdenVenta.fecha))
+
+
+def cash_facts(window: DateWindow):
+    """Facturas pagadas y pagos confirmados con el mismo formato que `resumen_caja_diario`."""
+    facturas = select(
+        cast(FacturaVenta.fecha_emision, Date).label("fecha"),
+        FacturaVenta.total.label("facturas_pagadas"),
+        literal_column("0").label("pagos_confirmados"),
+    ).where(window(FacturaVenta.fecha_emision), FacturaVenta.estado == PAID_INVOICE_STATE)
+    pagos = select(
+        cast(PagoCliente.fecha_pago, Date).label("fecha"),
+        literal_column("0").label("facturas_pagadas"),
+        PagoCliente.monto.label("pagos_confirmados"),
+    ).where(window(PagoCliente.fecha_pago), PagoCliente.estado == CONFIRMED_PAYMENT_STATE)
+    return union_all(facturas, pagos)
+
+
+class RollupLockTimeout(Exception):
+    """Otro refresco retuvo el bloqueo del día más de `_DAY_LOCK_TIMEOUT_MS`."""
+
+
+@dataclass(slots=True)
+class SalesRollupService:
+    db: Session
+
+    def _lock_days(self, first: date, last: date) -> None:
+        """Bloqueo exclusivo por día hasta el fin de la transacción (en orden, sin interbloqueos)."""
+        dialect = self.db.get_bind().dialect.name
+        day = first
+        while day <= last:
+            resource = f"resumen_ventas:{day.isoformat()}"
+            if dialect == "mssql":
+                result = self.db.execute(
+                    text(
+                        "SET NOCOUNT ON; DECLARE @resultado INT; "
+                        "EXEC @resultado = sp_getapplock @Resource = :resource, @LockMode = 'Exclusive', "
+                        "@LockOwner = 'Transaction', @LockTimeout = :timeout; SELECT @resultado"
+                    ),
+                    {"resource": resource, "timeout": _DAY_LOCK_TIMEOUT_MS},
+                ).scalar()
+                if result is None or result < 0:
+                    raise RollupLockTimeout(resource)
+            elif dialect == "postgresql":
+                self.db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:resource))"), {"resource": resource})
+            day += timedelta(days=1)
+
+    def refresh_range(self, first: date, last: date) -> None:
+        """Recalcula los acumulados de los días [first, last]. No hace commit."""
+        self._lock_days(first, last)
+        start = datetime.combine(first, time.min)
+        stop = datetime.combine(last + timedelta(days=1), time.min)
+
+        def window(column):
+            return and_(column >= start, column < stop)
+
+        for model in (ResumenVentaDiaria, ResumenOrdenDiaria, ResumenCajaDiaria):
+            self.db.execute(delete(model).where(model.fecha >= first, model.fecha <= last))
+
+        lineas = sale_line_facts(window).subquery("lineas")
+        self.db.execute(
+            insert(ResumenVentaDiaria).from_select(
+                ["fecha", "producto_id", "cliente_id", "cantidad", "importe", "lineas"],
+                select(
+                    lineas.c.fecha,
+                    lineas.c.producto_id,
+                    lineas.c.cliente_id,
+                    func.sum(lineas.c.cantidad),
+                    func.sum(lineas.c.importe),
+                    func.count(),
+                ).group_by(lineas.c.fecha, lineas.c.producto_id, lineas.c.cliente_id),
+            )
+        )
+
+        ordenes = order_facts(window).subquery("ordenes")
+        self.db.execute(
+            insert(ResumenOrdenDiaria).from_select(
+                ["fecha", "cliente_id", "estado", "ordenes"],
+                select(
+                    ordenes.c.fecha, ordenes.c.cliente_id, ordenes.c.estado, func.count()
+                ).group_by(ordenes.c.fecha, ordenes.c.cliente_id, ordenes.c.estado),
+            )
+        )
+
+        caja = cash_facts(window).subquery("caja")
+        self.db.execute(
+            insert(ResumenCajaDiaria).from_select(
+                ["fecha", "facturas_pagadas", "pagos_confirmados"],
+                select(
+                    caja.c.fecha,
+                    func.sum(caja.c.facturas_pagadas),
+                    func.sum(caja.c.pagos_confirmados),
+                ).group_by(caja.c.fecha),
+            )
+        )
+
+    def refresh_days(self, days: Iterable[date]) -> None:
+        """Recalcula los días indicados agrupando los consecutivos en un solo rango. No hace commit."""
+        run_start = run_end = None
+        for day in sorted(set(days)):
+            if run_end is not None and day == run_end + timedelta(days=1):
+                run_end = day
+                continue
+            if run_start is not None:
+                self.refresh_range(run_start, run_end)
+            run_start = run_end = day
+        if run_start is not None:
+            self.refresh_range(run_start, run_end)
+
+    def sync_days(self, days: Iterable[date]) -> None:
+        """Refresca y confirma los días tocados por una operación ya confirmada.
+
+        Un fallo aquí no debe revertir la venta o el pago: se reintenta y, si
+        sigue fallando, los días quedan anotados para el conciliador.
+        """
+        days = set(days)
+        if not days:
+            return
+        for attempt in range(1, _SYNC_ATTEMPTS + 1):
+            try:
+                self.refresh_days(days)
+                self.db.commit()
+                return
+            except Exception as exc:
+                self.db.rollback()
+                error = exc
+                logger.info("Reintento %s del acumulado de ventas para %s: %s", attempt, sorted(days), exc)
+        logger.warning("No se pudo refrescar el acumulado de ventas para %s: %s", sorted(days), error)
+        self.mark_pending(days)
+
+    def mark_pending(self, days: Iterable[date]) -> None:
+        """Anota días para que el conciliador los recalcule (confirma por su cuenta)."""
+        now = datetime.utcnow()
+        try:
+            for day in sorted(set(days)):
+                if self.db.get(ResumenDiaPendiente, day) is None:
+                    self.db.add(ResumenDiaPendiente(fecha=day, fecha_registro=now))
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()  # otro worker anotó el mismo día
+        except Exception:
+            self.db.rollback()
+            logger.exception("No se pudieron anotar los días pendientes del acumulado: %s", sorted(set(days)))
+
+    def rebuild_pending(self) -> int:
+        """Recalcula los días anotados y los quita de la lista. Devuelve cuántos recalculó."""
+        started = datetime.utcnow()
+        days = self.db.scalars(select(ResumenDiaPendiente.fecha).order_by(ResumenDiaPendiente.fecha)).all()
+        if not days:
+            return 0
+        try:
+            self.refresh_days(days)
+            # Un día anotado de nuevo durante el refresco se conserva para la próxima vuelta
+            self.db.execute(
+                delete(ResumenDiaPendiente).where(
+                    ResumenDiaPendiente.fecha.in_(days), ResumenDiaPendiente.fecha_registro <= started
+                )
+            )
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return len(days)
+
+
+def start_rollup_reconciler(session_factory, interval_seconds: int) -> Optional[threading.Event]:
+    """Lanza un hilo daemon que recalcula los días pendientes cada `interval_seconds`.
+
+    Devuelve el evento que lo detiene (o None si está desactivado).
+    """
+    if interval_seconds <= 0:
+        return None
+    stop = threading.Event()
+
+    def _loop() -> None:
+        while not stop.wait(interval_seconds):
+            db = session_factory()
+            try:
+                rebuilt = SalesRollupService(db=db).rebuild_pending()
+                if rebuilt:
+                    logger.info("Recalculados %s días pendientes del acumulado de ventas", rebuilt)
+            except Exception:
+                logger.exception("Falló la conciliación del acumulado de ventas")
+            finally:
+                db.close()
+
+    threading.Thread(target=_loop, name="sales-rollup-reconciler", daemon=True).start()
+    return stop
+
+
+__all__ = [
+    "SalesRollupService",
+    "RollupLockTimeout",
+    "start_rollup_reconciler",
+    "sale_line_facts",
+    "order_facts",
+    "cash_facts",
+    "PAID_INVOICE_STATE",
+    "CONFIRMED_PAYMENT_STATE",
+]
@@ -11,9 +11,10 @@ from fastapi import HTTPException, status
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.core.principal import principal_cache
 from app.core.security import create_access_token, create_refresh_token
 from app.models.cliente import Cliente
-from app.models.usuario import Rol, Usuario
+from app.models.usuario import Rol, Usuario, normalize_email
 from app.repositories.idempotency_repo import create_idempotency_key, get_idempotency_key
 from app.repositories.user_repo import UserFilter, UserRepository
 from app.schemas.auth import RegisterRequest, Token, UserResponse
@@ -91,7 +92,9 @@ class UserService:
         
         # Verificar también si existe como cliente (aunque no debería ser necesario si el email es único)
         from app.models.cliente import Cliente
-        existing_cliente = self.db.query(Cliente).filter(Cliente.correo == request_data.email).first()
+        existing_cliente = self.db.query(Cliente).filter(
+            Cliente.correo_igual(request_data.email)
+        ).first()
         if existing_cliente:
             self._record_idempotent_error(
                 idempotency_key,
@@ -121,11 +124,11 @@ class UserService:
             from datetime import datetime
             try:
                 # Normalizar email para almacenamiento consistente
-                email_normalizado = request_data.email.strip().lower()
+                email_normalizado = normalize_email(request_data.email)
                 
                 # Verificar si ya existe un cliente con este email
                 existing_cliente = self.db.query(Cliente).filter(
-                    Cliente.correo == email_normalizado
+                    Cliente.correo_igual(email_normalizado)
                 ).first()
                 
                 if existing_cliente:
@@ -310,6 +313,7 @@ class UserService:
             user = self._repo.update_roles(user, payload.role_ids or [])
         except ValueError as exc:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+        principal_cache.invalidate(user_id)
         return self._map_user_response(user)
 
     def set_active(self, user_id: int, activo: bool) -> UserResponse:
@@ -317,6 +321,7 @@ class UserService:
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado")
         user = self._repo.update_status(user, activo)
+        principal_cache.invalidate(user_id)
         return self._map_user_response(user)
 
     def update_user(self, user_id: int, payload: UserUpdateRequest) -> UserResponse:
@@ -336,6 +341,7 @@ class UserService:
                 status_code=status.HTTP_409_CONFLICT,
                 detail={"error": {"code": "USER_ALREADY_EXISTS", "message": "El correo o usuario ya existe"}},
             ) from None
+        principal_cache.invalidate(user_id)
         return self._map_user_response(updated)
 
     def delete_user(self, user_id: int) -> None:
@@ -345,6 +351,7 @@ class UserService:
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuario no encontrado")
         self._repo.delete(user)
+        principal_cache.invalidate(user_id)
 
     def send_password_reset(self, user_id: int) -> None:
         user = self._repo.get_by_id(user_id)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Benchmark de búsqueda de clientes por correo: LOWER(correo) frente a correo_normalizado.
+
+Crea una tabla temporal con la forma de `clientes` (correo, columna calculada
+`correo_normalizado` e índices iguales a los de producción) en la base de
+DATABASE_URL, la llena con `--rows` clientes de correo en mayúsculas y
+minúsculas mezcladas y mide `--lookups` búsquedas aleatorias con cada forma:
+- before: `WHERE LOWER(correo) = :correo` (la función sobre la columna impide
+  usar el índice: recorre la tabla)
+- after: `WHERE correo IS NOT NULL AND correo_normalizado = :correo`, como
+  `Cliente.correo_igual` (búsqueda en el índice único filtrado)
+
+La tabla es temporal de la conexión: no toca los datos reales. Soporta SQL
+Server, PostgreSQL y SQLite.
+
+Uso:
+    python scripts/benchmark_email_lookup.py --rows 500000 --lookups 200
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import text
+
+from app.db.session import engine
+from app.models.usuario import normalize_email
+
+_BATCH = 10_000
+
+_SETUP = {
+    "mssql": (
+        "#bench_clientes",
+        [
+            "CREATE TABLE #bench_clientes (id INT IDENTITY PRIMARY KEY, correo VARCHAR(100) NULL, "
+            "correo_normalizado AS LOWER(LTRIM(RTRIM(correo))) PERSISTED)",
+        ],
+        [
+            "CREATE INDEX ix_bench_correo ON #bench_clientes (correo)",
+            "CREATE UNIQUE INDEX uq_bench_correo_normalizado ON #bench_clientes (correo_normalizado) "
+            "WHERE correo IS NOT NULL",
+        ],
+    ),
+    "postgresql": (
+        "bench_clientes",
+        [
+            "CREATE TEMP TABLE bench_clientes (id SERIAL PRIMARY KEY, correo VARCHAR(100), "
+            "correo_normalizado VARCHAR(100) GENERATED ALWAYS AS (lower(btrim(correo))) STORED)",
+        ],
+        [
+            "CREATE INDEX ix_bench_correo ON bench_clientes (correo)",
+            "CREATE UNIQUE INDEX uq_bench_correo_normalizado ON bench_clientes (correo_normalizado) "
+            "WHERE correo IS NOT NULL",
+            "ANALYZE bench_clientes",
+        ],
+    ),
+    "sqlite": (
+        "bench_clientes",
+        [
+            "CREATE TEMP TABLE bench_clientes (id INTEGER PRIMARY KEY, correo VARCHAR(100), "
+            "correo_normalizado VARCHAR(100) GENERATED ALWAYS AS (lower(trim(correo))) STORED)",
+        ],
+        [
+            "CREATE INDEX temp.ix_bench_correo ON bench_clientes (correo)",
+            "CREATE UNIQUE INDEX temp.uq_bench_correo_normalizado ON bench_clientes (correo_normalizado) "
+            "WHERE correo IS NOT NULL",
+        ],
+    ),
+}
+
+
+def _email(index: int) -> str:
+    # Mayúsculas mezcladas, como llegan de formularios y cargas antiguas
+    return f"Cliente.{index}@Ferreteria-Demo.com" if index % 3 else f"cliente.{index}@ferreteria-demo.COM"
+
+
+def _measure(conn, sql: str, emails: list[str]) -> tuple[float, float]:
+    statement = text(sql)
+    conn.execute(statement, {"correo": emails[0]}).all()  # calentamiento
+    samples = []
+    for email in emails:
+        start = time.perf_counter()
+        rows = conn.execute(statement, {"correo": email}).all()
+        samples.append((time.perf_counter() - start) * 1000)
+        assert len(rows) == 1, f"se esperaba un cliente para {email}"
+    p50 = statistics.median(samples)
+    p95 = statistics.quantiles(samples, n=20)[18] if len(samples) >= 2 else samples[0]
+    return p50, p95
+
+
+def run(rows: int, lookups: int) -> None:
+    dialect = engine.dialect.name
+    if dialect not in _SETUP:
+        print(f"Dialecto no soportado: {dialect}")
+        return
+    table, create, indexes = _SETUP[dialect]
+    with engine.connect() as conn:
+        for statement in create:
+            conn.exec_driver_sql(statement)
+        started = time.perf_counter()
+        insert = text(f"INSERT INTO {table} (correo) VALUES (:correo)")
+        for offset in range(0, rows, _BATCH):
+            conn.execute(insert, [{"correo": _email(index)} for index in range(offset, min(rows, offset + _BATCH))])
+        for statement in indexes:
+            conn.exec_driver_sql(statement)
+        conn.commit()
+        print(f"{rows} clientes cargados en {time.perf_counter() - started:.1f} s ({dialect})")
+
+        sample = [normalize_email(_email(random.randrange(rows))) for _ in range(lookups)]
+        modes = [
+            ("before", f"SELECT id FROM {table} WHERE LOWER(correo) = :correo"),
+            ("after", f"SELECT id FROM {table} WHERE correo IS NOT NULL AND correo_normalizado = :correo"),
+        ]
+        print("=" * 44)
+        print(f"{'modo':<10}{'p50 ms':>16}{'p95 ms':>16}")
+        print("-" * 44)
+        for mode, sql in modes:
+            p50, p95 = _measure(conn, sql, sample)
+            print(f"{mode:<10}{p50:>16.2f}{p95:>16.2f}")
+        print("=" * 44)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args()
+    run(args.rows, args.lookups)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Benchmark de paginación: página 1 vs página profunda (por defecto la 500).
+
+Compara, contra la base configurada en DATABASE_URL:
+- legacy: OFFSET/LIMIT sobre el SELECT con joinedload de colecciones + unique()
+- ids: paginación en dos fases (ids primero, luego selectinload) de app.repositories.pagination
+- keyset: misma carga en dos fases pero partiendo de un cursor
+
+Uso:
+    python scripts/benchmark_pagination.py --runs 30 --page-size 20 --deep-page 500
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+
+from app.db.session import SessionLocal
+from app.models.atributo import ValorAtributoVariante
+from app.models.producto import Producto
+from app.models.variante_producto import VarianteProducto
+from app.models.venta import ItemOrdenVenta, OrdenVenta
+from app.repositories.pagination import PageQuery, encode_cursor
+from app.repositories.product_repo import ProductRepository
+from app.repositories.sale_repo import SaleRepository
+
+
+def _legacy_product_stmt():
+    return select(Producto).options(
+        joinedload(Producto.marca),
+        joinedload(Producto.categoria),
+        joinedload(Producto.variantes).joinedload(VarianteProducto.unidad_medida),
+        joinedload(Producto.variantes)
+        .joinedload(VarianteProducto.valores_atributos)
+        .joinedload(ValorAtributoVariante.atributo),
+        joinedload(Producto.imagenes),
+    )
+
+
+def _legacy_sale_stmt():
+    return select(OrdenVenta).options(
+        joinedload(OrdenVenta.cliente),
+        joinedload(OrdenVenta.usuario),
+        joinedload(OrdenVenta.items).joinedload(ItemOrdenVenta.variante),
+    )
+
+
+SCENARIOS = {
+    "productos": {
+        "model": Producto,
+        "order_by": (Producto.fecha_creacion.desc(), Producto.id.desc()),
+        "options": ProductRepository._load_options(),
+        "legacy": _legacy_product_stmt,
+    },
+    "ventas": {
+        "model": OrdenVenta,
+        "order_by": (OrdenVenta.fecha.desc(), OrdenVenta.id.desc()),
+        "options": SaleRepository._load_options(),
+        "legacy": _legacy_sale_stmt,
+    },
+}
+
+
+def _measure(fn, runs: int) -> tuple[float, float]:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    p50 = statistics.median(samples)
+    p95 = statistics.quantiles(samples, n=20)[18] if len(samples) >= 2 else samples[0]
+    return p50, p95
+
+
+def run(runs: int, page_size: int, deep_page: int) -> None:
+    print("=" * 72)
+    print(f"{'escenario':<12}{'modo':<8}{'página':>8}{'p50 ms':>12}{'p95 ms':>12}")
+    print("-" * 72)
+    for name, cfg in SCENARIOS.items():
+        db = SessionLocal()
+        try:
+            query = PageQuery(db=db, model=cfg["model"], order_by=cfg["order_by"], options=cfg["options"])
+            total = query.count()
+            for page in (1, deep_page):
+                offset = (page - 1) * page_size
+                if offset >= total:
+                    print(f"{name:<12}{'-':<8}{page:>8}   (solo {total} filas, página vacía)")
+                    continue
+
+                def legacy(cfg=cfg, db=db, offset=offset):
+                    stmt = cfg["legacy"]().order_by(*cfg["order_by"]).offset(offset).limit(page_size)
+                    db.execute(stmt).unique().scalars().all()
+                    db.expunge_all()
+
+                def two_phase(query=query, db=db, page=page):
+                    query.offset_page(page, page_size)
+                    db.expunge_all()
+
+                modes = [("legacy", legacy), ("ids", two_phase)]
+                if offset > 0:
+                    key_columns = [expr.element for expr in cfg["order_by"]]
+                    row = db.execute(
+                        select(*key_columns).order_by(*cfg["order_by"]).offset(offset - 1).limit(1)
+                    ).first()
+                    cursor = encode_cursor(list(row))
+
+                    def keyset(query=query, db=db, cursor=cursor):
+                        query.keyset_page(cursor, page_size)
+                        db.expunge_all()
+
+                    modes.append(("keyset", keyset))
+
+                for mode, fn in modes:
+                    fn()  # calentamiento (plan cache / pool)
+                    p50, p95 = _measure(fn, runs)
+                    print(f"{name:<12}{mode:<8}{page:>8}{p50:>12.1f}{p95:>12.1f}")
+        finally:
+            db.close()
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--deep-page", type=int, default=500)
+    args = parser.parse_args()
+    run(args.runs, args.page_size, args.deep_page)
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""Benchmark de búsqueda de productos: ILIKE '%texto%' frente a los motores de búsqueda.
+
+Mide contra la base de DATABASE_URL, para cada consulta de `--query`:
+- ilike-productos: el filtro anterior del listado (ILIKE sobre nombre y
+  descripción del producto, conteo + primera página de ids)
+- ilike-variantes: la búsqueda anterior de inventario (ILIKE sobre nombre de
+  producto y variante, JOIN, primeras `--limit` variantes)
+- un modo por motor de `--backends` (memory, like, mssql, postgresql) con
+  `ProductSearchService.search_product_ids`
+
+Los aciertos no tienen por qué coincidir: el ILIKE busca la frase literal con
+acentos, los motores buscan cada término plegado como prefijo.
+
+Con `--seed N` crea primero un catálogo sintético de N variantes (4 por
+producto) en la categoría "Benchmark búsqueda" y lo indexa; `--cleanup` lo
+borra al terminar.
+
+Uso:
+    python scripts/benchmark_product_search.py --seed 100000 --runs 20
+    python scripts/benchmark_product_search.py --backends memory mssql --query "tuberia pvc" --query "valvula"
+    python scripts/benchmark_product_search.py --cleanup --runs 0
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import delete, func, insert, or_, select
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models import BusquedaProducto, Categoria, Producto, UnidadMedida, VarianteProducto
+from app.services.product_search_service import ProductSearchService, reset_search_state
+
+BENCH_CATEGORY = "Benchmark búsqueda"
+VARIANTS_PER_PRODUCT = 4
+_BATCH = 2_000
+
+DEFAULT_QUERIES = ("tuberia pvc", "Válvula bronce", "tornillo", "cañeria 1/2", "mart")
+
+_ITEMS = ("Tubería", "Cañería", "Válvula", "Llave de paso", "Codo", "Niple", "Tornillo",
+          "Martillo", "Pintura látex", "Cemento", "Brocha", "Taladro percutor")
+_MATERIALS = ("PVC", "galvanizado", "cobre", "acero inoxidable", "bronce", "polietileno")
+_SIZES = ("1/2\"", "3/4\"", "1\"", "2\"", "10 mm", "25 kg", "4 L")
+_WORDS = ("resistente", "uso industrial", "para exteriores", "alta presión", "garantía",
+          "ferretería", "construcción", "fontanería", "instalación rápida", "económico")
+
+
+def seed(db, variants: int) -> None:
+    """Inserta el catálogo sintético e indexa sus productos."""
+    unidad_id = db.scalar(select(UnidadMedida.id).order_by(UnidadMedida.id).limit(1))
+    if unidad_id is None:
+        raise SystemExit("Se necesita al menos una unidad de medida para sembrar el catálogo.")
+    now = datetime.now()
+    categoria_id = db.scalar(select(Categoria.id).where(Categoria.nombre == BENCH_CATEGORY))
+    if categoria_id is None:
+        categoria = Categoria(nombre=BENCH_CATEGORY, descripcion="Datos del benchmark de búsqueda",
+                             fecha_creacion=now)
+        db.add(categoria)
+        db.flush()
+        categoria_id = categoria.id
+
+    rng = random.Random(42)
+    products = max(variants // VARIANTS_PER_PRODUCT, 1)
+    started = time.perf_counter()
+    for start in range(0, products, _BATCH):
+        count = min(_BATCH, products - start)
+        rows = [
+            {
+                "categoria_id": categoria_id,
+                "nombre": f"{rng.choice(_ITEMS)} {rng.choice(_MATERIALS)} {start + i}",
+                "descripcion": " ".join(rng.sample(_WORDS, 3)),
+                "fecha_creacion": now,
+            }
+            for i in range(count)
+        ]
+        ids = db.scalars(insert(Producto).returning(Producto.id), rows).all()
+        db.execute(
+            insert(VarianteProducto),
+            [
+                {
+                    "producto_id": product_id,
+                    "nombre": size,
+                    "unidad_medida_id": unidad_id,
+                    "precio": round(rng.uniform(5, 500), 2),
+                    "fecha_creacion": now,
+                }
+                for product_id in ids
+                for size in rng.sample(_SIZES, VARIANTS_PER_PRODUCT)
+            ],
+        )
+        db.commit()
+    print(f"  ✓ {products} productos / {products * VARIANTS_PER_PRODUCT} variantes "
+          f"en {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    ProductSearchService(db).rebuild()
+    print(f"  ✓ Documentos de búsqueda reconstruidos en {time.perf_counter() - started:.1f}s")
+
+
+def cleanup(db) -> None:
+    categoria_id = db.scalar(select(Categoria.id).where(Categoria.nombre == BENCH_CATEGORY))
+    if categoria_id is None:
+        print("No hay catálogo de benchmark que borrar.")
+        return
+    product_ids = select(Producto.id).where(Producto.categoria_id == categoria_id)
+    db.execute(delete(BusquedaProducto).where(BusquedaProducto.producto_id.in_(product_ids)))
+    db.execute(delete(VarianteProducto).where(VarianteProducto.producto_id.in_(product_ids)))
+    db.execute(delete(Producto).where(Producto.categoria_id == categoria_id))
+    db.execute(delete(Categoria).where(Categoria.id == categoria_id))
+    db.commit()
+    print("  ✓ Catálogo de benchmark eliminado")
+
+
+def _measure(fn, runs: int) -> tuple[float, float, int]:
+    hits = fn()  # calentamiento (plan cache / carga del índice en memoria)
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    p50 = statistics.median(samples)
+    p95 = statistics.quantiles(samples, n=20)[18] if len(samples) >= 2 else samples[0]
+    return p50, p95, hits
+
+
+def run(args) -> None:
+    db = SessionLocal()
+    try:
+        if args.seed:
+            seed(db, args.seed)
+        documents = db.scalar(select(func.count()).select_from(BusquedaProducto)) or 0
+        variants = db.scalar(select(func.count()).select_from(VarianteProducto)) or 0
+        print(f"Variantes: {variants}  documentos de búsqueda: {documents}")
+        if args.runs > 0:
+            _compare(db, args)
+        if args.cleanup:
+            cleanup(db)
+    finally:
+        db.close()
+
+
+def _compare(db, args) -> None:
+    page_size, limit = args.page_size, args.limit
+
+    def ilike_products(q):
+        like = f"%{q.strip()}%"
+        condition = or_(Producto.nombre.ilike(like), Producto.descripcion.ilike(like))
+        total = db.scalar(select(func.count()).select_from(Producto).where(condition))
+        db.scalars(
+            select(Producto.id).where(condition)
+            .order_by(Producto.fecha_creacion.desc(), Producto.id.desc()).limit(page_size)
+        ).all()
+        return total
+
+    def ilike_variants(q):
+        like = f"%{q.strip()}%"
+        stmt = (
+            select(VarianteProducto.id)
+            .join(VarianteProducto.producto)
+            .where(or_(Producto.nombre.ilike(like), VarianteProducto.nombre.ilike(like)))
+            .order_by(Producto.nombre.asc(), VarianteProducto.nombre.asc())
+            .limit(limit)
+        )
+        return len(db.scalars(stmt).all())
+
+    modes = [("ilike-productos", ilike_products), ("ilike-variantes", ilike_variants)]
+    configured = settings.product_search_backend
+    for backend in args.backends:
+        def search(q, backend=backend):
+            settings.product_search_backend = backend
+            return len(ProductSearchService(db).search_product_ids(q))
+
+        modes.append((backend, search))
+
+    print("=" * 78)
+    print(f"{'consulta':<20}{'modo':<18}{'aciertos':>10}{'p50 ms':>12}{'p95 ms':>12}")
+    print("-" * 78)
+    try:
+        for q in args.query or DEFAULT_QUERIES:
+            for mode, fn in modes:
+                try:
+                    p50, p95, hits = _measure(lambda fn=fn, q=q: fn(q), args.runs)
+                except Exception as exc:  # motor no disponible en este servidor
+                    db.rollback()
+                    print(f"{q[:19]:<20}{mode:<18}   no disponible: {str(exc).splitlines()[0][:40]}")
+                    continue
+                print(f"{q[:19]:<20}{mode:<18}{hits:>10}{p50:>12.1f}{p95:>12.1f}")
+    finally:
+        settings.product_search_backend = configured
+        reset_search_state()
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="Variantes sintéticas a crear antes de medir")
+    parser.add_argument("--cleanup", action="store_true", help="Borrar el catálogo sintético al terminar")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20, help="Variantes de la búsqueda de inventario")
+    parser.add_argument("--backends", nargs="+", default=["memory", "like"],
+                        choices=["memory", "like", "mssql", "postgresql"])
+    parser.add_argument("--query", action="append", help="Consulta a medir (repetible)")
+    args = parser.parse_args()
+    run(args)
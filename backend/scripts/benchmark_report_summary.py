@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Benchmark del resumen de reportes: consultas emitidas y tiempo por ventana.
+
+Compara, contra la base configurada en DATABASE_URL y para ventanas de
+30, 90 y 365 días que terminan ahora:
+- legacy: las seis consultas independientes que usaba ReportService.summary
+- single: la consulta única con CTE + GROUPING SETS de ReportService.summary,
+  que lee el acumulado diario para los días completos y las filas crudas en los bordes
+
+Uso:
+    python scripts/benchmark_report_summary.py --runs 20 --windows 30 90 365
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import event, func, select
+
+from app.db.session import SessionLocal, engine
+from app.models import (
+    Categoria,
+    Cliente,
+    ItemOrdenVenta,
+    OrdenVenta,
+    Producto,
+    ProductoAlmacen,
+    VarianteProducto,
+)
+from app.services.report_service import PENDING_ORDER_STATES, ReportService
+
+
+class _QueryCounter:
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.count += 1
+
+
+def _legacy_summary(db, start: datetime, end: datetime) -> None:
+    """Reproduce el resumen previo: una consulta por indicador sobre las filas crudas."""
+    importe = func.coalesce(
+        func.sum(ItemOrdenVenta.cantidad * func.coalesce(ItemOrdenVenta.precio_unitario, 0)), 0
+    )
+    in_range = (OrdenVenta.fecha >= start, OrdenVenta.fecha <= end)
+    db.execute(
+        select(importe)
+        .select_from(OrdenVenta)
+        .join(ItemOrdenVenta, ItemOrdenVenta.orden_venta_id == OrdenVenta.id)
+        .where(*in_range)
+    ).scalar_one()
+    db.execute(
+        select(func.count(OrdenVenta.id)).where(OrdenVenta.estado.in_(PENDING_ORDER_STATES), *in_range)
+    ).scalar_one()
+    db.execute(
+        select(func.count(ProductoAlmacen.id)).where(
+            ProductoAlmacen.cantidad_disponible < ReportService.LOW_STOCK_THRESHOLD
+        )
+    ).scalar_one()
+    db.execute(
+        select(func.count(func.distinct(OrdenVenta.cliente_id)))
+        .select_from(OrdenVenta)
+        .join(Cliente, Cliente.id == OrdenVenta.cliente_id)
+        .where(*in_range)
+    ).scalar_one()
+    by_product = (
+        select(Producto.nombre, importe)
+        .select_from(OrdenVenta)
+        .join(ItemOrdenVenta, ItemOrdenVenta.orden_venta_id == OrdenVenta.id)
+        .join(VarianteProducto, VarianteProducto.id == ItemOrdenVenta.variante_producto_id)
+        .join(Producto, Producto.id == VarianteProducto.producto_id)
+        .where(*in_range)
+    )
+    db.execute(
+        by_product.with_only_columns(Categoria.nombre, importe)
+        .join(Categoria, Categoria.id == Producto.categoria_id)
+        .group_by(Categoria.nombre)
+        .order_by(importe.desc())
+    ).all()
+    db.execute(by_product.group_by(Producto.nombre).order_by(importe.desc()).limit(5)).all()
+
+
+def _measure(fn, runs: int, counter: _QueryCounter) -> tuple[float, float, int]:
+    counter.count = 0
+    fn()
+    queries = counter.count
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    p50 = statistics.median(samples)
+    p95 = statistics.quantiles(samples, n=20)[18] if len(samples) >= 2 else samples[0]
+    return p50, p95, queries
+
+
+def run(runs: int, windows: list[int]) -> None:
+    counter = _QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    db = SessionLocal()
+    try:
+        service = ReportService(db=db)
+        end = datetime.utcnow()
+        print("=" * 64)
+        print(f"{'días':>6}  {'modo':<8}{'consultas':>10}{'p50 ms':>12}{'p95 ms':>12}")
+        print("-" * 64)
+        for days in windows:
+            start = end - timedelta(days=days)
+            modes = [
+                ("legacy", lambda start=start: _legacy_summary(db, start, end)),
+                ("single", lambda start=start: service.summary(start=start, end=end)),
+            ]
+            for mode, fn in modes:
+                fn()  # calentamiento (plan cache / pool)
+                p50, p95, queries = _measure(fn, runs, counter)
+                print(f"{days:>6}  {mode:<8}{queries:>10}{p50:>12.1f}{p95:>12.1f}")
+        print("=" * 64)
+    finally:
+        db.close()
+        event.remove(engine, "before_cursor_execute", counter)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--windows", type=int, nargs="+", default=[30, 90, 365])
+    args = parser.parse_args()
+    run(args.runs, args.windows)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Benchmark de SaleService.create_order: consultas emitidas y tiempo por tamaño de carrito.
+
+Crea pedidos de 1, 20 y 200 líneas (variantes con precio de lista, sin
+precio_unitario en el payload) para un cliente existente resuelto por correo,
+contra la base configurada en DATABASE_URL. Todo ocurre dentro de una
+transacción externa que se revierte al final: los commits del servicio solo
+liberan savepoints y la base queda como estaba.
+
+Uso:
+    python scripts/benchmark_sale_checkout.py --runs 20 --lines 1 20 200
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.db.session import engine
+from app.models import Cliente, VarianteProducto
+from app.schemas.sale import SaleOrderCreateRequest
+from app.services.sale_service import SaleService
+
+
+class _QueryCounter:
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.count += 1
+
+
+def _measure(fn, runs: int, counter: _QueryCounter) -> tuple[float, float, int]:
+    counter.count = 0
+    fn()
+    queries = counter.count
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    p50 = statistics.median(samples)
+    p95 = statistics.quantiles(samples, n=20)[18] if len(samples) >= 2 else samples[0]
+    return p50, p95, queries
+
+
+def run(runs: int, lines: list[int]) -> None:
+    logging.getLogger("app").setLevel(logging.WARNING)
+    counter = _QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    connection = engine.connect()
+    outer = connection.begin()
+    db = Session(bind=connection, join_transaction_mode="create_savepoint", expire_on_commit=False)
+    try:
+        variant_ids = db.scalars(
+            select(VarianteProducto.id)
+            .where(VarianteProducto.precio.is_not(None), VarianteProducto.precio > 0)
+            .order_by(VarianteProducto.id)
+            .limit(max(lines))
+        ).all()
+        email = db.scalar(select(Cliente.correo).where(Cliente.correo.is_not(None)).order_by(Cliente.id).limit(1))
+        if not variant_ids or not email:
+            print("Se requieren variantes con precio y un cliente con correo.")
+            return
+        if len(variant_ids) < max(lines):
+            print(f"Solo hay {len(variant_ids)} variantes con precio: las líneas repiten variantes.")
+
+        service = SaleService(db=db)
+        print("=" * 52)
+        print(f"{'líneas':>8}{'consultas':>12}{'p50 ms':>16}{'p95 ms':>16}")
+        print("-" * 52)
+        for size in lines:
+            payload = SaleOrderCreateRequest(
+                cliente_email=email,
+                items=[
+                    {"variante_producto_id": variant_ids[index % len(variant_ids)], "cantidad": 1}
+                    for index in range(size)
+                ],
+            )
+            fn = lambda payload=payload: service.create_order(payload, None)  # noqa: E731
+            fn()  # calentamiento (plan cache / pool)
+            p50, p95, queries = _measure(fn, runs, counter)
+            print(f"{size:>8}{queries:>12}{p50:>16.1f}{p95:>16.1f}")
+        print("=" * 52)
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
+        db.close()
+        outer.rollback()
+        connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--lines", type=int, nargs="+", default=[1, 20, 200])
+    args = parser.parse_args()
+    run(args.runs, args.lines)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Benchmark del autocompletado en memoria: memoria del índice y latencia por consulta.
+
+Construye un `TypeaheadIndex` con `--entries` sugerencias sintéticas (un
+producto cada `--variants` + 1 sugerencias, con nombres de ferretería y
+acentos) o, con --from-db, con el catálogo real de DATABASE_URL. Informa:
+- memoria asignada por el índice (tracemalloc, sin contar las filas de origen)
+- tiempo de construcción
+- p50/p99 en microsegundos de `suggest` para prefijos de 1 a 6 letras y
+  consultas de dos palabras
+
+Uso:
+    python scripts/benchmark_typeahead.py --entries 200000
+    python scripts/benchmark_typeahead.py --from-db --queries 5000
+"""
+import argparse
+import gc
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.text_folding import tokenize
+from app.services.typeahead_service import TypeaheadIndex, brand_entries, catalog_entries
+
+_ITEMS = ("Tubería", "Cañería", "Válvula", "Llave de paso", "Codo", "Niple", "Tornillo", "Martillo",
+          "Pintura látex", "Cemento", "Brocha", "Taladro percutor", "Disco de corte", "Lija al agua")
+_MATERIALS = ("PVC", "galvanizado", "cobre", "acero inoxidable", "bronce", "polietileno", "madera")
+_SIZES = ("1/2\"", "3/4\"", "1\"", "2\"", "10 mm", "25 kg", "4 L", "N° 80", "12 V")
+_BRANDS = ("Stanley", "Truper", "Bosch", "Makita", "Tigre", "Plastiforte", "Monopol", "Coboce", "DeWalt")
+
+
+def synthetic_rows(entries: int, variants: int, seed: int = 42):
+    rng = random.Random(seed)
+    products = max(entries // (variants + 1), 1)
+    rows = []
+    variant_id = 0
+    for product_id in range(1, products + 1):
+        nombre = f"{rng.choice(_ITEMS)} {rng.choice(_MATERIALS)} {rng.choice(_BRANDS)} {product_id}"
+        for size in rng.sample(_SIZES, variants):
+            variant_id += 1
+            rows.append(SimpleNamespace(producto_id=product_id, producto_nombre=nombre,
+                                        slug=f"producto-{product_id}", marca_id=None,
+                                        variante_id=variant_id, variante_nombre=size))
+    brands = [SimpleNamespace(id=index, nombre=name) for index, name in enumerate(_BRANDS, start=1)]
+    return rows, brands
+
+
+def db_rows():
+    from app.db.session import SessionLocal
+    from app.repositories.typeahead_repo import TypeaheadRepository
+
+    db = SessionLocal()
+    try:
+        repo = TypeaheadRepository(db)
+        return repo.catalog_rows(), repo.brand_rows()
+    finally:
+        db.close()
+
+
+def run(args) -> None:
+    rows, brands = db_rows() if args.from_db else synthetic_rows(args.entries, args.variants)
+
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    entries, slugs = catalog_entries(rows)
+    entries += brand_entries(brands)
+    index = TypeaheadIndex()
+    index.load(entries, slugs)
+    build_seconds = time.perf_counter() - started
+    del entries, slugs
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"Sugerencias: {len(index)}  construcción: {build_seconds:.2f}s")
+    print(f"Memoria del índice: {current / 2**20:.1f} MB (pico durante la construcción {peak / 2**20:.1f} MB)")
+    print(f"  ≈ {current / max(len(index), 1):.0f} bytes por sugerencia")
+
+    rng = random.Random(7)
+    words = sorted({word for row in rows for word in tokenize(row.producto_nombre) if not word.isdigit()})
+    print("=" * 56)
+    print(f"{'consulta':<22}{'p50 µs':>10}{'p99 µs':>10}{'máx µs':>10}")
+    print("-" * 56)
+    for length in (1, 2, 3, 4, 6):
+        queries = [rng.choice(words)[:length] for _ in range(args.queries)]
+        _report(f"prefijo {length} letra(s)", index, queries, args.limit)
+    pairs = [f"{rng.choice(words)} {rng.choice(words)[:3]}" for _ in range(args.queries)]
+    _report("dos palabras", index, pairs, args.limit)
+    print("=" * 56)
+
+
+def _report(label: str, index: TypeaheadIndex, queries: list[str], limit: int) -> None:
+    for q in queries[:50]:
+        index.suggest(q, limit)  # calentamiento (mezclas de prefijos cortos)
+    samples = []
+    for q in queries:
+        start = time.perf_counter()
+        index.suggest(q, limit)
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    samples.sort()
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{label:<22}{statistics.median(samples):>10.1f}{p99:>10.1f}{samples[-1]:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=200_000)
+    parser.add_argument("--variants", type=int, default=3, help="Variantes por producto (sintético)")
+    parser.add_argument("--from-db", action="store_true", help="Usar el catálogo de DATABASE_URL")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+    run(args)
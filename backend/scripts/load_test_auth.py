@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Prueba de carga de endpoints autenticados: throughput por nivel de concurrencia.
+
+Lanza N clientes concurrentes contra una API en ejecución (uvicorn) que
+repiten un GET autenticado durante `--duration` segundos por nivel, y reporta
+peticiones por segundo y latencias. Con las dependencias de autenticación
+fuera del event loop el throughput debe crecer con la concurrencia hasta el
+límite del threadpool / pool de conexiones; si se bloquea el loop, queda
+plano en el valor de un solo cliente.
+
+Uso:
+    uvicorn app.main:app --port 8000 &
+    python scripts/load_test_auth.py --email admin@ferreteria.com --password admin123
+    python scripts/load_test_auth.py --token <access_token> --levels 1 4 16 64 --duration 10
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+
+async def _login(client: httpx.AsyncClient, prefix: str, email: str, password: str) -> str:
+    response = await client.post(f"{prefix}/auth/login", json={"email": email, "password": password})
+    if response.status_code != 200:
+        raise SystemExit(f"Login falló ({response.status_code}): {response.text}")
+    return response.json()["access_token"]
+
+
+async def _worker(client: httpx.AsyncClient, path: str, deadline: float, latencies: list[float], errors: list[int]) -> None:
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get(path)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            errors.append(response.status_code)
+
+
+async def _run_level(client: httpx.AsyncClient, path: str, concurrency: int, duration: float) -> tuple[float, float, float, int]:
+    latencies: list[float] = []
+    errors: list[int] = []
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(_worker(client, path, deadline, latencies, errors) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    p50 = statistics.median(latencies)
+    p95 = statistics.quantiles(latencies, n=20)[18] if len(latencies) >= 2 else latencies[0]
+    return len(latencies) / elapsed, p50, p95, len(errors)
+
+
+async def run(args: argparse.Namespace) -> None:
+    prefix = "/api/v1"
+    limits = httpx.Limits(max_connections=max(args.levels), max_keepalive_connections=max(args.levels))
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30.0) as client:
+        token = args.token or await _login(client, prefix, args.email, args.password)
+        client.headers["Authorization"] = f"Bearer {token}"
+        path = f"{prefix}{args.path}"
+
+        warmup = await client.get(path)
+        if warmup.status_code != 200:
+            raise SystemExit(f"GET {path} devolvió {warmup.status_code}: {warmup.text}")
+
+        print("=" * 64)
+        print(f"GET {path}  ({args.duration:.0f}s por nivel)")
+        print(f"{'clientes':>9}{'req/s':>12}{'p50 ms':>12}{'p95 ms':>12}{'errores':>10}{'escala':>9}")
+        print("-" * 64)
+        baseline = None
+        for concurrency in args.levels:
+            rps, p50, p95, errors = await _run_level(client, path, concurrency, args.duration)
+            baseline = baseline or rps
+            print(f"{concurrency:>9}{rps:>12.1f}{p50:>12.1f}{p95:>12.1f}{errors:>10}{rps / baseline:>8.1f}x")
+        print("=" * 64)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", default="/auth/me", help="Ruta autenticada bajo /api/v1")
+    parser.add_argument("--token", default=None)
+    parser.add_argument("--email", default=None)
+    parser.add_argument("--password", default=None)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+    if not args.token and not (args.email and args.password):
+        parser.error("Se requiere --token o --email y --password")
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        sys.exit(130)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Reconstruye los documentos de búsqueda de productos (busqueda_productos).
+
+Vuelve a plegar nombre, variante y descripción de todos los productos con
+`app.core.text_folding` y reemplaza la tabla en una transacción. El índice
+full-text de SQL Server se actualiza solo (CHANGE_TRACKING AUTO).
+
+Con --setup en PostgreSQL crea además la extensión pg_trgm y los índices GIN
+(tsvector 'simple' y trigramas) que usa el motor `postgresql`.
+
+Uso:
+    python scripts/rebuild_product_search.py
+    python scripts/rebuild_product_search.py --setup
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import text
+
+from app.db.session import SessionLocal
+from app.services.product_search_service import ProductSearchService
+
+POSTGRESQL_SETUP = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS idx_busqueda_productos_texto_fts "
+    "ON dbo.busqueda_productos USING gin (to_tsvector('simple', texto))",
+    "CREATE INDEX IF NOT EXISTS idx_busqueda_productos_texto_trgm "
+    "ON dbo.busqueda_productos USING gin (texto gin_trgm_ops)",
+)
+
+
+def setup_indexes(db) -> None:
+    dialect = db.get_bind().dialect.name
+    if dialect != "postgresql":
+        print(f"--setup solo aplica a PostgreSQL (dialecto actual: {dialect}); "
+              "en SQL Server el índice full-text lo crea la migración 020.")
+        return
+    for statement in POSTGRESQL_SETUP:
+        db.execute(text(statement))
+    db.commit()
+    print("  ✓ Extensión pg_trgm e índices GIN de busqueda_productos")
+
+
+def run(setup: bool) -> None:
+    db = SessionLocal()
+    try:
+        if setup:
+            setup_indexes(db)
+        service = ProductSearchService(db=db)
+        started = time.perf_counter()
+        total = service.rebuild()
+        elapsed = time.perf_counter() - started
+        print(f"  ✓ {total} documentos en {elapsed:.1f}s (motor: {service.backend()})")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--setup", action="store_true", help="Crear pg_trgm e índices GIN (PostgreSQL)")
+    args = parser.parse_args()
+    run(args.setup)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Reconstruye el acumulado diario de ventas que alimenta los reportes.
+
+Recalcula desde las filas crudas (órdenes, facturas y pagos) los días del
+rango indicado, en bloques con un commit por bloque para no mantener una
+transacción larga. Por defecto cubre desde la primera orden hasta hoy.
+
+Uso:
+    python scripts/rebuild_sales_rollup.py
+    python scripts/rebuild_sales_rollup.py --from 2025-01-01 --to 2025-03-31 --chunk-days 7
+"""
+import argparse
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import func, select
+
+from app.db.session import SessionLocal
+from app.models import OrdenVenta
+from app.services.sales_rollup_service import SalesRollupService
+
+
+def run(first: date | None, last: date | None, chunk_days: int) -> None:
+    db = SessionLocal()
+    try:
+        if first is None:
+            oldest = db.scalar(select(func.min(OrdenVenta.fecha)))
+            if oldest is None:
+                print("No hay órdenes de venta; nada que reconstruir.")
+                return
+            first = oldest.date()
+        last = last or datetime.utcnow().date()
+        if first > last:
+            raise SystemExit("--from no puede ser posterior a --to")
+
+        service = SalesRollupService(db=db)
+        chunk_start = first
+        while chunk_start <= last:
+            chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), last)
+            service.refresh_range(chunk_start, chunk_end)
+            db.commit()
+            print(f"  ✓ {chunk_start.isoformat()} .. {chunk_end.isoformat()}")
+            chunk_start = chunk_end + timedelta(days=1)
+        print("Acumulado de ventas reconstruido.")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--from", dest="first", type=date.fromisoformat, default=None)
+    parser.add_argument("--to", dest="last", type=date.fromisoformat, default=None)
+    parser.add_argument("--chunk-days", type=int, default=31)
+    args = parser.parse_args()
+    run(args.first, args.last, max(args.chunk_days, 1))
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""Concilia el contador de stock reservado con las reservas activas.
+
+Compara `stock_reservado` con la suma de `items_reserva` en reservas
+PENDIENTE/CONFIRMADA y corrige las diferencias. La API ejecuta lo mismo
+periódicamente (RESERVATION_RECONCILE_INTERVAL_SECONDS); este script sirve
+para correrlo a demanda o después de cargas masivas.
+
+Uso:
+    python scripts/reconcile_reservation_holds.py            # detecta y corrige
+    python scripts/reconcile_reservation_holds.py --dry-run  # solo informa
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.db.session import SessionLocal
+from app.services.reservation_hold_service import ReservationHoldService
+
+
+def run(dry_run: bool) -> None:
+    db = SessionLocal()
+    try:
+        drift = ReservationHoldService(db=db).reconcile(repair=not dry_run)
+        if not drift:
+            print("Stock reservado consistente; nada que corregir.")
+            return
+        for item in drift:
+            registrado = "sin contador" if item.registrado is None else f"{item.registrado:.2f}"
+            print(f"  variante {item.variante_producto_id}: {registrado} -> {item.real:.2f}")
+        accion = "detectados" if dry_run else "corregidos"
+        print(f"{len(drift)} desvíos {accion}.")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    run(args.dry_run)
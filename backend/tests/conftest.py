@@ -1,7 +1,42 @@
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
 from app.main import app
+
+
 @pytest.fixture(scope="module")
 def client():
     with TestClient(app) as c:
         yield c
+
+
+def _sqlite_engine(url: str, dbo: str, **kwargs):
+    engine = create_engine(url, **kwargs)
+
+    @event.listens_for(engine, "connect")
+    def _attach(dbapi_conn, _record):
+        dbapi_conn.execute(f"ATTACH DATABASE '{dbo}' AS dbo")
+
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def sqlite_engine():
+    """SQLite en memoria con el esquema `dbo` adjunto y todas las tablas creadas."""
+    engine = _sqlite_engine("sqlite://", ":memory:", poolclass=StaticPool)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def sqlite_file_engine(tmp_path):
+    """Igual que `sqlite_engine` pero en ficheros: cada hilo usa su propia conexión."""
+    engine = _sqlite_engine(
+        f"sqlite:///{tmp_path / 'main.db'}", str(tmp_path / "dbo.db"), connect_args={"timeout": 30}
+    )
+    yield engine
+    engine.dispose()
@@ -66,3 +66,34 @@ async def test_me_without_token():
         response = await client.get("/api/v1/auth/me")
         assert response.status_code == 401
 
+
+
+def test_auth_dependencies_do_not_block_event_loop():
+    """Las dependencias que consultan la base deben ser sync (threadpool), no async."""
+    import inspect
+    from app.core.dependencies import get_current_user, get_current_user_optional
+
+    assert not inspect.iscoroutinefunction(get_current_user)
+    assert not inspect.iscoroutinefunction(get_current_user_optional)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_authenticated_requests():
+    """20 GET /auth/me concurrentes con el mismo token → todos 200."""
+    import asyncio
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        credentials = {"email": "testauthload@example.com", "password": "password123"}
+        await client.post(
+            "/api/v1/auth/register",
+            json={"username": "testauthload", **credentials},
+        )
+        login_response = await client.post("/api/v1/auth/login", json=credentials)
+        assert login_response.status_code == 200
+        headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+        responses = await asyncio.gather(
+            *(client.get("/api/v1/auth/me", headers=headers) for _ in range(20))
+        )
+        status_codes = [r.status_code for r in responses]
+        assert all(code == 200 for code in status_codes), f"Expected all 200, got {status_codes}"
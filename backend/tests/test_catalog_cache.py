@@ -0,0 +1,46 @@
+"""Tests de la caché en memoria de catálogos."""
+import time
+
+from app.core.cache import TTLCache
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" pasa a ser el menos usado
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_cache_expires_entries():
+    cache = TTLCache(maxsize=10, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+
+def test_cache_invalidate_by_prefix():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("catalog:meta", 1)
+    cache.set("catalog:categories", 2)
+    cache.set("otros:x", 3)
+    cache.invalidate("catalog:")
+    assert cache.get("catalog:meta") is None
+    assert cache.get("catalog:categories") is None
+    assert cache.get("otros:x") == 3
+
+
+def test_invalidation_during_load_is_not_overwritten():
+    cache = TTLCache(maxsize=10, ttl=60)
+
+    def stale_loader():
+        cache.invalidate("catalog:")  # una mutación confirma mientras se carga
+        return "viejo"
+
+    assert cache.get_or_set("catalog:meta", stale_loader) == "viejo"
+    assert cache.get("catalog:meta") is None
+    assert cache.get_or_set("catalog:meta", lambda: "nuevo") == "nuevo"
+    assert cache.get("catalog:meta") == "nuevo"
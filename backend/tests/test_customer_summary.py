@@ -0,0 +1,85 @@
+"""Tests del resumen 360 del cliente (agregados en una consulta y colecciones a pedido)."""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import app.models as models
+from app.services import customer_summary_service
+from app.services.customer_summary_service import CustomerSummaryService, invalidate_customer_summary
+
+START = datetime(2025, 3, 1, 10, 0)
+
+
+@pytest.fixture
+def engine(sqlite_engine):
+    engine = sqlite_engine
+    with Session(engine) as db:
+        db.add_all([
+            models.Producto(id=1, nombre="Taladro", fecha_creacion=START),
+            models.VarianteProducto(id=1, producto_id=1, nombre="Taladro 500W", unidad_medida_id=1,
+                                    precio=100, fecha_creacion=START),
+            models.Cliente(id=1, nombre="Constructora", nit_ci="123", fecha_registro=START),
+            models.Cliente(id=2, nombre="Otro", fecha_registro=START),
+        ])
+        for index, (cliente_id, estado) in enumerate(
+            [(1, "ENTREGADO"), (1, "PENDIENTE"), (1, "CANCELADO"), (2, "PENDIENTE")], start=1
+        ):
+            db.add(models.OrdenVenta(id=index, cliente_id=cliente_id, estado=estado,
+                                     fecha=START + timedelta(days=index)))
+            db.add(models.ItemOrdenVenta(orden_venta_id=index, variante_producto_id=1,
+                                         cantidad=index, precio_unitario=10))
+        db.add_all([
+            models.Reserva(id=1, cliente_id=1, estado="PENDIENTE", fecha_reserva=START),
+            models.Reserva(id=2, cliente_id=1, estado="COMPLETADA", fecha_reserva=START),
+            models.FacturaVenta(id=1, numero_factura="FAC-000001", cliente_id=1, fecha_emision=START,
+                                subtotal=100, total=100, estado="EMITIDA"),
+            models.FacturaVenta(id=2, numero_factura="FAC-000002", cliente_id=1, fecha_emision=START,
+                                subtotal=40, total=40, estado="ANULADA"),
+            models.PagoCliente(id=1, cliente_id=1, factura_id=1, monto=60, metodo_pago="EFECTIVO",
+                               fecha_pago=START, fecha_registro=START, estado="CONFIRMADO"),
+            models.PagoCliente(id=2, cliente_id=1, monto=25, metodo_pago="QR",
+                               fecha_pago=START, fecha_registro=START, estado="PENDIENTE"),
+        ])
+        db.commit()
+    invalidate_customer_summary()
+    yield engine
+    invalidate_customer_summary()
+
+
+def test_summary_aggregates_in_one_query(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    with Session(engine) as db:
+        summary = CustomerSummaryService(db).get_summary(1)
+    assert len(statements) == 1
+    stats = summary.statistics
+    assert (stats.total_orders, stats.open_orders) == (3, 1)
+    assert stats.total_spent == 60.0  # 1*10 + 2*10 + 3*10
+    assert stats.first_order_date == START + timedelta(days=1)
+    assert stats.last_order_date == START + timedelta(days=3)
+    assert (stats.total_reservations, stats.open_reservations) == (2, 1)
+    assert (stats.total_invoices, stats.total_invoiced) == (2, 100.0)
+    assert (stats.total_paid, stats.open_invoice_balance, stats.pending_payments) == (60.0, 40.0, 25.0)
+    assert summary.current_data.nit_ci == "123"
+
+
+def test_history_pages_only_requested_collections(engine):
+    with Session(engine) as db:
+        history = CustomerSummaryService(db).get_history(1, include=["orders"], page=1, page_size=2)
+    assert [order.id for order in history.orders.items] == [3, 2]
+    assert history.orders.total == 3
+    assert history.reservations == [] and history.invoices == [] and history.payments == []
+
+
+def test_cached_summary_is_invalidated(engine, monkeypatch):
+    monkeypatch.setattr(customer_summary_service._summaries, "ttl", 60)
+    with Session(engine) as db:
+        service = CustomerSummaryService(db)
+        assert service.get_summary(1).statistics.total_orders == 3
+        db.add(models.OrdenVenta(id=10, cliente_id=1, estado="PENDIENTE", fecha=START))
+        db.commit()
+        assert service.get_summary(1).statistics.total_orders == 3
+        invalidate_customer_summary(1)
+        assert service.get_summary(1).statistics.total_orders == 4
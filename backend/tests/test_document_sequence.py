@@ -0,0 +1,62 @@
+"""Tests de concurrencia de la numeración de documentos (sin duplicados)."""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.secuencia_documento import SecuenciaDocumento
+from app.services import document_sequence_service
+from app.services.document_sequence_service import FACTURA, TRANSFERENCIA, DocumentSequenceService
+
+THREADS = 8
+PER_THREAD = 50
+
+
+@pytest.fixture
+def engine(sqlite_file_engine):
+    # Base en fichero: cada hilo usa su propia conexión, como los workers reales
+    engine = sqlite_file_engine
+    with Session(engine) as db:
+        # Filas iniciales, como las carga la migración 016
+        db.add_all([SecuenciaDocumento(codigo=FACTURA.codigo), SecuenciaDocumento(codigo=TRANSFERENCIA.codigo)])
+        db.commit()
+    document_sequence_service.reset_blocks()
+    yield engine
+    document_sequence_service.reset_blocks()
+
+
+def _allocate(engine, sequence, block_size: int) -> list[str]:
+    numbers = []
+    for _ in range(PER_THREAD):
+        with Session(engine) as db:
+            numbers.append(DocumentSequenceService(db, block_size=block_size).next_number(sequence))
+            db.commit()
+    return numbers
+
+
+def _run_concurrently(engine, sequence, block_size: int) -> list[str]:
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        batches = pool.map(lambda _: _allocate(engine, sequence, block_size), range(THREADS))
+    return [number for batch in batches for number in batch]
+
+
+def test_concurrent_invoice_numbers_are_unique_and_gap_free(engine):
+    numbers = _run_concurrently(engine, FACTURA, block_size=1)
+    total = THREADS * PER_THREAD
+    assert len(set(numbers)) == total
+    assert sorted(numbers) == [f"FAC-{value:06d}" for value in range(1, total + 1)]
+
+
+def test_hilo_blocks_never_repeat_numbers(engine):
+    numbers = _run_concurrently(engine, TRANSFERENCIA, block_size=10)
+    assert len(set(numbers)) == THREADS * PER_THREAD
+    assert all(number.startswith("TRF-") for number in numbers)
+
+
+def test_rolled_back_document_releases_its_number(engine):
+    with Session(engine) as db:
+        DocumentSequenceService(db, block_size=1).next_number(FACTURA)
+        db.rollback()
+    with Session(engine) as db:
+        assert DocumentSequenceService(db, block_size=1).next_number(FACTURA) == "FAC-000001"
+        db.commit()
@@ -0,0 +1,76 @@
+"""Tests de las búsquedas por correo normalizado y de las reglas de fusión de la migración 017."""
+import importlib.util
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+import app.models as models
+from app.models.usuario import normalize_email
+from app.repositories.customer_repo import CustomerRepository
+from app.repositories.user_repo import UserRepository
+
+NOW = datetime(2025, 1, 1, 9, 0)
+MIGRATION = Path(__file__).resolve().parents[1] / "alembic" / "versions" / "017_add_normalized_emails.py"
+
+
+def _migration():
+    spec = importlib.util.spec_from_file_location("migration_017", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def db(sqlite_engine):
+    with Session(sqlite_engine) as session:
+        yield session
+
+
+def test_python_and_column_normalize_alike(db):
+    db.add_all([
+        models.Usuario(id=7, nombre_usuario="ana", correo=" Ana@Example.COM ", hash_contrasena="x",
+                       activo=True, fecha_creacion=NOW, fecha_modificacion=NOW),
+        models.Cliente(id=1, nombre="Ana", correo="  ANA@example.com", fecha_registro=NOW),
+        # Tabuladores y saltos de línea no son espacios para LTRIM/RTRIM
+        models.Cliente(id=2, nombre="Tab", correo="\tana@example.com", fecha_registro=NOW),
+        models.Cliente(id=3, nombre="Salto", correo="ana@example.com\n", fecha_registro=NOW),
+        models.Cliente(id=4, nombre="Sin correo", fecha_registro=NOW),
+    ])
+    db.commit()
+
+    for cliente in db.scalars(select(models.Cliente)):
+        assert cliente.correo_normalizado == normalize_email(cliente.correo)
+    assert db.get(models.Usuario, 7).correo_normalizado == normalize_email(" Ana@Example.COM ")
+
+    assert UserRepository(db).get_by_email("ana@EXAMPLE.com ").id == 7
+    found = db.scalars(select(models.Cliente.id).where(models.Cliente.correo_igual(" Ana@Example.com"))).all()
+    assert found == [1]
+    assert CustomerRepository(db).customer_id_for_user(7, "ANA@example.com") == 1
+    assert CustomerRepository(db).customer_id_for_user(7, "\tana@example.com") == 2
+
+
+def test_migration_skips_clients_of_different_users(db):
+    # Sin el índice único para poder cargar los duplicados previos a la migración
+    db.execute(text("DROP INDEX dbo.uq_clientes_correo_normalizado"))
+    rows = [
+        # Se conserva el vinculado aunque no tenga el menor id
+        (10, "a@x.com", None), (11, " A@x.com", 1), (12, "a@X.com ", None),
+        # Vinculados a usuarios distintos: no se fusiona nada del grupo
+        (20, "b@x.com", 2), (21, "B@x.com", 3), (22, "b@x.com ", None),
+        # Sin vínculo: el de menor id
+        (30, "c@x.com", None), (31, "C@X.COM", None),
+        (50, None, None), (51, None, None),
+    ]
+    db.add_all([
+        models.Cliente(id=id_, nombre=f"Cliente {id_}", correo=correo, usuario_id=usuario_id, fecha_registro=NOW)
+        for id_, correo, usuario_id in rows
+    ])
+    db.commit()
+
+    migration = _migration()
+    merges = db.execute(text(migration.CLIENTES_A_FUSIONAR_SQL)).all()
+    assert sorted(tuple(row) for row in merges) == [(10, 11), (12, 11), (31, 30)]
+    assert db.scalars(text(migration.CLIENTES_EN_CONFLICTO_SQL)).all() == ["b@x.com"]
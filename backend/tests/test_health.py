@@ -2,3 +2,12 @@ def test_health(client):
     r = client.get("/api/v1/health")
     assert r.status_code == 200
     assert r.json() == {"status": "ok"}
+
+
+def test_ready_reports_pool_and_threadpool(client):
+    r = client.get("/api/v1/ready")
+    assert r.status_code in (200, 503)
+    body = r.json()
+    assert body["status"] == ("ready" if r.status_code == 200 else "saturated")
+    assert {"in_use", "capacity", "saturation"} <= body["db_pool"].keys()
+    assert {"size", "busy", "waiting", "saturation"} <= body["threadpool"].keys()
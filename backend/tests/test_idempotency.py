@@ -0,0 +1,195 @@
+"""Tests de idempotencia: middleware (caché, cuerpo distinto y single-flight) y reserva en base."""
+import asyncio
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from app.core import idempotency
+from app.core.idempotency import IdempotencyMiddleware, collect_idempotent_routes, idempotent
+from app.core.security import create_access_token
+from app.models.idempotency import IdempotencyKey
+from app.repositories.idempotency_repo import (
+    IN_PROGRESS_STATUS,
+    claim_idempotency_key,
+    cleanup_expired_keys,
+    complete_idempotency_key,
+    release_idempotency_key,
+)
+
+
+@pytest.fixture
+def idem_app(monkeypatch):
+    monkeypatch.setattr(idempotency, "_claim", lambda key, route, request_hash: None)
+    monkeypatch.setattr(idempotency, "_finish", lambda key, stored: None)
+    previous_routes = list(idempotency._routes)
+
+    calls = {"n": 0}
+    app = FastAPI()
+    app.add_middleware(IdempotencyMiddleware)
+
+    @app.post("/orders", status_code=201)
+    @idempotent
+    async def create_order(payload: dict, response: Response):
+        calls["n"] += 1
+        response.headers["Location"] = f"/orders/{calls['n']}"
+        await asyncio.sleep(0.2)
+        return {"id": calls["n"], **payload}
+
+    collect_idempotent_routes(app)
+    with TestClient(app) as client:
+        yield client, calls
+    idempotency._routes[:] = previous_routes
+
+
+def test_retry_replays_stored_response(idem_app):
+    client, calls = idem_app
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    first = client.post("/orders", json={"total": 10}, headers=headers)
+    second = client.post("/orders", json={"total": 10}, headers=headers)
+    assert first.status_code == second.status_code == 201
+    assert second.json() == first.json()
+    assert second.headers["idempotent-replayed"] == "true"
+    assert calls["n"] == 1
+
+
+def test_same_key_different_body_is_rejected(idem_app):
+    client, calls = idem_app
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    assert client.post("/orders", json={"total": 10}, headers=headers).status_code == 201
+    response = client.post("/orders", json={"total": 99}, headers=headers)
+    assert response.status_code == 422
+    assert calls["n"] == 1
+
+
+def test_concurrent_duplicates_run_handler_once(idem_app):
+    client, calls = idem_app
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        responses = list(pool.map(lambda _: client.post("/orders", json={"total": 5}, headers=headers), range(5)))
+    assert {response.status_code for response in responses} == {201}
+    assert len({response.text for response in responses}) == 1
+    assert calls["n"] == 1
+
+
+def test_without_header_is_not_deduplicated(idem_app):
+    client, calls = idem_app
+    client.post("/orders", json={"total": 1})
+    client.post("/orders", json={"total": 1})
+    assert calls["n"] == 2
+
+
+def test_retry_after_token_refresh_replays_for_same_user(idem_app):
+    client, calls = idem_app
+    key = str(uuid.uuid4())
+    first_token = create_access_token({"sub": "7"}, expires_delta=timedelta(minutes=30))
+    refreshed = create_access_token({"sub": "7"}, expires_delta=timedelta(minutes=31))
+    other_user = create_access_token({"sub": "8"})
+    assert first_token != refreshed
+
+    first = client.post("/orders", json={"total": 3},
+                        headers={"Idempotency-Key": key, "Authorization": f"Bearer {first_token}"})
+    retry = client.post("/orders", json={"total": 3},
+                        headers={"Idempotency-Key": key, "Authorization": f"Bearer {refreshed}"})
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.headers["location"] == first.headers["location"] == "/orders/1"
+    assert calls["n"] == 1
+
+    other = client.post("/orders", json={"total": 3},
+                        headers={"Idempotency-Key": key, "Authorization": f"Bearer {other_user}"})
+    assert "idempotent-replayed" not in other.headers
+    assert calls["n"] == 2
+
+
+def _key_row(key: str, *, status_code: int, created_at: datetime, expires_at: datetime) -> IdempotencyKey:
+    return IdempotencyKey(key=key, route="/orders", method="POST", status_code=status_code,
+                          created_at=created_at, expires_at=expires_at)
+
+
+def test_claim_reserves_key_once(sqlite_engine):
+    with Session(sqlite_engine) as db:
+        assert claim_idempotency_key(db, "k1", "/orders", "POST", "hash") is None
+        existing = claim_idempotency_key(db, "k1", "/orders", "POST", "hash")
+        assert (existing.key, existing.status_code, existing.request_hash) == ("k1", IN_PROGRESS_STATUS, "hash")
+        assert db.scalar(select(func.count()).select_from(IdempotencyKey)) == 1
+
+
+def test_claim_takes_over_expired_and_abandoned_keys(sqlite_engine):
+    now = datetime.utcnow()
+    with Session(sqlite_engine) as db:
+        db.add_all([
+            _key_row("expired", status_code=201, created_at=now - timedelta(days=2), expires_at=now - timedelta(days=1)),
+            _key_row("abandoned", status_code=IN_PROGRESS_STATUS, created_at=now - timedelta(minutes=5),
+                     expires_at=now + timedelta(hours=1)),
+            _key_row("running", status_code=IN_PROGRESS_STATUS, created_at=now, expires_at=now + timedelta(hours=1)),
+        ])
+        db.commit()
+
+        for key in ("expired", "abandoned"):
+            assert claim_idempotency_key(db, key, "/orders", "POST", "new", stale_after_seconds=120) is None
+            row = db.scalars(select(IdempotencyKey).where(IdempotencyKey.key == key)).one()
+            db.refresh(row)
+            assert (row.status_code, row.request_hash, row.response_body, row.version) == (IN_PROGRESS_STATUS, "new", None, 2)
+        assert claim_idempotency_key(db, "running", "/orders", "POST", "new", stale_after_seconds=120).version == 1
+
+
+def test_claim_takeover_refused_when_another_worker_won(sqlite_engine):
+    now = datetime.utcnow()
+    with Session(sqlite_engine) as db:
+        db.add(_key_row("k1", status_code=201, created_at=now - timedelta(days=2), expires_at=now - timedelta(days=1)))
+        db.commit()
+
+    # El segundo worker leyó la fila expirada antes de que el primero la tomara
+    with Session(sqlite_engine) as first, Session(sqlite_engine, expire_on_commit=False) as second:
+        stale = second.scalars(select(IdempotencyKey)).one()
+        second.commit()
+        assert claim_idempotency_key(first, "k1", "/orders", "POST", "first") is None
+        existing = claim_idempotency_key(second, "k1", "/orders", "POST", "second")
+        assert existing is stale
+        assert (existing.request_hash, existing.version) == ("first", 2)
+
+
+def test_complete_and_release(sqlite_engine):
+    with Session(sqlite_engine) as db:
+        claim_idempotency_key(db, "done", "/orders", "POST", None)
+        claim_idempotency_key(db, "failed", "/orders", "POST", None)
+        complete_idempotency_key(db, "done", 201, '{"id": 1}', '[["location", "/orders/1"]]')
+        release_idempotency_key(db, "failed")
+        # Solo se liberan reservas en curso: la respuesta guardada se conserva
+        release_idempotency_key(db, "done")
+
+        rows = db.scalars(select(IdempotencyKey)).all()
+        assert [(row.key, row.status_code, row.response_body, row.response_headers) for row in rows] == [
+            ("done", 201, '{"id": 1}', '[["location", "/orders/1"]]')
+        ]
+
+
+def test_cleanup_deletes_expired_keys_in_batches(sqlite_engine):
+    now = datetime.utcnow()
+    with Session(sqlite_engine) as db:
+        db.add_all(
+            [_key_row(f"old-{i}", status_code=201, created_at=now - timedelta(days=2), expires_at=now - timedelta(hours=i + 1))
+             for i in range(5)]
+            + [_key_row("live", status_code=201, created_at=now, expires_at=now + timedelta(hours=1))]
+        )
+        db.commit()
+
+        deletes = []
+
+        @event.listens_for(sqlite_engine, "before_cursor_execute")
+        def _count_deletes(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("DELETE"):
+                deletes.append(statement)
+
+        try:
+            assert cleanup_expired_keys(db, batch_size=2) == 5
+        finally:
+            event.remove(sqlite_engine, "before_cursor_execute", _count_deletes)
+        assert len(deletes) == 3
+        assert db.scalars(select(IdempotencyKey.key)).all() == ["live"]
@@ -0,0 +1,142 @@
+"""Tests de concurrencia para las operaciones de stock (ingresos y transferencias)."""
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.main import app
+from app.models import ProductoAlmacen
+from app.services.inventory_service import _is_retryable
+
+
+@pytest.fixture(autouse=True)
+def override_stock_permissions():
+    """Reemplaza los checkers de rol y permiso por un usuario ADMIN fake."""
+
+    overrides: dict = {}
+
+    def fake_admin():
+        return SimpleNamespace(id=1, roles=["ADMIN"])
+
+    for route in app.routes:
+        dependant = getattr(route, "dependant", None)
+        if not dependant:
+            continue
+        for dependency in dependant.dependencies:
+            call = getattr(dependency, "call", None)
+            name = getattr(call, "__name__", "") if call else ""
+            if name.startswith("role_checker") or name.startswith("permission_checker"):
+                overrides[call] = fake_admin
+                app.dependency_overrides[call] = fake_admin
+
+    yield
+
+    for call in overrides:
+        app.dependency_overrides.pop(call, None)
+
+
+def _quantity(result: dict, variante_id: int, almacen_id: int) -> float:
+    for item in result:
+        if item["variante_id"] == variante_id and item["almacen_id"] == almacen_id:
+            return float(item["cantidad_disponible"])
+    return 0.0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_transfers_and_entries_keep_stock_consistent():
+    """
+    10 transferencias A→B y 10 ingresos en A concurrentes → todas 201 y saldos exactos.
+    Sin bloqueo de filas, las lecturas intercaladas pierden actualizaciones.
+    """
+    rounds = 10
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        warehouses = (await client.get("/api/v1/inventory/warehouses")).json()
+        stocks = (await client.get("/api/v1/inventory/stock")).json()
+        if len(warehouses) < 2 or not stocks:
+            pytest.skip("Se requieren dos almacenes y al menos un registro de inventario.")
+
+        variante_id = stocks[0]["variante_id"]
+        origen_id = stocks[0]["almacen_id"]
+        destino_id = next(w["id"] for w in warehouses if w["id"] != origen_id)
+
+        # Saldo inicial suficiente para todas las transferencias
+        seed = await client.post(
+            "/api/v1/inventory/entries",
+            json={
+                "almacen_id": origen_id,
+                "descripcion": "Saldo inicial concurrencia (pytest)",
+                "items": [{"variante_id": variante_id, "cantidad": rounds}],
+            },
+        )
+        assert seed.status_code == 201
+        before = (await client.get(f"/api/v1/inventory/stock/{variante_id}")).json()
+        origen_before = _quantity(before, variante_id, origen_id)
+        destino_before = _quantity(before, variante_id, destino_id)
+
+        transfers = [
+            client.post(
+                "/api/v1/inventory/transfers",
+                json={
+                    "almacen_origen_id": origen_id,
+                    "almacen_destino_id": destino_id,
+                    "descripcion": f"Transferencia concurrente {i} (pytest)",
+                    "items": [{"variante_id": variante_id, "cantidad": 1}],
+                },
+            )
+            for i in range(rounds)
+        ]
+        entries = [
+            client.post(
+                "/api/v1/inventory/entries",
+                json={
+                    "almacen_id": origen_id,
+                    "descripcion": f"Ingreso concurrente {i} (pytest)",
+                    "items": [{"variante_id": variante_id, "cantidad": 1}],
+                },
+            )
+            for i in range(rounds)
+        ]
+        responses = await asyncio.gather(*transfers, *entries)
+
+        status_codes = [r.status_code for r in responses]
+        assert all(code == 201 for code in status_codes), f"Expected all 201, got {status_codes}"
+
+        after = (await client.get(f"/api/v1/inventory/stock/{variante_id}")).json()
+        assert pytest.approx(_quantity(after, variante_id, origen_id), rel=1e-6) == origen_before
+        assert pytest.approx(_quantity(after, variante_id, destino_id), rel=1e-6) == destino_before + rounds
+
+        # Devolver el destino a su saldo previo y el origen a su saldo antes del ingreso inicial
+        restore = await client.post(
+            "/api/v1/inventory/adjustments",
+            json={
+                "descripcion": "Reversión concurrencia (pytest)",
+                "items": [
+                    {"variante_id": variante_id, "almacen_id": origen_id, "cantidad_nueva": origen_before - rounds},
+                    {"variante_id": variante_id, "almacen_id": destino_id, "cantidad_nueva": destino_before},
+                ],
+            },
+        )
+        assert restore.status_code == 201
+
+
+def test_only_concurrency_integrity_errors_are_retried(sqlite_engine):
+    def insert_error(**values) -> IntegrityError:
+        with Session(sqlite_engine) as db:
+            db.add(ProductoAlmacen(variante_producto_id=1, almacen_id=1,
+                                   fecha_actualizacion=datetime.now(), **values))
+            with pytest.raises(IntegrityError) as error:
+                db.commit()
+            return error.value
+
+    with Session(sqlite_engine) as db:
+        db.add(ProductoAlmacen(variante_producto_id=1, almacen_id=1, cantidad_disponible=5,
+                               fecha_actualizacion=datetime.now()))
+        db.commit()
+    # Alta concurrente del mismo par: se reintenta y se lee la fila del otro
+    assert _is_retryable(insert_error(cantidad_disponible=1))
+    # Violación real (NOT NULL): se propaga tal cual
+    assert not _is_retryable(insert_error(cantidad_disponible=None))
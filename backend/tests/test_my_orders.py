@@ -0,0 +1,106 @@
+"""Tests de "mis pedidos": unión usuario/cliente, total por ventana y cursor."""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import Session
+
+import app.models as models
+from app.schemas.sale import SaleItemCreateRequest, SaleOrderCreateRequest
+from app.services import sale_service
+from app.services.customer_service import invalidate_customer_link
+from app.services.sale_service import SaleService
+
+START = datetime(2025, 1, 1, 9, 0)
+
+
+@pytest.fixture
+def db(sqlite_engine):
+    session = Session(sqlite_engine, expire_on_commit=False)
+    now = datetime.now()
+    session.add_all([
+        models.Usuario(id=7, nombre_usuario="ana", correo="Ana@Example.com", hash_contrasena="x",
+                       activo=True, fecha_creacion=now, fecha_modificacion=now),
+        models.Cliente(id=1, nombre="Tienda", correo="tienda@example.com", fecha_registro=now),
+        # Cliente antiguo sin vínculo: se asocia por correo
+        models.Cliente(id=2, nombre="Ana", correo=" ana@example.COM", fecha_registro=now),
+        models.Cliente(id=3, nombre="Otro", correo="otro@example.com", fecha_registro=now),
+    ])
+    orders = [
+        (1, 7), (2, None), (2, 7), (3, None), (2, None), (1, 7), (3, 8), (2, None), (1, None),
+    ]
+    for index, (cliente_id, usuario_id) in enumerate(orders, start=1):
+        session.add(models.OrdenVenta(
+            id=index, cliente_id=cliente_id, usuario_id=usuario_id, estado="PENDIENTE",
+            # Dos órdenes con la misma fecha para ejercitar el desempate por id
+            fecha=START + timedelta(hours=min(index, 6)),
+        ))
+    session.commit()
+    invalidate_customer_link()
+    yield session
+    invalidate_customer_link()
+    session.close()
+
+
+def _ids(response) -> list[int]:
+    return [order.id for order in response.items]
+
+
+def test_lists_user_and_customer_orders_newest_first(db):
+    user = db.get(models.Usuario, 7)
+    response = SaleService(db).list_my_orders(user, page=1, page_size=50)
+    assert _ids(response) == [8, 6, 5, 3, 2, 1]
+    assert response.total == 6
+    # Lectura pura: el cliente encontrado por correo no se vincula
+    assert db.get(models.Cliente, 2).usuario_id is None
+
+
+def test_cursor_pages_cover_everything_once(db):
+    user = db.get(models.Usuario, 7)
+    service = SaleService(db)
+    seen, cursor = [], None
+    while True:
+        response = service.list_my_orders(user, page=1, page_size=4, cursor=cursor)
+        assert response.total == 6
+        seen += _ids(response)
+        cursor = response.next_cursor
+        if not cursor:
+            break
+    assert seen == [8, 6, 5, 3, 2, 1]
+
+
+def test_page_past_the_end_keeps_total(db):
+    user = db.get(models.Usuario, 7)
+    response = SaleService(db).list_my_orders(user, page=3, page_size=5)
+    assert response.items == []
+    assert response.total == 6
+
+
+def test_customer_link_is_invalidated_after_commit(db, monkeypatch):
+    db.add_all([
+        models.Producto(id=1, nombre="Taladro", fecha_creacion=START),
+        models.VarianteProducto(id=1, producto_id=1, nombre="500W", unidad_medida_id=1, precio=100,
+                                fecha_creacion=START),
+    ])
+    db.commit()
+    seen = []
+
+    def spy(user_id=None):
+        # Se invalida cuando la orden (y con ella el vínculo) ya está confirmada
+        seen.append((user_id, db.get(models.OrdenVenta, 10) is not None))
+
+    monkeypatch.setattr(sale_service, "invalidate_customer_link", spy)
+    SaleService(db).create_order(
+        SaleOrderCreateRequest(cliente_email="otro@example.com", cliente_nombre="Ana",
+                               items=[SaleItemCreateRequest(variante_producto_id=1, cantidad=1)]),
+        usuario_id=7,
+    )
+    assert db.get(models.Cliente, 2).usuario_id == 7
+    assert seen == [(7, True)]
+
+
+def test_bad_cursor_raises_value_error(db):
+    service = SaleService(db)
+    with pytest.raises(ValueError):
+        service.list_orders(customer_id=None, estado=None, page=1, page_size=10, cursor="no-es-un-cursor")
+    with pytest.raises(ValueError):
+        service.list_my_orders(db.get(models.Usuario, 7), page=1, page_size=10, cursor="no-es-un-cursor")
@@ -0,0 +1,27 @@
+"""Tests del codificador de cursores de paginación keyset."""
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app.repositories.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    values = [datetime(2025, 1, 15, 10, 30), Decimal("12.50"), 42, "abc"]
+    assert decode_cursor(encode_cursor(values)) == values
+
+
+@pytest.mark.parametrize("cursor", ["", "no-es-base64!", "eyJhIjoxfQ"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize("payload", [[{"dec": "abc"}], [{"dt": 5}], [{"d": None}], [{"dec": [1]}]])
+def test_tampered_cursor_values(payload):
+    cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+    with pytest.raises(ValueError, match="Cursor de paginación inválido"):
+        decode_cursor(cursor)
@@ -0,0 +1,43 @@
+"""Tests del formato de hash de contraseñas y del pool dedicado de bcrypt."""
+import asyncio
+import threading
+from hashlib import sha256
+
+import bcrypt
+import pytest
+
+from app.core.password_executor import PasswordExecutor, PasswordPoolSaturated
+from app.core.security import check_password, get_password_hash
+
+
+def test_legacy_hashes_are_flagged_for_rehash():
+    """Hashes sin marca (legacy o normalizados antiguos) validan y piden rehash."""
+    legacy = bcrypt.hashpw(b"secreto", bcrypt.gensalt()).decode()
+    unmarked = bcrypt.hashpw(sha256(b"secreto").digest(), bcrypt.gensalt()).decode()
+    for hashed in (legacy, unmarked):
+        check = check_password("secreto", hashed)
+        assert check.valid and check.needs_rehash
+        assert not check_password("otro", hashed).valid
+
+    current = get_password_hash("secreto")
+    assert check_password("secreto", current).needs_rehash is False
+    assert check_password("secreto", current).valid
+    assert not check_password("otro", current).valid
+
+
+@pytest.mark.asyncio
+async def test_pool_rejects_when_workers_and_queue_are_full():
+    pool = PasswordExecutor(workers=1, queue_limit=1)
+    release = threading.Event()
+    busy = [asyncio.ensure_future(pool.run(release.wait, 5)) for _ in range(2)]
+    await asyncio.sleep(0.05)
+    try:
+        assert (pool.running, pool.queued) == (1, 1)
+        with pytest.raises(PasswordPoolSaturated):
+            await pool.run(len, "x")
+    finally:
+        release.set()
+        await asyncio.gather(*busy)
+
+    assert await pool.run(len, "x") == 1
+    pool.shutdown()
@@ -0,0 +1,35 @@
+"""Tests de la caché de principals y los checks de autorización en memoria."""
+from app.core.dependencies import can_manage_sales, can_update_stock, get_user_roles, has_permission, has_role
+from app.core.principal import Principal, PrincipalCache, PrincipalRole
+
+
+def _principal(user_id: int, *roles: str, permissions: tuple[str, ...] = ()) -> Principal:
+    return Principal(
+        id=user_id,
+        nombre_usuario=f"user{user_id}",
+        correo=f"user{user_id}@example.com",
+        activo=True,
+        roles=tuple(PrincipalRole(id=i, nombre=nombre) for i, nombre in enumerate(roles, start=1)),
+        role_names=frozenset(nombre.upper() for nombre in roles),
+        permissions=frozenset(permissions),
+        version_seguridad=0,
+    )
+
+
+def test_role_checks_use_precomputed_sets():
+    principal = _principal(1, "Ventas", permissions=("VENTAS.CREAR",))
+    assert has_role(principal, " ventas ")
+    assert can_manage_sales(principal)
+    assert not can_update_stock(principal)
+    assert get_user_roles(principal) == ["VENTAS"]
+    assert has_permission(principal, "ventas.crear")
+    assert [rol.nombre for rol in principal.roles] == ["Ventas"]
+
+
+def test_invalidate_only_drops_the_given_user():
+    cache = PrincipalCache(maxsize=10, ttl=60, stamp_check_seconds=60)
+    cache._cache.set(cache._key(1), _principal(1, "ADMIN"))
+    cache._cache.set(cache._key(10), _principal(10, "ADMIN"))
+    cache.invalidate(1)
+    assert cache._cache.get(cache._key(1)) is None
+    assert cache._cache.get(cache._key(10)) is not None
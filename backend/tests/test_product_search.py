@@ -0,0 +1,86 @@
+"""Tests de la búsqueda de productos (plegado de acentos, prefijos, ranking e índice incremental)."""
+import importlib.util
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+import app.models as models
+from app.core.config import settings
+from app.schemas.product import ProductUpdateRequest
+from app.services.product_search_service import ProductSearchService, query_terms, reset_search_state
+from app.services.product_service import ProductService
+
+NOW = datetime(2025, 3, 1, 10, 0)
+MIGRATION = Path(__file__).resolve().parents[1] / "alembic" / "versions" / "020_add_product_search.py"
+
+
+@pytest.fixture
+def db(monkeypatch, sqlite_engine):
+    monkeypatch.setattr(settings, "product_search_backend", "memory")
+    reset_search_state()
+    with Session(sqlite_engine) as session:
+        session.add_all([
+            models.UnidadMedida(id=1, nombre="Unidad", fecha_creacion=NOW),
+            models.Producto(id=1, nombre="Tubería PVC", descripcion="Presión 10 bar", fecha_creacion=NOW),
+            models.Producto(id=2, nombre="Codo PVC", descripcion="Para tubería de desagüe", fecha_creacion=NOW),
+            models.Producto(id=3, nombre="Llave de paso", descripcion="Bronce", fecha_creacion=NOW),
+            models.VarianteProducto(id=1, producto_id=1, nombre='1/2"', unidad_medida_id=1, fecha_creacion=NOW),
+            models.VarianteProducto(id=2, producto_id=1, nombre='3/4"', unidad_medida_id=1, fecha_creacion=NOW),
+            models.VarianteProducto(id=3, producto_id=2, nombre="90°", unidad_medida_id=1, fecha_creacion=NOW),
+        ])
+        session.commit()
+        ProductSearchService(session).rebuild()
+        yield session
+    reset_search_state()
+
+
+def test_folding_prefix_and_name_ranking(db):
+    service = ProductSearchService(db)
+    assert query_terms("Tubería de PVC") == ["tuberia", "pvc"]
+    # Sin acentos y por prefijo; el nombre pesa más que la descripción
+    assert service.search_product_ids("tuberia") == [1, 2]
+    assert service.search_product_ids("TUB pvc") == [1, 2]
+    assert service.search_product_ids("bronce llave") == [3]
+    assert service.search_product_ids("pvc acero") == []
+    assert service.search_variant_ids('tuberia 3/4"') == [2]
+    documents = db.scalars(select(models.BusquedaProducto.texto).order_by(models.BusquedaProducto.id)).all()
+    assert documents[0] == "tuberia pvc 1 2 presion 10 bar"
+
+
+def test_update_reindexes_incrementally(db):
+    service = ProductSearchService(db)
+    assert service.search_product_ids("valvula") == []
+    ProductService(db).update_product(3, ProductUpdateRequest(nombre="Válvula esférica"))
+    assert service.search_product_ids("valvula") == [3]
+    assert service.search_product_ids("llave") == []
+
+
+def test_product_list_uses_relevance_order(db):
+    result = ProductService(db).list_products(
+        q="tubería", brand_id=None, category_id=None, status=None, page=1, page_size=1
+    )
+    assert [item.id for item in result.items] == [1]
+    assert result.total == 2 and result.next_cursor
+    second = ProductService(db).list_products(
+        q="tubería", brand_id=None, category_id=None, status=None, page=1, page_size=1,
+        cursor=result.next_cursor,
+    )
+    assert [item.id for item in second.items] == [2] and second.next_cursor is None
+
+
+def test_migration_backfill_folds_like_the_app(db):
+    spec = importlib.util.spec_from_file_location("migration_020", MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    columns = (models.BusquedaProducto.producto_id, models.BusquedaProducto.variante_id,
+               models.BusquedaProducto.nombre, models.BusquedaProducto.texto)
+    rebuilt = db.execute(select(*columns).order_by(*columns[:2])).all()
+
+    db.execute(delete(models.BusquedaProducto))
+    assert migration._backfill_documents(db.connection()) == 4
+    assert db.execute(select(*columns).order_by(*columns[:2])).all() == rebuilt
+    # Con documentos ya cargados no vuelve a insertar
+    assert migration._backfill_documents(db.connection()) == 0
@@ -0,0 +1,24 @@
+"""Tests del slug persistido de productos (colisiones con el sufijo por id)."""
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+import app.models as models
+from app.repositories.product_repo import ProductRepository
+
+NOW = datetime(2025, 3, 1, 10, 0)
+
+
+def test_slug_fallback_skips_taken_slugs(sqlite_engine):
+    with Session(sqlite_engine) as db:
+        db.add_all([
+            models.Producto(id=1, nombre="Codo", slug="codo", fecha_creacion=NOW),
+            # Otro producto cuyo nombre ya genera el slug de respaldo del siguiente id
+            models.Producto(id=2, nombre="Codo 3", slug="codo-3", fecha_creacion=NOW),
+        ])
+        db.commit()
+
+        repo = ProductRepository(db)
+        assert repo.create({"nombre": "Codo"}).slug == "codo-3-2"
+        assert repo.create({"nombre": "Codo"}).slug == "codo-4"
+        assert repo.get_by_slug("codo-3-2").id == 3
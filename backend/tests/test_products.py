@@ -68,3 +68,13 @@ def test_list_products_pagination():
     assert data["page"] == 1
     assert data["page_size"] == 5
     assert len(data["items"]) <= 5
+
+
+def test_list_products_status_filter():
+    """Test que el filtro de estado se aplica antes de paginar."""
+    response = client.get("/api/v1/products?status=INACTIVE&page=1&page_size=5")
+    assert response.status_code == 200
+    data = response.json()
+    assert all(item["status"] == "INACTIVE" for item in data["items"])
+    # El total corresponde al conteo filtrado, no al tamaño de la página
+    assert data["total"] >= len(data["items"])
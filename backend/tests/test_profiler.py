@@ -0,0 +1,118 @@
+"""Tests del profiler bajo demanda."""
+import asyncio
+import pstats
+
+import pytest
+
+import app.core.profiler as profiler
+from app.core.config import settings
+from app.core.profiler import ProfileSession, call_profiled, collapsed_stacks
+
+
+def _leaf(n: int) -> int:
+    return sum(i * i for i in range(n))
+
+
+def _handler() -> int:
+    return _leaf(20000) + _leaf(10000)
+
+
+def test_collapsed_stacks_follow_call_tree():
+    session = ProfileSession(id="20260101T000000-00000000", user_id=1)
+    assert call_profiled(session, _handler) == _handler()
+    lines = collapsed_stacks(pstats.Stats(session.profiles[0]))
+    assert lines
+    stacks = [line.rsplit(" ", 1)[0] for line in lines]
+    edge = f":_handler:{_handler.__code__.co_firstlineno};test_profiler:_leaf:{_leaf.__code__.co_firstlineno}"
+    assert any(stack.endswith(edge) for stack in stacks)
+    assert all(int(line.rsplit(" ", 1)[1]) >= 1 for line in lines)
+
+
+def test_profile_flag_ignored_without_admin_token(client):
+    r = client.get("/api/v1/health?_profile=1", headers={"X-Profile": "1"})
+    assert r.status_code == 200
+    assert "x-profile-id" not in r.headers
+
+
+def test_overlapping_profiled_requests_share_one_slot(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiler, "_admin_user_id", lambda token: 1)
+    monkeypatch.setattr(settings, "profile_spool_dir", str(tmp_path))
+    first_running = asyncio.Event()
+    release_first = asyncio.Event()
+
+    async def endpoint(first: bool) -> int:
+        if first:
+            first_running.set()
+            await release_first.wait()
+        return _handler()
+
+    async def app(scope, receive, send):
+        session = profiler.active_profile()
+        first = scope["path"] == "/first"
+        if session is not None:
+            await profiler.call_profiled_async(session, endpoint, first)
+        else:
+            await endpoint(first)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def request(path: str) -> dict:
+        headers = {}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                headers.update(message["headers"])
+
+        scope = {"type": "http", "method": "GET", "path": path, "query_string": b"_profile=1",
+                 "headers": [(b"authorization", b"Bearer token")]}
+        await profiler.ProfilerMiddleware(app)(scope, None, send)
+        return headers
+
+    async def scenario():
+        first = asyncio.create_task(request("/first"))
+        await first_running.wait()
+        second = await request("/second")  # sin slot libre: se sirve sin perfilar
+        release_first.set()
+        return await first, second
+
+    first, second = asyncio.run(scenario())
+    assert profiler.PROFILE_ID_HEADER in first
+    assert profiler.PROFILE_ID_HEADER not in second
+    assert len(list(tmp_path.glob("*.pstats"))) == 1
+    assert profiler._profiling.acquire(blocking=False)
+    profiler._profiling.release()
+
+
+@pytest.mark.parametrize(("query_string", "requested"), [
+    (b"_profile=1", True),
+    (b"page=2&_profile=1", True),
+    (b"x_profile=1", False),
+    (b"_profile=10", False),
+    (b"a=_profile=1", False),
+    (b"", False),
+])
+def test_profile_query_flag_matches_exactly(query_string, requested):
+    assert profiler._requested({"query_string": query_string, "headers": []}) is requested
+
+
+def test_no_profile_id_when_profiler_unavailable(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiler, "_admin_user_id", lambda token: 1)
+    monkeypatch.setattr(profiler, "_enable_profile", lambda session: None)  # slot ocupado por otra herramienta
+    monkeypatch.setattr(settings, "profile_spool_dir", str(tmp_path))
+
+    async def app(scope, receive, send):
+        await profiler.call_profiled_async(profiler.active_profile(), asyncio.sleep, 0)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    headers = {}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            headers.update(message["headers"])
+
+    scope = {"type": "http", "method": "GET", "path": "/", "query_string": b"_profile=1",
+             "headers": [(b"authorization", b"Bearer token")]}
+    asyncio.run(profiler.ProfilerMiddleware(app)(scope, None, send))
+    assert profiler.PROFILE_ID_HEADER not in headers
+    assert list(tmp_path.iterdir()) == []
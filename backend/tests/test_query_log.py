@@ -0,0 +1,55 @@
+"""Tests de la normalización de SQL, el top de sentencias por tiempo y el registro de lentas."""
+import json
+import time
+
+from sqlalchemy import create_engine, text
+
+from app.db.query_log import QueryLog, normalize_sql, parameters_shape, scrub_plan
+
+
+def test_normalize_sql_collapses_literals_and_in_lists():
+    sql = "SELECT id  FROM dbo.t1 WHERE id IN (?, ?, ?) AND nombre = N'O''Brien' AND stock > 10"
+    assert normalize_sql(sql) == "SELECT id FROM dbo.t1 WHERE id IN (?+) AND nombre = ? AND stock > ?"
+    assert normalize_sql("SELECT * FROM t WHERE a IN (?, ?)") == normalize_sql("SELECT * FROM t WHERE a IN (?, ?, ?, ?)")
+
+
+def test_parameters_shape_hides_values():
+    assert parameters_shape((1, "x", None), False) == ["int", "str", "NoneType"]
+    assert parameters_shape([{"id": 1}, {"id": 2}], True) == {"rows": 2, "row": {"id": "int"}}
+
+
+def test_top_groups_by_normalized_statement():
+    engine = create_engine("sqlite://")
+    log = QueryLog(threshold_ms=0, max_statements=10, log_path=None, max_bytes=0, backups=0, capture_plan=False)
+    log.install(engine)
+    with engine.connect() as conn:
+        for value in (1, 2, 3):
+            conn.execute(text(f"SELECT {value}"))
+        conn.execute(text("SELECT 'a', 'b'"))
+
+    top = log.top(5)
+    assert [(item.sql, item.calls) for item in top if item.sql == "SELECT ?"] == [("SELECT ?", 3)]
+    assert sum(item.calls for item in top) == 4
+    assert all(item.slow_calls == 0 for item in top)
+
+
+def test_writer_starts_on_demand_and_plans_hide_values(tmp_path):
+    log_path = tmp_path / "logs" / "slow.jsonl"
+    log = QueryLog(threshold_ms=0.000001, max_statements=10, log_path=str(log_path),
+                   max_bytes=1024 * 1024, backups=1, capture_plan=False)
+    engine = create_engine("sqlite://")
+    log.install(engine)
+    assert not log_path.parent.exists()  # nada se crea al instalar los eventos
+
+    stop = log.start_writer()
+    assert stop is not None and log.start_writer() is None
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline and not (log_path.exists() and log_path.read_text()):
+        time.sleep(0.01)
+    stop.set()
+    assert json.loads(log_path.read_text().splitlines()[0])["sql"] == "SELECT ?"
+
+    plan = '<ColumnReference Column="@p1" ParameterDataType="int" ParameterCompiledValue="(42)" />'
+    assert scrub_plan(plan) == '<ColumnReference Column="@p1" ParameterDataType="int" />'
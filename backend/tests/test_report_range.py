@@ -0,0 +1,19 @@
+"""Tests de la división de rangos de reportes entre acumulado diario y filas crudas."""
+from datetime import date, datetime, time
+
+from app.services.report_service import ReportRange
+
+
+def test_whole_days_use_rollup():
+    rng = ReportRange.split(datetime(2025, 1, 1), datetime.combine(date(2025, 1, 31), time.max))
+    assert (rng.first_day, rng.last_day) == (date(2025, 1, 1), date(2025, 1, 31))
+
+
+def test_partial_edges_are_excluded_from_rollup():
+    rng = ReportRange.split(datetime(2025, 1, 1, 15, 30), datetime(2025, 1, 31, 9, 0))
+    assert (rng.first_day, rng.last_day) == (date(2025, 1, 2), date(2025, 1, 30))
+
+
+def test_range_within_a_day_reads_raw_rows_only():
+    rng = ReportRange.split(datetime(2025, 1, 1, 8, 0), datetime(2025, 1, 1, 18, 0))
+    assert rng.first_day is None and rng.last_day is None
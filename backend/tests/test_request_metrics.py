@@ -0,0 +1,22 @@
+"""Tests de Server-Timing y métricas por ruta."""
+import re
+
+from app.core.metrics import metrics
+
+
+def test_server_timing_counts_queries_and_phases(client):
+    r = client.get("/api/v1/health")
+    assert r.status_code == 200
+    timing = r.headers["server-timing"]
+    assert re.search(r'db;dur=[\d.]+;desc="1 queries"', timing)
+    for phase in ("handler", "serialize", "total"):
+        assert f"{phase};dur=" in timing
+
+
+def test_route_histograms_use_route_template(client):
+    client.get("/api/v1/health")
+    routes = {
+        (labels["method"], labels["route"])
+        for labels, _ in metrics.histograms("http_request_latency_ms")
+    }
+    assert ("GET", "/api/v1/health") in routes
@@ -0,0 +1,43 @@
+"""Tests de la consulta de disponibilidad en lote para reservas."""
+import pytest
+from httpx import AsyncClient
+
+from app.main import app
+
+
+@pytest.mark.asyncio
+async def test_availability_batch_matches_single_checks():
+    """El lote devuelve, por variante, lo mismo que la consulta individual."""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        items = [
+            {"variante_producto_id": 1, "cantidad": 1},
+            {"variante_producto_id": 2, "cantidad": 3},
+            {"variante_producto_id": 1, "cantidad": 2},  # repetida: se suma
+        ]
+        response = await client.post("/api/v1/reservations/availability", json={"items": items})
+        assert response.status_code == 200
+        data = response.json()
+        assert [item["variante_producto_id"] for item in data["items"]] == [1, 2]
+        assert data["suficiente"] == all(item["suficiente"] for item in data["items"])
+
+        for item in data["items"]:
+            single = await client.get(
+                f"/api/v1/reservations/availability/{item['variante_producto_id']}",
+                params={"cantidad": item["solicitado"]},
+            )
+            assert single.status_code == 200
+            assert single.json() == item
+
+
+@pytest.mark.asyncio
+async def test_availability_batch_validation():
+    """Lista vacía o cantidades no positivas → 422."""
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post("/api/v1/reservations/availability", json={"items": []})
+        assert response.status_code == 422
+
+        response = await client.post(
+            "/api/v1/reservations/availability",
+            json={"items": [{"variante_producto_id": 1, "cantidad": 0}]},
+        )
+        assert response.status_code == 422
@@ -0,0 +1,67 @@
+"""Tests del refresco del acumulado diario (reintentos y días pendientes)."""
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import app.models as models
+from app.services.sales_rollup_service import SalesRollupService
+
+DAY = date(2025, 3, 1)
+
+
+@pytest.fixture
+def db(sqlite_engine):
+    with Session(sqlite_engine) as session:
+        session.add_all([
+            models.Producto(id=1, nombre="Taladro", fecha_creacion=datetime(2025, 1, 1)),
+            models.VarianteProducto(id=1, producto_id=1, nombre="500W", unidad_medida_id=1,
+                                    fecha_creacion=datetime(2025, 1, 1)),
+            models.Cliente(id=1, nombre="Constructora", fecha_registro=datetime(2025, 1, 1)),
+            models.OrdenVenta(id=1, cliente_id=1, estado="PAGADO", fecha=datetime(2025, 3, 1, 10, 0)),
+            models.ItemOrdenVenta(orden_venta_id=1, variante_producto_id=1, cantidad=2, precio_unitario=50),
+        ])
+        session.commit()
+        yield session
+
+
+def _pending(db) -> list[date]:
+    return list(db.scalars(select(models.ResumenDiaPendiente.fecha)))
+
+
+def test_failed_refresh_is_recorded_and_reconciled(db, monkeypatch):
+    calls = []
+
+    def failing(self, first, last):
+        calls.append((first, last))
+        raise RuntimeError("deadlock")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(SalesRollupService, "refresh_range", failing)
+        SalesRollupService(db).sync_days([DAY])
+    assert len(calls) == 3
+    assert _pending(db) == [DAY]
+    assert db.scalars(select(models.ResumenVentaDiaria.id)).all() == []
+
+    assert SalesRollupService(db).rebuild_pending() == 1
+    assert _pending(db) == []
+    # SQLite no convierte CAST(... AS DATE): se comprueban solo los importes
+    row = db.execute(select(models.ResumenVentaDiaria.importe, models.ResumenVentaDiaria.lineas)).one()
+    assert (float(row.importe), row.lineas) == (100.0, 1)
+    assert SalesRollupService(db).rebuild_pending() == 0
+
+
+def test_transient_failure_is_retried(db, monkeypatch):
+    original = SalesRollupService.refresh_range
+    failures = [RuntimeError("unique key race")]
+
+    def flaky(self, first, last):
+        if failures:
+            raise failures.pop()
+        original(self, first, last)
+
+    monkeypatch.setattr(SalesRollupService, "refresh_range", flaky)
+    SalesRollupService(db).sync_days([DAY])
+    assert _pending(db) == []
+    assert db.scalars(select(models.ResumenOrdenDiaria.ordenes)).all() == [1]
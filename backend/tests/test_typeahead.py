@@ -0,0 +1,108 @@
+"""Tests del autocompletado en memoria (popularidad, prefijos plegados y refresco incremental)."""
+from datetime import datetime
+
+import pytest
+from sqlalchemy.orm import Session
+
+import app.models as models
+import app.services.typeahead_service as typeahead
+from app.core.config import settings
+from app.schemas.product import ProductUpdateRequest
+from app.services.product_search_service import reset_search_state
+from app.services.product_service import ProductService
+from app.services.typeahead_service import TypeaheadIndex, TypeaheadService, catalog_entries, reset_typeahead
+
+NOW = datetime(2025, 3, 1, 10, 0)
+
+
+@pytest.fixture
+def db(monkeypatch, sqlite_engine):
+    monkeypatch.setattr(settings, "product_search_backend", "memory")
+    reset_search_state()
+    reset_typeahead()
+    with Session(sqlite_engine) as session:
+        session.add_all([
+            models.UnidadMedida(id=1, nombre="Unidad", fecha_creacion=NOW),
+            models.Marca(id=1, nombre="Tigre", fecha_creacion=NOW),
+            models.Producto(id=1, nombre="Tubería PVC", marca_id=1, fecha_creacion=NOW),
+            models.Producto(id=2, nombre="Codo PVC", marca_id=1, fecha_creacion=NOW),
+            models.Producto(id=3, nombre="Tubo de cobre", fecha_creacion=NOW),
+            models.VarianteProducto(id=1, producto_id=1, nombre='1/2"', unidad_medida_id=1, fecha_creacion=NOW),
+            models.VarianteProducto(id=2, producto_id=1, nombre='3/4"', unidad_medida_id=1, fecha_creacion=NOW),
+            models.VarianteProducto(id=3, producto_id=3, nombre="15 mm", unidad_medida_id=1, fecha_creacion=NOW),
+            models.Cliente(id=1, nombre="Cliente", fecha_registro=NOW),
+            # Dentro de la ventana de popularidad: el tubo de cobre es lo más vendido
+            models.OrdenVenta(id=1, cliente_id=1, fecha=datetime.now(), estado="PAGADO"),
+            models.ItemOrdenVenta(orden_venta_id=1, variante_producto_id=3, cantidad=5),
+            models.ItemOrdenVenta(orden_venta_id=1, variante_producto_id=2, cantidad=2),
+        ])
+        session.commit()
+        yield session
+    reset_typeahead()
+    reset_search_state()
+
+
+def _ids(suggestions):
+    return [(item.tipo, item.id) for item in suggestions]
+
+
+def test_prefix_ranked_by_sales(db):
+    service = TypeaheadService(db)
+    # "tub" pliega acentos y ordena por unidades vendidas (producto = suma de variantes)
+    assert _ids(service.suggest("TUB", limit=3)) == [("producto", 3), ("variante", 3), ("producto", 1)]
+    assert _ids(service.suggest("tuberia 3/4", limit=5)) == [("variante", 2)]
+    assert _ids(service.suggest("pvc tig", limit=5)) == []
+    assert _ids(service.suggest("tig", limit=5)) == [("marca", 1)]
+    variant = service.suggest("cobre", limit=1, tipos=["variante"])[0]
+    assert (variant.texto, variant.producto_id) == ("Tubo de cobre 15 mm", 3)
+
+
+def test_update_refreshes_index_in_place(db):
+    service = TypeaheadService(db)
+    assert _ids(service.suggest("codo", limit=5)) == [("producto", 2)]
+    ProductService(db).update_product(2, ProductUpdateRequest(nombre="Codo roscado"))
+    assert _ids(service.suggest("roscado", limit=5)) == [("producto", 2)]
+    assert service.suggest("codo pvc", limit=5) == []
+
+    db.get(models.Marca, 1).nombre = "Tigre Plast"
+    db.commit()
+    service.refresh_brands([1])
+    assert _ids(service.suggest("plast", limit=5)) == [("marca", 1)]
+
+
+def test_multi_word_bitmaps_match_text_check(monkeypatch):
+    rows = [
+        type("Row", (), dict(producto_id=i, producto_nombre=f"{a} {b} {i}", slug=f"p-{i}", marca_id=None,
+                             variante_id=None, variante_nombre=None))
+        for i, (a, b) in enumerate(
+            [("codo", "pvc"), ("tubo", "pvc"), ("codo", "cobre"), ("tubo", "cobre"), ("codo", "pvc")], start=1
+        )
+    ]
+    entries, slugs = catalog_entries(rows)
+    by_text = TypeaheadIndex()
+    by_text.load(entries, slugs)
+    monkeypatch.setattr(typeahead, "_BITMAP_MIN_POSTINGS", 1)
+    by_bitmap = TypeaheadIndex()
+    by_bitmap.load(entries, slugs)
+    for q in ("codo pvc", "c p", "tubo cob", "pvc cobre"):
+        assert _ids(by_bitmap.suggest(q, 10)) == _ids(by_text.suggest(q, 10))
+    assert _ids(by_bitmap.suggest("codo pvc", 10)) == [("producto", 1), ("producto", 5)]
+    by_bitmap.replace_products([1], [], {})
+    assert _ids(by_bitmap.suggest("codo pvc", 10)) == [("producto", 5)]
+
+
+def test_edit_during_rebuild_is_not_lost(db, monkeypatch):
+    service = TypeaheadService(db)
+    service.rebuild()
+    load = TypeaheadIndex.load
+
+    def load_after_edit(index, ranked, slugs):
+        # La edición se confirma y se aplica con la foto del catálogo ya leída
+        ProductService(db).update_product(2, ProductUpdateRequest(nombre="Codo roscado"))
+        return load(index, ranked, slugs)
+
+    monkeypatch.setattr(TypeaheadIndex, "load", load_after_edit)
+    service.rebuild()
+    monkeypatch.setattr(TypeaheadIndex, "load", load)
+    assert _ids(service.suggest("roscado", limit=5)) == [("producto", 2)]
+    assert service.suggest("codo pvc", limit=5) == []
@@ -106,6 +106,31 @@ export const reservationsService = {
     return response
   },
 
+  async checkAvailabilityBatch(items: Array<{ variante_producto_id: number; cantidad: number }>): Promise<{
+    items: Array<{
+      variante_producto_id: number
+      stock_total: number
+      reservado: number
+      disponible: number
+      solicitado: number
+      suficiente: boolean
+    }>
+    suficiente: boolean
+  }> {
+    const response = await api.post<{
+      items: Array<{
+        variante_producto_id: number
+        stock_total: number
+        reservado: number
+        disponible: number
+        solicitado: number
+        suficiente: boolean
+      }>
+      suficiente: boolean
+    }>("/reservations/availability", { items })
+    return response
+  },
+
   async createReservation(data: {
     cliente_id?: number
     items: Array<{